@@ -28,5 +28,6 @@ st.markdown('''Please find the system requirements below to run PCB Thermal Anal
 * Python 3.10 must be installed on the machine running the simulation.
 ''')
 
-st.warning('⚠️ Do not refresh the app (browser tab) during a run session. The session state will be reset and all '
-           'progress will be lost!')
+st.warning('⚠️ Refreshing the app (browser tab) resets the session state and the file selections. Simulations run '
+           'in a background worker and keep running; reattach to them from the Simulation Jobs panel of the '
+           'Simulate page.')
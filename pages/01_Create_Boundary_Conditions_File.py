@@ -5,7 +5,11 @@ import streamlit as st
 import tkinter as tk
 from tkinter import filedialog
 from ctypes import windll
-from st_aggrid import GridOptionsBuilder, AgGrid, GridUpdateMode, DataReturnMode
+from utils.materials import material_names
+from utils.bc_editor import BcTableEditor, PAGE_SIZES, ROW_COLUMN
+from utils.bc_rules import apply_rules, save_rules, load_rules, rules_to_table, table_to_rules, RULES_FILE_EXTENSION
+from utils.power_map import read_power_map, guess_columns, join_power_map, report_messages, KEY_COLUMNS, \
+    VALUE_COLUMNS
 
 st.set_page_config(layout="centered", page_icon="🌡️", page_title="PCB Thermal Analyzer")
 st.title('📝Create Boundary Conditions File')
@@ -19,8 +23,14 @@ if 'idf' not in st.session_state:
 if 'idf_file' not in st.session_state:
     st.session_state['idf_file'] = False
 
-if 'dataframe' not in st.session_state:
-    st.session_state['dataframe'] = False
+if 'bc_editor' not in st.session_state:
+    st.session_state['bc_editor'] = False
+
+if 'bc_rules' not in st.session_state:
+    st.session_state['bc_rules'] = False
+
+if 'power_map_file' not in st.session_state:
+    st.session_state['power_map_file'] = False
 
 if 'generate_bc_csv' not in st.session_state:
     st.session_state['generate_bc_csv'] = False
@@ -34,9 +44,6 @@ if 'matcsv' not in st.session_state:
 if 'mat_csvfile' not in st.session_state:
     st.session_state['mat_csvfile'] = False
 
-if 'mat_dataframe' not in st.session_state:
-    st.session_state['mat_dataframe'] = False
-
 if 'workdir' not in st.session_state:
     st.session_state['workdir'] = False
 
@@ -236,14 +243,105 @@ if st.session_state['idf_file']:
         st.write('👍 Boundary Conditions CSV File Generated.')
 
 if st.session_state['idf_csv_file']:
-    st.info('ℹ️ To export the table as CSV, right click on any cell in table, then Export -> CSV Export.')
-    st.session_state['dataframe'] = pd.read_csv(st.session_state['idf_csv_file'])
+    # The grid component is loaded once there is a table to show
+    from st_aggrid import GridOptionsBuilder, AgGrid, GridUpdateMode, DataReturnMode
+    # The table is kept in memory and only the rows of one page go to the grid
+    if not st.session_state['bc_editor'] or st.session_state['bc_editor'].bc_file != \
+            os.path.abspath(st.session_state['idf_csv_file']) or st.session_state['bc_editor'].is_stale():
+        st.session_state['bc_editor'] = BcTableEditor(st.session_state['idf_csv_file'])
+    bc_editor = st.session_state['bc_editor']
+
+    # Ordered rules set columns of many rows at once
+    with st.expander('Bulk Assignment Rules'):
+        st.write('Rules are applied in order; where rules overlap, the later rule wins. Blank cells match any '
+                 'component or leave the column unchanged. Refdes is a regular expression (e.g. U\\d+), the other '
+                 'names take wildcards (e.g. BGA*).')
+        rule_files = sorted(i for i in os.listdir(os.getcwd()) if i.endswith(RULES_FILE_EXTENSION))
+        c8, c9 = st.columns([3, 1])
+        rules_file = c8.selectbox('Rule set:', ['New'] + rule_files)
+        if c9.button('Load Rule Set') or st.session_state['bc_rules'] is False:
+            st.session_state['bc_rules'] = rules_to_table(load_rules(rules_file) if rules_file != 'New' else [])
+        rules_df = st.data_editor(st.session_state['bc_rules'], num_rows='dynamic', use_container_width=True)
+        rules = table_to_rules(rules_df)
+        c10, c11, c12 = st.columns([2, 1, 1])
+        rules_name = c10.text_input('Rule set name:', value=rules_file[:-len(RULES_FILE_EXTENSION)]
+                                    if rules_file != 'New' else '')
+        if c11.button('Save Rule Set'):
+            if rules_name:
+                save_rules(rules_name + RULES_FILE_EXTENSION, rules)
+                st.success(f'Rule set saved as {rules_name + RULES_FILE_EXTENSION}', icon="✅")
+            else:
+                st.warning('⚠️ Enter a rule set name!')
+        if c12.button('Apply Rules'):
+            try:
+                new_df, matched, changed = apply_rules(bc_editor.df, rules)
+            except ValueError as e:
+                st.exception(RuntimeError('The rules have errors:\n' + str(e)))
+            else:
+                bc_editor.replace(new_df, changed)
+                st.success(f'{len(rules)} rule(s) applied, {changed} cell(s) changed.', icon="✅")
+                st.dataframe(pd.DataFrame({'Rule': [i['name'] for i in rules], 'Matched rows': matched}))
+
+    # Power and resistances from an external power map, joined by reference designator or part number
+    with st.expander('Import Power Map'):
+        c13, c14 = st.columns([3, 1])
+        c13.write('Select power map (*.csv, *.xlsx) keyed by reference designator or part number:')
+        if c14.button('Select Power Map'):
+            root3 = tk.Tk()
+            root3.attributes("-topmost", True)
+            root3.withdraw()
+            try:
+                files = filedialog.askopenfilenames(parent=root3, initialdir=os.getcwd(),
+                                                    filetypes=[('Power Map', '*.csv *.xlsx')])
+                st.session_state['power_map_file'] = os.path.abspath(files[0])
+            except (RuntimeWarning, IndexError):
+                pass
+        if st.session_state['power_map_file']:
+            st.markdown(f'''📝 ```{st.session_state['power_map_file']}```''')
+            # Read again whenever the file changes, so a new revision is imported with the same settings
+            map_df = read_power_map(st.session_state['power_map_file'])
+            guessed = guess_columns(map_df)
+            map_columns = list(map_df.columns)
+            c15, c16 = st.columns(2)
+            bc_key = c15.selectbox('Match BC column:', KEY_COLUMNS)
+            map_key = c16.selectbox('With power map column:', map_columns,
+                                    index=map_columns.index(guessed[bc_key]) if bc_key in guessed else 0)
+            map_value_columns = {}
+            map_scale = {}
+            for bc_col in VALUE_COLUMNS:
+                c17, c18 = st.columns([2, 1])
+                options = ['None'] + map_columns
+                map_col = c17.selectbox(f'{bc_col} from:', options,
+                                        index=options.index(guessed[bc_col]) if bc_col in guessed else 0)
+                map_scale[bc_col] = c18.number_input(f'{bc_col} scaling factor', value=1.0, format='%g')
+                if map_col != 'None':
+                    map_value_columns[bc_col] = map_col
+            if st.button('Import Power Map'):
+                if map_value_columns:
+                    new_df, report = join_power_map(bc_editor.df, map_df, bc_key, map_key, map_value_columns,
+                                                    map_scale)
+                    bc_editor.replace(new_df, report['changed'])
+                    st.success(f'''{report['matched_rows']} BC row(s) matched, {report['changed']} cell(s) '''
+                               f'''changed.''', icon="✅")
+                    for message in report_messages(report):
+                        st.warning('⚠️ ' + message)
+                else:
+                    st.warning('⚠️ Select at least one power map column to import!')
+
     include_dropdownlist = ('YES', 'NO')
     bc_dropdownlist = ('block', 'network', 'hollow')
 
-    gb = GridOptionsBuilder.from_dataframe(st.session_state['dataframe'])
+    c3, c4, c5 = st.columns([2, 1, 1])
+    search = c3.text_input('Search instance, part, package or type:')
+    page_size = c4.selectbox('Rows per page:', PAGE_SIZES)
+    num_pages = bc_editor.page(1, page_size, search)[1]
+    page_number = int(c5.number_input(f'Page (of {num_pages}):', min_value=1, max_value=num_pages, value=1, step=1))
+    page_df = bc_editor.page(page_number, page_size, search)[0]
+
+    gb = GridOptionsBuilder.from_dataframe(page_df)
     gb.configure_default_column(editable=True)
     # gb.configure_grid_options(domLayout='normal')
+    gb.configure_column(ROW_COLUMN, hide=True, editable=False)
     gb.configure_column('Include', editable=True, cellEditor='agSelectCellEditor',
                         cellEditorParams={'values': include_dropdownlist}, singleClickEdit=True)
     gb.configure_column('Package_Name', editable=False)
@@ -261,21 +359,39 @@ if st.session_state['idf_csv_file']:
     gb.configure_column('Monitor_Point', editable=True, cellEditor='agSelectCellEditor',
                         cellEditorParams={'values': include_dropdownlist}, singleClickEdit=True)
     if st.session_state['mat_csvfile']:
-        st.session_state['mat_dataframe'] = pd.read_csv(st.session_state['mat_csvfile'])
-        mat_dropdownlist = tuple(st.session_state['mat_dataframe'].iloc[:, 0])
+        # The library is parsed once per file version, not on every rerun
+        mat_dropdownlist = material_names(st.session_state['mat_csvfile'])
         gb.configure_column('Material', editable=True, cellEditor='agSelectCellEditor',
                             cellEditorParams={'values': mat_dropdownlist}, singleClickEdit=True)
     grid_options = gb.build()
     grid_height = 400
+    # Only cell value changes rerun the page; sorting and filtering stay in the browser
     grid_response = AgGrid(
-        st.session_state['dataframe'],
+        page_df,
         gridOptions=grid_options,
         height=grid_height,
         width='100%',
-        data_return_mode=DataReturnMode.FILTERED_AND_SORTED,
-        update_mode=GridUpdateMode.GRID_CHANGED
+        data_return_mode=DataReturnMode.AS_INPUT,
+        update_mode=GridUpdateMode.VALUE_CHANGED,
+        key=f'bc_grid_{bc_editor.revision}_{page_number}_{page_size}_{search}'
     )
 
-    df = grid_response['data']
-    selected = grid_response['selected_rows']
-    selected_df = pd.DataFrame(selected).apply(pd.to_numeric, errors='coerce')
+    changed, rejected = bc_editor.apply_changes(grid_response['data'])
+    for message in rejected:
+        st.warning('⚠️ ' + message)
+    bc_editor.flush()
+
+    c6, c7 = st.columns([3, 1])
+    if c7.button('Save Table'):
+        bc_editor.flush(force=True)
+    if bc_editor.pending:
+        c6.warning(f'⚠️ {bc_editor.pending} edit(s) not saved to the CSV file yet.')
+    else:
+        c6.markdown(f'''💾 ```{bc_editor.bc_file}``` is up to date.''')
+    # The table is only turned into CSV text on request, not on every edit
+    c8, c9 = st.columns([3, 1])
+    if c9.button('Prepare Download'):
+        bc_editor.to_csv()
+    if bc_editor.csv_ready():
+        c8.download_button('Download Boundary Conditions CSV', bc_editor.to_csv(),
+                           file_name=os.path.basename(bc_editor.bc_file), mime='text/csv')
@@ -1,248 +1,43 @@
 import os
 import re
-import csv
-import shutil
-import pyaedt
+import json
+import time
 import signal
+import getpass
 import numpy as np
 import pandas as pd
-from ctypes import windll
+import importlib.util
 import streamlit as st
-import tkinter as tk
-from tkinter import filedialog as fd
+from utils.jobs import list_jobs, get_job_status, read_progress, final_monitors
+from utils.benchmark import solve_record, compare_solves
+from utils.bc_schema import load_bc_table
+from utils.distributed import sweep_jobs, submit_batch, batch_status, list_batches, collect_results, \
+    launch_workers, validate_hosts
+from utils.scheduler import submit_job, cancel_job, dispatch, list_queue, get_capacity, set_capacity, PRIORITIES
+from utils.influence import influence_file, load_influence, evaluate, group_powers_from_bc, accuracy_check, \
+    validity_messages, GROUP_COLUMNS, NOMINAL_CASE
+from utils.lumping import DEFAULT_LUMPING
+from utils.board_model import BOARD_MODELS, DEFAULT_TILE_SIZE
+from utils.uploads import store_stream, list_uploads, materialize, idf_pair, ECAD_UPLOAD_TYPES, IDF_UPLOAD_EXTENSIONS
 
 st.set_page_config(layout="centered", page_icon="🌡️", page_title="PCB Thermal Analyzer")
 st.title('🖥️Simulate')
 
+# Fix blur issue in tkinter window panels
+try:
+    from ctypes import windll
+    windll.shcore.SetProcessDpiAwareness(1)
+except ImportError:
+    # Not on Windows, e.g. a headless server; inputs are uploaded
+    pass
 
-# Function definitions
-
-# Function to create a forced convection problem setup with default entries
-def forced_convection_setup(setup_name, flow_regime, turb_model='ZeroEquation'):
-    """ Default settings for forced convection problem
-        Parameters
-        ----------
-        setup_name: str
-            Name of setup. Use only alphanumeric characters (letter, numbers and underscores)
-        flow_regime: str
-            Laminar or Turbulent
-        turb_model: str, optional
-            default = 'ZeroEquation'
-            'TwoEquation' uses 'Enhanced Realizable k-epsilon' turbulence model
-    """
-    setup = ipk.create_setup(setup_name)
-    setup.props['Enabled'] = True
-    flow_regime = flow_regime.casefold()
-    turb_model = turb_model.casefold()
-    if flow_regime == 'laminar':
-        setup.props['Flow Regime'] = 'Laminar'
-    else:
-        setup.props['Flow Regime'] = 'Turbulent'
-        if turb_model == 'zeroequation':
-            setup.props['Turbulent Model Eqn'] = 'ZeroEquation'
-        else:
-            setup.props['Turbulent Model Eqn'] = 'EnhancedRealizableTwoEquation'
-    setup.props['Include Temperature'] = True
-    setup.props['Include Flow'] = True
-    setup.props['Include Gravity'] = False
-    setup.props['Include Solar'] = False
-    setup.props['Solution Initialization - X Velocity'] = "0m_per_sec"
-    setup.props['Solution Initialization - Y Velocity'] = "0m_per_sec"
-    setup.props['Solution Initialization - Z Velocity'] = "0m_per_sec"
-    setup.props['Solution Initialization - Use Model Based Flow Initialization'] = False
-    setup.props['Convergence Criteria - Flow'] = '1e-4'
-    setup.props['Convergence Criteria - Energy'] = '1e-10'
-    setup.props['IsEnabled'] = False
-    setup.props['Radiation Model'] = 'Off'
-    setup.props['Under-relaxation - Pressure'] = '0.3'
-    setup.props['Under-relaxation - Momentum'] = '0.7'
-    setup.props['Under-relaxation - Temperature'] = '1'
-    setup.props['Discretization Scheme - Pressure'] = 'Standard'
-    setup.props['Discretization Scheme - Momentum'] = 'First'
-    setup.props['Discretization Scheme - Temperature'] = 'First'
-    setup.props['Secondary Gradient'] = False
-    setup.props['Sequential Solve of Flow and Energy Equations'] = True
-    setup.props['Convergence Criteria - Max Iterations'] = 300
-    setup.update()
-
-
-# Function to create a natural convection problem setup with default entries
-def natural_convection_setup(setup_name, gravity_dir, flow_regime, turb_model='ZeroEquation', ambient_temp=20):
-    """ Default settings for natural convection problem
-        Parameters
-        ----------
-        setup_name: str
-            Name of setup. Use only alphanumeric characters (letter, numbers and underscores)
-        gravity_dir: str
-            Direction of gravity: -x, +x, -y, +y, -z, +z
-        flow_regime: str
-            Laminar or Turbulent
-        turb_model: str, optional
-            default = 'ZeroEquation'
-            'TwoEquation' uses 'Enhanced Realizable k-epsilon' turbulence model
-        ambient_temp: float, optional
-            default = 20
-    """
-    setup = ipk.create_setup(setup_name)
-    setup.props['Enabled'] = True
-    flow_regime = flow_regime.casefold()
-    turb_model = turb_model.casefold()
-    if flow_regime == 'laminar':
-        setup.props['Flow Regime'] = 'Laminar'
-    else:
-        setup.props['Flow Regime'] = 'Turbulent'
-        if turb_model == 'zeroequation':
-            setup.props['Turbulent Model Eqn'] = 'ZeroEquation'
-        else:
-            setup.props['Turbulent Model Eqn'] = 'EnhancedRealizableTwoEquation'
-    setup.props['Include Temperature'] = True
-    setup.props['Include Flow'] = True
-    setup.props['Include Gravity'] = True
-    setup.props['Include Solar'] = False
-    setup.props['Solution Initialization - X Velocity'] = "0m_per_sec"
-    setup.props['Solution Initialization - Y Velocity'] = "0m_per_sec"
-    setup.props['Solution Initialization - Z Velocity'] = "0m_per_sec"
-    gravity_dir = gravity_dir.casefold()
-    ambient_temp = str(ambient_temp) + 'cel'
-    if gravity_dir == "-x":
-        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=0)
-        ipk.modeler.edit_region_dimensions([250, 50, 50, 50, 200, 200])
-        setup.props['Solution Initialization - X Velocity'] = "0.00098m_per_sec"
-    elif gravity_dir == "-y":
-        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=1)
-        ipk.modeler.edit_region_dimensions([50, 50, 250, 50, 200, 200])
-        setup.props['Solution Initialization - Y Velocity'] = "0.00098m_per_sec"
-    elif gravity_dir == "-z":
-        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=2)
-        ipk.modeler.edit_region_dimensions([50, 50, 50, 50, 250, 50])
-        setup.props['Solution Initialization - Z Velocity'] = "0.00098m_per_sec"
-    elif gravity_dir == "+x":
-        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=3)
-        ipk.modeler.edit_region_dimensions([50, 250, 50, 50, 200, 200])
-        setup.props['Solution Initialization - X Velocity'] = "-0.00098m_per_sec"
-    elif gravity_dir == "+y":
-        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=4)
-        ipk.modeler.edit_region_dimensions([50, 50, 50, 250, 200, 200])
-        setup.props['Solution Initialization - Y Velocity'] = "-0.00098m_per_sec"
-    else:
-        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=5)
-        ipk.modeler.edit_region_dimensions([50, 50, 50, 50, 50, 250])
-        setup.props['Solution Initialization - Z Velocity'] = "-0.00098m_per_sec"
-    setup.props['Solution Initialization - Use Model Based Flow Initialization'] = False
-    setup.props['Convergence Criteria - Flow'] = '1e-4'
-    setup.props['Convergence Criteria - Energy'] = '1e-10'
-    setup.props['IsEnabled'] = True
-    setup.props['Radiation Model'] = 'Discrete Ordinates Model'
-    setup.props['Flow Iteration Per Radiation Iteration'] = '10'
-    setup.props['ThetaDivision'] = 2
-    setup.props['PhiDivision'] = 2
-    setup.props['ThetaPixels'] = 2
-    setup.props['PhiPixels'] = 2
-    setup.props['Convergence Criteria - Discrete Ordinates'] = '1e-6'
-    setup.props['Under-relaxation - Pressure'] = '0.7'
-    setup.props['Under-relaxation - Momentum'] = '0.3'
-    setup.props['Under-relaxation - Temperature'] = '1'
-    setup.props['Discretization Scheme - Pressure'] = 'Standard'
-    setup.props['Discretization Scheme - Momentum'] = 'First'
-    setup.props['Discretization Scheme - Temperature'] = 'First'
-    setup.props['Discretization Scheme - Discrete Ordinates'] = 'First'
-    setup.props['Secondary Gradient'] = False
-    setup.props['Linear Solver Type - Pressure'] = 'V'
-    setup.props['Linear Solver Type - Momentum'] = 'flex'
-    setup.props['Linear Solver Type - Temperature'] = 'F'
-    setup.props['Sequential Solve of Flow and Energy Equations'] = False
-    setup.props['Convergence Criteria - Max Iterations'] = 500
-    setup.update()
-
-
-# Function to create opening boundary condition
-def assign_opening_boundary(name, face_id, flow_type,
-                            xvel="0m_per_sec", yvel="0m_per_sec", zvel="0m_per_sec",
-                            pressure="AmbientPressure", temperature="AmbientTemp"):
-    """ Function to create opening boundary condition
-        Parameters
-        ----------
-        name: str
-            name of opening boundary condition, e.g., inlet/outlet
-        face_id: int
-            face ID of opening
-        flow_type: str
-            velocity or pressure
-        xvel: str, optional
-            velocity in x-direction
-        yvel: str, optional
-            velocity in y-direction
-        zvel: str, optional
-            velocity in z-direction
-        pressure: str, optional
-            pressure at opening boundary
-        temperature: str, optional
-            temperature at opening boundary
-    """
-    props = {"Faces": [face_id]}
-    if flow_type == 'velocity':
-        props['Inlet Type'] = "Velocity"
-        props['Static Pressure'] = pressure
-        props['X Velocity'] = xvel
-        props['Y Velocity'] = yvel
-        props['Z Velocity'] = zvel
-        props['Temperature'] = temperature
-    else:
-        props['Inlet Type'] = "Pressure"
-        props['Total Pressure'] = pressure
-        props['Temperature'] = temperature
-    bound = pyaedt.modules.Boundary.BoundaryObject(ipk, name, props, 'Opening')
-    if bound.create():
-        ipk.boundaries.append(bound)
-        return bound
-
-
-# Function to add slack
-def add_slack(box_name, minx, maxx, miny, maxy, minz, maxz):
-    obj_ref = ipk.modeler.get_object_from_name(box_name)
-    obj_ref.bottom_face_x.move_with_offset(minx)
-    obj_ref.bottom_face_y.move_with_offset(miny)
-    obj_ref.bottom_face_z.move_with_offset(minz)
-    obj_ref.top_face_x.move_with_offset(maxx)
-    obj_ref.top_face_y.move_with_offset(maxy)
-    obj_ref.top_face_z.move_with_offset(maxz)
-    return None
-
-
-# Function to remove aedt files and project folders
-def cleanup_files(proj_name):
-    proj_path = os.path.join(os.getcwd(), proj_name)
-    proj_name_no_ext = os.path.splitext(proj_name)[0]
-    if os.path.exists(proj_path):
-        os.remove(proj_path)
-    if os.path.exists(os.path.join(os.getcwd(), proj_name + ".lock")):
-        os.remove(os.path.join(os.getcwd(), proj_name + ".lock"))
-    # Delete aedt results folder
-    if os.path.exists(os.path.join(os.getcwd(), proj_name_no_ext + ".aedtresults")):
-        try:
-            shutil.rmtree(os.path.join(os.getcwd(), proj_name_no_ext + ".aedtresults"))
-        except RuntimeError:
-            print('Error deleting aedtresults directory')
-    # Delete pyaedt folder
-    if os.path.exists(os.path.join(os.getcwd(), proj_name_no_ext + ".pyaedt")):
-        try:
-            shutil.rmtree(os.path.join(os.getcwd(), proj_name_no_ext + ".pyaedt"))
-        except RuntimeError:
-            print('Error deleting pyaedt directory')
-
-
-def quit_aedt():
-    ipk.save_project()
-    pid = desktop.aedt_process_id
-    os.kill(pid, signal.SIGTERM)
-    file_list = os.listdir(os.getcwd())
-    for item in file_list:
-        if item.endswith('.lock'):
-            os.remove(item)
 
+# Function to store an uploaded file once per upload, not on every rerun
+def store_upload(uploaded_file):
+    if uploaded_file.id not in st.session_state['stored_uploads']:
+        st.session_state['stored_uploads'][uploaded_file.id] = store_stream(uploaded_file.name, uploaded_file)
+    return uploaded_file.name, st.session_state['stored_uploads'][uploaded_file.id]
 
-# Fix blur issue in tkinter window panels
-windll.shcore.SetProcessDpiAwareness(1)
 
 if 'idf' not in st.session_state:
     st.session_state['idf'] = False
@@ -269,111 +64,171 @@ if 'workdir' not in st.session_state:
     st.session_state['workdir'] = False
 if 'pid' not in st.session_state:
     st.session_state['pid'] = False
+if 'shared_dir' not in st.session_state:
+    st.session_state['shared_dir'] = False
+if 'stored_uploads' not in st.session_state:
+    st.session_state['stored_uploads'] = {}
+
+# File dialogs need tkinter and a desktop on the machine running the app; servers without them only offer uploads
+input_sources = ('File Dialogs', 'Upload') if importlib.util.find_spec('tkinter') else ('Upload',)
+input_source = st.radio('Select input files with:', input_sources, horizontal=True,
+                        help='File dialogs open on the desktop of the machine running the app. Uploads work from '
+                             'any browser; files uploaded before are reused without storing them again.')
+if input_source == 'File Dialogs':
+    import tkinter as tk
+    from tkinter import filedialog as fd
+
+    # Get working directory from Windows Explorer dialog box
+    c1, c2 = st.columns([3, 1])
+    c1.write('Select working directory:')
+    workdir_button = c2.button('Select Folder')
+    if workdir_button:
+        st.session_state['workdir'] = True
+        root0 = tk.Tk()
+        root0.attributes("-topmost", True)
+        root0.withdraw()
+        try:
+            workdir = fd.askdirectory(parent=root0, initialdir=os.getcwd(), title='Select Folder')
+            st.session_state['workdir'] = workdir
+        except RuntimeWarning:
+            pass
 
-# Get working directory from Windows Explorer dialog box
-c1, c2 = st.columns([3, 1])
-c1.write('Select working directory:')
-workdir_button = c2.button('Select Folder')
-if workdir_button:
-    st.session_state['workdir'] = True
-    root0 = tk.Tk()
-    root0.attributes("-topmost", True)
-    root0.withdraw()
-    try:
-        workdir = fd.askdirectory(parent=root0, initialdir=os.getcwd(), title='Select Folder')
-        st.session_state['workdir'] = workdir
-    except RuntimeWarning:
-        pass
+    # Read IDF board file from Windows Explorer dialog box
+    col01, col02, col03 = st.columns([2, 1, 1])
+    col01.write('Select IDF Board file type:')
+    st.session_state['idf_type'] = col02.selectbox('Select IDF Board file type:', ('*.emn', '*.bdf'),
+                                                   label_visibility='collapsed')
+    idf_button = col03.button('Select Board File')
+    if idf_button:
+        st.session_state['idf'] = True
+        root1 = tk.Tk()
+        root1.attributes("-topmost", True)
+        root1.withdraw()
+        try:
+            if st.session_state['idf_type'] == '*.emn':
+                files = fd.askopenfilenames(parent=root1, initialdir=os.getcwd(), filetypes=[('EMN File', '*.emn')])
+                idf_file = os.path.basename(files[0])
+                st.session_state['idf_file'] = idf_file
+            if st.session_state['idf_type'] == '*.bdf':
+                files = fd.askopenfilenames(parent=root1, initialdir=os.getcwd(), filetypes=[('BDF File', '*.bdf')])
+                idf_file = os.path.basename(files[0])
+                st.session_state['idf_file'] = idf_file
+        except RuntimeWarning:
+            pass
 
-if st.session_state['workdir']:
-    os.chdir(st.session_state['workdir'])
-
-# Read IDF board file from Windows Explorer dialog box
-col01, col02, col03 = st.columns([2, 1, 1])
-col01.write('Select IDF Board file type:')
-st.session_state['idf_type'] = col02.selectbox('Select IDF Board file type:', ('*.emn', '*.bdf'),
-                                               label_visibility='collapsed')
-idf_button = col03.button('Select Board File')
-if idf_button:
-    st.session_state['idf'] = True
-    root1 = tk.Tk()
-    root1.attributes("-topmost", True)
-    root1.withdraw()
-    try:
-        if st.session_state['idf_type'] == '*.emn':
-            files = fd.askopenfilenames(parent=root1, initialdir=os.getcwd(), filetypes=[('EMN File', '*.emn')])
-            idf_file = os.path.basename(files[0])
-            st.session_state['idf_file'] = idf_file
-        if st.session_state['idf_type'] == '*.bdf':
-            files = fd.askopenfilenames(parent=root1, initialdir=os.getcwd(), filetypes=[('BDF File', '*.bdf')])
-            idf_file = os.path.basename(files[0])
-            st.session_state['idf_file'] = idf_file
-    except RuntimeWarning:
-        pass
-
-# Read ECAD file from Windows Explorer dialog box
-col04, col05, col06 = st.columns([2, 1, 1])
-col04.write('Please select ECAD file type:')
-st.session_state['ecad_type'] = col05.selectbox('Select ECAD type:', ('EDB Folder', 'ODB++ File', 'BRD File'),
-                                                label_visibility='collapsed')
-ecad_button = col06.button('Select ECAD')
-if ecad_button:
-    st.session_state['ecad'] = True
-    root2 = tk.Tk()
-    root2.attributes("-topmost", True)
-    root2.withdraw()
-    try:
-        if st.session_state['ecad_type'] == 'EDB Folder':
-            ecad_file = fd.askdirectory(parent=root2, initialdir=os.getcwd())
-            st.session_state['ecad_file'] = ecad_file
-        elif st.session_state['ecad_type'] == 'ODB++ File':
-            ecad_file = fd.askopenfilename(parent=root2, initialdir=os.getcwd(), filetypes=[('TGZ File', '*.tgz')])
-            st.session_state['ecad_file'] = ecad_file
-        elif st.session_state['ecad_type'] == 'BRD File':
-            ecad_file = fd.askopenfilename(parent=root2, initialdir=os.getcwd(), filetypes=[('BRD File', '*.brd')])
-            st.session_state['ecad_file'] = ecad_file
-        else:
-            st.error('Something went wrong!')
-    except RuntimeWarning:
-        pass
-
-# Read Boundary Conditions CSV file from Windows Explorer dialog box
-col07, col08 = st.columns([3, 1])
-col07.write('Please select boundary conditions CSV file:')
-bc_file_button = col08.button('Select BC CSV file')
-if bc_file_button:
-    st.session_state['bcs'] = True
-    bcs = True
-    root3 = tk.Tk()
-    root3.attributes("-topmost", True)
-    root3.withdraw()
-    try:
-        bc_file = fd.askopenfilenames(parent=root3, initialdir=os.getcwd(),
-                                      filetypes=[('Microsoft Excel Comma Separated Values File', '*.csv')])
-        bc_filename = os.path.basename(bc_file[0])
-        st.session_state['bc_filename'] = bc_filename
-    except RuntimeWarning:
-        pass
-
-# Read material file from Windows Explorer dialog box
-include_matfile = st.checkbox('Read Materials as CSV File?')
-if include_matfile:
-    col09, col10 = st.columns([3, 1])
-    col09.write('Please select materials CSV file:')
-    mats_button = col10.button('Select Materials CSV')
-    if mats_button:
-        st.session_state['mats'] = True
-        root4 = tk.Tk()
-        root4.attributes("-topmost", True)
-        root4.withdraw()
+    # Read ECAD file from Windows Explorer dialog box
+    col04, col05, col06 = st.columns([2, 1, 1])
+    col04.write('Please select ECAD file type:')
+    st.session_state['ecad_type'] = col05.selectbox('Select ECAD type:', ('EDB Folder', 'ODB++ File', 'BRD File'),
+                                                    label_visibility='collapsed')
+    ecad_button = col06.button('Select ECAD')
+    if ecad_button:
+        st.session_state['ecad'] = True
+        root2 = tk.Tk()
+        root2.attributes("-topmost", True)
+        root2.withdraw()
         try:
-            materials_file = fd.askopenfilenames(parent=root4, initialdir=os.getcwd(), filetypes=[
-                ('Microsoft Excel Comma Separated Values File', '*.csv')])
-            materials_filename = os.path.basename(materials_file[0])
-            st.session_state['materials_filename'] = materials_filename
+            if st.session_state['ecad_type'] == 'EDB Folder':
+                ecad_file = fd.askdirectory(parent=root2, initialdir=os.getcwd())
+                st.session_state['ecad_file'] = ecad_file
+            elif st.session_state['ecad_type'] == 'ODB++ File':
+                ecad_file = fd.askopenfilename(parent=root2, initialdir=os.getcwd(), filetypes=[('TGZ File', '*.tgz')])
+                st.session_state['ecad_file'] = ecad_file
+            elif st.session_state['ecad_type'] == 'BRD File':
+                ecad_file = fd.askopenfilename(parent=root2, initialdir=os.getcwd(), filetypes=[('BRD File', '*.brd')])
+                st.session_state['ecad_file'] = ecad_file
+            else:
+                st.error('Something went wrong!')
         except RuntimeWarning:
             pass
 
+    # Read Boundary Conditions CSV file from Windows Explorer dialog box
+    col07, col08 = st.columns([3, 1])
+    col07.write('Please select boundary conditions CSV file:')
+    bc_file_button = col08.button('Select BC CSV file')
+    if bc_file_button:
+        st.session_state['bcs'] = True
+        bcs = True
+        root3 = tk.Tk()
+        root3.attributes("-topmost", True)
+        root3.withdraw()
+        try:
+            bc_file = fd.askopenfilenames(parent=root3, initialdir=os.getcwd(),
+                                          filetypes=[('Microsoft Excel Comma Separated Values File', '*.csv')])
+            bc_filename = os.path.basename(bc_file[0])
+            st.session_state['bc_filename'] = bc_filename
+        except RuntimeWarning:
+            pass
+
+    # Read material file from Windows Explorer dialog box
+    include_matfile = st.checkbox('Read Materials as CSV File?')
+    if include_matfile:
+        col09, col10 = st.columns([3, 1])
+        col09.write('Please select materials CSV file:')
+        mats_button = col10.button('Select Materials CSV')
+        if mats_button:
+            st.session_state['mats'] = True
+            root4 = tk.Tk()
+            root4.attributes("-topmost", True)
+            root4.withdraw()
+            try:
+                materials_file = fd.askopenfilenames(parent=root4, initialdir=os.getcwd(), filetypes=[
+                    ('Microsoft Excel Comma Separated Values File', '*.csv')])
+                materials_filename = os.path.basename(materials_file[0])
+                st.session_state['materials_filename'] = materials_filename
+            except RuntimeWarning:
+                pass
+
+
+else:
+    # Uploaded files are stored by content on the server, so the same archive is kept only once
+    st.session_state['workdir'] = st.text_input('Working directory on the server:',
+                                                value=st.session_state['workdir'] or os.getcwd())
+    idf_uploads = st.file_uploader('Upload IDF board and library files (*.emn and *.emp, or *.bdf and *.ldf):',
+                                   type=[i[1:] for i in IDF_UPLOAD_EXTENSIONS], accept_multiple_files=True)
+    if idf_uploads:
+        idf_files = dict(store_upload(i) for i in idf_uploads)
+        pair = idf_pair(list(idf_files))
+        if pair is None:
+            st.warning('⚠️ Upload one IDF board file with the library file of the same name!')
+        else:
+            st.session_state['idf'] = True
+            st.session_state['idf_file'] = materialize([(i, idf_files[i]) for i in pair])[pair[0]]
+            st.session_state['idf_type'] = '*' + os.path.splitext(pair[0])[1].lower()
+
+    ecad_upload = st.file_uploader('Upload ECAD file (*.tgz ODB++ archive, *.brd file or *.zip of an EDB folder):',
+                                   type=[i[1:] for i in ECAD_UPLOAD_TYPES])
+    stored_ecad = st.selectbox('Or use an ECAD file uploaded before:', [None] + list_uploads(tuple(ECAD_UPLOAD_TYPES)),
+                               format_func=lambda x: 'None' if x is None else
+                               f'''{x['names'][-1]} ({x['size'] / 2 ** 20:.1f} MB, '''
+                               f'''{time.strftime('%Y-%m-%d %H:%M', time.localtime(x['uploaded']))})''')
+    ecad = store_upload(ecad_upload) if ecad_upload else \
+        (stored_ecad['names'][-1], stored_ecad['sha256']) if stored_ecad else None
+    if ecad:
+        st.session_state['ecad'] = True
+        st.session_state['ecad_file'] = materialize([ecad])[ecad[0]]
+        st.session_state['ecad_type'] = ECAD_UPLOAD_TYPES[os.path.splitext(ecad[0])[1].lower()]
+
+    bc_upload = st.file_uploader('Upload boundary conditions CSV file:', type=['csv'])
+    if bc_upload:
+        bc = store_upload(bc_upload)
+        st.session_state['bcs'] = True
+        st.session_state['bc_filename'] = materialize([bc])[bc[0]]
+
+    include_matfile = st.checkbox('Read Materials as CSV File?')
+    if include_matfile:
+        mats_upload = st.file_uploader('Upload materials CSV file:', type=['csv'])
+        if mats_upload:
+            mats = store_upload(mats_upload)
+            st.session_state['mats'] = True
+            st.session_state['materials_filename'] = materialize([mats])[mats[0]]
+
+if st.session_state['workdir']:
+    if os.path.isdir(st.session_state['workdir']):
+        os.chdir(st.session_state['workdir'])
+    else:
+        st.warning('⚠️ The working directory does not exist!')
+
 with st.expander('List of Inputs'):
     if st.session_state['workdir']:
         st.markdown(f'''**Selected working directory:** ```{os.path.abspath(st.session_state['workdir'])}```''')
@@ -412,6 +267,10 @@ all_points = st.checkbox('Create points at board side face centers for all compo
 if all_points:
     st.write(':information_source: Temperatures at the created points will be written out to a table/file.')
 
+reuse_ecad_import = st.checkbox('Reuse cached ECAD import', value=True,
+                                help='Boards imported before are linked from the ECAD cache instead of being '
+                                     're-imported. The cache is keyed by the content of the ECAD file or folder.')
+
 delete_filtered = st.checkbox('Delete filtered objects?', help='Deleted objects cannot be recovered.')
 
 if delete_filtered:
@@ -447,6 +306,26 @@ if conv_type == 'Natural':
 st.markdown('---')
 st.markdown('**Mesh Settings**')
 mesh_fidelity = st.select_slider('Select mesh resolution:', options=['Coarse', 'Medium', 'Fine'])
+lumping = False
+if st.checkbox('Lump small unpowered components',
+               help='Clusters of neighbouring small components without power or monitor point are replaced by one '
+                    'block each, with the area-weighted conductivity of the components, to reduce the mesh.'):
+    col34, col35, col36, col37 = st.columns(4)
+    lumping = {'max_area': col34.number_input('Max footprint [mm²]', min_value=0.01,
+                                              value=DEFAULT_LUMPING['max_area'], step=0.5),
+               'max_height': col35.number_input('Max height [mm]', min_value=0.01,
+                                                value=DEFAULT_LUMPING['max_height'], step=0.1),
+               'gap': col36.number_input('Max gap [mm]', min_value=0.0, value=DEFAULT_LUMPING['gap'], step=0.1),
+               'max_extent': col37.number_input('Max cluster size [mm]', min_value=1.0,
+                                                value=DEFAULT_LUMPING['max_extent'], step=1.0)}
+board = False
+col38, col39 = st.columns(2)
+board_model = col38.selectbox('Board model:', BOARD_MODELS,
+                              help='Trace-detailed links the PCB with its traces from the ECAD. Tiled builds the '
+                                   'board from tiles whose anisotropic conductivity follows the copper coverage of '
+                                   'every layer, which meshes and solves much faster.')
+if board_model == 'Tiled':
+    board = {'tile_size': col39.number_input('Tile size [mm]', min_value=0.5, value=DEFAULT_TILE_SIZE, step=0.5)}
 
 # Solve Settings
 st.markdown('---')
@@ -454,21 +333,67 @@ st.markdown('**Solve Settings**')
 col13, col14 = st.columns(2)
 num_cores = col13.number_input('Number of Processors', min_value=1, max_value=128, value=1, step=1, format='%d')
 mode = col14.radio('Mode:', ('Graphical', 'Non-Graphical'))
+col18, col19, col20 = st.columns(3)
+user_name = col18.text_input('User:', value=getpass.getuser(),
+                             help='Jobs are queued on the shared server and scheduled with a fair share per user.')
+priority = col19.selectbox('Priority:', list(PRIORITIES), index=1,
+                           help='Setup-only jobs of lower priority may be preempted by higher priority jobs.')
+memory_gb = col20.number_input('Memory [GB]:', min_value=0.0, value=0.0, step=1.0,
+                               help='Memory to reserve for the job, 0 to only require free memory.')
 
 project_name = st.text_input('Enter Project Name:',
                              help='Only letters (A-Z,a-z), numbers (0-9) and underscores are allowed.')
 
 aedt_version = st.selectbox('Select AEDT release:', ('2023 R1', '2023 R2'))
 
+incremental_mode = st.checkbox('Update existing project incrementally',
+                               help='Only boundary conditions, materials and monitor points of components that '
+                                    'changed in the BC table are updated. The mesh is kept when geometry is '
+                                    'untouched.')
+
+resume_build = st.checkbox('Resume from the last completed build stage', value=True,
+                           help='Every build stage saves a snapshot of the project. A rebuild restores the snapshot '
+                                'of the last stage whose inputs did not change, e.g. after a failed mesh setup, '
+                                'instead of importing the ECAD and IDF again.')
+
 analyze_setup = st.checkbox('Setup problem and proceed to solve')
+stop_rule = False
+influence = False
+benchmark_board = False
 if analyze_setup:
+    stop_early = st.checkbox('Stop when monitor temperatures are stable',
+                             help='The solve is stopped cleanly before the maximum number of iterations once every '
+                                  'monitor point changed less than the tolerance over the iteration window.')
+    if stop_early:
+        col30, col31 = st.columns(2)
+        stop_delta_t = col30.number_input('Temperature tolerance [cel]', min_value=0.001, value=0.05, step=0.01,
+                                          format='%.3f')
+        stop_window = col31.number_input('Iteration window', min_value=5, max_value=500, value=30, step=5)
+        stop_rule = {'delta_t': stop_delta_t, 'window': int(stop_window)}
+    warm_start = st.checkbox('Initialize from the closest solved project',
+                             help='Starts from the solution of a solved project of the working directory with the '
+                                  'same geometry and the nearest ambient temperature, velocity and total power.')
+    influence = False
+    if st.checkbox('Build thermal influence matrix',
+                   help='Solves one case per heat source group with 1 W in the group, on one mesh, so the monitor '
+                        'temperatures of any power scenario can be predicted instantly below. Valid while the '
+                        'board responds linearly to power, i.e. forced convection dominated by conduction.'):
+        influence = {'group_column': st.selectbox('Group heat sources by:', GROUP_COLUMNS,
+                                                  help='Components of a group change power together, e.g. one '
+                                                       'group per power rail. Instance_Name solves one case per '
+                                                       'powered component.')}
+    benchmark_board = board and st.checkbox('Benchmark against the trace-detailed board',
+                                            help='Also submits the same job with the trace-detailed board, as '
+                                                 'project <name>_detailed, to compare mesh, solve time and monitor '
+                                                 'temperatures once both are done.')
     sim_button_text = '**Simulate**'
 else:
     sim_button_text = '**Setup Only**'
 setup_analyze_button = st.button(sim_button_text)
 placeholder = st.empty()
-analysis_complete = False
-analysis_setup = 'Icepak_Analysis'
+
+if 'job_id' not in st.session_state:
+    st.session_state['job_id'] = False
 
 # Main Code Execution
 #
@@ -485,506 +410,321 @@ if st.session_state['idf_file'] and st.session_state['ecad_file'] and st.session
         board_filename = os.path.abspath(filename_no_ext + '.bdf')
         lib_filename = os.path.abspath(filename_no_ext + '.ldf')
 
-    ecad_foldername = st.session_state['ecad_file']
-    bc_filename = st.session_state['bc_filename']
     materials_filename = st.session_state['materials_filename']
 
-    # Launch new AEDT Icepak session
-    project_name = project_name + '.aedt'
-    project_path = os.path.join(os.getcwd(), project_name)
-    if setup_analyze_button:
-        aedt_release = re.sub(' R', '.', aedt_version)
-        cleanup_files(project_name)
-        placeholder.info('AEDT Icepak session in progress...', icon="🏃🏽")
-
-        if mode == 'Graphical':
-            non_graphical_mode = False
-        else:
-            non_graphical_mode = True
-
-        # Start AEDT Desktop session
-        desktop = pyaedt.Desktop(aedt_release, non_graphical=non_graphical_mode)
-
-        # Insert ECAD Import code
-        ecad_file_path = st.session_state['ecad_file']
-        ecad_type = st.session_state['ecad_type']
-        ecad_file_name = os.path.basename(ecad_file_path)
-        ecad_file_name_no_ext = os.path.splitext(ecad_file_name)[0]
-
-        ecad_project_name = ecad_file_name_no_ext + '.aedt'
-        ecad_project_path = os.path.join(os.getcwd(), ecad_project_name)
-        ecad_project_name_no_ext = os.path.splitext(ecad_project_name)[0]
-
-        cleanup_files(ecad_project_name)
-
-        h3d = pyaedt.Hfss3dLayout()
-        if ecad_type == 'EDB Folder':
-            h3d.import_edb(ecad_file_path)
-        if ecad_type == 'ODB++ File':
-            h3d.import_odb(ecad_file_path)
-        if ecad_type == 'BRD File':
-            h3d.import_brd(ecad_file_path)
-
-        h3d.save_project()
-
-        # Delete empty project
-        project_list = desktop.project_list()
-        for i in project_list:
-            if i != ecad_file_name_no_ext:
-                desktop.odesktop.DeleteProject(i)
-
-        # ECAD design name from HFSS 3D Layout
-        ecad_design = h3d.design_list[0]
-
-        # Get name of outline polygon
-        outline_poly = []
-        for key in h3d.modeler.polygons.keys():
-            if h3d.modeler.polygons[key].placement_layer == 'Outline':
-                outline_poly.append(key)
-
-        # Insert Icepak design and rename project to user-specified project name
-        ipk = pyaedt.Icepak()
-        ipk.save_project()
-        ipk.oproject.Rename(os.path.join(ipk.project_path, project_name), True)
-
-        # Create PCB object in Icepak from HFSS 3D Layout
-        ipk.create_pcb_from_3dlayout(component_name=ecad_file_name_no_ext,
-                                     project_name=None,
-                                     design_name=ecad_design,
-                                     resolution=3,
-                                     extent_type='Polygon',
-                                     outline_polygon=outline_poly[0],
-                                     close_linked_project_after_import=False)
-        # Import IDF file into Icepak
-        ipk.import_idf(board_filename)
-
-        # Fit all and save
-        ipk.modeler.fit_all()
-        ipk.save_project()
-        ipk.autosave_disable()
-
-        # List of boundary conditions
-        list_bcs = ipk.odesign.GetChildObject('Thermal').GetChildNames()
-
-        # Delete all boundary conditions
-        omodule = ipk.odesign.GetModule("BoundarySetup")
-        if list_bcs:
-            for i in list_bcs:
-                omodule.DeleteBoundaries([i])
-
-        # Delete all points
-        for i in ipk.modeler.points:
-            ipk.modeler.points[i].delete()
-
-        # Import Modified CSV file
-        rows = []
-        with open(bc_filename, 'r') as csvFile:
-            csvReader = csv.reader(csvFile)
-            fields = next(csvReader)
-            for row in csvReader:
-                rows.append(row)
-
-        # Read material properties file (if provided)
-        if st.session_state['materials_filename']:
-            rows_mat = []
-            with open(materials_filename, 'r', encoding='utf-8-sig') as matFile:
-                csvReader = csv.reader(matFile)
-                fields_mat = next(csvReader)
-                for row in csvReader:
-                    rows_mat.append(row)
-
-            # Create materials in AEDT
-            for i in rows_mat:
-                mat = ipk.materials.add_material(i[0])
-                mat.thermal_conductivity = i[1]
-                mat.update()
-
-        # Delete empty part numbers/NOREFDES instances
-        for i in ipk.modeler.solid_bodies:
-            if i.startswith('idf_mech'):
-                ipk.modeler.delete(i)
-
-        # Remove any gap between board and components
-        top_components = []
-        bottom_components = []
-        for i in range(len(rows)):
-            if rows[i][3] != 'NOREFDES':
-                block_name = re.sub(r"\W", "_", rows[i][3])
-                if rows[i][6] == 'TOP':
-                    top_components.append(block_name)
-                if rows[i][6] == 'BOTTOM':
-                    bottom_components.append(block_name)
-
-        tc_z = ipk.modeler.get_object_from_name(top_components[0]).bottom_face_z.center[2]
-        bc_z = ipk.modeler.get_object_from_name(bottom_components[0]).top_face_z.center[2]
-
-        pcb = ipk.modeler.primitives.user_defined_component_names
-        pcb_layers = sorted(ipk.modeler.get_3d_component_object_list(pcb[0]))
-        top_layer_z_bound = ipk.modeler.get_object_from_name(pcb_layers[0]).top_face_z.center[2]
-        bottom_layer_z_bound = ipk.modeler.get_object_from_name(pcb_layers[-1]).bottom_face_z.center[2]
-
-        move_top = tc_z - top_layer_z_bound
-        if move_top > 0:
-            ipk.modeler.move(objid=top_components, vector=[0, 0, -move_top])
-        else:
-            ipk.modeler.move(objid=top_components, vector=[0, 0, move_top])
-
-        move_bottom = bc_z - bottom_layer_z_bound
-        if move_bottom < 0:
-            ipk.modeler.move(objid=bottom_components, vector=[0, 0, -move_bottom])
-        else:
-            ipk.modeler.move(objid=bottom_components, vector=[0, 0, move_bottom])
-
-        # Create dictionary of points at board side of all components
-        points_dict = {}
-        for i in range(len(rows)):
-            if rows[i][3] != 'NOREFDES':
-                block_name = re.sub(r"\W", "_", rows[i][3])
-                block_handle = ipk.modeler.get_object_from_name(block_name)
-                pcb_top_layer = ipk.modeler.get_object_from_name(pcb_layers[0])
-                pcb_bottom_layer = ipk.modeler.get_object_from_name(pcb_layers[-1])
-                if block_handle.get_touching_faces(pcb_top_layer):
-                    block_board_side = block_handle.get_touching_faces(pcb_top_layer)
-                else:
-                    block_board_side = block_handle.get_touching_faces(pcb_bottom_layer)
-                point_name = 'point_' + block_name
-                if all_points:
-                    mon_point = ipk.modeler.primitives.get_face_center(block_board_side[0].id)
-                    points_dict[point_name] = mon_point
-
-        # Delete filtered objects or make them non-model
-        for i in range(len(rows)):
-            if rows[i][0] == 'NO':
-                if rows[i][3] != 'NOREFDES':
-                    block_name = re.sub(r"\W", "_", rows[i][3])
-                    block_handle = ipk.modeler.get_object_from_name(block_name)
-                    if delete_filtered:
-                        ipk.modeler.delete(block_handle.name)
-                    else:
-                        block_handle.model = False
-
-        # Priority assignments based on volume of objects
-        obj_dict = {}
-        for i in ipk.modeler.solid_bodies:
-            if i != 'Region':
-                obj_dict[i] = ipk.modeler.get_object_from_name(i).volume
-        vol_sorted_objs = sorted(obj_dict.items(), key=lambda x: x[1], reverse=True)
-        vol_sorted_obj_list = []
-        for i in vol_sorted_objs:
-            vol_sorted_obj_list.append(i[0])
-
-        priority_num = 2
-        args = ["NAME:UpdatePriorityListData"]
-        for i in vol_sorted_obj_list:
-            if i != 'Region':
-                prio = [
-                    "NAME:PriorityListParameters",
-                    "EntityType:=", "Object",
-                    "EntityList:=", i,
-                    "PriorityNumber:=", priority_num,
-                    "PriorityListType:=", "3D"
-                ]
-                args.append(prio)
-                priority_num = priority_num + 1
-        ipk.modeler.oeditor.UpdatePriorityList(args)
-
-        # Clear Desktop messages
-        desktop.clear_messages()
-
-        # Save project
-        ipk.save_project()
-
-        # Make board that comes with the IDF file as non-model object
-        board_handle = ipk.modeler.get_object_from_name('IDF_BoardOutline')
-        board_handle.model = False
-
-        # Clear Desktop messages
-        desktop.clear_messages()
-
-        # List all model objects in design
-        model_objects = ipk.modeler.model_objects
-        model_objects.remove('Region')
-
-        # List of primitive objects
-        primitive_objects = [x for x in model_objects if x not in pcb_layers]
-
-        # Set mesh dimensions
-        dim_x = []
-        dim_y = []
-        dim_z = []
-        for i in primitive_objects:
-            obj_handle = ipk.modeler.get_object_from_name(i)
-            dim_x.append(obj_handle.bounding_dimension[0])
-            dim_y.append(obj_handle.bounding_dimension[1])
-        for i in pcb_layers:
-            obj_handle = ipk.modeler.get_object_from_name(i)
-            dim_z.append(obj_handle.bounding_dimension[2])
-
-        pcb_dim_x = ipk.modeler.get_object_from_name(pcb_layers[0]).bounding_dimension[0]
-        pcb_dim_y = ipk.modeler.get_object_from_name(pcb_layers[0]).bounding_dimension[1]
-        pcb_min_x = ipk.modeler.get_object_from_name(pcb_layers[0]).bounding_box[0]
-        pcb_min_y = ipk.modeler.get_object_from_name(pcb_layers[0]).bounding_box[1]
-        pcb_max_x = ipk.modeler.get_object_from_name(pcb_layers[0]).bounding_box[3]
-        pcb_max_y = ipk.modeler.get_object_from_name(pcb_layers[0]).bounding_box[4]
-
-        tx = np.histogram(dim_x, bins=10)
-        ty = np.histogram(dim_y, bins=10)
-        max_val_index_x = np.argmax(tx[0])
-        max_val_index_y = np.argmax(ty[0])
-
-        if mesh_fidelity == 'Coarse':
-            mesh_mult_xy = 0.5
-            mesh_mult_z = 8
-        elif mesh_fidelity == 'Medium':
-            mesh_mult_xy = 0.25
-            mesh_mult_z = 4
+    job = {'project_name': project_name + '.aedt',
+           'aedt_release': re.sub(' R', '.', aedt_version),
+           'non_graphical': mode != 'Graphical',
+           'ecad_file': st.session_state['ecad_file'],
+           'ecad_type': st.session_state['ecad_type'],
+           'idf_file': board_filename,
+           'bc_file': os.path.abspath(st.session_state['bc_filename']),
+           'materials_file': os.path.abspath(materials_filename) if materials_filename else False,
+           'all_points': all_points,
+           'delete_filtered': delete_filtered,
+           'reuse_ecad_import': reuse_ecad_import,
+           'conv_type': conv_type,
+           'vel': vel,
+           'vel_dir': vel_dir,
+           'air_temp': air_temp,
+           'gravity_direction': gravity_direction,
+           'mesh_fidelity': mesh_fidelity,
+           'lumping': lumping,
+           'board': board,
+           'num_cores': int(num_cores),
+           'analyze': analyze_setup,
+           'stop_rule': stop_rule,
+           'warm_start': analyze_setup and warm_start,
+           'influence': influence,
+           'incremental': incremental_mode,
+           'resume': resume_build}
+
+    # Check the whole BC table before any AEDT work
+    bc_errors, bc_warnings = load_bc_table(job['bc_file'], job['materials_file'], job['aedt_release'])[1:]
+    for warning in bc_warnings:
+        st.warning('⚠️ ' + warning)
+    if bc_errors:
+        placeholder.empty()
+        st.exception(RuntimeError('The boundary conditions table has errors:\n' + '\n'.join(bc_errors)))
+
+    # Hand the run to a background worker, which survives reruns and browser refreshes
+    if setup_analyze_button and not bc_errors:
+        try:
+            st.session_state['job_id'] = submit_job(job, os.getcwd(), user=user_name,
+                                                    priority=PRIORITIES[priority], memory_gb=memory_gb)
+            if benchmark_board:
+                submit_job(dict(job, board=False, project_name=project_name + '_detailed.aedt'), os.getcwd(),
+                           user=user_name, priority=PRIORITIES[priority], memory_gb=memory_gb)
+        except ValueError as e:
+            placeholder.empty()
+            st.exception(RuntimeError(str(e)))
         else:
-            mesh_mult_xy = 0.1
-            mesh_mult_z = 2
-
-        # Max element size in x, y, z direction based on mesh fidelity
-        mesh_x = mesh_mult_xy * (tx[1][max_val_index_x] + tx[1][max_val_index_x + 1])
-        mesh_y = mesh_mult_xy * (ty[1][max_val_index_y] + ty[1][max_val_index_y + 1])
-        mesh_z = mesh_mult_z * min(dim_z)
-
-        # Find extent of all objects in z-direction
-        minzs = []
-        maxzs = []
-        for i in primitive_objects:
-            obj_handle = ipk.modeler.get_object_from_name(i)
-            minzs.append(obj_handle.bounding_box[2])
-            maxzs.append(obj_handle.bounding_box[5])
-        z_extent_min = min(minzs)
-        z_extent_max = max(maxzs)
-        z_extent = z_extent_max - z_extent_min
-
-        # slack values
-        slack_x = 0.1 * pcb_dim_x
-        slack_y = 0.1 * pcb_dim_y
-        slack_z = 0.25 * z_extent
-
-        # Add mesh region
-        meshregion_box = ipk.modeler.create_box([pcb_min_x, pcb_min_y, z_extent_min], [pcb_dim_x, pcb_dim_y, z_extent],
-                                                'meshregion_all_objs')
-        add_slack('meshregion_all_objs', slack_x, slack_x, slack_y, slack_y, slack_z, slack_z)
-        meshregion_box.model = False
-        mesh_box = 'meshregion_all_objs'
-        mesh_region = ipk.mesh.assign_mesh_region([mesh_box], 5, False, 'meshregion_all_objs')
-
-        # Set user defined settings in mesh region
-        mesh_region.UserSpecifiedSettings = True
-        mesh_region.MaxElementSizeX = str(mesh_x) + ipk.modeler.model_units
-        mesh_region.MaxElementSizeY = str(mesh_y) + ipk.modeler.model_units
-        mesh_region.MaxElementSizeZ = str(mesh_z) + ipk.modeler.model_units
-        mesh_region.MinElementsInGap = 2
-        mesh_region.MinElementsOnEdge = 2
-        mesh_region.MaxSizeRatio = 2
-        mesh_region.NoOGrids = True
-        mesh_region.StairStepMeshing = False
-        mesh_region.MinGapX = '0.0001mm'
-        mesh_region.MinGapY = '0.0001mm'
-        mesh_region.MinGapZ = '0.0001mm'
-        mesh_region.EnableMLM = True
-        mesh_region.MaxLevels = 2
-        mesh_region.BufferLayers = 1
-        mesh_region.EnforeMLMType = "2D"
-        mesh_region.Enable2DCutCell = True
-        mesh_region.UniformMeshParametersType = "Average"
-        mesh_region.DMLMType = "2DMLM_XY"
-        mesh_region.Objects = [mesh_box]
-        mesh_region.update()
-
-        # Add mesh operation to primitives, mesh level = 2
-        mesh_levels_primitives = {}
-        for i in primitive_objects:
-            mesh_levels_primitives[i] = 2
-        ipk.mesh.assign_mesh_level(mesh_levels_primitives, "mesh_levels_primitives")
-
-        # Add mesh operation to primitives, mesh level = 1
-        mesh_levels_3dcomps = {}
-        for i in pcb_layers:
-            mesh_levels_3dcomps[i] = 1
-        ipk.mesh.assign_mesh_level(mesh_levels_3dcomps, "mesh_levels_pcb_layers")
-
-        # Global mesh dimensions
-        domain = ipk.modeler.get_bounding_dimension()
-        global_max_x = 4 * mesh_x
-        global_max_y = 4 * mesh_y
-        global_max_z = 4 * mesh_z
-
-        # Apply global mesh settings.
-        ipk.mesh.global_mesh_region.UserSpecifiedSettings = True
-        ipk.mesh.global_mesh_region.MaxElementSizeX = str(global_max_x) + ipk.modeler.model_units
-        ipk.mesh.global_mesh_region.MaxElementSizeY = str(global_max_y) + ipk.modeler.model_units
-        ipk.mesh.global_mesh_region.MaxElementSizeZ = str(global_max_z) + ipk.modeler.model_units
-        ipk.mesh.global_mesh_region.MinElementsInGap = 3
-        ipk.mesh.global_mesh_region.MinElementsOnEdge = 2
-        ipk.mesh.global_mesh_region.MaxSizeRatio = 2
-        ipk.mesh.global_mesh_region.NoOGrids = True
-        ipk.mesh.global_mesh_region.StairStepMeshing = False
-        ipk.mesh.global_mesh_region.MinGapX = '0.0001mm'
-        ipk.mesh.global_mesh_region.MinGapY = '0.0001mm'
-        ipk.mesh.global_mesh_region.MinGapZ = '0.0001mm'
-        ipk.mesh.global_mesh_region.EnableMLM = False
-        ipk.mesh.global_mesh_region.UniformMeshParametersType = "None"
-        ipk.mesh.global_mesh_region.OptimizePCBMesh = True
-        ipk.mesh.global_mesh_region.update()
-
-        # Assign Boundary Conditions
-        def name_cleanup(name):
-            return re.sub(r"\W", "_", name)
-
-
-        colnames = ['Include', 'Package_Name', 'Part_Name', 'Instance_Name', 'Designator_Type', 'Height [mm]',
-                    'Placement', 'BC_Type', 'Power [W]', 'R_jb [C/W]', 'R_jc [C/W]', 'Monitor_Point', 'Material']
-        df = pd.DataFrame(rows, columns=colnames)
-        df2 = df.copy()
-        df2 = df2[(df2['Include'] == 'YES')]
-        df2 = df2[(df2['Instance_Name'] != 'NOREFDES')]
-        df3 = pd.DataFrame()
-        df3['block_name'] = df2.apply(lambda x: name_cleanup(x.Instance_Name), axis=1)
-        df3['bc_type'] = df2['BC_Type']
-        df3['power'] = df2['Power [W]']
-        df3['rjb'] = df2['R_jb [C/W]']
-        df3['rjc'] = df2['R_jc [C/W]']
-        df3['monpt'] = df2['Monitor_Point']
-        df3['mat_type'] = df2['Material']
-
-        for ind in df3.index:
-            block_handle = ipk.modeler.get_object_from_name(df3['block_name'][ind])
-            if df3['bc_type'][ind] == "block":
-                if df3['power'][ind] != 0:
-                    ipk.create_source_block(df3['block_name'][ind], df3['power'][ind] + "W", assign_material=False,
-                                            use_object_for_name=True)
-                # Assign material property
-                if df3['mat_type'][ind] != "":
-                    block_handle.material_name = df3['mat_type'][ind]
-                    block_handle.surface_material_name = 'Ceramic-surface'
-            elif df3['bc_type'][ind] == "network":
-                ipk.create_two_resistor_network_block(object_name=df3['block_name'][ind], pcb=pcb[0],
-                                                      power=df3['power'][ind] + "W",
-                                                      rjb=df3['rjb'][ind], rjc=df3['rjc'][ind])
-            elif df3['bc_type'][ind] == "hollow":
-                ipk.create_source_block(df3['block_name'][ind], df3['power'][ind] + "W", assign_material=False,
-                                        use_object_for_name=True)
-                ipk.modeler.primitives[df3['block_name'][ind]].solve_inside = False
-            else:
-                e = RuntimeError('Error! Incorrect block boundary condition.')
-                st.exception(e)
-            # Monitor points
-            if df3['monpt'][ind] == "YES":
-                pcb_top_layer = ipk.modeler.get_object_from_name(pcb_layers[0])
-                pcb_bottom_layer = ipk.modeler.get_object_from_name(pcb_layers[-1])
-                if block_handle.get_touching_faces(pcb_top_layer):
-                    block_board_side = block_handle.get_touching_faces(pcb_top_layer)
-                else:
-                    block_board_side = block_handle.get_touching_faces(pcb_bottom_layer)
-                point_name = 'point_' + df3['block_name'][ind]
-                mon_point = ipk.modeler.primitives.get_face_center(block_board_side[0].id)
-                ipk.assign_point_monitor(mon_point, monitor_type='Temperature', monitor_name=point_name)
-
-        # Insert forced convection setup
-        if conv_type == 'Forced':
-            analysis_setup = 'forced_conv_setup'
-            forced_convection_setup(analysis_setup, 'Turbulent')
-
-            # Assign velocity inlet and pressure outlet boundary conditions
-            region = ipk.modeler.primitives["Region"]
-            if vel_dir == '+X':
-                ipk.modeler.edit_region_dimensions([100, 100, 50, 50, 50, 50])
-                inlet_opening_face_id = region.bottom_face_x.id
-                outlet_opening_face_id = region.top_face_x.id
-                speed = str(vel) + 'm_per_sec'
-                air_temp = str(air_temp) + 'cel'
-                assign_opening_boundary('inlet', inlet_opening_face_id, flow_type='velocity', xvel=speed,
-                                        temperature=air_temp)
-                assign_opening_boundary('outlet', outlet_opening_face_id, flow_type='pressure')
-            elif vel_dir == '-X':
-                ipk.modeler.edit_region_dimensions([100, 100, 50, 50, 50, 50])
-                inlet_opening_face_id = region.top_face_x.id
-                outlet_opening_face_id = region.bottom_face_x.id
-                speed = str(vel) + 'm_per_sec'
-                air_temp = str(air_temp) + 'cel'
-                assign_opening_boundary('inlet', inlet_opening_face_id, flow_type='velocity', xvel=speed,
-                                        temperature=air_temp)
-                assign_opening_boundary('outlet', outlet_opening_face_id, flow_type='pressure')
-            elif vel_dir == '+Y':
-                ipk.modeler.edit_region_dimensions([50, 50, 100, 100, 50, 50])
-                inlet_opening_face_id = region.bottom_face_y.id
-                outlet_opening_face_id = region.top_face_y.id
-                speed = str(vel) + 'm_per_sec'
-                air_temp = str(air_temp) + 'cel'
-                assign_opening_boundary('inlet', inlet_opening_face_id, flow_type='velocity', yvel=speed,
-                                        temperature=air_temp)
-                assign_opening_boundary('outlet', outlet_opening_face_id, flow_type='pressure')
-            elif vel_dir == '-Y':
-                ipk.modeler.edit_region_dimensions([50, 50, 100, 100, 50, 50])
-                inlet_opening_face_id = region.top_face_y.id
-                outlet_opening_face_id = region.bottom_face_y.id
-                speed = str(vel) + 'm_per_sec'
-                air_temp = str(air_temp) + 'cel'
-                assign_opening_boundary('inlet', inlet_opening_face_id, flow_type='velocity', yvel=speed,
-                                        temperature=air_temp)
-                assign_opening_boundary('outlet', outlet_opening_face_id, flow_type='pressure')
-            elif vel_dir == '+Z':
-                ipk.modeler.edit_region_dimensions([50, 50, 50, 50, 100, 100])
-                inlet_opening_face_id = region.bottom_face_z.id
-                outlet_opening_face_id = region.top_face_z.id
-                speed = str(vel) + 'm_per_sec'
-                air_temp = str(air_temp) + 'cel'
-                assign_opening_boundary('inlet', inlet_opening_face_id, flow_type='velocity', zvel=speed,
-                                        temperature=air_temp)
-                assign_opening_boundary('outlet', outlet_opening_face_id, flow_type='pressure')
-            else:
-                ipk.modeler.edit_region_dimensions([50, 50, 50, 50, 100, 100])
-                inlet_opening_face_id = region.top_face_z.id
-                outlet_opening_face_id = region.bottom_face_z.id
-                speed = str(vel) + 'm_per_sec'
-                air_temp = str(air_temp) + 'cel'
-                assign_opening_boundary('inlet', inlet_opening_face_id, flow_type='velocity', zvel=speed,
-                                        temperature=air_temp)
-                assign_opening_boundary('outlet', outlet_opening_face_id, flow_type='pressure')
-
-        if conv_type == 'Natural':
-            analysis_setup = 'natural_conv_setup'
-            natural_convection_setup(analysis_setup, gravity_dir=gravity_direction, flow_regime='Turbulent',
-                                     ambient_temp=air_temp)
-            for i in ipk.modeler.get_object_faces('Region'):
-                outlet_name = 'outlet_' + str(i)
-                assign_opening_boundary(outlet_name, i, flow_type='pressure')
-
-        # Create monitor points at all object bases
-        list_mon_pts = ipk.odesign.GetChildObject("Monitor").GetChildNames()
-        for pt in points_dict:
-            if pt not in list_mon_pts:
-                ipk.assign_point_monitor(points_dict[pt], monitor_type='Temperature', monitor_name=pt)
-
-        ipk.modeler.refresh_all_ids()
-        ipk.modeler.refresh()
-
-        if analyze_setup:
-            ipk.mesh.generate_mesh(analysis_setup)
-            # Solve the model.
-            num_tasks = num_cores
-            ipk.analyze_setup(analysis_setup, num_cores, num_tasks)
-            quit_aedt()
-        analysis_complete = True
-        if analysis_complete:
-            placeholder.success('AEDT Icepak run completed.', icon="✅")
-            st.markdown(f'''**Project saved to:** ```{project_path}```''')
-            st.session_state['pid'] = desktop.aedt_process_id
+            placeholder.info('Job submitted to the scheduler. It starts when a license and cores are free.',
+                             icon="🏃🏽")
 else:
+    job = False
     e = RuntimeError('One or more input files are missing')
     st.exception(e)
 
-if st.session_state['pid']:
-    close_aedt = st.button('Close AEDT')
-    if close_aedt:
-        try:
-            os.kill(st.session_state['pid'], signal.SIGTERM)
-            files = os.listdir(os.getcwd())
-            for file in files:
-                if file.endswith('.lock'):
-                    os.remove(file)
-        except RuntimeWarning:
-            st.warning('⚠️ No active AEDT sessions!')
+# Simulation jobs of the working directory
+st.markdown('---')
+st.markdown('**Simulation Jobs**')
+# Start queued jobs whose resources were freed by crashed workers or closed AEDT sessions
+dispatch()
+jobs = list_jobs(os.getcwd())
+if jobs:
+    job_ids = [i[0] for i in jobs]
+    default_index = job_ids.index(st.session_state['job_id']) if st.session_state['job_id'] in job_ids else 0
+    selected_job = st.selectbox('Select job:', job_ids, index=default_index)
+    st.session_state['job_id'] = selected_job
+    job_dir = dict(jobs)[selected_job]
+    job_status = get_job_status(job_dir)
+    job_state = job_status.get('state', 'queued')
+    st.progress(int(job_status.get('percent', 0)), text=f'''{job_status.get('stage', '')} ({job_state})''')
+    if job_status.get('message'):
+        st.markdown(f'''```{job_status['message']}```''')
+    for warning in read_progress(job_dir, 'warning'):
+        st.warning('⚠️ ' + warning['message'])
+    if job_state == 'failed':
+        st.error(job_status.get('error', 'Job failed.'))
+        if job_status.get('traceback'):
+            with st.expander('Traceback'):
+                st.code(job_status['traceback'])
+    residual_history = read_progress(job_dir, 'residuals')
+    if residual_history:
+        st.markdown(f'''**Latest residuals (iteration {residual_history[-1]['iteration']}), log10 history:**''')
+        residual_df = pd.DataFrame([i['values'] for i in residual_history],
+                                   index=[i['iteration'] for i in residual_history])
+        st.dataframe(pd.DataFrame([residual_history[-1]['values']]))
+        st.line_chart(np.log10(residual_df.clip(lower=1e-12)))
+    monitor_history = read_progress(job_dir, 'monitors')
+    if monitor_history:
+        st.markdown('**Monitor point history:**')
+        monitor_df = pd.DataFrame([i['values'] for i in monitor_history],
+                                  index=[i['iteration'] for i in monitor_history])
+        st.line_chart(monitor_df.groupby(level=0).last())
+    if job_status.get('stopped_early'):
+        st.success(f'''Stopped at iteration {job_status['iterations']} of {job_status['max_iterations']}: '''
+                   f'''{job_status['iterations_saved']} iterations saved''', icon="✅")
+    elif job_status.get('iterations'):
+        st.markdown(f'''**Iterations:** {job_status['iterations']} of {job_status['max_iterations']}''')
+    if job_status.get('mesh_cells'):
+        st.markdown(f'''**Mesh cells:** {job_status['mesh_cells']:,}''')
+    if job_status.get('solve_seconds'):
+        st.markdown(f'''**Mesh time:** {job_status.get('mesh_seconds', 0):.0f} s, **solve time:** '''
+                    f'''{job_status['solve_seconds']:.0f} s''')
+    if job_status.get('board'):
+        board_status = job_status['board']
+        coverage = ', '.join(f'{layer} {value:g}%' for layer, value in board_status['coverage'].items())
+        st.markdown(f'''**Tiled board:** {board_status['tiles']} tiles in {board_status['blocks']} blocks with '''
+                    f'''{board_status['materials']} materials; copper coverage {coverage}''')
+    if job_status.get('lumping'):
+        lumping_status = job_status['lumping']
+        st.markdown(f'''**Lumping:** {lumping_status['lumped']} of {lumping_status['candidates']} small components '''
+                    f'''merged into {lumping_status['blocks']} blocks, {lumping_status['dropped_clusters']} '''
+                    f'''cluster(s) left as they are because they would cover other components''')
+    if job_state == 'done' and job_status.get('analyze'):
+        reference_jobs = [i for i, i_dir in jobs if i != selected_job and
+                          get_job_status(i_dir).get('state') == 'done' and get_job_status(i_dir).get('analyze')]
+        reference_job = st.selectbox('Compare with the solve of job:', ['None'] + reference_jobs,
+                                     help='A solve of the same board in full detail, e.g. with the trace-detailed '
+                                          'board or without lumping')
+        if reference_job != 'None':
+            summary, compare_df = compare_solves(solve_record(job_dir), solve_record(dict(jobs)[reference_job]))
+            if summary['cell_reduction'] is not None:
+                st.markdown(f'''**Mesh cells:** {summary['cell_reduction']:.1f}% fewer than job {reference_job}''')
+            if summary['solve_speedup'] is not None:
+                st.markdown(f'''**Solve:** {summary['solve_speedup']:.2f}x as fast as job {reference_job}''')
+            if compare_df.empty:
+                st.write('The jobs have no monitor points in common.')
+            else:
+                st.markdown(f'''**Monitor temperatures:** largest difference {summary['max_difference']:.3f} cel, '''
+                            f'''mean {summary['mean_difference']:.3f} cel''')
+                st.dataframe(compare_df)
+
+    col15, col16, col17 = st.columns(3)
+    col15.button('Refresh')
+    auto_refresh = col16.checkbox('Auto refresh', value=job_state in ('queued', 'running'))
+    if job_state in ('queued', 'running'):
+        if col17.button('Cancel Job'):
+            cancel_job(selected_job)
+            st.experimental_rerun()
+        if auto_refresh:
+            time.sleep(5)
+            st.experimental_rerun()
+    elif job_status.get('aedt_pid') and job_state == 'done' and not job_status.get('analyze'):
+        if col17.button('Close AEDT'):
+            try:
+                os.kill(job_status['aedt_pid'], signal.SIGTERM)
+                files = os.listdir(os.getcwd())
+                for file in files:
+                    if file.endswith('.lock'):
+                        os.remove(file)
+                dispatch()
+            except OSError:
+                st.warning('⚠️ No active AEDT sessions!')
+else:
+    st.write('No simulation jobs in the working directory.')
+
+# Queue of the shared analysis server
+with st.expander('Server Queue'):
+    queue = list_queue()
+    if queue:
+        queue_df = pd.DataFrame(queue)[['job_id', 'user', 'priority', 'state', 'cores', 'memory_gb', 'setup_only',
+                                        'preemptions']]
+        queue_df['priority'] = queue_df['priority'].map({v: k for k, v in PRIORITIES.items()})
+        st.dataframe(queue_df)
+    else:
+        st.write('No queued or running jobs.')
+    capacity = get_capacity()
+    col21, col22, col23 = st.columns(3)
+    licenses = col21.number_input('Icepak licenses', min_value=0, value=int(capacity['licenses']), step=1)
+    cores = col22.number_input('Cores', min_value=1, value=int(capacity['cores']), step=1)
+    memory = col23.number_input('Memory [GB]', min_value=0.0, value=float(capacity['memory_gb']), step=1.0,
+                                help='0 to only check the free memory of the machine.')
+    lmutil = st.text_input('lmutil executable (optional):', value=capacity['lmutil'])
+    col24, col25 = st.columns(2)
+    license_server = col24.text_input('License server (optional):', value=capacity['license_server'],
+                                      help='e.g. 1055@licserver')
+    license_feature = col25.text_input('License feature:', value=capacity['license_feature'])
+    if st.button('Save Server Settings'):
+        set_capacity(licenses=int(licenses), cores=int(cores), memory_gb=memory, lmutil=lmutil,
+                     license_server=license_server, license_feature=license_feature)
+        dispatch()
+        st.success('Server settings saved', icon="✅")
+
+# Variations solved on several worker hosts
+with st.expander('Distributed Sweep'):
+    st.write('Solve variations of the setup on several machines. Every worker runs its own non-graphical AEDT '
+             'session and exchanges inputs and results through a shared directory.')
+    # A path on the server, as a folder dialog would open on the server and not in the browser
+    st.session_state['shared_dir'] = st.text_input('Shared directory on the server:',
+                                                   value=st.session_state['shared_dir'] or '',
+                                                   help='Must be reachable at the same path from every worker host')
+    if st.session_state['shared_dir'] and not os.path.isdir(st.session_state['shared_dir']):
+        st.warning('⚠️ The shared directory does not exist!')
+        st.session_state['shared_dir'] = False
+    sweep_labels = {'Ambient Temperature [cel]': 'air_temp', 'Velocity Magnitude [m/s]': 'vel'}
+    col28, col29 = st.columns(2)
+    sweep_parameter = col28.selectbox('Sweep parameter:', list(sweep_labels))
+    sweep_values = col29.text_input('Values:', help='Comma separated, e.g. 20, 30, 40')
+    hosts = st.text_area('Worker hosts:', value='localhost',
+                         help='One host per line. A host listed several times runs several workers. Remote '
+                              'workers are started with ssh and must see the shared directory at the same path.')
+    max_retries = st.number_input('Retries per variation', min_value=0, max_value=10, value=2, step=1)
+    if st.button('Submit Sweep'):
+        values = [i.strip() for i in sweep_values.split(',') if i.strip()]
+        host_list = [i.strip() for i in hosts.splitlines() if i.strip()]
+        host_errors = validate_hosts(host_list, st.session_state['shared_dir'] or '')
+        if not job:
+            st.exception(RuntimeError('One or more input files are missing'))
+        elif not st.session_state['shared_dir'] or not values:
+            st.warning('⚠️ Select a shared directory and enter the sweep values.')
+        elif host_errors:
+            for message in host_errors:
+                st.warning('⚠️ ' + message)
+        else:
+            sweep = sweep_jobs(job, sweep_labels[sweep_parameter], values)
+            batch_id = submit_batch(st.session_state['shared_dir'], sweep, max_retries=int(max_retries))
+            workers = launch_workers(host_list, st.session_state['shared_dir'])
+            st.success(f'Batch {batch_id} submitted to {len(workers)} workers', icon="✅")
+
+    if st.session_state['shared_dir'] and list_batches(st.session_state['shared_dir']):
+        batch_id = st.selectbox('Select batch:', list_batches(st.session_state['shared_dir']))
+        batch_df = batch_status(st.session_state['shared_dir'], batch_id)
+        st.dataframe(batch_df)
+        st.progress(int(100 * (batch_df['state'] == 'done').mean()))
+        if st.button('Copy Solved Projects to Working Directory'):
+            projects = collect_results(st.session_state['shared_dir'], batch_id, os.getcwd())
+            st.success(f'{len(projects)} projects copied', icon="✅")
+
+
+# Power scenarios predicted from the influence matrix of a project
+with st.expander('Power Scenarios'):
+    influence_dir = os.path.dirname(influence_file(os.getcwd(), 'project.aedt'))
+    influence_projects = sorted(os.path.splitext(i)[0] for i in os.listdir(influence_dir) if i.endswith('.npz')) \
+        if os.path.isdir(influence_dir) else []
+    if not influence_projects:
+        st.write('No influence matrix in the working directory. Simulate a project with "Build thermal influence '
+                 'matrix" first.')
+    else:
+        influence_project = st.selectbox('Select project:', influence_projects)
+        model = load_influence(influence_file(os.getcwd(), influence_project + '.aedt'))
+        meta = model['meta']
+        st.write(f'''{len(model['groups'])} heat source groups by {meta['group_column']}, '''
+                 f'''{len(model['monitors'])} monitor points, {meta['conv_type'].lower()} convection at '''
+                 f'''{meta['air_temp']:g} cel''')
+        for message in validity_messages(meta):
+            st.warning('⚠️ ' + message)
+        if meta['max_error'] is not None:
+            st.markdown(f'''**Nominal powers against the full solve:** largest difference '''
+                        f'''{meta['max_error']:.3f} cel, mean difference {meta['mean_error']:.3f} cel''')
+
+        # One row per scenario with the power of every group, starting with the nominal powers
+        if 'influence_scenarios' not in st.session_state:
+            st.session_state['influence_scenarios'] = {}
+        if influence_project not in st.session_state['influence_scenarios']:
+            nominal_df = pd.DataFrame([model['nominal']], columns=model['groups'])
+            nominal_df.insert(0, 'Scenario', NOMINAL_CASE)
+            st.session_state['influence_scenarios'][influence_project] = nominal_df
+        col40, col41 = st.columns([3, 1])
+        scenario_file = col40.file_uploader('Boundary conditions file of a scenario:', type=['csv'],
+                                            key='scenario_file_' + influence_project)
+        if col41.button('Add Scenario from BC File'):
+            if not scenario_file:
+                st.warning('⚠️ Upload the boundary conditions file of the scenario first.')
+            else:
+                bc_df, bc_errors = load_bc_table(scenario_file)[:2]
+                if bc_errors:
+                    st.exception(RuntimeError('The boundary conditions table has errors:\n' + '\n'.join(bc_errors)))
+                else:
+                    group_powers, unknown = group_powers_from_bc(model, bc_df)
+                    if unknown:
+                        st.warning(f'''⚠️ {len(unknown)} powered component(s) are not heat sources of the '''
+                                   f'''influence matrix and are left out: {', '.join(unknown[:10])}''')
+                    scenario_row = pd.DataFrame([group_powers.to_numpy()], columns=model['groups'])
+                    scenario_row.insert(0, 'Scenario', os.path.splitext(scenario_file.name)[0])
+                    st.session_state['influence_scenarios'][influence_project] = pd.concat(
+                        [st.session_state['influence_scenarios'][influence_project], scenario_row], ignore_index=True)
+        scenarios_df = st.data_editor(st.session_state['influence_scenarios'][influence_project], num_rows='dynamic',
+                                      key='influence_scenarios_' + influence_project)
+        scenario_names = [str(name) if isinstance(name, str) and name.strip() else f'Scenario {i + 1}'
+                          for i, name in enumerate(scenarios_df['Scenario'])]
+        group_powers = scenarios_df.drop(columns='Scenario').apply(pd.to_numeric, errors='coerce').fillna(0.0)
+        group_powers.index = scenario_names
+        start = time.perf_counter()
+        predicted_df = evaluate(model, group_powers)
+        elapsed = time.perf_counter() - start
+        st.markdown(f'''**Predicted monitor temperatures [cel]** ({len(scenario_names)} scenario(s) in '''
+                    f'''{1000 * elapsed:.1f} ms):''')
+        st.dataframe(predicted_df)
+        st.dataframe(predicted_df.agg(['max', 'mean']).rename(index={'max': 'Max [cel]', 'mean': 'Mean [cel]'}))
+
+        # Full solves of the working directory to check the prediction against
+        solved_jobs = []
+        for solved_job_id, solved_job_dir in jobs:
+            solved_status = get_job_status(solved_job_dir)
+            if solved_status.get('state') == 'done' and solved_status.get('analyze') and \
+                    read_progress(solved_job_dir, 'monitors'):
+                solved_jobs.append(solved_job_id)
+        if solved_jobs:
+            col32, col33 = st.columns([3, 1])
+            check_job = col32.selectbox('Check against the full solve of job:', solved_jobs)
+            if col33.button('Check Accuracy'):
+                check_job_dir = dict(jobs)[check_job]
+                with open(os.path.join(check_job_dir, 'job.json'), 'r') as f:
+                    check_bc_file = json.load(f)['bc_file']
+                group_powers, unknown = group_powers_from_bc(model, load_bc_table(check_bc_file)[0])
+                if unknown:
+                    st.warning(f'''⚠️ {len(unknown)} powered component(s) of the job are not heat sources of the '''
+                               f'''influence matrix: {', '.join(unknown[:10])}''')
+                solved = final_monitors(check_job_dir)
+                predicted = evaluate(model, pd.DataFrame([group_powers.to_numpy()], columns=model['groups'],
+                                                         index=[check_job]))[check_job]
+                compare_df, max_error, mean_error = accuracy_check(predicted, solved)
+                if max_error is None:
+                    st.warning('⚠️ The job has none of the monitor points of the influence matrix.')
+                else:
+                    st.markdown(f'''**Largest difference:** {max_error:.3f} cel, **mean difference:** '''
+                                f'''{mean_error:.3f} cel''')
+                    st.dataframe(compare_df)
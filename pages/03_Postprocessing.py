@@ -1,19 +1,22 @@
 import os
 import re
 import signal
-import pyaedt
-import pandas as pd
+import warnings
+import importlib.util
 import streamlit as st
-import tkinter as tk
-from PIL import Image
-from tkinter import filedialog as fd
-from ctypes import windll
+from utils.results_cache import ResultsCache, CACHE_FOLDER
+from utils.field_expressions import ExpressionRegistry, max_temperature_expression, heat_flow_expression
 
 st.set_page_config(layout="centered", page_icon="🌡️", page_title="PCB Thermal Analyzer")
 st.title('📊Postprocessing')
 
 # Fix blur issue in tkinter window panels
-windll.shcore.SetProcessDpiAwareness(1)
+try:
+    from ctypes import windll
+    windll.shcore.SetProcessDpiAwareness(1)
+except ImportError:
+    # Not on Windows, e.g. a headless server; files are selected by path
+    pass
 
 
 # Function to get solution name
@@ -23,47 +26,36 @@ def get_solution_name():
     return sol_name
 
 
+# Function to get the metadata index of the selected project
+def get_project_index():
+    st.session_state.project_index = load_project_index(st.session_state.ipk, st.session_state.project,
+                                                        st.session_state.project_index)
+    return st.session_state.project_index
+
+
+# Function to get the named expression registry of the selected project
+def get_expression_registry():
+    registry = st.session_state.expression_registry
+    if not registry or registry.ipk is not st.session_state.ipk or \
+            registry.project != os.path.normcase(os.path.abspath(st.session_state.project)):
+        registry = ExpressionRegistry(st.session_state.ipk, st.session_state.project)
+        st.session_state.expression_registry = registry
+    return registry
+
+
 # Function to get boundary conditions types
 def get_boundary_condition_type():
-    list_bcs = st.session_state.ipk.odesign.GetChildObject('Thermal').GetChildNames()
-    thermal_bc_types = {}
-    for i in list_bcs:
-        type_bc = st.session_state.ipk.odesign.GetChildObject('Thermal').GetChildObject(i).GetPropValue('Type')
-        if type_bc in thermal_bc_types:
-            if not isinstance(thermal_bc_types[type_bc], list):
-                thermal_bc_types[type_bc] = [thermal_bc_types[type_bc]]
-            thermal_bc_types[type_bc].append(i)
-        else:
-            thermal_bc_types[type_bc] = [i]
-    return thermal_bc_types
+    return boundary_types(get_project_index())
 
 
 # Function to get boundary conditions associated with objects
 def get_boundary_condition_association():
-    thermal_bcs = {}
-    omodule = st.session_state.ipk.odesign.GetModule("BoundarySetup")
-    oeditor = st.session_state.ipk.odesign.SetActiveEditor("3D Modeler")
-    obj_bcs = ('Solid Block', 'Hollow Block', 'Source')
-    face_bcs = ('Network', 'Opening', 'Conducting Plate', 'Grille')
-    list_bcs = st.session_state.ipk.odesign.GetChildObject("Thermal").GetChildNames()
-    for bc in list_bcs:
-        type_bc = st.session_state.ipk.odesign.GetChildObject('Thermal').GetChildObject(bc).GetPropValue('Type')
-        obj_bc_dict = {}
-        if type_bc in obj_bcs:
-            block = omodule.GetBoundaryAssignment(bc)
-            objname = [oeditor.GetObjectNameByID(x) for x in block]
-            obj_bc_dict[type_bc] = objname
-        if type_bc in face_bcs:
-            sheet = omodule.GetBoundaryAssignment(bc)
-            objname = [oeditor.GetObjectNameByFaceID(sheet[0])]
-            obj_bc_dict[type_bc] = objname
-        thermal_bcs[bc] = obj_bc_dict
-    return thermal_bcs
+    return boundary_objects(get_project_index())
 
 
 # Function to get monitor point temperatures
 def get_monitor_point_temperatures(sol_name):
-    mon_point_list = list(st.session_state.ipk.odesign.GetChildObject('Monitor').GetChildNames())
+    mon_point_list = get_project_index()['monitors']
     mon_point_quant = []
     for i in mon_point_list:
         x = i + '.Temperature'
@@ -146,13 +138,8 @@ def get_network_junction_temperatures(sol_name):
 
 # Function to get maximum temperature of objects
 def get_object_max_temperatures(sol_name):
-    obj_list = st.session_state.ipk.modeler.model_objects
-    if 'Region' in obj_list:
-        try:
-            obj_list.remove('Region')
-        except RuntimeError:
-            print('Region not present in obj_list')
-    obj_bcs = get_boundary_condition_association()
+    project_index = get_project_index()
+    obj_bcs = boundary_objects(project_index)
     solid_blocks = []
     hollow_blocks = []
     for i in obj_bcs:
@@ -165,34 +152,11 @@ def get_object_max_temperatures(sol_name):
                     hollow_blocks.append(k)
             else:
                 pass
-    if st.session_state.ipk.odesign.GetChildObject('3D Modeler').Get3DComponentDefinitionNames():
-        comp3d_name = st.session_state.ipk.odesign.GetChildObject('3D Modeler').Get3DComponentDefinitionNames()[0]
-        comp3d_instance_name = st.session_state.ipk.odesign.GetChildObject('3D Modeler'). \
-            Get3DComponentInstanceNames(comp3d_name)[0]
-        comp3d_part_names = list(
-            st.session_state.ipk.odesign.GetChildObject('3D Modeler').Get3DComponentPartNames(comp3d_instance_name))
-        solid_blocks = solid_blocks + comp3d_part_names
-    calc_expr = []
-    omodule = st.session_state.ipk.odesign.GetModule("FieldsReporter")
-    omodule.CalcStack("clear")
-    for i in solid_blocks:
-        st.session_state.ipk.post.ofieldsreporter.EnterQty('Temp')
-        st.session_state.ipk.post.ofieldsreporter.EnterVol(i)
-        st.session_state.ipk.post.ofieldsreporter.CalcOp('Maximum')
-        named_expr = i
-        if omodule.DoesNamedExpressionExists(named_expr):
-            omodule.DeleteNamedExpr(named_expr)
-        st.session_state.ipk.post.ofieldsreporter.AddNamedExpression(named_expr, 'Fields')
-        calc_expr.append(named_expr)
-    for i in hollow_blocks:
-        st.session_state.ipk.post.ofieldsreporter.EnterQty('Temp')
-        st.session_state.ipk.post.ofieldsreporter.EnterSurf(i)
-        st.session_state.ipk.post.ofieldsreporter.CalcOp('Maximum')
-        named_expr = i
-        if omodule.DoesNamedExpressionExists(named_expr):
-            omodule.DeleteNamedExpr(named_expr)
-        st.session_state.ipk.post.ofieldsreporter.AddNamedExpression(named_expr, 'Fields')
-        calc_expr.append(named_expr)
+    # Parts of the PCB 3D component, or the tiles of a tiled board
+    solid_blocks = solid_blocks + project_index['pcb_layers']
+    expressions = dict([max_temperature_expression(i) for i in solid_blocks] +
+                       [max_temperature_expression(i, surface=True) for i in hollow_blocks])
+    calc_expr = get_expression_registry().ensure(expressions)
     a = ["X:=", ["All"]]
     b = ["X Component:=", "X", "Y Component:=", calc_expr]
     obj_max_temp = 'Object_Max_Temperatures'
@@ -225,16 +189,42 @@ def get_object_max_temperatures(sol_name):
     return df
 
 
+# Function to get temperature statistics of all solid objects from one field export
+def get_object_temperature_statistics(sol_name):
+    project_index = get_project_index()
+    hollow_blocks = [k for i in project_index['types'].get('Hollow Block', [])
+                     for k in project_index['boundaries'][i]['objects']]
+    solid_names = set(st.session_state.ipk.modeler.solid_names)
+    objects = [i for i in project_index['objects'] if i in solid_names and i not in hollow_blocks]
+    if not objects:
+        return 'No solid objects in the model!'
+    out_dir = os.path.join(st.session_state.workdir, CACHE_FOLDER, 'fields')
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        df = export_object_statistics(st.session_state.ipk, sol_name, objects, out_dir)
+    for w in caught:
+        st.warning('⚠️ ' + str(w.message))
+    if df.empty:
+        return 'No temperatures exported for the solid objects!'
+    return df
+
+
 # Function to plot contours of temperature on PCB layers
 def get_temperature_contours_on_pcb_layers(sol_name):
-    pcb = st.session_state.ipk.modeler.primitives.user_defined_component_names
-    pcb_layers = sorted(st.session_state.ipk.modeler.get_3d_component_object_list(pcb[0]))
+    pcb_layers = get_project_index()['pcb_layers']
     pcb_layer_temps = st.session_state.ipk.post.create_fieldplot_surface(pcb_layers, "Temperature", sol_name,
                                                                          plot_name="Temperature_on_PCB_layers")
     path_image = pcb_layer_temps.export_image(os.path.join(os.getcwd(), "Temperature_on_PCB_layers.png"))
     return path_image
 
 
+# Function to export temperature fields on PCB layers to NumPy arrays
+def get_temperature_fields_on_pcb_layers(sol_name, field_dir, resolution):
+    pcb_layers = get_project_index()['pcb_layers']
+    export_pcb_layer_fields(st.session_state.ipk, sol_name, pcb_layers, field_dir, resolution=resolution)
+    return field_dir
+
+
 # Function to plot contours of temperature on all objects in the model
 def get_temperature_contours_on_all_objects(sol_name):
     model_objects = st.session_state.ipk.modeler.model_objects
@@ -251,42 +241,19 @@ def get_temperature_contours_on_all_objects(sol_name):
 
 # Function to get board side heat flux for objects touching the PCB
 def get_object_board_side_heat_flux(sol_name):
-    model_objects = st.session_state.ipk.modeler.model_objects
-    if 'Region' in model_objects:
-        try:
-            model_objects.remove('Region')
-        except RuntimeError:
-            print('Region not present in obj_list')
-    pcb = st.session_state.ipk.modeler.primitives.user_defined_component_names
-    pcb_layers = sorted(st.session_state.ipk.modeler.get_3d_component_object_list(pcb[0]))
-    components = [x for x in model_objects if x not in pcb_layers]
-    pcb_top_layer = st.session_state.ipk.modeler.get_object_from_name(pcb_layers[0])
-    pcb_bot_layer = st.session_state.ipk.modeler.get_object_from_name(pcb_layers[-1])
-    board_side_faces = {}
+    project_index = get_project_index()
+    pcb_layers = project_index['pcb_layers']
+    components = [x for x in project_index['objects'] if x not in pcb_layers]
+    registry = get_expression_registry()
+    # Board side faces are only looked up for components without a face list
+    face_lists = {}
     for comp in components:
-        obj_handle = st.session_state.ipk.modeler.get_object_from_name(comp)
-        if obj_handle.get_touching_faces(pcb_top_layer):
-            board_side_faces[comp] = str(obj_handle.get_touching_faces(pcb_top_layer)[0])
-        else:
-            board_side_faces[comp] = str(obj_handle.get_touching_faces(pcb_bot_layer)[0])
-    board_side_face_list = []
-    for key in board_side_faces:
-        face_id = board_side_faces[key].split(' ')[1]
-        face_name = key + '_board_side'
-        st.session_state.ipk.modeler.create_face_list([face_id], name=face_name)
-        board_side_face_list.append(face_name)
-    calc_expr = []
-    report_module = st.session_state.ipk.odesign.GetModule("FieldsReporter")
-    report_module.CalcStack("clear")
-    for i in board_side_face_list:
-        report_module.EnterQty("Heat_Flux")
-        report_module.EnterSurf(i)
-        report_module.CalcOp("Integrate")
-        named_expr = str(i) + "_heat_flux"
-        if report_module.DoesNamedExpressionExists(named_expr):
-            report_module.DeleteNamedExpr(named_expr)
-        st.session_state.ipk.post.ofieldsreporter.AddNamedExpression(named_expr, 'Fields')
-        calc_expr.append(named_expr)
+        face_name = comp + '_board_side'
+        if not registry.has_face_list(face_name):
+            obj_handle = st.session_state.ipk.modeler.get_object_from_name(comp)
+            face_lists[face_name] = [board_side_face(st.session_state.ipk, obj_handle, pcb_layers).id]
+    expressions = dict(heat_flow_expression(comp + '_board_side') for comp in components)
+    calc_expr = registry.ensure(expressions, face_lists)
     a = ["X:=", ["All"]]
     b = ["X Component:=", "X", "Y Component:=", calc_expr]
     obj_board_side_heat_flux = 'Object_Board_Side_Heat_Flux'
@@ -318,6 +285,14 @@ def get_object_board_side_heat_flux(sol_name):
     return df
 
 
+# Function to get the results cache of the selected project
+def get_results_cache():
+    cache_dir = os.path.abspath(os.path.join(st.session_state.workdir, CACHE_FOLDER, 'results'))
+    if not st.session_state.results_cache or st.session_state.results_cache.cache_dir != cache_dir:
+        st.session_state.results_cache = ResultsCache(cache_dir)
+    return st.session_state.results_cache
+
+
 def quit_aedt():
     if st.session_state.desktop:
         st.session_state.ipk.save_project()
@@ -347,12 +322,38 @@ if 'close_aedt' not in st.session_state:
     st.session_state.close_aedt = False
 if 'workdir' not in st.session_state:
     st.session_state.workdir = False
+if 'results_cache' not in st.session_state:
+    st.session_state.results_cache = False
+if 'field_dir' not in st.session_state:
+    st.session_state.field_dir = False
+if 'fld_file' not in st.session_state:
+    st.session_state.fld_file = False
+if 'field_index' not in st.session_state:
+    st.session_state.field_index = False
+if 'project_index' not in st.session_state:
+    st.session_state.project_index = False
+if 'expression_registry' not in st.session_state:
+    st.session_state.expression_registry = False
+
+# Without Tk, e.g. on a headless server, files are selected by typing their path
+file_dialogs = importlib.util.find_spec('tkinter') is not None
 
 c1, c2 = st.columns([1, 2])
 aedt_version = c1.selectbox('Select AEDT Release:', ('2023 R1', '2023 R2'))
 c2.write('Select AEDT project file (*.aedt)')
-aedt_project_button = c2.button('Select AEDT Project')
+if file_dialogs:
+    aedt_project_button = c2.button('Select AEDT Project')
+else:
+    aedt_project_button = False
+    project_path = c2.text_input('AEDT project file path:')
+    if project_path:
+        if os.path.isfile(project_path) and project_path.lower().endswith('.aedt'):
+            st.session_state.project = os.path.abspath(project_path)
+        else:
+            st.warning('⚠️ ' + project_path + ' is not an AEDT project file!')
 if aedt_project_button:
+    import tkinter as tk
+    from tkinter import filedialog as fd
     st.session_state.project = True
     root = tk.Tk()
     root.attributes("-topmost", True)
@@ -378,50 +379,180 @@ st.markdown('---')
 
 aedt_release = re.sub(' R', '.', aedt_version)
 post_tuple = ('Monitor Point Temperatures', 'Network Junction Temperatures', 'Object Temperatures',
-              'Temperature Contours on PCB Layers', 'Temperature Contours on Entire Model',
-              'Heat Flow Rates at Object-PCB Interfaces')
+              'Object Temperature Statistics', 'Temperature Contours on PCB Layers',
+              'Temperature Contours on Entire Model', 'Heat Flow Rates at Object-PCB Interfaces',
+              'Temperature Field on PCB Layers (Interactive)', 'Field File Statistics', 'Results Across Runs')
 st.session_state.post_quant = st.selectbox('Postprocessing selection:', post_tuple)
+if st.session_state.post_quant == 'Field File Statistics':
+    c3, c4 = st.columns([3, 1])
+    c3.write('Select exported field file (*.fld)')
+    if file_dialogs:
+        fld_file_button = c4.button('Select Field File')
+    else:
+        fld_file_button = False
+        fld_path = c3.text_input('Field file path:')
+        if fld_path:
+            if os.path.isfile(fld_path):
+                st.session_state.fld_file = os.path.abspath(fld_path)
+            else:
+                st.warning('⚠️ ' + fld_path + ' does not exist!')
+    if fld_file_button:
+        import tkinter as tk
+        from tkinter import filedialog as fd
+        root = tk.Tk()
+        root.attributes("-topmost", True)
+        root.withdraw()
+        try:
+            files = fd.askopenfilenames(parent=root, initialdir=os.getcwd(), filetypes=[('Field File', '*.fld')])
+            st.session_state.fld_file = os.path.abspath(files[0])
+        except RuntimeError:
+            st.session_state.fld_file = False
+    if st.session_state.fld_file:
+        st.markdown(f'''**Selected Field File:** ```{st.session_state.fld_file}```''')
+    region_text = st.text_input('Region [xmin, ymin, zmin, xmax, ymax, zmax] (blank for entire field):')
+    percentile_text = st.text_input('Percentiles:', value='50, 95, 99')
+if st.session_state.post_quant == 'Temperature Field on PCB Layers (Interactive)':
+    field_resolution = st.number_input('Field sample points along longer board side', min_value=20,
+                                       max_value=2000, value=200, step=20, format='%d')
 
 st.session_state.create_report = st.button('Create Report')
 
+# Tables of one value per object of every run are also stored in the results warehouse, for queries across runs
+warehouse_tables = {'Monitor Point Temperatures': 'monitor',
+                    'Network Junction Temperatures': 'junction',
+                    'Object Temperatures': 'object_max',
+                    'Heat Flow Rates at Object-PCB Interfaces': 'heat_flow'}
+table_reports = {'Monitor Point Temperatures': get_monitor_point_temperatures,
+                 'Network Junction Temperatures': get_network_junction_temperatures,
+                 'Object Temperatures': get_object_max_temperatures,
+                 'Object Temperature Statistics': get_object_temperature_statistics,
+                 'Heat Flow Rates at Object-PCB Interfaces': get_object_board_side_heat_flux}
+image_reports = {'Temperature Contours on PCB Layers': get_temperature_contours_on_pcb_layers,
+                 'Temperature Contours on Entire Model': get_temperature_contours_on_all_objects}
+
 if st.session_state.launch_aedt:
     if os.path.exists(os.path.join(os.getcwd(), st.session_state.project + ".lock")):
         os.remove(os.path.join(os.getcwd(), st.session_state.project + ".lock"))
+    # pyaedt takes seconds to import, so it is loaded when AEDT is launched, not on every page visit
+    import pyaedt
     st.session_state.desktop = pyaedt.Desktop(aedt_release)
     st.session_state.ipk = pyaedt.Icepak(st.session_state.project)
 
 if st.session_state.create_report and st.session_state.desktop:
+    # pandas, numpy and the field modules are loaded once a report is created, not on every page visit
+    import pandas as pd
+    from utils.field_export import export_pcb_layer_fields, load_layer_fields, evict_layer_fields
+    from utils.board_model import board_side_face
+    from utils.project_index import load_project_index, boundary_types, boundary_objects
+    from utils.object_stats import export_object_statistics
     solution_name = get_solution_name()
-    if st.session_state.post_quant == 'Monitor Point Temperatures':
-        mon_df = get_monitor_point_temperatures(solution_name)
-        st.dataframe(mon_df)
-    elif st.session_state.post_quant == 'Network Junction Temperatures':
-        net_df = get_network_junction_temperatures(solution_name)
-        st.dataframe(net_df)
-    elif st.session_state.post_quant == 'Object Temperatures':
-        obj_temp_df = get_object_max_temperatures(solution_name)
-        st.dataframe(obj_temp_df)
-    elif st.session_state.post_quant == 'Temperature Contours on PCB Layers':
-        if os.path.exists(os.path.abspath(os.path.join(st.session_state.workdir, 'Temperature_on_PCB_layers.png'))):
-            image_path = os.path.abspath(os.path.join(st.session_state.workdir, 'Temperature_on_PCB_layers.png'))
-        else:
-            image_path = get_temperature_contours_on_pcb_layers(solution_name)
-        image = Image.open(image_path)
-        st.image(image, caption='Temperature Contours on PCB Layers')
-    elif st.session_state.post_quant == 'Temperature Contours on Entire Model':
-        if os.path.exists(os.path.abspath(os.path.join(st.session_state.workdir, 'Temperature_on_all_objects.png'))):
-            image_path = os.path.abspath(os.path.join(st.session_state.workdir, 'Temperature_on_all_objects.png'))
+    results_cache = get_results_cache()
+    report_key = results_cache.key(st.session_state.project, solution_name, st.session_state.post_quant)
+    if st.session_state.post_quant in table_reports:
+        report_df = results_cache.get_table(report_key)
+        if report_df is None:
+            report_df = table_reports[st.session_state.post_quant](solution_name)
+            if isinstance(report_df, pd.DataFrame):
+                results_cache.put_table(report_key, report_df)
+                if st.session_state.post_quant in warehouse_tables:
+                    from utils.warehouse import run_info, store_results
+                    store_results(warehouse_tables[st.session_state.post_quant], report_df,
+                                  run_info(st.session_state.project, solution_name))
+        if isinstance(report_df, pd.DataFrame):
+            st.dataframe(report_df)
         else:
-            image_path = get_temperature_contours_on_all_objects(solution_name)
+            st.warning('⚠️ ' + report_df)
+    elif st.session_state.post_quant in image_reports:
+        image_path = results_cache.get_image(report_key)
+        if image_path is None:
+            image_path = results_cache.put_image(report_key, image_reports[st.session_state.post_quant](solution_name))
+        from PIL import Image
         image = Image.open(image_path)
-        st.image(image, caption='Temperature Contours on Entire Model')
-    elif st.session_state.post_quant == 'Heat Flow Rates at Object-PCB Interfaces':
-        solution_name = get_solution_name()
-        heat_flux_df = get_object_board_side_heat_flux(solution_name)
-        st.dataframe(heat_flux_df)
+        st.image(image, caption=st.session_state.post_quant)
+    elif st.session_state.post_quant == 'Temperature Field on PCB Layers (Interactive)':
+        field_key = results_cache.key(st.session_state.project, solution_name, st.session_state.post_quant,
+                                      resolution=field_resolution)
+        field_dir = os.path.join(os.path.dirname(results_cache.cache_dir), 'fields', field_key)
+        if load_layer_fields(field_dir)[0] is None:
+            get_temperature_fields_on_pcb_layers(solution_name, field_dir, field_resolution)
+            evict_layer_fields(os.path.dirname(field_dir))
+        st.session_state.field_dir = field_dir
     else:
         pass
 
+# Contours of exported layer fields are rendered locally, without going back to AEDT
+if st.session_state.field_dir and st.session_state.post_quant == 'Temperature Field on PCB Layers (Interactive)':
+    import pandas as pd
+    from utils.field_export import load_layer_fields, layer_coordinates, find_hot_spots, probe_layer, \
+        plot_layer_contours
+    field_meta, layer_fields = load_layer_fields(st.session_state.field_dir)
+    if field_meta:
+        layer_names = list(layer_fields)
+        show_layers = st.multiselect('PCB layers:', layer_names, default=layer_names[:1])
+        if show_layers:
+            x_min = min(field_meta['layers'][i]['x0'] for i in show_layers)
+            x_max = max(field_meta['layers'][i]['x1'] for i in show_layers)
+            y_min = min(field_meta['layers'][i]['y0'] for i in show_layers)
+            y_max = max(field_meta['layers'][i]['y1'] for i in show_layers)
+            zoom_x = st.slider('X range [' + field_meta['units'] + ']', x_min, x_max, (x_min, x_max))
+            zoom_y = st.slider('Y range [' + field_meta['units'] + ']', y_min, y_max, (y_min, y_max))
+            num_hot_spots = st.number_input('Number of hot spots per layer', min_value=0, max_value=20, value=3,
+                                            step=1, format='%d')
+            hot_spots = {}
+            hot_spot_rows = []
+            for layer in show_layers:
+                x_layer, y_layer = layer_coordinates(field_meta['layers'][layer])
+                hot_spots[layer] = find_hot_spots(layer_fields[layer], x_layer, y_layer, count=num_hot_spots,
+                                                  min_distance=0.05 * max(x_max - x_min, y_max - y_min))
+                for px, py, value in hot_spots[layer]:
+                    hot_spot_rows.append([layer, px, py, value])
+            st.pyplot(plot_layer_contours(field_meta, layer_fields, show_layers, xlim=zoom_x, ylim=zoom_y,
+                                          hot_spots=hot_spots))
+            if hot_spot_rows:
+                st.dataframe(pd.DataFrame(hot_spot_rows, columns=['Layer', 'X', 'Y', 'Temperature [C]']))
+            col_px, col_py = st.columns(2)
+            probe_x = col_px.number_input('Probe X [' + field_meta['units'] + ']', value=0.5 * (x_min + x_max))
+            probe_y = col_py.number_input('Probe Y [' + field_meta['units'] + ']', value=0.5 * (y_min + y_max))
+            probe_rows = []
+            for layer in show_layers:
+                x_layer, y_layer = layer_coordinates(field_meta['layers'][layer])
+                probe_rows.append([layer, probe_layer(layer_fields[layer], x_layer, y_layer, probe_x, probe_y)])
+            st.dataframe(pd.DataFrame(probe_rows, columns=['Layer', 'Temperature [C]']))
+
+# Statistics of large field files are computed from spatial bins, without loading the point cloud; only the points
+# of bins cut by the region edge are read again, chunk by chunk
+if st.session_state.create_report and st.session_state.post_quant == 'Field File Statistics':
+    import pandas as pd
+    from utils.field_reader import build_field_index, FieldBinIndex
+    if st.session_state.fld_file:
+        fld_stat = os.stat(st.session_state.fld_file)
+        index_file = st.session_state.fld_file + '.' + str(fld_stat.st_mtime_ns) + '_' + str(fld_stat.st_size) + \
+            '.index.npz'
+        if st.session_state.field_index and st.session_state.field_index[0] == index_file:
+            field_index = st.session_state.field_index[1]
+        elif os.path.exists(index_file):
+            field_index = FieldBinIndex.load(index_file)
+        else:
+            field_index = build_field_index(st.session_state.fld_file)
+            field_index.save(index_file)
+        st.session_state.field_index = (index_file, field_index)
+        try:
+            region = [float(i) for i in region_text.split(',')] if region_text.strip() else None
+            percentiles = tuple(float(i) for i in percentile_text.split(',') if i.strip())
+            if region is not None and len(region) != 6:
+                raise ValueError
+        except ValueError:
+            e = RuntimeError('Region must be six comma separated numbers and percentiles comma separated numbers')
+            st.exception(e)
+        else:
+            field_stats = field_index.query(region, percentiles, fld_file=st.session_state.fld_file)
+            if field_stats:
+                st.dataframe(pd.DataFrame(list(field_stats.items()), columns=['Statistic', 'Value']))
+            else:
+                st.warning('⚠️ No field values in the selected region!')
+    else:
+        st.warning('⚠️ No field file selected!')
+
 st.session_state.close_aedt = st.button('Save and Quit AEDT')
 if st.session_state.close_aedt:
     quit_aedt()
@@ -429,3 +560,36 @@ elif st.session_state.desktop:
     st.warning(f'AEDT session open @Port: {st.session_state.desktop.aedt_process_id}')
 else:
     st.warning('⚠️ No active AEDT sessions open!')
+
+# Results of earlier runs are read from the warehouse, without AEDT
+if st.session_state.post_quant == 'Results Across Runs':
+    # The warehouse loads pyarrow, which only this view needs
+    import pandas as pd
+    from utils.warehouse import list_runs, query_results, TABLES
+    table_labels = {v: k for k, v in warehouse_tables.items()}
+    all_runs = list_runs()
+    if all_runs.empty:
+        st.write('No runs stored yet. Tables created with this page are stored automatically.')
+    else:
+        c5, c6 = st.columns(2)
+        query_table = c5.selectbox('Result:', list(TABLES), format_func=lambda x: table_labels[x])
+        query_board = c6.selectbox('Board:', ['All'] + sorted(all_runs['board'].unique()))
+        c7, c8 = st.columns([3, 1])
+        query_names = c7.text_input('Names (comma separated, blank for all):', help='e.g. U12, U15')
+        query_last = c8.number_input('Last runs', min_value=1, value=50, step=10)
+        names = [i.strip() for i in query_names.split(',') if i.strip()]
+        query_df = query_results(query_table, names or None, None if query_board == 'All' else query_board,
+                                 int(query_last))
+        if query_df.empty:
+            st.warning('⚠️ No stored results match the query.')
+        else:
+            value_label = TABLES[query_table][1]
+            summary = query_df.groupby('name')['value'].agg(['max', 'mean', 'min', 'count'])
+            summary.columns = ['Max ' + value_label, 'Mean ' + value_label, 'Min ' + value_label, 'Runs']
+            st.dataframe(summary)
+            history = query_df.pivot_table(index='run_time', columns='name', values='value')
+            history.index = pd.to_datetime(history.index, unit='s')
+            if len(names) and len(names) <= 10:
+                st.line_chart(history)
+            st.dataframe(query_df[['run_time', 'board', 'project', 'air_temp', 'vel', 'power', 'name', 'value']]
+                         .assign(run_time=lambda x: pd.to_datetime(x['run_time'], unit='s')))
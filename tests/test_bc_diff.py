@@ -0,0 +1,69 @@
+import pandas as pd
+
+from utils.bc_diff import diff_bc_tables, incremental_update_blockers, save_build_record, load_build_record, \
+    remove_build_record, BUILD_KEYS
+
+
+def bc_table(changes=None):
+    df = pd.DataFrame({'Instance_Name': ['U1', 'R-2', 'NOREFDES'], 'Package_Name': ['BGA', '0402', 'X'],
+                       'Part_Name': ['CPU', 'RES', 'X'], 'Placement': ['TOP', 'TOP', 'TOP'],
+                       'Height [mm]': ['1.2', '0.5', '1'], 'Include': ['YES', 'YES', 'YES'],
+                       'BC_Type': ['block', 'block', 'block'], 'Power [W]': ['5', '0.1', '1'],
+                       'R_jb [C/W]': ['', '', ''], 'R_jc [C/W]': ['', '', ''], 'Monitor_Point': ['YES', 'NO', 'NO'],
+                       'Material': ['', '', '']})
+    for (row, col), value in (changes or {}).items():
+        df.loc[row, col] = value
+    return df
+
+
+def test_identical_tables_have_no_changes():
+    diff = diff_bc_tables(bc_table(), bc_table())
+    assert diff == {'changed': {}, 'geometry': [], 'included': [], 'excluded': []}
+
+
+def test_numbers_are_compared_by_value():
+    diff = diff_bc_tables(bc_table(), bc_table({(0, 'Power [W]'): '5.0'}))
+    assert diff['changed'] == {}
+
+
+def test_changed_columns_use_block_names():
+    diff = diff_bc_tables(bc_table(), bc_table({(1, 'Power [W]'): '0.2', (1, 'Include'): 'NO'}))
+    assert diff['changed'] == {'R_2': ['Include', 'Power [W]']}
+    assert diff['excluded'] == ['R_2']
+    assert diff['included'] == []
+
+
+def test_geometry_changes_and_new_components():
+    new_df = pd.concat([bc_table({(0, 'Height [mm]'): '2'}), bc_table().iloc[[1]].assign(Instance_Name='C3')])
+    diff = diff_bc_tables(bc_table(), new_df)
+    assert sorted(diff['geometry']) == ['C3', 'U1']
+    assert diff['changed'] == {}
+
+
+def test_blockers():
+    inputs = {key: 'a' for key in BUILD_KEYS}
+    diff = diff_bc_tables(bc_table(), bc_table({(0, 'Power [W]'): '6'}))
+    assert incremental_update_blockers(diff, inputs, dict(inputs)) == []
+    reasons = incremental_update_blockers(diff, inputs, dict(inputs, ecad_hash='b'))
+    assert reasons == ['Input changed: ecad_hash']
+    reasons = incremental_update_blockers(diff, dict(inputs, lumped=['U1']), inputs)
+    assert reasons == ['Lumped components changed: U1']
+
+
+def test_deleted_components_included_again():
+    inputs = {'delete_filtered': True}
+    diff = diff_bc_tables(bc_table({(0, 'Include'): 'NO'}), bc_table())
+    assert diff['included'] == ['U1']
+    assert incremental_update_blockers(diff, inputs, inputs) == ['Deleted components included again: U1']
+
+
+def test_build_record_round_trip(tmp_path):
+    project = tmp_path / 'board.aedt'
+    assert load_build_record(str(project)) == (None, None)
+    project.write_text('')
+    save_build_record(str(project), bc_table(), {'ecad_hash': 'abc', 'lumped': ['R_2']})
+    bc_df, inputs = load_build_record(str(project))
+    assert inputs == {'ecad_hash': 'abc', 'lumped': ['R_2']}
+    assert diff_bc_tables(bc_table(), bc_df)['changed'] == {}
+    remove_build_record(str(project))
+    assert load_build_record(str(project)) == (None, None)
@@ -0,0 +1,99 @@
+import os
+
+import pandas as pd
+import pytest
+
+from utils import bc_editor
+from utils.bc_editor import BcTableEditor, ROW_COLUMN
+
+
+@pytest.fixture
+def bc_file(tmp_path):
+    path = str(tmp_path / 'board_bc.csv')
+    pd.DataFrame({'Instance_Name': ['U1', 'U2', 'R1', 'R2', 'C1'],
+                  'Part_Name': ['CPU', 'PMIC', 'R10K', 'R10K', 'C1U'],
+                  'Package_Name': ['BGA', 'QFN', '0402', '0402', '0603'],
+                  'Power [W]': [5, 1, 0, 0, 0],
+                  'Material': ['', '', '', '', '']}).to_csv(path, index=False)
+    return path
+
+
+def test_numeric_and_text_types(bc_file):
+    editor = BcTableEditor(bc_file)
+    assert editor.df['Power [W]'].dtype == float
+    assert editor.df['Material'].dtype == object
+
+
+def test_pages_and_search(bc_file):
+    editor = BcTableEditor(bc_file)
+    page_df, num_pages = editor.page(2, 2)
+    assert num_pages == 3
+    assert list(page_df[ROW_COLUMN]) == [2, 3]
+    assert list(page_df['Instance_Name']) == ['R1', 'R2']
+    page_df, num_pages = editor.page(1, 100, search='r10k')
+    assert num_pages == 1
+    assert list(page_df[ROW_COLUMN]) == [2, 3]
+
+
+def test_apply_changes(bc_file):
+    editor = BcTableEditor(bc_file)
+    page_df = editor.page(2, 2)[0]
+    # The grid may send numbers back as text
+    page_df['Power [W]'] = page_df['Power [W]'].astype(object)
+    page_df.loc[0, 'Power [W]'] = '0.25'
+    page_df.loc[1, 'Power [W]'] = 'hot'
+    page_df.loc[1, 'Material'] = 'FR-4'
+    page_df.loc[0, 'Instance_Name'] = 'R99'
+    changed, rejected = editor.apply_changes(page_df)
+    assert changed == 2
+    assert rejected == ['R2: Power [W] "hot" is not a number']
+    assert editor.df.loc[2, 'Power [W]'] == 0.25
+    assert editor.df.loc[3, 'Material'] == 'FR-4'
+    # Read-only columns keep their values
+    assert editor.df.loc[2, 'Instance_Name'] == 'R1'
+    # The same page sent back again changes nothing
+    assert editor.apply_changes(editor.page(2, 2)[0]) == (0, [])
+    assert editor.pending == 2
+
+
+def test_flush(bc_file, monkeypatch):
+    monkeypatch.setattr(bc_editor, 'FLUSH_EDITS', 2)
+    monkeypatch.setattr(bc_editor, 'FLUSH_INTERVAL', 1e9)
+    editor = BcTableEditor(bc_file)
+    page_df = editor.page(1, 5)[0]
+    page_df.loc[0, 'Power [W]'] = 6
+    editor.apply_changes(page_df)
+    assert not editor.flush()
+    page_df.loc[1, 'Power [W]'] = 2
+    editor.apply_changes(page_df)
+    assert editor.flush()
+    assert editor.pending == 0
+    assert list(pd.read_csv(bc_file)['Power [W]']) == [6, 2, 0, 0, 0]
+    assert not editor.is_stale()
+    os.utime(bc_file, ns=(0, 0))
+    assert editor.is_stale()
+
+
+def test_replace(bc_file):
+    editor = BcTableEditor(bc_file)
+    new_df = editor.df.copy()
+    new_df['Power [W]'] = 1.0
+    editor.replace(new_df, 4)
+    assert editor.revision == 1
+    assert editor.pending == 0
+    assert list(pd.read_csv(bc_file)['Power [W]']) == [1.0] * 5
+
+
+def test_csv_is_built_again_only_after_edits(bc_file):
+    editor = BcTableEditor(bc_file)
+    assert not editor.csv_ready()
+    csv = editor.to_csv()
+    assert editor.csv_ready()
+    assert editor.to_csv() is csv
+    page_df = editor.page(1, 5)[0]
+    editor.apply_changes(page_df)
+    assert editor.csv_ready()
+    page_df.loc[4, 'Power [W]'] = 0.5
+    editor.apply_changes(page_df)
+    assert not editor.csv_ready()
+    assert editor.to_csv().splitlines()[-1] == 'C1,C1U,0603,0.5,'
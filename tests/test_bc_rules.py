@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import bc_rules
+from utils.bc_rules import validate_rule, rule_mask, apply_rules, save_rules, load_rules, rules_to_table, \
+    table_to_rules
+
+
+@pytest.fixture
+def bc_df():
+    return pd.DataFrame({'Instance_Name': ['U1', 'u2', 'U10', 'R1', 'C7'],
+                         'Designator_Type': ['IC', 'IC', 'IC', 'RES', 'CAP'],
+                         'Package_Name': ['BGA256', 'QFN32', 'BGA64', '0402', '0603'],
+                         'Part_Name': ['CPU', 'PMIC', 'DDR', 'R10K', 'C1U'],
+                         'Placement': ['TOP', 'TOP', 'BOTTOM', 'TOP', 'BOTTOM'],
+                         'Height [mm]': [1.5, 0.9, 1.2, 0.35, 0.5],
+                         'Include': ['NO', 'NO', 'NO', 'NO', 'NO'],
+                         'BC_Type': ['block'] * 5,
+                         'Power [W]': [0.0] * 5,
+                         'R_jb [C/W]': [np.nan] * 5})
+
+
+@pytest.fixture(params=[True, False], ids=['per value', 'one pass'])
+def match_mode(request, monkeypatch):
+    # Both ways of testing a pattern must select the same rows
+    monkeypatch.setattr(bc_rules, 'MAX_LOOP_ROWS', 1000 if request.param else 0)
+
+
+def test_validate_rule():
+    assert validate_rule({'instance': 'U\\d+', 'set': {'Include': 'yes', 'Power [W]': 1}}) == []
+    errors = validate_rule({'name': 'Bad', 'instance': 'U(', 'colour': 'red',
+                            'set': {'Include': 'maybe', 'Power [W]': -1, 'Instance_Name': 'X'}})
+    assert len(errors) == 5
+    assert all(i.startswith('Bad: ') for i in errors)
+    assert validate_rule({'instance': 'U1'}) == ['Rule: nothing to set']
+
+
+def test_regex_and_wildcards(bc_df, match_mode):
+    assert list(rule_mask(bc_df, {'instance': 'U\\d', 'set': {}})) == [True, True, False, False, False]
+    assert list(rule_mask(bc_df, {'package': 'bga*', 'set': {}})) == [True, False, True, False, False]
+    assert list(rule_mask(bc_df, {'package': '060?', 'placement': 'bottom', 'set': {}})) == \
+        [False, False, False, False, True]
+
+
+def test_inline_flags(bc_df, match_mode):
+    mask = rule_mask(bc_df, {'instance': '(?i)u1\\d*', 'set': {}})
+    assert list(mask) == [True, False, True, False, False]
+
+
+def test_heights(bc_df, match_mode):
+    mask = rule_mask(bc_df, {'min_height': 0.5, 'max_height': 1.2, 'designator_type': 'IC', 'set': {}})
+    assert list(mask) == [False, True, True, False, False]
+
+
+def test_later_rules_win(bc_df):
+    rules = [{'instance': 'U.*', 'set': {'Include': 'yes', 'Power [W]': 1.0}},
+             {'package': 'BGA*', 'set': {'Power [W]': 3.0, 'BC_Type': 'NETWORK', 'R_jb [C/W]': 2.1}}]
+    new_df, matched, changed = apply_rules(bc_df, rules)
+    assert matched == [3, 2]
+    assert list(new_df['Include']) == ['YES', 'YES', 'YES', 'NO', 'NO']
+    assert list(new_df['Power [W]']) == [3.0, 1.0, 3.0, 0.0, 0.0]
+    assert list(new_df['BC_Type']) == ['network', 'block', 'network', 'block', 'block']
+    assert changed == 3 + 3 + 2 + 2
+    # The input table is left as it was
+    assert list(bc_df['Include']) == ['NO'] * 5
+
+
+def test_invalid_rules_are_not_applied(bc_df):
+    with pytest.raises(ValueError):
+        apply_rules(bc_df, [{'instance': '[', 'set': {'Include': 'YES'}}])
+
+
+def test_rules_file_and_table_round_trip(tmp_path):
+    rules = [{'name': 'BGA', 'package': 'BGA*', 'min_height': 1.0, 'set': {'BC_Type': 'network', 'R_jb [C/W]': 2.1}},
+             {'name': 'Rule 2', 'instance': 'R\\d+', 'set': {'Include': 'NO'}}]
+    rules_file = str(tmp_path / ('board' + bc_rules.RULES_FILE_EXTENSION))
+    save_rules(rules_file, rules)
+    assert load_rules(rules_file) == rules
+    assert table_to_rules(rules_to_table(rules)) == rules
+    assert table_to_rules(rules_to_table([])) == []
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from utils.board_model import polygon_mask, copper_mask, tile_edges, sample_points, layer_conductivities, \
+    tile_board, tile_blocks
+
+
+def rectangle(x0, y0, x1, y1):
+    return np.array([x0, x1, x1, x0], dtype=float), np.array([y0, y0, y1, y1], dtype=float)
+
+
+def test_polygon_mask():
+    xs = ys = np.arange(10) + 0.5
+    mask = polygon_mask(*rectangle(2, 3, 6, 5), xs, ys)
+    assert mask.sum() == 4 * 2
+    assert mask[3:5, 2:6].all()
+    # Triangle whose long side passes between the points
+    triangle = np.array([0, 9.9, 0]), np.array([0, 0, 9.9])
+    assert polygon_mask(*triangle, xs, ys).sum() == 45
+    assert not polygon_mask(*rectangle(20, 20, 30, 30), xs, ys).any()
+
+
+def test_copper_mask_cuts_voids():
+    xs = ys = np.arange(10) + 0.5
+    shapes = [(rectangle(0, 0, 10, 10), [rectangle(2, 2, 4, 4)]), (rectangle(3, 3, 4, 4), [])]
+    copper = copper_mask(shapes, xs, ys)
+    # The second shape fills part of the void of the first
+    assert copper.sum() == 100 - 4 + 1
+    assert not copper[2, 2] and copper[3, 3]
+
+
+def test_tile_grid():
+    edges = tile_edges(0.0, 12.0, 5.0)
+    assert list(edges) == [0, 4, 8, 12]
+    assert list(tile_edges(0.0, 10.0, 5.0)) == [0, 5, 10]
+    assert list(sample_points(np.array([0.0, 4.0]), 4)) == [0.5, 1.5, 2.5, 3.5]
+
+
+def test_traces_conduct_along_their_direction():
+    samples = 4
+    copper = np.zeros((samples, samples), dtype=bool)
+    copper[1] = True
+    kx, ky, kz = layer_conductivities(copper, 400.0, 0.4, samples)
+    assert kx[0, 0] == pytest.approx((400 + 3 * 0.4) / 4)
+    assert ky[0, 0] == pytest.approx(4 / (1 / 400 + 3 / 0.4))
+    assert kz[0, 0] == pytest.approx((400 + 3 * 0.4) / 4)
+
+
+def test_tile_board_and_blocks():
+    # Copper on the left half of the top layer, a core below and no copper on the bottom layer
+    layout = {'outline': rectangle(0, 0, 10, 4),
+              'layers': [{'name': 'TOP', 'thickness': 0.035, 'metal': 400.0, 'fill': 0.3,
+                          'shapes': [(rectangle(0, 0, 5, 4), [])]},
+                         {'name': 'CORE', 'thickness': 1.5, 'metal': None, 'fill': 0.3, 'shapes': []},
+                         {'name': 'BOTTOM', 'thickness': 0.035, 'metal': 400.0, 'fill': 0.3, 'shapes': []}]}
+    tiles = tile_board(layout, 2.5, sample_pitch=0.5)
+    assert tiles['inside'].shape == (2, 4) and tiles['inside'].all()
+    assert tiles['thickness'] == pytest.approx(1.57)
+    assert list(tiles['coverage']['TOP'][0]) == [1, 1, 0, 0]
+    assert tiles['kx'][0, 0] == pytest.approx((0.035 * 400 + 1.535 * 0.3) / 1.57)
+    assert tiles['kx'][0, 3] == pytest.approx(0.3)
+    blocks, materials = tile_blocks(tiles)
+    # Each row has a copper block and a bare block
+    assert len(blocks) == 4 and len(materials) == 2
+    assert list(blocks[0, :4]) == [0, 0, 5, 2]
+    assert sorted(blocks[:, 4]) == [0, 0, 1, 1]
+
+
+def test_tiles_outside_the_outline_are_left_out():
+    outline = np.array([0, 10, 10, 5, 5, 0], dtype=float), np.array([0, 0, 10, 10, 5, 5], dtype=float)
+    layout = {'outline': outline, 'layers': [{'name': 'CORE', 'thickness': 1.0, 'metal': None, 'fill': 0.3,
+                                              'shapes': []}]}
+    tiles = tile_board(layout, 5.0, sample_pitch=0.5)
+    assert tiles['inside'].tolist() == [[True, True], [False, True]]
+    blocks, materials = tile_blocks(tiles)
+    assert blocks[:, :4].tolist() == [[0, 0, 10, 5], [5, 5, 10, 10]]
+    assert materials.tolist() == [[0.3, 0.3, 0.3]]
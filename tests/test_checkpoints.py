@@ -0,0 +1,88 @@
+import os
+
+import pandas as pd
+import pytest
+
+from utils import checkpoints
+from utils.ecad_cache import ecad_content_hash
+from utils.checkpoints import StageCheckpoints, BUILD_STAGES, SOLVE_STAGE, stage_keys
+
+
+@pytest.fixture
+def job(tmp_path, monkeypatch):
+    # ECAD hashes are remembered in a cache of the test, not of the user
+    monkeypatch.setattr(checkpoints, 'ecad_content_hash',
+                        lambda path: ecad_content_hash(path, cache_dir=str(tmp_path / 'ecad_cache')))
+    (tmp_path / 'board.brd').write_text('layout')
+    (tmp_path / 'board.emn').write_text('outline')
+    (tmp_path / 'board.emp').write_text('library')
+    return {'ecad_file': str(tmp_path / 'board.brd'), 'ecad_type': 'BRD File', 'project_name': 'board.aedt',
+            'idf_file': str(tmp_path / 'board.emn'), 'all_points': False, 'delete_filtered': False,
+            'mesh_fidelity': 'Coarse', 'materials_file': '', 'conv_type': 'Natural', 'vel': '0', 'vel_dir': '+X',
+            'air_temp': '25', 'gravity_direction': '-Z'}
+
+
+@pytest.fixture
+def bc_df():
+    return pd.DataFrame({'Instance_Name': ['U1', 'R1'], 'Placement': ['TOP', 'TOP'], 'Include': ['YES', 'NO'],
+                         'BC_Type': ['block', 'block'], 'Power [W]': ['2', '0'], 'R_jb [C/W]': ['', ''],
+                         'R_jc [C/W]': ['', ''], 'Monitor_Point': ['YES', 'NO'], 'Material': ['', '']})
+
+
+def changed_stages(old_keys, new_keys):
+    return [stage for stage, percent in BUILD_STAGES if old_keys[stage] != new_keys[stage]]
+
+
+def test_changed_input_invalidates_later_stages(job, bc_df, tmp_path):
+    keys = stage_keys(job, bc_df)
+    assert stage_keys(job, bc_df) == keys
+    assert changed_stages(keys, stage_keys(dict(job, mesh_fidelity='Fine'), bc_df)) == \
+        ['Mesh setup', 'Boundary conditions', 'Solution setup']
+    power_df = bc_df.assign(**{'Power [W]': ['3', '0']})
+    assert changed_stages(keys, stage_keys(job, power_df)) == ['Boundary conditions', 'Solution setup']
+    # The IDF library file is an input of the IDF import
+    (tmp_path / 'board.emp').write_text('library 2')
+    assert changed_stages(keys, stage_keys(job, bc_df))[0] == 'IDF import'
+
+
+def test_save_resume_and_restore(job, bc_df, tmp_path):
+    project_file = tmp_path / 'work' / 'board.aedt'
+    project_file.parent.mkdir()
+    keys = stage_keys(job, bc_df)
+    record = StageCheckpoints(str(tmp_path), 'board.aedt', keys)
+    assert record.resume_point() is None
+    for stage, percent in BUILD_STAGES[:3]:
+        project_file.write_text(stage)
+        record.save(stage, str(project_file), {'stage': stage})
+    assert StageCheckpoints(str(tmp_path), 'board.aedt', keys).resume_point() == BUILD_STAGES[2][0]
+
+    # A changed input resumes from the last stage before it
+    new_keys = stage_keys(dict(job, all_points=True), bc_df)
+    record = StageCheckpoints(str(tmp_path), 'board.aedt', new_keys)
+    stage = record.resume_point()
+    assert stage == 'IDF import'
+    restored = record.restore(stage, str(tmp_path / 'retry'))
+    assert open(restored).read() == 'IDF import'
+    assert record.state(stage) == {'stage': 'IDF import'}
+
+    # Saving a stage drops the checkpoints of the stages after it
+    record.complete(SOLVE_STAGE)
+    record.save('PCB creation', str(project_file), {})
+    assert 'IDF import' not in record.record['stages']
+    assert SOLVE_STAGE not in record.record['stages']
+    assert not os.path.exists(record._snapshot_dir('IDF import'))
+    record.clear()
+    assert StageCheckpoints(str(tmp_path), 'board.aedt', keys).resume_point() is None
+
+
+def test_states_are_copies(job, bc_df, tmp_path):
+    project_file = tmp_path / 'board.aedt'
+    project_file.write_text('')
+    record = StageCheckpoints(str(tmp_path), 'board.aedt', stage_keys(job, bc_df))
+    state = {'lumped': ['R1']}
+    record.save('ECAD import', str(project_file), state)
+    # Later stages extend the state they were given
+    state['lumped'].append('R2')
+    restored = record.state('ECAD import')
+    restored['lumped'].append('R3')
+    assert record.state('ECAD import') == {'lumped': ['R1']}
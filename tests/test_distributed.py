@@ -0,0 +1,33 @@
+import subprocess
+
+import pytest
+
+from utils import distributed
+from utils.distributed import validate_hosts, launch_workers
+
+
+def test_validate_hosts():
+    assert validate_hosts(['localhost', 'node-01.lab', '10.0.0.2'], '/share/batches') == []
+    errors = validate_hosts(['h1 & del /s C:\\', '-oProxyCommand=calc', 'node_1'], '/share')
+    assert len(errors) == 3
+    assert all(i.endswith('is not a valid host name') for i in errors)
+    # Quotes only matter once the path goes through the shell of a remote host
+    assert validate_hosts(['localhost'], '/share/"x"') == []
+    assert len(validate_hosts(['node1'], '/share/"x" & calc')) == 1
+
+
+def test_workers_are_started_without_a_shell(tmp_path, monkeypatch):
+    started = []
+
+    def popen(args, **kwargs):
+        started.append((args, kwargs.get('shell', False)))
+    monkeypatch.setattr(subprocess, 'Popen', popen)
+    shared_dir = str(tmp_path / 'shared dir')
+    assert launch_workers(['localhost', 'node1'], shared_dir, python='/opt/py/python') == ['localhost-1', 'node1-2']
+    assert started[0] == (['/opt/py/python', '-m', 'utils.host_worker', shared_dir, '--name', 'localhost-1'], False)
+    assert started[1] == (['ssh', 'node1', '"/opt/py/python"', '-m', 'utils.host_worker', f'"{shared_dir}"',
+                           '--name', 'node1-2'], False)
+    with pytest.raises(ValueError):
+        launch_workers(['node1; rm -rf ~'], shared_dir)
+    assert len(started) == 2
+    assert distributed.REMOTE_COMMAND[0] == 'ssh'
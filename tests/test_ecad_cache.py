@@ -0,0 +1,62 @@
+import os
+
+from utils.ecad_cache import ecad_content_hash, layout_key, get_cached_layout, store_layout, restore_layout
+
+
+def saved_layout(folder, name='board'):
+    os.makedirs(os.path.join(folder, name + '.aedb'))
+    with open(os.path.join(folder, name + '.aedt'), 'w') as f:
+        f.write('project')
+    with open(os.path.join(folder, name + '.aedb', 'edb.def'), 'w') as f:
+        f.write('edb')
+    return os.path.join(folder, name + '.aedt')
+
+
+def test_content_hash(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    (tmp_path / 'a' / 'board.brd').write_text('layout')
+    (tmp_path / 'b' / 'board.brd').write_text('layout')
+    first = ecad_content_hash(str(tmp_path / 'a' / 'board.brd'), cache_dir)
+    assert ecad_content_hash(str(tmp_path / 'b' / 'board.brd'), cache_dir) == first
+    assert ecad_content_hash(str(tmp_path / 'a' / 'board.brd'), cache_dir) == first
+    (tmp_path / 'a' / 'board.brd').write_text('layout 2')
+    assert ecad_content_hash(str(tmp_path / 'a' / 'board.brd'), cache_dir) != first
+    assert [i for i in os.listdir(cache_dir) if i.endswith('.tmp')] == []
+
+
+def test_layouts_are_kept_per_release_and_type():
+    keys = {layout_key('abc', 'BRD File', '2023.1'), layout_key('abc', 'BRD File', '2023.2'),
+            layout_key('abc', 'ODB++ File', '2023.1'), layout_key('abd', 'BRD File', '2023.1')}
+    assert len(keys) == 4
+
+
+def test_store_and_restore(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    key = layout_key('abc', 'BRD File', '2023.1')
+    assert get_cached_layout(key, cache_dir) is None
+    store_layout(key, saved_layout(str(tmp_path / 'work')), {'ecad_type': 'BRD File'}, cache_dir)
+    assert get_cached_layout(key, cache_dir)['project'] == 'board.aedt'
+    project = restore_layout(key, str(tmp_path / 'restored'), cache_dir)
+    assert open(project).read() == 'project'
+    assert os.path.exists(os.path.join(str(tmp_path / 'restored'), 'board.aedb', 'edb.def'))
+
+
+def test_storing_again_keeps_the_stored_layout(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    key = layout_key('abc', 'BRD File', '2023.1')
+    store_layout(key, saved_layout(str(tmp_path / 'worker1')), {'worker': 1}, cache_dir)
+    store_layout(key, saved_layout(str(tmp_path / 'worker2')), {'worker': 2}, cache_dir)
+    assert get_cached_layout(key, cache_dir)['worker'] == 1
+    assert os.listdir(cache_dir) == [key]
+
+
+def test_least_recently_used_layouts_are_evicted(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    for i in range(3):
+        key = layout_key(str(i), 'BRD File', '2023.1')
+        store_layout(key, saved_layout(str(tmp_path / f'work{i}')), {}, cache_dir, max_entries=2)
+        os.utime(os.path.join(cache_dir, key, 'layout.json'), (i, i))
+    assert get_cached_layout(layout_key('0', 'BRD File', '2023.1'), cache_dir) is None
+    assert get_cached_layout(layout_key('2', 'BRD File', '2023.1'), cache_dir) is not None
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from utils.field_export import layer_sample_grid, points_to_grid
+
+
+def test_layer_sample_grid():
+    x, y, z = layer_sample_grid([0, 0, 1, 10, 5, 1.6], 11)
+    assert len(x) == 11 and len(y) == 6
+    assert x[0] == 0 and x[-1] == 10 and y[-1] == 5 and z == pytest.approx(1.3)
+    # A thin layer still gets two points across
+    x, y, z = layer_sample_grid([0, 0, 0, 100, 0.01, 0], 11)
+    assert len(y) == 2
+
+
+@pytest.mark.parametrize('bounding_box', [[1, 2, 0, 1, 2, 0], [0, 0, 0, 10, 0, 1], [0, 0, 0, 0, 10, 1],
+                                          [5, 0, 0, 0, 5, 1]])
+def test_layer_without_area_is_rejected(bounding_box):
+    with pytest.raises(ValueError, match='no area'):
+        layer_sample_grid(bounding_box, 200)
+
+
+def test_points_to_grid():
+    x, y, z = layer_sample_grid([0, 0, 0, 4, 2, 0], 5)
+    points = np.array([[i, j, z, 10 * i + j] for j in y for i in x if (i, j) != (2, 1)])
+    grid = points_to_grid(points, x, y)
+    assert grid.shape == (3, 5)
+    assert grid[2, 4] == 42 and np.isnan(grid[1, 2])
@@ -0,0 +1,57 @@
+import numpy as np
+
+from utils.field_reader import _parse_block, iter_field_chunks, build_field_index
+
+REGION = [0.23, 0.41, 0.0, 0.67, 0.93, 1.0]
+
+
+def write_field_file(path, points):
+    with open(path, 'w') as f:
+        f.write('Grid Output Min: [0 0 0] Max: [1 1 1]\nNum Points: %d\n' % len(points))
+        f.write('\n'.join('%.6f %.6f %.6f %.4f' % tuple(i) for i in points) + '\n')
+
+
+def field_points(num_points=5000):
+    rng = np.random.default_rng(1)
+    points = rng.random((num_points, 4))
+    points[:, 3] = 20 + 80 * points[:, 0] + 10 * points[:, 1]
+    return points
+
+
+def test_parse_block():
+    assert _parse_block('1 2 3 4\n5 6 7 8\n', 4).tolist() == [[1, 2, 3, 4], [5, 6, 7, 8]]
+    # Stray lines, blank lines and rows of another length are skipped, also when the value count fits
+    assert _parse_block('1 2 3 4\nNaN values follow\n\n5 6 7 8', 4).tolist()[1] == [5, 6, 7, 8]
+    assert _parse_block('1 2 3\n4 5 6 7 8\n1 2 3 4\n', 4).tolist() == [[1, 2, 3, 4]]
+    assert _parse_block('1 2 3 4\n5 6 x 8\n', 4).tolist() == [[1, 2, 3, 4]]
+    assert _parse_block('', 4).shape == (0, 4)
+
+
+def test_chunks_end_on_line_boundaries(tmp_path):
+    fld_file = str(tmp_path / 'field.fld')
+    points = field_points(1000)
+    write_field_file(fld_file, points)
+    blocks = list(iter_field_chunks(fld_file, chunk_bytes=1000))
+    assert len(blocks) > 10
+    assert np.allclose(np.vstack(blocks), points, atol=1e-4)
+
+
+def test_region_statistics_are_exact(tmp_path):
+    fld_file = str(tmp_path / 'field.fld')
+    points = field_points()
+    write_field_file(fld_file, points)
+    index = build_field_index(fld_file, shape=(8, 8, 2), chunk_bytes=20000)
+    assert index.query()['count'] == len(points)
+    points = np.vstack(list(iter_field_chunks(fld_file)))
+    xyz = points[:, :3]
+    values = points[(xyz >= REGION[:3]).all(axis=1) & (xyz <= REGION[3:]).all(axis=1), 3]
+    inside, partial = index.region_mask(REGION)
+    assert inside.any() and partial.any()
+    stats = index.query(REGION, (50,), fld_file=fld_file, chunk_bytes=20000)
+    assert stats['count'] == len(values)
+    assert np.isclose(stats['min'], values.min()) and np.isclose(stats['max'], values.max())
+    assert np.isclose(stats['mean'], values.mean())
+    assert abs(stats['p50'] - np.percentile(values, 50)) <= (index.value_range[1] - index.value_range[0]) / 128
+    # Without the field file, the bins cut by the region count as a whole
+    assert index.query(REGION)['count'] == int(index.count[inside | partial].sum()) > len(values)
+    assert index.query([2, 2, 2, 3, 3, 3], fld_file=fld_file) is None
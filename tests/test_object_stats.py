@@ -0,0 +1,106 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from utils.field_export import read_field_points
+from utils.object_stats import object_sample_points, match_sample_values, object_statistics, \
+    export_object_statistics, STAT_PERCENTILE
+
+# Coordinates with more digits than the export writes, so rounding them is not enough to find the samples
+BOXES = np.array([[12.3456789, 45.678912, 0.1234567, 13.987654, 47.123456, 1.6543219],
+                  [151.234567, 98.7654321, 1.6, 154.321987, 100.123457, 2.9876543]])
+
+
+def write_field_file(path, points, values):
+    # The export writes coordinates with six significant digits, in an order of its own
+    rows = ['%g %g %g %s' % (x, y, z, 'Nan' if np.isnan(v) else '%g' % v) for (x, y, z), v in zip(points, values)]
+    order = np.random.default_rng(0).permutation(len(rows))
+    with open(path, 'w') as f:
+        f.write('Grid Output Min: [0 0 0] Max: [1 1 1]\nNum Points: %d\n' % len(rows))
+        f.write('\n'.join(rows[i] for i in order) + '\n')
+
+
+def test_sample_points():
+    points, owners = object_sample_points(BOXES, samples=4)
+    assert list(np.bincount(owners)) == [4 * 4 * 4, 4 * 2 * 2]
+    for i, box in enumerate(BOXES):
+        inside = points[owners == i]
+        assert (inside > box[:3]).all() and (inside < box[3:]).all()
+    points, owners = object_sample_points(np.empty((0, 6)))
+    assert points.shape == (0, 3) and owners.shape == (0,)
+
+
+def test_every_exported_sample_is_found(tmp_path):
+    points, owners = object_sample_points(BOXES)
+    values = 25 + np.arange(len(points), dtype=float)
+    values[::7] = np.nan
+    fld_file = str(tmp_path / 'samples.fld')
+    write_field_file(fld_file, points, values)
+    found, matched = match_sample_values(points, read_field_points(fld_file, dtype=np.float64, skip_nan=False))
+    assert matched.all()
+    np.testing.assert_array_equal(np.isnan(found), np.isnan(values))
+    np.testing.assert_allclose(found[~np.isnan(values)], values[~np.isnan(values)])
+
+
+def test_missing_samples_are_reported(tmp_path):
+    points, owners = object_sample_points(BOXES)
+    fld_file = str(tmp_path / 'samples.fld')
+    write_field_file(fld_file, points[:-3], np.full(len(points) - 3, 30.0))
+    found, matched = match_sample_values(points, read_field_points(fld_file, dtype=np.float64, skip_nan=False))
+    assert list(np.flatnonzero(~matched)) == [len(points) - 3, len(points) - 2, len(points) - 1]
+    assert (found[matched] == 30).all() and np.isnan(found[~matched]).all()
+    found, matched = match_sample_values(points, np.empty((0, 4)))
+    assert not matched.any()
+
+
+def test_statistics():
+    points = np.array([[0, 0, 0], [1, 0, 0], [2, 0, 0], [3, 0, 0], [0, 0, 0], [0, 0, 1]], dtype=float)
+    owners = np.array([0, 0, 0, 0, 2, 2])
+    values = np.array([20, 22, 24, 26, 50, np.nan])
+    df = object_statistics(['U1', 'U2', 'U3'], points, owners, values)
+    # U2 has no samples, and U3 only one with a value
+    assert list(df['Object']) == ['U1', 'U3']
+    u1 = df.iloc[0]
+    assert (u1['Max [C]'], u1['Mean [C]'], u1['Min [C]'], u1['Samples']) == (26, 23, 20, 4)
+    assert u1[f'P{STAT_PERCENTILE} [C]'] == pytest.approx(np.percentile([20, 22, 24, 26], STAT_PERCENTILE))
+    assert u1['Gradient [C/mm]'] == pytest.approx(2.0)
+    assert df.iloc[1]['Gradient [C/mm]'] == 0
+
+
+class FakeObject:
+    def __init__(self, box):
+        self.bounding_box = list(box)
+
+
+class FakeIcepak:
+    """ Enough of an Icepak design to export a temperature field at sample points """
+
+    def __init__(self, boxes, drop=0):
+        self.modeler = self
+        self.post = self
+        self.model_units = 'mm'
+        self.boxes = boxes
+        self.drop = drop
+
+    def get_object_from_name(self, name):
+        return FakeObject(self.boxes[name])
+
+    def export_field_file(self, quantity_name, solution, filename, obj_list, sample_points_lists,
+                          export_with_sample_points):
+        points = np.array(sample_points_lists)[self.drop:]
+        write_field_file(filename, points, 25 + points[:, 0])
+
+
+def test_export_object_statistics(tmp_path):
+    ipk = FakeIcepak({'U1': BOXES[0], 'U2': BOXES[1]})
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        df = export_object_statistics(ipk, 'Setup1 : SteadyState', ['U1', 'U2'], str(tmp_path))
+    assert list(df['Object']) == ['U1', 'U2']
+    # Temperature rises with x, so the hottest sample is in the last of five cells along x
+    assert df['Max [C]'].iloc[1] == pytest.approx(25 + BOXES[1, 0] + 0.9 * (BOXES[1, 3] - BOXES[1, 0]), rel=1e-5)
+    assert not (tmp_path / 'object_samples.fld').exists()
+
+    with pytest.warns(UserWarning, match='2 of .* sample points were not found'):
+        export_object_statistics(FakeIcepak({'U1': BOXES[0]}, drop=2), 'Setup1 : SteadyState', ['U1'], str(tmp_path))
@@ -0,0 +1,39 @@
+import pytest
+
+from utils import scheduler
+from utils.scheduler import set_capacity, submit_job, checked_free_licenses, get_capacity, list_queue
+
+
+def test_lmstat_is_asked_once_per_interval(tmp_path, monkeypatch):
+    db_file = str(tmp_path / 'scheduler.db')
+    set_capacity(db_file, lmutil='lmutil', license_server='1055@licserver')
+    calls = []
+
+    def free_licenses(capacity):
+        calls.append(capacity['license_server'])
+        return 3
+    monkeypatch.setattr(scheduler, 'free_licenses', free_licenses)
+    capacity = get_capacity(db_file)
+    assert checked_free_licenses(capacity, db_file)[0] == 3
+    assert checked_free_licenses(capacity, db_file)[0] == 3
+    assert len(calls) == 1
+    monkeypatch.setattr(scheduler, 'LICENSE_CHECK_INTERVAL', 0)
+    assert checked_free_licenses(capacity, db_file)[0] == 3
+    assert len(calls) == 2
+
+
+def test_without_license_server_lmstat_is_not_asked(tmp_path, monkeypatch):
+    db_file = str(tmp_path / 'scheduler.db')
+    monkeypatch.setattr(scheduler, 'free_licenses', lambda capacity: pytest.fail('lmstat asked'))
+    assert checked_free_licenses(get_capacity(db_file), db_file)[0] is None
+
+
+def test_job_larger_than_the_server_is_rejected(tmp_path, monkeypatch):
+    db_file = str(tmp_path / 'scheduler.db')
+    set_capacity(db_file, cores=4, memory_gb=16)
+    monkeypatch.setattr(scheduler, 'create_job', lambda job, workdir: pytest.fail('job created'))
+    with pytest.raises(ValueError, match='8 cores'):
+        submit_job({'num_cores': 8, 'analyze': True}, str(tmp_path), user='a', db_file=db_file)
+    with pytest.raises(ValueError, match='32 GB'):
+        submit_job({'num_cores': 4, 'analyze': True}, str(tmp_path), user='a', memory_gb=32, db_file=db_file)
+    assert list_queue(db_file) == []
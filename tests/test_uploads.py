@@ -0,0 +1,92 @@
+import io
+import os
+import stat
+import hashlib
+import zipfile
+
+import pytest
+
+from utils.uploads import begin_upload, write_chunk, finish_upload, upload_file, store_stream, list_uploads, \
+    materialize, idf_pair, has_upload, file_sha256
+
+
+@pytest.fixture
+def store(tmp_path):
+    return str(tmp_path / 'uploads')
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_chunked_upload_resumes(store):
+    data = b'board outline ' * 1000
+    sha = sha256(data)
+    assert begin_upload('board.emn', len(data), sha, store) == 0
+    offset = write_chunk(sha, 0, data[:5000], store)
+    # An interrupted transfer resumes at the received offset
+    assert begin_upload('board.emn', len(data), sha, store) == offset == 5000
+    with pytest.raises(ValueError):
+        write_chunk(sha, 0, data[:10], store)
+    write_chunk(sha, offset, data[offset:], store)
+    assert finish_upload(sha, store) == sha
+    assert has_upload(sha, store)
+    # Stored content is not transferred again
+    assert begin_upload('copy.emn', len(data), sha, store) is None
+    assert list_uploads(upload_dir=store)[0]['names'] == ['board.emn', 'copy.emn']
+
+
+def test_corrupted_upload_is_discarded(store):
+    sha = sha256(b'expected')
+    begin_upload('board.brd', 8, sha, store)
+    write_chunk(sha, 0, b'received', store)
+    with pytest.raises(ValueError, match='board.brd is corrupted'):
+        finish_upload(sha, store)
+    assert not has_upload(sha, store)
+    assert begin_upload('board.brd', 8, sha, store) == 0
+
+
+def test_upload_file_and_stream_share_the_content(store, tmp_path):
+    path = tmp_path / 'board.brd'
+    path.write_bytes(b'layout' * 100)
+    sha = upload_file(str(path), store, chunk_size=64)
+    assert sha == file_sha256(str(path))
+    assert store_stream('board v2.brd', io.BytesIO(path.read_bytes()), store, chunk_size=64) == sha
+    uploads = list_uploads(('.brd',), store)
+    assert [i['sha256'] for i in uploads] == [sha]
+    assert uploads[0]['size'] == 600
+    assert list_uploads(('.tgz',), store) == []
+    assert os.listdir(os.path.join(store, 'partial')) == []
+
+
+def test_stored_contents_are_read_only_and_inputs_are_copies(store):
+    board = store_stream('board.emn', io.BytesIO(b'outline'), store)
+    library = store_stream('board.emp', io.BytesIO(b'library'), store)
+    paths = materialize([('board.emn', board), ('board.emp', library)], store)
+    object_file = os.path.join(store, 'objects', board[:2], board)
+    assert not os.stat(object_file).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    assert os.path.dirname(paths['board.emn']) == os.path.dirname(paths['board.emp'])
+    with open(paths['board.emn'], 'ab') as f:
+        f.write(b' changed by AEDT')
+    with open(object_file, 'rb') as f:
+        assert f.read() == b'outline'
+    # The same files map to the same folder
+    assert materialize([('board.emp', library), ('board.emn', board)], store) == paths
+
+
+def test_edb_archives_are_extracted(store):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as f:
+        f.writestr('board.aedb/edb.def', b'edb')
+    archive.seek(0)
+    sha = store_stream('board.zip', archive, store)
+    path = materialize([('board.zip', sha)], store)['board.zip']
+    assert os.path.basename(path) == 'board.aedb'
+    assert os.path.exists(os.path.join(path, 'edb.def'))
+
+
+def test_idf_pair():
+    assert idf_pair(['board.EMN', 'board.emp']) == ('board.EMN', 'board.emp')
+    assert idf_pair(['board.bdf', 'board.ldf', 'notes.txt']) == ('board.bdf', 'board.ldf')
+    assert idf_pair(['board.emn', 'other.emp']) is None
+    assert idf_pair(['a.emn', 'b.emn', 'a.emp']) is None
@@ -0,0 +1,95 @@
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+from utils import warehouse
+from utils.bc_diff import save_build_record
+from utils.warehouse import run_info, store_results, list_runs, query_results, max_over_runs, compact_partition
+
+
+def make_info(run_id, board, run_time, air_temp=25.0):
+    return {'run_id': run_id, 'board': board, 'project': '/work/' + board + '.aedt', 'solution': 'Setup1 : SteadyState',
+            'run_time': run_time, 'conv_type': 'Natural', 'air_temp': air_temp, 'vel': 0.0, 'power': 10.0}
+
+
+def junctions(*values):
+    return pd.DataFrame({'Network Junction': ['U1', 'U2'][:len(values)], 'Temperature [C]': list(values)})
+
+
+def test_empty_warehouse(tmp_path):
+    assert list_runs(warehouse_dir=str(tmp_path)).empty
+    assert query_results('junction', warehouse_dir=str(tmp_path)).empty
+    assert max_over_runs('junction', 'U1', warehouse_dir=str(tmp_path)) is None
+
+
+def test_query_across_runs(tmp_path):
+    store_results('junction', junctions(80, 60), make_info('run1', 'main', 100), str(tmp_path))
+    store_results('junction', junctions(95, 70), make_info('run2', 'main', 200, air_temp=40), str(tmp_path))
+    store_results('junction', junctions(50), make_info('run3', 'io board', 300), str(tmp_path))
+    assert list(list_runs(warehouse_dir=str(tmp_path))['run_id']) == ['run3', 'run2', 'run1']
+    assert list(list_runs('main', last=1, warehouse_dir=str(tmp_path))['run_id']) == ['run2']
+    # Board names are cleaned up the same way when stored and when queried
+    assert list(list_runs('io board', warehouse_dir=str(tmp_path))['run_id']) == ['run3']
+
+    results = query_results('junction', ['U1'], board='main', warehouse_dir=str(tmp_path))
+    assert list(results['value']) == [95, 80]
+    assert list(results['air_temp']) == [40, 25]
+    best = max_over_runs('junction', 'U1', warehouse_dir=str(tmp_path))
+    assert (best['run_id'], best['value']) == ('run2', 95)
+
+
+def test_storing_a_run_again_replaces_its_rows(tmp_path):
+    store_results('junction', junctions(80, 60), make_info('run1', 'main', 100), str(tmp_path))
+    store_results('junction', junctions(81, 61), make_info('run1', 'main', 100), str(tmp_path))
+    results = query_results('junction', warehouse_dir=str(tmp_path))
+    assert list(results['value']) == [81, 61]
+    assert len(list_runs(warehouse_dir=str(tmp_path))) == 1
+
+
+def test_numeric_board_names(tmp_path):
+    store_results('junction', junctions(80), make_info('run1', '1234', 100), str(tmp_path))
+    store_results('junction', junctions(70), make_info('run2', '0042', 200), str(tmp_path))
+    runs = list_runs(warehouse_dir=str(tmp_path))
+    assert sorted(runs['board']) == ['0042', '1234']
+    assert list(query_results('junction', board='0042', warehouse_dir=str(tmp_path))['value']) == [70]
+
+
+def test_compaction_keeps_the_latest_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(warehouse, 'MAX_PARTITION_FILES', 3)
+    for i in range(5):
+        store_results('junction', junctions(60 + i), make_info(f'run{i}', 'main', 100 + i), str(tmp_path))
+    part_dir = os.path.join(str(tmp_path), 'junction', 'board=main')
+    assert len(glob.glob(os.path.join(part_dir, '*.parquet'))) <= 3
+    store_results('junction', junctions(99), make_info('run0', 'main', 100), str(tmp_path))
+    compact_partition(part_dir)
+    assert len(glob.glob(os.path.join(part_dir, '*.parquet'))) == 1
+    results = query_results('junction', warehouse_dir=str(tmp_path))
+    assert sorted(results['value']) == [61, 62, 63, 64, 99]
+
+
+def test_run_info(tmp_path):
+    project = tmp_path / 'board.aedt'
+    project.write_text('')
+    info = run_info(str(project), 'Setup1 : SteadyState')
+    assert info['board'] == 'board'
+    assert info['power'] == 0.0
+    save_build_record(str(project), pd.DataFrame({'Instance_Name': ['U1', 'U2'], 'Include': ['YES', 'NO'],
+                                                  'Power [W]': ['2.5', '4']}),
+                      {'ecad_file': '/boards/main.tgz', 'air_temp': '35', 'vel': ''})
+    info = run_info(str(project), 'Setup1 : SteadyState')
+    assert (info['board'], info['power'], info['air_temp']) == ('main', 2.5, 35.0)
+    assert info['vel'] != info['vel']
+    # The run ID changes with the solution
+    (tmp_path / 'board.aedtresults').mkdir()
+    (tmp_path / 'board.aedtresults' / 'solution.dat').write_text('x')
+    assert run_info(str(project), 'Setup1 : SteadyState')['run_id'] != info['run_id']
+
+
+@pytest.mark.parametrize('table_name', sorted(warehouse.TABLES))
+def test_every_table(tmp_path, table_name):
+    name_col, value_col = warehouse.TABLES[table_name]
+    report_df = pd.DataFrame({name_col: ['A'], value_col: [1.5]})
+    store_results(table_name, report_df, make_info('run1', 'main', 100), str(tmp_path))
+    assert list(query_results(table_name, warehouse_dir=str(tmp_path))['value']) == [1.5]
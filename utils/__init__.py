@@ -0,0 +1 @@
+""" Helper modules shared by the PCB Thermal Analyzer pages """
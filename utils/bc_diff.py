@@ -0,0 +1,145 @@
+import os
+import re
+import json
+
+import pandas as pd
+
+# Columns of the boundary conditions table that can be updated without rebuilding the model
+BC_COLUMNS = ['Include', 'BC_Type', 'Power [W]', 'R_jb [C/W]', 'R_jc [C/W]', 'Monitor_Point', 'Material']
+# Columns that describe the geometry of a component
+GEOMETRY_COLUMNS = ['Package_Name', 'Part_Name', 'Placement', 'Height [mm]']
+# Inputs of a project build that require a full rebuild when changed. ECAD and IDF inputs are compared by content,
+# so a board exported again under the same name is not updated against the old geometry.
+BUILD_KEYS = ['ecad_hash', 'ecad_type', 'idf_hash', 'mesh_fidelity', 'delete_filtered', 'all_points', 'conv_type',
+              'vel', 'vel_dir', 'air_temp', 'gravity_direction', 'lumping', 'board']
+
+
+# Function to get the file names used to store the build record of a project
+def build_record_files(project_path):
+    project_no_ext = os.path.splitext(os.path.abspath(project_path))[0]
+    return project_no_ext + '_applied_bcs.csv', project_no_ext + '_build.json'
+
+
+# Function to store the boundary conditions table and build inputs with a project
+def save_build_record(project_path, bc_df, build_inputs):
+    """ Store the applied boundary conditions table and the inputs used to build a project
+        Parameters
+        ----------
+        project_path: str
+            Full path of the AEDT project file (*.aedt)
+        bc_df: pandas.DataFrame
+            Boundary conditions table applied to the project
+        build_inputs: dict
+            Inputs used to build the project (ECAD, IDF, mesh and solution settings, analysis setup name)
+    """
+    bc_file, build_file = build_record_files(project_path)
+    bc_df.to_csv(bc_file, index=False)
+    with open(build_file, 'w') as f:
+        json.dump(build_inputs, f, indent=2)
+
+
+# Function to load the boundary conditions table and build inputs stored with a project
+def load_build_record(project_path):
+    """ Returns
+        -------
+        tuple
+            Boundary conditions table and build inputs, (None, None) if the project has no build record
+    """
+    bc_file, build_file = build_record_files(project_path)
+    if not (os.path.exists(project_path) and os.path.exists(bc_file) and os.path.exists(build_file)):
+        return None, None
+    with open(build_file, 'r') as f:
+        build_inputs = json.load(f)
+    return pd.read_csv(bc_file, dtype=str, keep_default_na=False), build_inputs
+
+
+# Function to remove the build record of a project
+def remove_build_record(project_path):
+    for file in build_record_files(project_path):
+        if os.path.exists(file):
+            os.remove(file)
+
+
+def _normalize(value):
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+# Function to index a boundary conditions table by block name
+def _index_table(bc_df):
+    df = bc_df.astype(str)
+    df = df[df['Instance_Name'] != 'NOREFDES'].copy()
+    df['block_name'] = [re.sub(r"\W", "_", i) for i in df['Instance_Name']]
+    return df.set_index('block_name')
+
+
+# Function to compare the applied boundary conditions table with a new one
+def diff_bc_tables(old_df, new_df):
+    """ Compare two boundary conditions tables component by component
+        Parameters
+        ----------
+        old_df: pandas.DataFrame
+            Boundary conditions table stored with the existing project
+        new_df: pandas.DataFrame
+            New boundary conditions table
+        Returns
+        -------
+        dict
+            'changed': {block_name: [changed BC columns]} for components present in both tables,
+            'geometry': block names whose geometry columns differ or that were added or removed,
+            'included': block names switched from Include NO to YES,
+            'excluded': block names switched from Include YES to NO
+    """
+    old = _index_table(old_df)
+    new = _index_table(new_df)
+    diff = {'changed': {}, 'geometry': sorted(set(old.index) ^ set(new.index)), 'included': [], 'excluded': []}
+    for block_name in new.index.intersection(old.index):
+        old_row = old.loc[block_name]
+        new_row = new.loc[block_name]
+        if any(_normalize(old_row.get(c, '')) != _normalize(new_row.get(c, '')) for c in GEOMETRY_COLUMNS):
+            diff['geometry'].append(block_name)
+            continue
+        changed = [c for c in BC_COLUMNS if _normalize(old_row.get(c, '')) != _normalize(new_row.get(c, ''))]
+        if not changed:
+            continue
+        diff['changed'][block_name] = changed
+        if 'Include' in changed:
+            if new_row['Include'] == 'YES':
+                diff['included'].append(block_name)
+            else:
+                diff['excluded'].append(block_name)
+    return diff
+
+
+# Function to check whether a project can be updated incrementally
+def incremental_update_blockers(diff, old_inputs, new_inputs):
+    """ Reasons that prevent an incremental update of an existing project
+        Parameters
+        ----------
+        diff: dict
+            Result of diff_bc_tables
+        old_inputs: dict
+            Build inputs stored with the project
+        new_inputs: dict
+            Build inputs of the new run
+        Returns
+        -------
+        list
+            Human readable reasons. An empty list means the project can be updated incrementally.
+    """
+    reasons = []
+    for key in BUILD_KEYS:
+        if str(old_inputs.get(key)) != str(new_inputs.get(key)):
+            reasons.append('Input changed: ' + key)
+    if diff['geometry']:
+        reasons.append('Component geometry changed: ' + ', '.join(diff['geometry'][:10]))
+    if diff['included'] and new_inputs.get('delete_filtered'):
+        reasons.append('Deleted components included again: ' + ', '.join(diff['included'][:10]))
+    # Lumped components were merged into other blocks and no longer exist on their own
+    lumped = sorted(set(old_inputs.get('lumped') or ()) & set(diff['changed']))
+    if lumped:
+        reasons.append('Lumped components changed: ' + ', '.join(lumped[:10]))
+    return reasons
@@ -0,0 +1,168 @@
+import os
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from utils.bc_schema import NUMERIC_COLUMNS
+
+# Rows sent to the grid at a time
+PAGE_SIZES = (100, 500, 1000)
+# Pending edits are written to the CSV file once there are this many, or after this many seconds
+FLUSH_EDITS = 200
+FLUSH_INTERVAL = 10.0
+# Hidden grid column with the position of a row in the whole table
+ROW_COLUMN = '_row'
+READ_ONLY_COLUMNS = ('Package_Name', 'Part_Name', 'Instance_Name', 'Placement')
+SEARCH_COLUMNS = ('Instance_Name', 'Part_Name', 'Package_Name', 'Designator_Type')
+
+
+# Function to get a stamp that changes whenever a file changes
+def _file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class BcTableEditor:
+    """ Boundary conditions table kept in memory and edited one page at a time
+        Only the rows of the shown page go to the grid, and edits come back as cell changes that are applied to
+        the table. Changes are written to the CSV file in batches, not on every edit.
+        Parameters
+        ----------
+        bc_file: str
+            Path of the boundary conditions CSV file
+    """
+
+    def __init__(self, bc_file):
+        self.bc_file = os.path.abspath(bc_file)
+        self.df = pd.read_csv(self.bc_file)
+        # Numeric columns are float, so an integer column can take a decimal edit, and text columns that
+        # happen to hold only numbers or blanks can take text
+        for col in self.df.columns:
+            if col in NUMERIC_COLUMNS and pd.api.types.is_integer_dtype(self.df[col]):
+                self.df[col] = self.df[col].astype(float)
+            elif col not in NUMERIC_COLUMNS and pd.api.types.is_numeric_dtype(self.df[col]):
+                self.df[col] = self.df[col].astype(object)
+        self.stamp = _file_stamp(self.bc_file)
+        self.pending = 0
+        self.last_flush = time.time()
+        # Changes with every bulk update, so the grid shows the new table instead of sending the old one back
+        self.revision = 0
+        # Changes with every edit, so the CSV text for download is only built again after the table changed
+        self.edits = 0
+        self._csv = None
+
+    def is_stale(self):
+        """ True if the CSV file was changed by something else, e.g. generated again """
+        return not os.path.exists(self.bc_file) or _file_stamp(self.bc_file) != self.stamp
+
+    def rows(self, search=None):
+        """ Positions of the rows whose names contain the search text, all rows without one """
+        if not search:
+            return np.arange(len(self.df))
+        match = np.zeros(len(self.df), dtype=bool)
+        for col in SEARCH_COLUMNS:
+            if col in self.df.columns:
+                match |= self.df[col].astype(str).str.contains(search, case=False, regex=False).to_numpy()
+        return np.flatnonzero(match)
+
+    def page(self, page_number, page_size, search=None):
+        """ Rows of one page with their positions in ROW_COLUMN
+            Parameters
+            ----------
+            page_number: int
+                Page, starting at 1
+            page_size: int
+                Rows per page
+            search: str, optional
+                Only rows whose names contain this text
+            Returns
+            -------
+            tuple
+                Page table and number of pages
+        """
+        rows = self.rows(search)
+        num_pages = max(1, -(-len(rows) // page_size))
+        page_rows = rows[(page_number - 1) * page_size:page_number * page_size]
+        page_df = self.df.iloc[page_rows].copy()
+        page_df.insert(0, ROW_COLUMN, page_rows)
+        return page_df.reset_index(drop=True), num_pages
+
+    def apply_changes(self, edited_df):
+        """ Apply the cells of a page returned by the grid that differ from the table
+            Parameters
+            ----------
+            edited_df: pandas.DataFrame
+                Page as returned by the grid, with ROW_COLUMN
+            Returns
+            -------
+            tuple
+                Number of changed cells and list of rejected changes
+        """
+        if edited_df is None or len(edited_df) == 0 or ROW_COLUMN not in edited_df.columns:
+            return 0, []
+        rows = pd.to_numeric(edited_df[ROW_COLUMN], errors='coerce').to_numpy()
+        valid = ~np.isnan(rows) & (rows >= 0) & (rows < len(self.df))
+        edited_df = edited_df[valid]
+        rows = rows[valid].astype(int)
+        changed = 0
+        rejected = []
+        for col in self.df.columns:
+            if col in READ_ONLY_COLUMNS or col not in edited_df.columns:
+                continue
+            old = self.df[col].iloc[rows].reset_index(drop=True)
+            new = edited_df[col].reset_index(drop=True)
+            if col in NUMERIC_COLUMNS:
+                new_values = pd.to_numeric(new, errors='coerce')
+                bad = new_values.isna() & new.notna() & (new.astype(str).str.strip() != '')
+                for i in np.flatnonzero(bad):
+                    rejected.append(f'''{self.df.at[self.df.index[rows[i]], 'Instance_Name']}: {col} '''
+                                    f'''"{new[i]}" is not a number''')
+                diff = ~bad & (new_values != old) & ~(new_values.isna() & old.isna())
+            else:
+                new_values = new.where(new.notna(), None)
+                diff = new_values.fillna('').astype(str) != old.fillna('').astype(str)
+            if diff.any():
+                positions = rows[diff.to_numpy()]
+                self.df.iloc[positions, self.df.columns.get_loc(col)] = new_values[diff].to_numpy()
+                changed += int(diff.sum())
+        self.pending += changed
+        self.edits += changed
+        return changed, rejected
+
+    def replace(self, new_df, changed):
+        """ Take over a table changed as a whole, e.g. by rules; the changes are written right away """
+        self.df = new_df
+        self.pending += changed
+        self.edits += changed
+        self.revision += 1
+        self.flush(force=True)
+
+    def to_csv(self):
+        """ Table as CSV text, built once per version of the table """
+        if not self.csv_ready():
+            self._csv = (self.edits, self.df.to_csv(index=False))
+        return self._csv[1]
+
+    def csv_ready(self):
+        """ True if the CSV text of the current table was already built """
+        return self._csv is not None and self._csv[0] == self.edits
+
+    def flush(self, force=False):
+        """ Write the table to the CSV file if enough edits are pending, or always with force
+            Returns
+            -------
+            bool
+                True if the file was written
+        """
+        if not self.pending or not (force or self.pending >= FLUSH_EDITS or
+                                    time.time() - self.last_flush >= FLUSH_INTERVAL):
+            return False
+        tmp_file = self.bc_file + '.' + uuid.uuid4().hex + '.tmp'
+        self.df.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, self.bc_file)
+        self.stamp = _file_stamp(self.bc_file)
+        self.pending = 0
+        self.last_flush = time.time()
+        return True
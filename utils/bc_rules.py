@@ -0,0 +1,253 @@
+import re
+import json
+
+import numpy as np
+import pandas as pd
+
+from utils.bc_schema import CATEGORIES, NUMERIC_COLUMNS
+
+# Rule keys matched against text columns: regular expression for the reference designator, wildcards (*, ?)
+# for the others. Matching ignores case. Columns with few distinct values come first, as they narrow the rows
+# down fastest.
+TEXT_MATCHES = {'placement': 'Placement', 'designator_type': 'Designator_Type', 'package': 'Package_Name',
+                'part': 'Part_Name', 'instance': 'Instance_Name'}
+REGEX_MATCHES = ('instance',)
+HEIGHT_MATCHES = ('min_height', 'max_height')
+# Columns a rule can set
+SET_COLUMNS = ('Include', 'BC_Type', 'Power [W]', 'R_jb [C/W]', 'R_jc [C/W]', 'Monitor_Point', 'Material')
+RULES_FILE_EXTENSION = '.rules.json'
+# Below this many rows in question, values are tested one by one instead of in one pass over the column
+MAX_LOOP_ROWS = 2000
+
+
+# Function to check a rule before it is applied
+def validate_rule(rule):
+    """ e.g. {'name': 'BGA ICs', 'instance': 'U\\d+', 'package': 'BGA*', 'set': {'BC_Type': 'network',
+        'R_jb [C/W]': 2.1}} sets all U* with a BGA package to network blocks with R_jb = 2.1 C/W
+        Returns
+        -------
+        list
+            Errors of the rule, empty if it can be applied
+    """
+    errors = []
+    name = rule.get('name') or 'Rule'
+    unknown = [i for i in rule if i not in ('name', 'set') + tuple(TEXT_MATCHES) + HEIGHT_MATCHES]
+    if unknown:
+        errors.append(f'''{name}: unknown match key(s) {', '.join(unknown)}''')
+    for key in REGEX_MATCHES:
+        if rule.get(key):
+            try:
+                re.compile(rule[key])
+            except re.error as e:
+                errors.append(f'{name}: {key} is not a valid regular expression ({e})')
+    for key in HEIGHT_MATCHES:
+        if rule.get(key) is not None and not isinstance(rule[key], (int, float)):
+            errors.append(f'{name}: {key} must be a number')
+    if not rule.get('set'):
+        errors.append(f'{name}: nothing to set')
+    for col, value in (rule.get('set') or {}).items():
+        if col not in SET_COLUMNS:
+            errors.append(f'{name}: {col} cannot be set by a rule')
+        elif col in CATEGORIES:
+            allowed = CATEGORIES[col]
+            if str(value).lower() not in (i.lower() for i in allowed):
+                errors.append(f'''{name}: {col} must be one of {', '.join(allowed)}''')
+        elif col in NUMERIC_COLUMNS and (not isinstance(value, (int, float)) or value < 0):
+            errors.append(f'{name}: {col} must be a non-negative number')
+    return errors
+
+
+# Function to turn a wildcard pattern into a regular expression
+def _wildcard_regex(pattern):
+    return ''.join('.*' if i == '*' else '.' if i == '?' else re.escape(i) for i in pattern)
+
+
+class _ColumnIndex:
+    """ Distinct values of a text column with the code of each row, so a pattern is tested once per value
+        Patterns that apply to many rows are run in one pass over the distinct values joined into lines, which
+        keeps the work inside the regular expression engine.
+    """
+
+    def __init__(self, values):
+        codes, uniques = pd.factorize(values.fillna('').astype(str))
+        self.codes = codes
+        self.uniques = np.asarray(uniques, dtype=object)
+        self._text = None
+        self._matches = {}
+
+    def _match_values(self, regex, codes):
+        lookup = np.zeros(len(self.uniques), dtype=bool)
+        pattern = re.compile(regex, re.IGNORECASE)
+        for code in codes:
+            lookup[code] = pattern.fullmatch(self.uniques[code]) is not None
+        return lookup
+
+    def _match_all(self, regex):
+        if regex in self._matches:
+            return self._matches[regex]
+        if self._text is None:
+            lengths = np.fromiter(map(len, self.uniques), dtype=np.int64, count=len(self.uniques))
+            self._ends = np.cumsum(lengths + 1) - 1
+            self._starts = self._ends - lengths
+            self._text = '\n'.join(self.uniques) if not any('\n' in i for i in self.uniques) else False
+        lookup = None
+        try:
+            line_pattern = re.compile('^(?:' + regex + ')$', re.IGNORECASE | re.MULTILINE)
+        except re.error:
+            # Inline flags such as (?i) must start the pattern, so it cannot be wrapped; it is tested per value
+            line_pattern = None
+        if self._text is not False and line_pattern is not None:
+            lookup = np.zeros(len(self.uniques), dtype=bool)
+            for m in line_pattern.finditer(self._text):
+                code = np.searchsorted(self._starts, m.start(), side='right') - 1
+                if m.end() != self._ends[code]:
+                    # The pattern can match a line break; test the values one by one
+                    lookup = None
+                    break
+                lookup[code] = True
+        if lookup is None:
+            lookup = self._match_values(regex, range(len(self.uniques)))
+        self._matches[regex] = lookup
+        return lookup
+
+    def match(self, regex, candidates):
+        if candidates.sum() <= MAX_LOOP_ROWS:
+            lookup = self._match_values(regex, np.unique(self.codes[candidates]))
+        else:
+            lookup = self._match_all(regex)
+        return lookup[self.codes] & candidates
+
+
+# Function to select the rows of a rule
+def rule_mask(df, rule, indexes=None):
+    """ Parameters
+        ----------
+        df: pandas.DataFrame
+            Boundary conditions table
+        rule: dict
+            Rule, see validate_rule
+        indexes: dict, optional
+            Column indexes and heights shared by the rules of a rule set
+        Returns
+        -------
+        numpy.ndarray
+            Boolean mask of the rows the rule applies to
+    """
+    indexes = {} if indexes is None else indexes
+    mask = np.ones(len(df), dtype=bool)
+    # Height is cheap to test, so it narrows the rows down before the text patterns
+    if 'Height [mm]' in df.columns and (rule.get('min_height') is not None or rule.get('max_height') is not None):
+        if 'Height [mm]' not in indexes:
+            indexes['Height [mm]'] = pd.to_numeric(df['Height [mm]'], errors='coerce').to_numpy()
+        height = indexes['Height [mm]']
+        if rule.get('min_height') is not None:
+            mask &= height >= rule['min_height']
+        if rule.get('max_height') is not None:
+            mask &= height <= rule['max_height']
+    for key, col in TEXT_MATCHES.items():
+        if not rule.get(key) or not mask.any():
+            continue
+        if col not in indexes:
+            indexes[col] = _ColumnIndex(df[col])
+        regex = rule[key] if key in REGEX_MATCHES else _wildcard_regex(rule[key])
+        mask = indexes[col].match(regex, mask)
+    return mask
+
+
+# Function to apply an ordered rule set to the boundary conditions table
+def apply_rules(df, rules):
+    """ Apply rules in order; where rules overlap, the later rule wins
+        Parameters
+        ----------
+        df: pandas.DataFrame
+            Boundary conditions table
+        rules: list
+            Rules, see validate_rule
+        Returns
+        -------
+        tuple
+            New table, number of rows matched by each rule and number of changed cells
+    """
+    errors = [e for rule in rules for e in validate_rule(rule)]
+    if errors:
+        raise ValueError('\n'.join(errors))
+    indexes = {}
+    columns = {}
+    matched = []
+    for rule in rules:
+        mask = rule_mask(df, rule, indexes)
+        matched.append(int(mask.sum()))
+        for col, value in rule['set'].items():
+            if col not in columns:
+                columns[col] = df[col].to_numpy(dtype=float if col in NUMERIC_COLUMNS else object, copy=True)
+            if col in CATEGORIES:
+                # Categories are written as the table spells them
+                value = next(i for i in CATEGORIES[col] if i.lower() == str(value).lower())
+            columns[col][mask] = value
+    new_df = df.copy()
+    changed = 0
+    for col, values in columns.items():
+        old = df[col].to_numpy(dtype=float if col in NUMERIC_COLUMNS else object)
+        if col in NUMERIC_COLUMNS:
+            changed += int((~((values == old) | (np.isnan(values) & np.isnan(old)))).sum())
+        else:
+            changed += int((pd.Series(values).fillna('').astype(str).to_numpy() !=
+                            pd.Series(old).fillna('').astype(str).to_numpy()).sum())
+        new_df[col] = values
+    return new_df, matched, changed
+
+
+# Function to save a rule set
+def save_rules(rules_file, rules):
+    with open(rules_file, 'w') as f:
+        json.dump({'rules': rules}, f, indent=2)
+
+
+# Function to read a saved rule set
+def load_rules(rules_file):
+    with open(rules_file, 'r') as f:
+        return json.load(f)['rules']
+
+
+# Columns of the rule table on the Create Boundary Conditions File page, with their rule keys
+RULE_TABLE_COLUMNS = {'Name': 'name', 'Refdes Regex': 'instance', 'Designator Type': 'designator_type',
+                      'Package': 'package', 'Part': 'part', 'Side': 'placement', 'Min Height [mm]': 'min_height',
+                      'Max Height [mm]': 'max_height'}
+
+
+# Function to show a rule set as a table, one rule per row
+def rules_to_table(rules):
+    rows = []
+    for rule in rules:
+        row = {label: rule.get(key) for label, key in RULE_TABLE_COLUMNS.items()}
+        row.update({col: rule['set'].get(col) for col in SET_COLUMNS})
+        rows.append(row)
+    df = pd.DataFrame(rows, columns=list(RULE_TABLE_COLUMNS) + list(SET_COLUMNS))
+    numeric = ('Min Height [mm]', 'Max Height [mm]') + tuple(i for i in SET_COLUMNS if i in NUMERIC_COLUMNS)
+    for col in df.columns:
+        # Typed columns, so an empty rule table can still be edited
+        if col in numeric:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+        else:
+            df[col] = df[col].fillna('').astype(str)
+    return df
+
+
+# Function to read a rule set from its table; blank cells match everything or set nothing
+def table_to_rules(df):
+    rules = []
+    for i, row in enumerate(df.to_dict('records')):
+        rule = {'name': row.get('Name') or f'Rule {i + 1}'}
+        for label, key in RULE_TABLE_COLUMNS.items():
+            value = row.get(label)
+            if key != 'name' and value is not None and not (isinstance(value, float) and np.isnan(value)) and \
+                    str(value).strip() != '':
+                rule[key] = float(value) if key in HEIGHT_MATCHES else str(value).strip()
+        rule['set'] = {}
+        for col in SET_COLUMNS:
+            value = row.get(col)
+            if value is not None and not (isinstance(value, float) and np.isnan(value)) and str(value).strip() != '':
+                rule['set'][col] = float(value) if col in NUMERIC_COLUMNS else str(value).strip()
+        if len(rule) > 2 or rule['set']:
+            rules.append(rule)
+    return rules
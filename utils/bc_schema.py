@@ -0,0 +1,131 @@
+import os
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+from utils.materials import load_material_library
+
+# Allowed values of the categorical columns of the boundary conditions table, after normalization
+CATEGORIES = {'Include': ('YES', 'NO'),
+              'Placement': ('TOP', 'BOTTOM'),
+              'BC_Type': ('block', 'network', 'hollow'),
+              'Monitor_Point': ('YES', 'NO')}
+# Numeric columns and whether an empty cell is allowed
+NUMERIC_COLUMNS = {'Height [mm]': True, 'Power [W]': False, 'R_jb [C/W]': True, 'R_jc [C/W]': True}
+TEXT_COLUMNS = ['Package_Name', 'Part_Name', 'Instance_Name', 'Designator_Type', 'Material']
+# Components above this power are reported as a warning
+MAX_COMPONENT_POWER = 1000.0
+MAX_LISTED_ROWS = 10
+
+
+# Function to read the material names of the AEDT system library
+@lru_cache(maxsize=4)
+def aedt_library_materials(aedt_release):
+    """ Names of the materials in the system library of an AEDT installation
+        Parameters
+        ----------
+        aedt_release: str
+            AEDT release, e.g. '2023.1'
+        Returns
+        -------
+        frozenset
+            Lower-case material names, None if the installation is not found
+    """
+    root = os.environ.get('ANSYSEM_ROOT' + aedt_release[2:].replace('.', ''))
+    amat_file = os.path.join(root, 'syslib', 'Materials.amat') if root else None
+    if not amat_file or not os.path.exists(amat_file):
+        return None
+    with open(amat_file, 'r', errors='ignore') as f:
+        names = re.findall(r"^\t\$begin '([^']+)'$", f.read(), flags=re.MULTILINE)
+    return frozenset(i.lower() for i in names)
+
+
+# Function to describe the rows of a failed check
+def _rows_message(df, mask, message):
+    rows = df.index[mask]
+    listed = ', '.join(f'''{i + 2} ({df.at[i, 'Instance_Name']})''' for i in rows[:MAX_LISTED_ROWS])
+    if len(rows) > MAX_LISTED_ROWS:
+        listed += f', ... {len(rows) - MAX_LISTED_ROWS} more'
+    return f'{message} in {len(rows)} row(s): {listed}'
+
+
+# Function to read and validate the boundary conditions CSV file
+def load_bc_table(bc_file, materials_file=None, aedt_release=None):
+    """ Read the boundary conditions table with typed columns and check every column at once
+        Categorical columns are normalized (YES/NO, TOP/BOTTOM, block/network/hollow) and numeric columns
+        are converted to float. Row numbers in the messages are line numbers of the CSV file.
+        Parameters
+        ----------
+        bc_file: str
+            Path of the boundary conditions CSV file
+        materials_file: str, optional
+            Materials CSV file; its materials are known to the project
+        aedt_release: str, optional
+            AEDT release whose system library materials are known, e.g. '2023.1'
+        Returns
+        -------
+        tuple
+            Typed table, list of errors and list of warnings
+    """
+    df = pd.read_csv(bc_file, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    errors = []
+    warnings = []
+    missing = [i for i in list(CATEGORIES) + list(NUMERIC_COLUMNS) + TEXT_COLUMNS if i not in df.columns]
+    if missing:
+        return df, ['Missing column(s): ' + ', '.join(missing)], warnings
+
+    for col in TEXT_COLUMNS:
+        df[col] = df[col].str.strip()
+    for col, allowed in CATEGORIES.items():
+        df[col] = df[col].str.strip()
+        df[col] = df[col].str.lower() if col == 'BC_Type' else df[col].str.upper()
+        bad = ~df[col].isin(allowed)
+        if bad.any():
+            errors.append(_rows_message(df, bad, f'''{col} must be one of {', '.join(allowed)}'''))
+    for col, allow_empty in NUMERIC_COLUMNS.items():
+        text = df[col].str.strip()
+        df[col] = pd.to_numeric(text, errors='coerce')
+        empty = text == ''
+        bad = df[col].isna() & ~empty
+        if bad.any():
+            errors.append(_rows_message(df, bad, f'{col} is not a number'))
+        if not allow_empty and empty.any():
+            errors.append(_rows_message(df, empty, f'{col} is empty'))
+        negative = df[col] < 0
+        if negative.any():
+            errors.append(_rows_message(df, negative, f'{col} is negative'))
+        df[col] = df[col].fillna(0.0).astype(float)
+
+    included = (df['Include'] == 'YES') & (df['Instance_Name'] != 'NOREFDES')
+    network = included & (df['BC_Type'] == 'network')
+    for col in ('R_jb [C/W]', 'R_jc [C/W]'):
+        bad = network & ~(df[col] > 0)
+        if bad.any():
+            errors.append(_rows_message(df, bad, f'Network blocks need a positive {col}'))
+    high_power = included & (df['Power [W]'] > MAX_COMPONENT_POWER)
+    if high_power.any():
+        warnings.append(_rows_message(df, high_power, f'Power above {MAX_COMPONENT_POWER:g} W'))
+
+    # Blocks are named after the cleaned-up instance name, which must be unique
+    block_names = df['Instance_Name'].str.replace(r'\W', '_', regex=True)
+    duplicated = pd.Series(False, index=df.index)
+    duplicated[included] = block_names[included].duplicated(keep=False)
+    if duplicated.any():
+        errors.append(_rows_message(df, duplicated, 'Duplicated instance name'))
+
+    # Materials of solid blocks must exist in the materials CSV file or in the AEDT library
+    solid = included & (df['BC_Type'] == 'block') & (df['Material'] != '')
+    known = set()
+    if materials_file:
+        known.update(load_material_library(materials_file).index)
+    library = aedt_library_materials(aedt_release) if aedt_release else None
+    unknown = solid & ~df['Material'].str.lower().isin(known | set(library or ()))
+    if unknown.any():
+        message = _rows_message(df, unknown, 'Unknown material')
+        if library is None:
+            # Without the AEDT installation the system library cannot be checked
+            warnings.append(message + '. The AEDT material library was not found; materials must exist in it.')
+        else:
+            errors.append(message)
+    return df, errors, warnings
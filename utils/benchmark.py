@@ -0,0 +1,43 @@
+import pandas as pd
+
+from utils.jobs import get_job_status, final_monitors
+
+
+# Function to collect what a solved job reports for a comparison
+def solve_record(job_dir):
+    """ Mesh cells, mesh and solve times [s] and final monitor temperatures [cel] of a job """
+    status = get_job_status(job_dir)
+    return {'mesh_cells': status.get('mesh_cells'), 'mesh_seconds': status.get('mesh_seconds'),
+            'solve_seconds': status.get('solve_seconds'), 'monitors': final_monitors(job_dir)}
+
+
+# Function to compare the results of a simplified model with a reference solve
+def compare_solves(solve, reference):
+    """ e.g. a model with lumped components or a tiled board against the same board solved in full detail
+        Parameters
+        ----------
+        solve: dict
+            Results of the simplified model, see solve_record
+        reference: dict
+            The same for the reference model
+        Returns
+        -------
+        tuple
+            Summary with the reduction of the cell count [%], the speedup of mesh and solve and the largest and
+            mean absolute monitor difference [cel], None where a value is missing, and table of the temperatures
+            of the monitors both models have with their difference
+    """
+    summary = {'cell_reduction': None, 'mesh_speedup': None, 'solve_speedup': None, 'max_difference': None,
+               'mean_difference': None}
+    if solve.get('mesh_cells') and reference.get('mesh_cells'):
+        summary['cell_reduction'] = 100.0 * (1 - solve['mesh_cells'] / reference['mesh_cells'])
+    for key, seconds in (('mesh_speedup', 'mesh_seconds'), ('solve_speedup', 'solve_seconds')):
+        if solve.get(seconds) and reference.get(seconds):
+            summary[key] = reference[seconds] / solve[seconds]
+    compare = pd.DataFrame({'Job [cel]': pd.Series(solve['monitors'], dtype=float),
+                            'Reference [cel]': pd.Series(reference['monitors'], dtype=float)}).dropna()
+    compare['Difference [cel]'] = compare['Job [cel]'] - compare['Reference [cel]']
+    if not compare.empty:
+        summary['max_difference'] = float(compare['Difference [cel]'].abs().max())
+        summary['mean_difference'] = float(compare['Difference [cel]'].abs().mean())
+    return summary, compare
@@ -0,0 +1,287 @@
+import numpy as np
+
+# Board models: the PCB 3D component of the ECAD with its traces, or tiles with the effective conductivity of the
+# copper and dielectric in them
+BOARD_MODELS = ('Trace-detailed', 'Tiled')
+DEFAULT_TILE_SIZE = 5.0
+# Spacing of the points the copper coverage is sampled at [mm], finer than most traces are wide
+SAMPLE_PITCH = 0.1
+# Conductivities [W/m-C] of layers whose material has none in the layout
+COPPER_CONDUCTIVITY = 400.0
+DIELECTRIC_CONDUCTIVITY = 0.3
+# Significant digits of the tile conductivities; tiles that agree share a material and merge into one block
+CONDUCTIVITY_DIGITS = 2
+TILE_PREFIX = 'board_tile_'
+
+
+# Function to get the points of a layout primitive in mm
+def _points_mm(primitive):
+    xs, ys = primitive.points()
+    return np.asarray(xs, dtype=float) * 1000, np.asarray(ys, dtype=float) * 1000
+
+
+# Function to read the stackup and copper shapes of a layout database
+def read_layout(aedb_path, edb_version):
+    """ Layers of the stackup with the outlines of the copper shapes of the signal layers
+        Pads and plated holes of padstacks are not read, so their copper is not part of the tiles.
+        Parameters
+        ----------
+        aedb_path: str
+            Layout database (*.aedb) of the ECAD import
+        edb_version: str
+            AEDT release, e.g. 2023.1
+        Returns
+        -------
+        dict
+            Layers from top to bottom under 'layers' with name, thickness [mm], conductivity of the metal
+            (None for dielectric layers) and of the fill [W/m-C] and copper shapes as ((x, y), voids) outlines
+            [mm], and the board outline (x, y) [mm] under 'outline', None if the layout has none
+    """
+    from pyaedt import Edb
+    edb = Edb(edbpath=aedb_path, edbversion=edb_version, isreadonly=True)
+    try:
+        materials = edb.materials.materials
+
+        def conductivity(material_name, default):
+            try:
+                value = float(materials[material_name].thermal_conductivity)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                return default
+            return value if value > 0 else default
+
+        primitives = edb.modeler.primitives_by_layer
+        stackup = sorted(edb.stackup.stackup_layers.values(), key=lambda x: x.lower_elevation, reverse=True)
+        layers = []
+        for layer in stackup:
+            signal = layer.type == 'signal'
+            shapes = [(_points_mm(i), [_points_mm(v) for v in i.voids])
+                      for i in primitives.get(layer.name, []) if signal and not i.is_void]
+            layers.append({'name': layer.name, 'thickness': float(layer.thickness) * 1000,
+                           'metal': conductivity(layer.material, COPPER_CONDUCTIVITY) if signal else None,
+                           'fill': conductivity(layer.dielectric_fill if signal else layer.material,
+                                                DIELECTRIC_CONDUCTIVITY),
+                           'shapes': shapes})
+        outlines = [_points_mm(i) for i in primitives.get('Outline', [])]
+    finally:
+        edb.close_edb()
+    return {'layers': layers, 'outline': outlines[0] if outlines else None}
+
+
+# Function to find which points of a grid lie inside a polygon
+def polygon_mask(px, py, xs, ys):
+    """ Even-odd scanline fill: the crossings of the polygon edges with every grid row are sorted once, and the
+        number of crossings left of each point tells whether it is inside
+        Parameters
+        ----------
+        px, py: numpy.ndarray
+            Polygon vertices
+        xs, ys: numpy.ndarray
+            Coordinates of the grid columns and rows, ascending
+        Returns
+        -------
+        numpy.ndarray
+            Boolean mask, one row per value of ys
+    """
+    mask = np.zeros((len(ys), len(xs)), dtype=bool)
+    rows = np.flatnonzero((ys >= py.min()) & (ys <= py.max()))
+    if len(rows) == 0 or len(px) < 3:
+        return mask
+    x0, y0 = px, py
+    x1, y1 = np.roll(px, -1), np.roll(py, -1)
+    row_y = ys[rows]
+    # Half-open in y, so a vertex on a row is crossed once
+    r, e = np.nonzero((y0[None, :] <= row_y[:, None]) != (y1[None, :] <= row_y[:, None]))
+    if len(r) == 0:
+        return mask
+    crossings = x0[e] + (row_y[r] - y0[e]) * (x1[e] - x0[e]) / (y1[e] - y0[e])
+    # Rows are laid end to end on one axis, so one sort and one search handle all of them
+    origin = min(crossings.min(), xs.min())
+    width = max(crossings.max(), xs.max()) - origin + 1.0
+    keys = np.sort(crossings - origin + r * width)
+    row_starts = np.searchsorted(keys, np.arange(len(rows)) * width)
+    counts = np.searchsorted(keys, (xs[None, :] - origin) + np.arange(len(rows))[:, None] * width) - \
+        row_starts[:, None]
+    mask[rows] = counts % 2 == 1
+    return mask
+
+
+# Function to rasterize the copper shapes of a layer
+def copper_mask(shapes, xs, ys):
+    """ Union of the shapes of a layer, each without its voids, on a grid """
+    copper = np.zeros((len(ys), len(xs)), dtype=bool)
+    for (px, py), voids in shapes:
+        # Only the grid rows and columns around the shape are tested
+        cols = slice(np.searchsorted(xs, px.min()), np.searchsorted(xs, px.max(), side='right'))
+        rows = slice(np.searchsorted(ys, py.min()), np.searchsorted(ys, py.max(), side='right'))
+        if cols.start == cols.stop or rows.start == rows.stop:
+            continue
+        shape = polygon_mask(px, py, xs[cols], ys[rows])
+        for vx, vy in voids:
+            shape &= ~polygon_mask(vx, vy, xs[cols], ys[rows])
+        copper[rows, cols] |= shape
+    return copper
+
+
+# Function to get the grid lines of the tiles along one axis
+def tile_edges(lo, hi, tile_size):
+    count = max(int(np.ceil((hi - lo) / tile_size - 1e-9)), 1)
+    return np.linspace(lo, hi, count + 1)
+
+
+# Function to get the sample points of the tiles along one axis
+def sample_points(edges, samples):
+    fractions = (np.arange(samples) + 0.5) / samples
+    return (edges[:-1, None] + np.diff(edges)[:, None] * fractions[None, :]).ravel()
+
+
+# Function to compute the effective conductivity of the tiles of one layer
+def layer_conductivities(copper, metal, fill, samples):
+    """ Each row of samples in a tile conducts along x as its samples in series, and the rows of a tile conduct in
+        parallel; the same holds along y. Through the layer, the samples conduct in parallel. Traces along x thus
+        raise the x conductivity of a tile far more than the y conductivity.
+        Parameters
+        ----------
+        copper: numpy.ndarray
+            Copper mask of the layer, samples x samples points per tile
+        metal: float
+            Conductivity of the copper [W/m-C]
+        fill: float
+            Conductivity of the dielectric between the copper [W/m-C]
+        samples: int
+            Samples per tile along each axis
+        Returns
+        -------
+        tuple
+            Conductivity along x, y and z of every tile [W/m-C], one row per tile row
+    """
+    ny, nx = copper.shape[0] // samples, copper.shape[1] // samples
+    k = np.where(copper, metal, fill).reshape(ny, samples, nx, samples)
+    kx = (samples / (1 / k).sum(axis=3)).mean(axis=1)
+    ky = (samples / (1 / k).sum(axis=1)).mean(axis=2)
+    kz = k.mean(axis=(1, 3))
+    return kx, ky, kz
+
+
+# Function to compute the tiles of a board
+def tile_board(layout, tile_size, sample_pitch=SAMPLE_PITCH):
+    """ Effective anisotropic conductivity of the tiles of a board
+        The layers of a tile conduct in parallel in the plane and in series through the board.
+        Parameters
+        ----------
+        layout: dict
+            Stackup and copper of the board, see read_layout
+        tile_size: float
+            Largest tile size [mm]; tiles are fitted to the board extent
+        sample_pitch: float, optional
+            Spacing of the copper samples [mm]
+        Returns
+        -------
+        dict
+            Tile edges along x and y [mm], mask of the tiles on the board (at least half inside the outline),
+            conductivity along x, y and z of every tile [W/m-C], board thickness [mm] and copper coverage of
+            every tile of each signal layer
+    """
+    layers = layout['layers']
+    if layout['outline'] is not None:
+        px, py = layout['outline']
+    else:
+        px = np.concatenate([s[0][0] for i in layers for s in i['shapes']])
+        py = np.concatenate([s[0][1] for i in layers for s in i['shapes']])
+    x_edges = tile_edges(px.min(), px.max(), tile_size)
+    y_edges = tile_edges(py.min(), py.max(), tile_size)
+    samples = max(int(np.ceil(tile_size / sample_pitch)), 1)
+    xs, ys = sample_points(x_edges, samples), sample_points(y_edges, samples)
+    ny, nx = len(y_edges) - 1, len(x_edges) - 1
+    if layout['outline'] is not None:
+        inside = polygon_mask(px, py, xs, ys).reshape(ny, samples, nx, samples).mean(axis=(1, 3)) >= 0.5
+    else:
+        inside = np.ones((ny, nx), dtype=bool)
+
+    in_plane_x = np.zeros((ny, nx))
+    in_plane_y = np.zeros((ny, nx))
+    through = np.zeros((ny, nx))
+    coverage = {}
+    for layer in layers:
+        t = layer['thickness']
+        if layer['metal'] is None:
+            kx = ky = kz = np.full((ny, nx), layer['fill'])
+        else:
+            copper = copper_mask(layer['shapes'], xs, ys)
+            kx, ky, kz = layer_conductivities(copper, layer['metal'], layer['fill'], samples)
+            coverage[layer['name']] = copper.reshape(ny, samples, nx, samples).mean(axis=(1, 3))
+        in_plane_x += t * kx
+        in_plane_y += t * ky
+        through += t / kz
+    thickness = sum(i['thickness'] for i in layers)
+    return {'x_edges': x_edges, 'y_edges': y_edges, 'inside': inside, 'kx': in_plane_x / thickness,
+            'ky': in_plane_y / thickness, 'kz': thickness / through, 'thickness': thickness, 'coverage': coverage}
+
+
+# Function to round values to significant digits
+def _round_significant(values, digits):
+    scale = 10.0 ** (np.floor(np.log10(np.abs(values))) - digits + 1)
+    return np.round(values / scale) * scale
+
+
+# Function to merge the tiles of a board into blocks
+def tile_blocks(tiles, digits=CONDUCTIVITY_DIGITS):
+    """ Neighbouring tiles of a row whose conductivities agree to the given significant digits merge into one block
+        Returns
+        -------
+        tuple
+            Blocks as rows of (xmin, ymin, xmax, ymax, material) [mm], and conductivities along x, y and z of
+            each material [W/m-C]
+    """
+    k = np.stack([tiles['kx'], tiles['ky'], tiles['kz']], axis=-1)
+    materials, codes = np.unique(_round_significant(k[tiles['inside']], digits), axis=0, return_inverse=True)
+    material_grid = np.full(tiles['inside'].shape, -1)
+    material_grid[tiles['inside']] = codes.ravel()
+    x_edges, y_edges = tiles['x_edges'], tiles['y_edges']
+    blocks = []
+    for row, codes_row in enumerate(material_grid):
+        # A run ends where the material changes
+        starts = np.flatnonzero(np.diff(np.r_[-2, codes_row]) != 0)
+        ends = np.r_[starts[1:], len(codes_row)]
+        for start, end in zip(starts, ends):
+            if codes_row[start] >= 0:
+                blocks.append((x_edges[start], y_edges[row], x_edges[end], y_edges[row + 1], codes_row[start]))
+    return np.array(blocks, dtype=float).reshape(-1, 5), materials
+
+
+# Function to get the board objects of an Icepak design
+def board_objects(ipk):
+    """ Returns
+        -------
+        tuple
+            Name of the PCB 3D component, None for a tiled board, and the board objects: the PCB layers from top
+            to bottom, or the tiles
+    """
+    pcb = ipk.modeler.primitives.user_defined_component_names
+    if pcb:
+        return pcb[0], sorted(ipk.modeler.get_3d_component_object_list(pcb[0]))
+    return None, sorted(i for i in ipk.modeler.solid_bodies if i.startswith(TILE_PREFIX))
+
+
+# Function to get the face of a block touching the PCB
+def board_side_face(ipk, block_handle, pcb_layers):
+    pcb_top_layer = ipk.modeler.get_object_from_name(pcb_layers[0])
+    pcb_bottom_layer = ipk.modeler.get_object_from_name(pcb_layers[-1])
+    block_board_side = block_handle.get_touching_faces(pcb_top_layer) or \
+        block_handle.get_touching_faces(pcb_bottom_layer)
+    if block_board_side:
+        return block_board_side[0]
+    # A component of a tiled board stands on tiles other than the first and last one; its board side is the face
+    # towards the middle of the board
+    board_middle = (pcb_top_layer.top_face_z.center[2] + pcb_bottom_layer.bottom_face_z.center[2]) / 2
+    if block_handle.bottom_face_z.center[2] >= board_middle:
+        return block_handle.bottom_face_z
+    return block_handle.top_face_z
+
+
+# Function to find the tile under a component of a tiled board
+def board_tile_under(ipk, block_handle, tiles):
+    x, y = ipk.modeler.primitives.get_face_center(board_side_face(ipk, block_handle, tiles).id)[:2]
+    tile = ipk.modeler.get_object_from_name(tiles[0])
+    z = (tile.top_face_z.center[2] + tile.bottom_face_z.center[2]) / 2
+    under = [i for i in ipk.modeler.get_bodyname_from_position([x, y, z]) if i in tiles]
+    return under[0] if under else tiles[0]
@@ -0,0 +1,187 @@
+import os
+import copy
+import json
+import time
+import shutil
+import hashlib
+
+from utils.jobs import _read_json, _write_json
+from utils.bc_diff import BC_COLUMNS
+from utils.ecad_cache import ecad_content_hash
+from utils.uploads import file_sha256
+from utils.distributed import IDF_COMPANIONS
+
+# Snapshots of the project after every build stage, per project of a working directory
+CHECKPOINT_FOLDER = os.path.join('.pcb_thermal_cache', 'checkpoints')
+# Build stages in order, with their progress percentage
+BUILD_STAGES = [('ECAD import', 5), ('PCB creation', 15), ('IDF import', 25), ('Gap fix', 35), ('Filtering', 40),
+                ('Lumping', 42), ('Priorities', 45), ('Mesh setup', 50), ('Boundary conditions', 60),
+                ('Solution setup', 70)]
+SOLVE_STAGE = 'Solve'
+
+
+# Function to get the checkpoint folder of a project
+def checkpoint_dir(workdir, project_name):
+    return os.path.join(os.path.abspath(workdir), CHECKPOINT_FOLDER, os.path.splitext(project_name)[0])
+
+
+# Function to list the inputs each build stage depends on
+def _stage_inputs(job, bc_df):
+    idf_no_ext, ext = os.path.splitext(job['idf_file'])
+    idf_library = idf_no_ext + IDF_COMPANIONS.get(ext.lower(), '')
+    return {'ECAD import': [ecad_content_hash(job['ecad_file']), job['ecad_type']],
+            'PCB creation': [job['project_name'], job.get('board') or None],
+            'IDF import': [file_sha256(job['idf_file']),
+                           file_sha256(idf_library) if os.path.isfile(idf_library) else ''],
+            'Gap fix': [bc_df[['Instance_Name', 'Placement']].to_csv(index=False), job['all_points']],
+            'Filtering': [bc_df['Include'].to_csv(index=False), job['delete_filtered']],
+            'Lumping': [job.get('lumping') or None, bc_df[['Instance_Name', 'Include', 'BC_Type', 'Power [W]',
+                                                           'Monitor_Point', 'Material']].to_csv(index=False)
+                        if job.get('lumping') else ''],
+            'Priorities': [],
+            'Mesh setup': [job['mesh_fidelity']],
+            'Boundary conditions': [bc_df[['Instance_Name'] + BC_COLUMNS].to_csv(index=False),
+                                    file_sha256(job['materials_file']) if job['materials_file'] else ''],
+            'Solution setup': [job['conv_type'], job['vel'], job['vel_dir'], job['air_temp'],
+                               job['gravity_direction']]}
+
+
+# Function to get the key of every build stage
+def stage_keys(job, bc_df):
+    """ Each key hashes the inputs of its stage and the key of the stage before, so a changed input invalidates
+        its stage and every later one
+        Parameters
+        ----------
+        job: dict
+            Simulation inputs
+        bc_df: pandas.DataFrame
+            Boundary conditions table as normalized strings
+        Returns
+        -------
+        dict
+            Key of each stage of BUILD_STAGES
+    """
+    inputs = _stage_inputs(job, bc_df)
+    keys = {}
+    key = ''
+    for stage, percent in BUILD_STAGES:
+        key = hashlib.sha256(json.dumps([key, stage, inputs[stage]]).encode('utf-8')).hexdigest()
+        keys[stage] = key
+    return keys
+
+
+# Function to list the files of a project snapshot with their path relative to the project folder
+def _project_files(project_file):
+    project_no_ext = os.path.splitext(project_file)[0]
+    files = [(os.path.basename(project_file), project_file)]
+    # Layout designs keep their EDB next to the project
+    if os.path.isdir(project_no_ext + '.aedb'):
+        for dirpath, dirnames, filenames in os.walk(project_no_ext + '.aedb'):
+            for name in filenames:
+                full_path = os.path.join(dirpath, name)
+                files.append((os.path.relpath(full_path, os.path.dirname(project_file)), full_path))
+    return files
+
+
+class StageCheckpoints:
+    """ Completed build stages of a project with a snapshot of the project after each of them
+        A retry of a failed or changed build restores the snapshot of the last stage whose inputs are unchanged
+        and runs only the stages after it.
+        Parameters
+        ----------
+        workdir: str
+            Working directory of the project
+        project_name: str
+            Name of the project file
+        keys: dict
+            Key of each stage, see stage_keys
+    """
+
+    def __init__(self, workdir, project_name, keys):
+        self.folder = checkpoint_dir(workdir, project_name)
+        self.record_file = os.path.join(self.folder, 'checkpoints.json')
+        self.keys = keys
+        self.record = _read_json(self.record_file, {'stages': {}})
+
+    def _snapshot_dir(self, stage):
+        number = [i[0] for i in BUILD_STAGES].index(stage) + 1
+        return os.path.join(self.folder, f'''{number:02d}_{stage.lower().replace(' ', '_')}''')
+
+    def resume_point(self):
+        """ Last stage completed with unchanged inputs, None if the build has to start from the beginning """
+        resume = None
+        for stage, percent in BUILD_STAGES:
+            entry = self.record['stages'].get(stage)
+            if not entry or entry['key'] != self.keys[stage] or \
+                    not all(os.path.exists(os.path.join(self._snapshot_dir(stage), i)) for i in entry['files']):
+                break
+            resume = stage
+        return resume
+
+    def state(self, stage):
+        """ Values the later stages need, e.g. names of PCB layers, as recorded after a stage """
+        # A copy, so later stages can extend lists of the state without changing the record
+        return copy.deepcopy(self.record['stages'][stage]['state'])
+
+    def save(self, stage, project_file, state):
+        """ Record the completion of a stage with a snapshot of the saved project
+            Files that did not change since the snapshot of the previous stage are hard linked to it.
+            Checkpoints of later stages no longer follow from this one and are removed.
+        """
+        stages = [i[0] for i in BUILD_STAGES]
+        previous = self._snapshot_dir(stages[stages.index(stage) - 1]) if stages.index(stage) else None
+        snapshot_dir = self._snapshot_dir(stage)
+        tmp_dir = snapshot_dir + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        files = []
+        for rel_path, full_path in _project_files(project_file):
+            dest = os.path.join(tmp_dir, rel_path)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            earlier = os.path.join(previous, rel_path) if previous else None
+            stat = os.stat(full_path)
+            linked = False
+            if earlier and os.path.exists(earlier):
+                earlier_stat = os.stat(earlier)
+                if (earlier_stat.st_size, earlier_stat.st_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                    try:
+                        os.link(earlier, dest)
+                        linked = True
+                    except OSError:
+                        pass
+            if not linked:
+                shutil.copy2(full_path, dest)
+            files.append(rel_path)
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        os.rename(tmp_dir, snapshot_dir)
+        for later in stages[stages.index(stage) + 1:] + [SOLVE_STAGE]:
+            if self.record['stages'].pop(later, None) is not None and later != SOLVE_STAGE:
+                shutil.rmtree(self._snapshot_dir(later), ignore_errors=True)
+        self.record['stages'][stage] = {'key': self.keys[stage], 'files': files, 'state': copy.deepcopy(state),
+                                        'completed': time.time()}
+        _write_json(self.record_file, self.record)
+
+    def complete(self, stage):
+        """ Record the completion of a stage without a snapshot, e.g. the solve """
+        self.record['stages'][stage] = {'key': self.keys[BUILD_STAGES[-1][0]], 'files': [], 'state': {},
+                                        'completed': time.time()}
+        _write_json(self.record_file, self.record)
+
+    def restore(self, stage, dest_dir):
+        """ Copy the snapshot of a stage into a folder
+            Returns
+            -------
+            str
+                Full path of the restored project file
+        """
+        snapshot_dir = self._snapshot_dir(stage)
+        files = self.record['stages'][stage]['files']
+        for rel_path in files:
+            dest = os.path.join(dest_dir, rel_path)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            # Copied, not linked, as AEDT writes into the restored project
+            shutil.copy2(os.path.join(snapshot_dir, rel_path), dest)
+        return os.path.join(dest_dir, files[0])
+
+    def clear(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+        self.record = {'stages': {}}
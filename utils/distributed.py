@@ -0,0 +1,328 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import socket
+import subprocess
+import pandas as pd
+
+from utils.jobs import APP_ROOT, _read_json, _write_json
+
+# Workers consider a claimed task lost when its claim has not been touched for this many seconds
+HEARTBEAT_INTERVAL = 30
+HEARTBEAT_TIMEOUT = 300
+DEFAULT_RETRIES = 2
+# Arguments of the command used to start a worker on a remote host; local hosts are started directly. ssh hands
+# the arguments to the shell of the remote host as one line, so paths are quoted and must not contain characters
+# that shell would still expand inside quotes.
+REMOTE_COMMAND = ('ssh', '{host}', '"{python}"', '-m', 'utils.host_worker', '"{shared_dir}"', '--name', '{name}')
+REMOTE_UNSAFE_CHARACTERS = '"$`%!\r\n'
+LOCAL_HOSTS = ('localhost', '127.0.0.1', 'local')
+# Host names (RFC 1123) and IPv4 addresses; anything else is rejected before a command is built from it
+HOST_NAME = re.compile(r'(?=.{1,253}$)[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?'
+                       r'(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)*')
+# Job inputs that are files or folders to copy to the shared directory
+INPUT_KEYS = ('ecad_file', 'idf_file', 'bc_file', 'materials_file')
+IDF_COMPANIONS = {'.emn': '.emp', '.bdf': '.ldf'}
+
+
+# Function to get the folder of a batch in the shared directory
+def get_batch_dir(shared_dir, batch_id):
+    return os.path.join(shared_dir, 'batches', batch_id)
+
+
+# Function to copy a file or folder into a folder
+def _copy_input(path, dest_dir):
+    dest = os.path.join(dest_dir, os.path.basename(os.path.normpath(path)))
+    if os.path.isdir(path):
+        if not os.path.exists(dest):
+            shutil.copytree(path, dest)
+    else:
+        shutil.copy2(path, dest)
+    return os.path.basename(dest)
+
+
+# Function to split a simulation job into one job per variation
+def sweep_jobs(job, parameter, values):
+    """ Jobs of a parameter sweep
+        Parameters
+        ----------
+        job: dict
+            Simulation inputs of the nominal design
+        parameter: str
+            Job key to vary, e.g. 'air_temp' or 'vel'
+        values: list
+            Values of the parameter
+        Returns
+        -------
+        list
+    """
+    project_no_ext = os.path.splitext(job['project_name'])[0]
+    jobs = []
+    for i, value in enumerate(values):
+        jobs.append(dict(job, **{parameter: value}, project_name=f'{project_no_ext}_var{i + 1}.aedt',
+                         variation={parameter: value}))
+    return jobs
+
+
+# Function to hand a batch of simulation jobs to the worker hosts
+def submit_batch(shared_dir, jobs, max_retries=DEFAULT_RETRIES):
+    """ Copy the inputs of a batch to the shared directory and create one task per job
+        Every worker host runs its own non-graphical AEDT session, so the jobs are always solved
+        non-graphically and rebuilt from scratch.
+        Parameters
+        ----------
+        shared_dir: str
+            Directory reachable from every worker host
+        jobs: list
+            Simulation jobs, e.g. from sweep_jobs
+        max_retries: int, optional
+            default = 2
+            Attempts after the first one before a task is marked as failed
+        Returns
+        -------
+        str
+            Batch ID
+    """
+    batch_id = time.strftime('%Y%m%d_%H%M%S') + '_' + os.path.splitext(jobs[0]['project_name'])[0]
+    batch_dir = get_batch_dir(shared_dir, batch_id)
+    inputs_dir = os.path.join(batch_dir, 'inputs')
+    tasks_dir = os.path.join(batch_dir, 'tasks')
+    os.makedirs(inputs_dir)
+    os.makedirs(tasks_dir)
+    os.makedirs(os.path.join(batch_dir, 'results'))
+
+    # Jobs of a batch usually share their input files, which are copied once
+    copied = {}
+    for i, job in enumerate(jobs):
+        task = dict(job, non_graphical=True, analyze=True, incremental=False)
+        for key in INPUT_KEYS:
+            path = job.get(key)
+            if not path:
+                continue
+            if path not in copied:
+                copied[path] = _copy_input(path, inputs_dir)
+                ext = os.path.splitext(path)[1].lower()
+                if key == 'idf_file' and ext in IDF_COMPANIONS:
+                    companion = os.path.splitext(path)[0] + IDF_COMPANIONS[ext]
+                    if os.path.exists(companion):
+                        _copy_input(companion, inputs_dir)
+            task[key] = copied[path]
+        task_id = f'task{i + 1:04d}'
+        task.update(task_id=task_id, batch_id=batch_id, max_retries=max_retries)
+        _write_json(os.path.join(tasks_dir, task_id + '.json'), task)
+    _write_json(os.path.join(batch_dir, 'batch.json'), {'batch_id': batch_id, 'tasks': len(jobs),
+                                                        'submitted': time.time(), 'host': socket.gethostname()})
+    return batch_id
+
+
+# Function to record one attempt of a task
+def record_attempt(tasks_dir, task_id, entry):
+    entry['time'] = time.time()
+    with open(os.path.join(tasks_dir, task_id + '.attempts.jsonl'), 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+
+
+# Function to read the attempts of a task
+def read_attempts(tasks_dir, task_id):
+    attempts = []
+    try:
+        with open(os.path.join(tasks_dir, task_id + '.attempts.jsonl'), 'r') as f:
+            for line in f:
+                try:
+                    attempts.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return attempts
+
+
+# Function to get the state of a task
+def task_state(tasks_dir, task_id):
+    """ One of 'done', 'failed', 'running', 'lost' and 'pending' """
+    base = os.path.join(tasks_dir, task_id)
+    if os.path.exists(base + '.done'):
+        return 'done'
+    if os.path.exists(base + '.failed'):
+        return 'failed'
+    try:
+        heartbeat = os.path.getmtime(base + '.claim')
+    except OSError:
+        return 'pending'
+    if time.time() - heartbeat > HEARTBEAT_TIMEOUT:
+        return 'lost'
+    return 'running'
+
+
+# Function to claim a pending task
+def claim_task(tasks_dir, task_id, worker_name):
+    """ Claim a task for a worker. The claim file is created exclusively, so only one worker wins.
+        Lost claims, whose worker stopped sending heartbeats, are released first and count as a failed attempt.
+        Returns
+        -------
+        bool
+    """
+    base = os.path.join(tasks_dir, task_id)
+    state = task_state(tasks_dir, task_id)
+    if state == 'lost':
+        claim = _read_json(base + '.claim', {})
+        stale_file = base + '.claim.' + str(int(time.time() * 1000))
+        try:
+            # Only the worker whose rename succeeds records the lost attempt
+            os.rename(base + '.claim', stale_file)
+        except OSError:
+            return False
+        record_attempt(tasks_dir, task_id, {'worker': claim.get('worker'), 'result': 'lost',
+                                            'error': 'No heartbeat for %d s' % HEARTBEAT_TIMEOUT})
+        os.remove(stale_file)
+        finish_attempt_check(tasks_dir, task_id)
+        state = task_state(tasks_dir, task_id)
+    if state != 'pending':
+        return False
+    try:
+        fd = os.open(base + '.claim', os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except OSError:
+        return False
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'worker': worker_name, 'host': socket.gethostname(), 'pid': os.getpid(),
+                   'claimed': time.time()}, f)
+    return True
+
+
+# Function to mark a task as failed once it has used all its attempts
+def finish_attempt_check(tasks_dir, task_id):
+    task = _read_json(os.path.join(tasks_dir, task_id + '.json'), {})
+    attempts = read_attempts(tasks_dir, task_id)
+    failures = [i for i in attempts if i['result'] != 'done']
+    if len(failures) > task.get('max_retries', DEFAULT_RETRIES):
+        _write_json(os.path.join(tasks_dir, task_id + '.failed'), {'error': failures[-1].get('error', ''),
+                                                                     'attempts': len(attempts)})
+
+
+# Function to read the state of every task of a batch
+def batch_status(shared_dir, batch_id):
+    """ Returns
+        -------
+        pandas.DataFrame
+            One row per task with its variation, state, worker and number of attempts
+    """
+    tasks_dir = os.path.join(get_batch_dir(shared_dir, batch_id), 'tasks')
+    rows = []
+    for name in sorted(os.listdir(tasks_dir)):
+        if not name.endswith('.json'):
+            continue
+        task_id = name[:-5]
+        task = _read_json(os.path.join(tasks_dir, name), {})
+        claim = _read_json(os.path.join(tasks_dir, task_id + '.claim'), {})
+        attempts = read_attempts(tasks_dir, task_id)
+        status = _read_json(os.path.join(get_batch_dir(shared_dir, batch_id), 'results', task_id, 'status.json'), {})
+        state = task_state(tasks_dir, task_id)
+        rows.append({'task': task_id, 'project': task.get('project_name'),
+                     'variation': json.dumps(task.get('variation', {})), 'state': state,
+                     'worker': claim.get('worker', attempts[-1]['worker'] if attempts else ''),
+                     'stage': status.get('stage', '') if state == 'running' else '',
+                     'attempts': len(attempts) + (state == 'running'),
+                     'error': next((i.get('error', '') for i in reversed(attempts) if i['result'] != 'done'), '')})
+    return pd.DataFrame(rows)
+
+
+# Function to list the batches of a shared directory, newest first
+def list_batches(shared_dir):
+    batches_dir = os.path.join(shared_dir, 'batches')
+    if not os.path.isdir(batches_dir):
+        return []
+    return [i for i in sorted(os.listdir(batches_dir), reverse=True)
+            if os.path.exists(os.path.join(batches_dir, i, 'batch.json'))]
+
+
+# Function to copy the solved projects of a batch into a working directory
+def collect_results(shared_dir, batch_id, workdir):
+    """ Returns
+        -------
+        list
+            Project files copied to the working directory
+    """
+    results_dir = os.path.join(get_batch_dir(shared_dir, batch_id), 'results')
+    tasks_dir = os.path.join(get_batch_dir(shared_dir, batch_id), 'tasks')
+    projects = []
+    for task_id in sorted(os.listdir(results_dir)):
+        if task_state(tasks_dir, task_id) != 'done':
+            continue
+        for name in os.listdir(os.path.join(results_dir, task_id)):
+            src = os.path.join(results_dir, task_id, name)
+            dest = os.path.join(workdir, name)
+            if name.endswith('.aedtresults'):
+                shutil.rmtree(dest, ignore_errors=True)
+                shutil.copytree(src, dest)
+            elif name.endswith('.aedt'):
+                shutil.copy2(src, dest)
+                projects.append(dest)
+    return projects
+
+
+# Function to check the hosts and shared directory of the workers before starting them
+def validate_hosts(hosts, shared_dir, python=sys.executable):
+    """ Returns
+        -------
+        list
+            Errors, empty if the workers can be started
+    """
+    errors = [f'{host} is not a valid host name' for host in hosts if not HOST_NAME.fullmatch(host)]
+    if any(host.lower() not in LOCAL_HOSTS for host in hosts):
+        for label, path in (('Shared directory', shared_dir), ('Python interpreter', python)):
+            unsafe = sorted(set(path) & set(REMOTE_UNSAFE_CHARACTERS))
+            if unsafe:
+                errors.append(f'{label} {path!r} cannot be passed to remote hosts, it contains {unsafe}')
+    return errors
+
+
+# Function to start worker processes on a list of hosts
+def launch_workers(hosts, shared_dir, command=REMOTE_COMMAND, python=sys.executable):
+    """ Start one worker per host entry. Local hosts, which may be listed several times to test a batch on a
+        single machine, are started as detached processes; other hosts are started with the remote command.
+        No shell is involved on this machine, and hosts and paths are checked with validate_hosts first.
+        Workers do not start AEDT themselves: each task is submitted to the scheduler of the worker's host, so
+        batch tasks and the jobs of the app share its licenses and cores (see utils.host_worker).
+        Parameters
+        ----------
+        hosts: list
+            Host names
+        shared_dir: str
+            Directory reachable from every worker host, with the same path on every host
+        command: tuple, optional
+            Arguments of the remote start command with {host}, {python}, {shared_dir} and {name} fields
+        python: str, optional
+            Python interpreter with this app on its path on every host
+        Returns
+        -------
+        list
+            Worker names
+    """
+    errors = validate_hosts(hosts, shared_dir, python)
+    if errors:
+        raise ValueError('\n'.join(errors))
+    names = []
+    env = dict(os.environ)
+    env['PYTHONPATH'] = APP_ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    logs_dir = os.path.join(shared_dir, 'logs')
+    os.makedirs(logs_dir, exist_ok=True)
+    for i, host in enumerate(hosts):
+        name = f'{host}-{i + 1}'
+        kwargs = {}
+        if sys.platform == 'win32':
+            kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+        else:
+            kwargs['start_new_session'] = True
+        if host.lower() in LOCAL_HOSTS:
+            args = [python, '-m', 'utils.host_worker', shared_dir, '--name', name]
+        else:
+            args = [i.format(host=host, python=python, shared_dir=shared_dir, name=name) for i in command]
+        log = open(os.path.join(logs_dir, name + '.log'), 'a')
+        subprocess.Popen(args, cwd=APP_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+                         stdin=subprocess.DEVNULL, **kwargs)
+        log.close()
+        names.append(name)
+    return names
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+
+# Imported HFSS 3D Layout projects are shared by all working directories of a user
+ECAD_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.pcb_thermal_cache', 'ecad')
+MAX_CACHED_LAYOUTS = 10
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+# Function to write a JSON file that other processes may be writing at the same time
+def _replace_json(path, data):
+    tmp_path = path + '.' + uuid.uuid4().hex + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    # The last writer wins; every version is complete, so readers never see a partial file
+    os.replace(tmp_path, path)
+
+
+# Function to list the files of an ECAD input with their size and modification time
+def _ecad_files(ecad_path):
+    if os.path.isdir(ecad_path):
+        files = []
+        for dirpath, dirnames, filenames in os.walk(ecad_path):
+            dirnames.sort()
+            for name in sorted(filenames):
+                full_path = os.path.join(dirpath, name)
+                files.append((os.path.relpath(full_path, ecad_path).replace('\\', '/'), full_path))
+        return files
+    return [(os.path.basename(ecad_path), ecad_path)]
+
+
+# Function to hash the content of an ECAD file or EDB folder
+def ecad_content_hash(ecad_path, cache_dir=ECAD_CACHE_DIR):
+    """ SHA-256 of the content of an EDB folder, ODB++ archive (*.tgz) or BRD file
+        File names inside a folder are part of the hash, file paths outside are not. Hashes are
+        remembered per path and reused as long as no file size or modification time changes.
+        Parameters
+        ----------
+        ecad_path: str
+            Path of the ECAD file or EDB folder
+        cache_dir: str, optional
+            Folder of the ECAD cache
+        Returns
+        -------
+        str
+    """
+    files = _ecad_files(ecad_path)
+    signature = []
+    for rel_path, full_path in files:
+        stat = os.stat(full_path)
+        signature.append([rel_path, stat.st_size, stat.st_mtime_ns])
+    memo_file = os.path.join(cache_dir, 'hashes.json')
+    memo = {}
+    if os.path.exists(memo_file):
+        try:
+            with open(memo_file, 'r') as f:
+                memo = json.load(f)
+        except ValueError:
+            memo = {}
+    memo_key = os.path.normcase(os.path.abspath(ecad_path))
+    if memo_key in memo and memo[memo_key]['signature'] == signature:
+        return memo[memo_key]['hash']
+
+    sha = hashlib.sha256()
+    for rel_path, full_path in files:
+        sha.update(rel_path.encode('utf-8') + b'\0')
+        with open(full_path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                sha.update(block)
+    digest = sha.hexdigest()
+    memo[memo_key] = {'signature': signature, 'hash': digest}
+    os.makedirs(cache_dir, exist_ok=True)
+    _replace_json(memo_file, memo)
+    return digest
+
+
+# Function to get the cache key of an imported layout
+def layout_key(ecad_hash, ecad_type, aedt_release):
+    """ Key of the layout project imported from an ECAD content with an ECAD type and AEDT release
+        Projects saved by a newer AEDT release cannot be opened by an older one, so each release has its own entry.
+        Returns
+        -------
+        str
+    """
+    return hashlib.sha256(json.dumps([ecad_hash, ecad_type, str(aedt_release)]).encode('utf-8')).hexdigest()
+
+
+# Function to get the cached layout project of a layout key
+def get_cached_layout(ecad_hash, cache_dir=ECAD_CACHE_DIR):
+    """ Returns
+        -------
+        dict
+            Metadata of the cached layout project, None if the ECAD has not been imported before
+    """
+    meta_file = os.path.join(cache_dir, ecad_hash, 'layout.json')
+    if not os.path.exists(meta_file):
+        return None
+    with open(meta_file, 'r') as f:
+        meta = json.load(f)
+    os.utime(meta_file, None)
+    return meta
+
+
+# Function to copy an imported layout project into the cache
+def store_layout(ecad_hash, project_file, meta, cache_dir=ECAD_CACHE_DIR, max_entries=MAX_CACHED_LAYOUTS):
+    """ Store an HFSS 3D Layout project (*.aedt and *.aedb) under the key of its ECAD input
+        Workers that import the same board at the same time each copy into a folder of their own; the first one
+        moved into place is kept, and the others are discarded.
+        Parameters
+        ----------
+        ecad_hash: str
+            Key returned by layout_key
+        project_file: str
+            Full path of the saved HFSS 3D Layout project
+        meta: dict
+            Information needed to reuse the project (design name, outline polygon, ...)
+        cache_dir: str, optional
+            Folder of the ECAD cache
+        max_entries: int, optional
+            default = 10
+            Least recently used layouts beyond this number are removed
+    """
+    entry_dir = os.path.join(cache_dir, ecad_hash)
+    if os.path.exists(os.path.join(entry_dir, 'layout.json')):
+        return
+    project_no_ext = os.path.splitext(project_file)[0]
+    tmp_dir = os.path.join(cache_dir, ecad_hash + '.' + uuid.uuid4().hex + '.tmp')
+    os.makedirs(tmp_dir)
+    try:
+        shutil.copy2(project_file, tmp_dir)
+        if os.path.isdir(project_no_ext + '.aedb'):
+            shutil.copytree(project_no_ext + '.aedb',
+                            os.path.join(tmp_dir, os.path.basename(project_no_ext) + '.aedb'))
+        meta = dict(meta, project=os.path.basename(project_file), stored=time.time())
+        with open(os.path.join(tmp_dir, 'layout.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+        # An entry without layout.json is left over from an interrupted store
+        if os.path.isdir(entry_dir) and not os.path.exists(os.path.join(entry_dir, 'layout.json')):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Stored by another worker in the meantime
+            if not os.path.exists(os.path.join(entry_dir, 'layout.json')):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    evict_layouts(cache_dir, max_entries)
+
+
+# Function to copy a cached layout project into a working folder
+def restore_layout(ecad_hash, dest_dir, cache_dir=ECAD_CACHE_DIR):
+    """ Copy a cached layout project to a working folder
+        Returns
+        -------
+        str
+            Full path of the restored HFSS 3D Layout project
+    """
+    meta = get_cached_layout(ecad_hash, cache_dir)
+    entry_dir = os.path.join(cache_dir, ecad_hash)
+    shutil.rmtree(dest_dir, ignore_errors=True)
+    shutil.copytree(entry_dir, dest_dir, ignore=shutil.ignore_patterns('layout.json'))
+    return os.path.join(dest_dir, meta['project'])
+
+
+# Function to remove least recently used layouts from the cache
+def evict_layouts(cache_dir=ECAD_CACHE_DIR, max_entries=MAX_CACHED_LAYOUTS):
+    entries = []
+    for name in os.listdir(cache_dir):
+        meta_file = os.path.join(cache_dir, name, 'layout.json')
+        # Folders being stored by other workers are not entries yet
+        if not name.endswith('.tmp') and os.path.exists(meta_file):
+            entries.append((os.path.getmtime(meta_file), name))
+    entries.sort(reverse=True)
+    for mtime, name in entries[max_entries:]:
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
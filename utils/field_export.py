@@ -0,0 +1,295 @@
+import os
+import json
+import shutil
+
+import numpy as np
+
+from utils.field_reader import iter_field_chunks
+
+FIELD_META_FILE = 'fields.json'
+MAX_CACHED_FIELDS = 10
+
+
+# Function to create a regular grid of sample points in the mid-plane of a PCB layer
+def layer_sample_grid(bounding_box, resolution):
+    """ Regular grid of sample points covering the bounding box of a PCB layer
+        Parameters
+        ----------
+        bounding_box: list
+            [xmin, ymin, zmin, xmax, ymax, zmax] of the layer in model units
+        resolution: int
+            Number of sample points along the longer side of the layer
+        Returns
+        -------
+        tuple
+            x coordinates, y coordinates and z coordinate of the sample plane
+    """
+    xmin, ymin, zmin, xmax, ymax, zmax = [float(i) for i in bounding_box]
+    # A grid needs two distinct coordinates along each side, or its cell size is zero
+    if not (xmax > xmin and ymax > ymin):
+        raise ValueError(f'The bounding box {[xmin, ymin, zmin, xmax, ymax, zmax]} has no area in the x-y plane')
+    step = max(xmax - xmin, ymax - ymin) / max(int(resolution) - 1, 1)
+    nx = max(int(round((xmax - xmin) / step)) + 1, 2)
+    ny = max(int(round((ymax - ymin) / step)) + 1, 2)
+    x = np.linspace(xmin, xmax, nx)
+    y = np.linspace(ymin, ymax, ny)
+    z = 0.5 * (zmin + zmax)
+    return x, y, z
+
+
+# Function to read an exported field file into an array of x, y, z, value rows
+def read_field_points(fld_file, dtype=np.float32, skip_nan=True):
+    """ Read the points of an AEDT field file (*.fld)
+        Header lines are skipped, and so are points outside the solved domain (Nan) unless skip_nan is False.
+        Parameters
+        ----------
+        fld_file: str
+            Path of the field file
+        dtype: numpy.dtype, optional
+            default = float32
+        skip_nan: bool, optional
+            default = True
+        Returns
+        -------
+        numpy.ndarray
+            Array with one x, y, z, value row per point
+    """
+    chunks = list(iter_field_chunks(fld_file, dtype=dtype, skip_nan=skip_nan))
+    if not chunks:
+        return np.empty((0, 4), dtype=dtype)
+    return np.concatenate(chunks)
+
+
+# Function to map exported points back onto the sample grid
+def points_to_grid(points, x, y):
+    """ Place exported point values onto the regular sample grid
+        Parameters
+        ----------
+        points: numpy.ndarray
+            x, y, z, value rows as returned by read_field_points
+        x: numpy.ndarray
+            x coordinates of the grid
+        y: numpy.ndarray
+            y coordinates of the grid
+        Returns
+        -------
+        numpy.ndarray
+            float32 array of shape (len(y), len(x)). Cells without a value are NaN.
+    """
+    grid = np.full((len(y), len(x)), np.nan, dtype=np.float32)
+    if not len(points):
+        return grid
+    dx = (x[-1] - x[0]) / (len(x) - 1)
+    dy = (y[-1] - y[0]) / (len(y) - 1)
+    ix = np.clip(np.rint((points[:, 0] - x[0]) / dx).astype(np.int64), 0, len(x) - 1)
+    iy = np.clip(np.rint((points[:, 1] - y[0]) / dy).astype(np.int64), 0, len(y) - 1)
+    grid[iy, ix] = points[:, 3]
+    return grid
+
+
+# Function to export the temperature field on each PCB layer to NumPy arrays
+def export_pcb_layer_fields(ipk, sol_name, pcb_layers, out_dir, resolution=200, quantity='Temp'):
+    """ Sample the temperature on each PCB layer onto a regular grid and store it as *.npy files
+        Parameters
+        ----------
+        ipk: pyaedt.Icepak
+            Icepak design with a solved setup
+        sol_name: str
+            Name of solution (setup : sweep)
+        pcb_layers: list
+            Names of PCB layer objects
+        out_dir: str
+            Folder for the *.npy arrays and the metadata file
+        resolution: int, optional
+            default = 200
+            Number of sample points along the longer side of each layer
+        quantity: str, optional
+            default = 'Temp'
+        Returns
+        -------
+        dict
+            Metadata of the exported layers
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    meta = {'quantity': quantity, 'units': ipk.modeler.model_units, 'solution': sol_name, 'layers': {}}
+    for layer in pcb_layers:
+        bounding_box = ipk.modeler.get_object_from_name(layer).bounding_box
+        try:
+            x, y, z = layer_sample_grid(bounding_box, resolution)
+        except ValueError as e:
+            raise ValueError('PCB layer ' + layer + ' cannot be sampled. ' + str(e)) from e
+        sample_points = [[float(i), float(j), z] for j in y for i in x]
+        fld_file = os.path.join(out_dir, layer + '.fld')
+        ipk.post.export_field_file(quantity_name=quantity, solution=sol_name, filename=fld_file,
+                                   obj_list=[layer], sample_points_lists=sample_points,
+                                   export_with_sample_points=True)
+        grid = points_to_grid(read_field_points(fld_file), x, y)
+        np.save(os.path.join(out_dir, layer + '.npy'), grid)
+        os.remove(fld_file)
+        meta['layers'][layer] = {'x0': float(x[0]), 'x1': float(x[-1]), 'nx': len(x),
+                                 'y0': float(y[0]), 'y1': float(y[-1]), 'ny': len(y), 'z': z}
+    with open(os.path.join(out_dir, FIELD_META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+# Function to load exported layer fields as memory-mapped arrays
+def load_layer_fields(out_dir):
+    """ Load the layer fields written by export_pcb_layer_fields
+        Parameters
+        ----------
+        out_dir: str
+            Folder of the exported fields
+        Returns
+        -------
+        tuple
+            Metadata dictionary and a dictionary of memory-mapped grids per layer.
+            (None, None) if no export exists in the folder.
+    """
+    meta_file = os.path.join(out_dir, FIELD_META_FILE)
+    if not os.path.exists(meta_file):
+        return None, None
+    with open(meta_file, 'r') as f:
+        meta = json.load(f)
+    # Loading marks the export as recently used, see evict_layer_fields
+    try:
+        os.utime(meta_file, None)
+    except OSError:
+        pass
+    fields = {}
+    for layer in meta['layers']:
+        fields[layer] = np.load(os.path.join(out_dir, layer + '.npy'), mmap_mode='r')
+    return meta, fields
+
+
+# Function to remove least recently used layer field exports
+def evict_layer_fields(fields_dir, max_entries=MAX_CACHED_FIELDS):
+    """ Keep the most recently exported or loaded layer fields of a folder, one export per sub-folder
+        Parameters
+        ----------
+        fields_dir: str
+            Folder holding the export folders of export_pcb_layer_fields
+        max_entries: int, optional
+            default = 10
+    """
+    if not os.path.isdir(fields_dir):
+        return
+    entries = []
+    for name in os.listdir(fields_dir):
+        meta_file = os.path.join(fields_dir, name, FIELD_META_FILE)
+        if os.path.exists(meta_file):
+            entries.append((os.path.getmtime(meta_file), name))
+    entries.sort(reverse=True)
+    for mtime, name in entries[max_entries:]:
+        shutil.rmtree(os.path.join(fields_dir, name), ignore_errors=True)
+
+
+# Function to get grid coordinates of a layer from its metadata
+def layer_coordinates(layer_meta):
+    x = np.linspace(layer_meta['x0'], layer_meta['x1'], layer_meta['nx'])
+    y = np.linspace(layer_meta['y0'], layer_meta['y1'], layer_meta['ny'])
+    return x, y
+
+
+# Function to find the hottest spots on a layer
+def find_hot_spots(grid, x, y, count=5, min_distance=0.0):
+    """ Locations of the highest values on a layer grid
+        Parameters
+        ----------
+        grid: numpy.ndarray
+            Layer grid of shape (len(y), len(x))
+        x: numpy.ndarray
+            x coordinates of the grid
+        y: numpy.ndarray
+            y coordinates of the grid
+        count: int, optional
+            default = 5
+        min_distance: float, optional
+            default = 0.0
+            Minimum distance between reported hot spots, in model units
+        Returns
+        -------
+        list
+            (x, y, value) tuples sorted by decreasing value
+    """
+    if count <= 0:
+        return []
+    values = np.asarray(grid, dtype=np.float32).ravel()
+    valid = np.flatnonzero(~np.isnan(values))
+    order = valid[np.argsort(values[valid])[::-1]]
+    spots = []
+    for flat_index in order:
+        iy, ix = divmod(int(flat_index), len(x))
+        px, py = float(x[ix]), float(y[iy])
+        if all((px - s[0]) ** 2 + (py - s[1]) ** 2 > min_distance ** 2 for s in spots):
+            spots.append((px, py, float(values[flat_index])))
+        if len(spots) >= count:
+            break
+    return spots
+
+
+# Function to read the value of a layer grid at a point
+def probe_layer(grid, x, y, px, py):
+    ix = int(np.clip(np.rint((px - x[0]) / (x[1] - x[0])), 0, len(x) - 1))
+    iy = int(np.clip(np.rint((py - y[0]) / (y[1] - y[0])), 0, len(y) - 1))
+    return float(grid[iy, ix])
+
+
+# Function to plot contours of the exported layer fields
+def plot_layer_contours(meta, fields, layers, xlim=None, ylim=None, levels=20, hot_spots=None):
+    """ Contour plot of the exported layer fields rendered with matplotlib
+        Parameters
+        ----------
+        meta: dict
+            Metadata returned by load_layer_fields
+        fields: dict
+            Layer grids returned by load_layer_fields
+        layers: list
+            Names of the layers to plot, one subplot per layer
+        xlim: tuple, optional
+            (min, max) x range to zoom into
+        ylim: tuple, optional
+            (min, max) y range to zoom into
+        levels: int, optional
+            default = 20
+        hot_spots: dict, optional
+            Hot spots per layer as returned by find_hot_spots, marked on the plot
+        Returns
+        -------
+        matplotlib.figure.Figure
+    """
+    import matplotlib.pyplot as plt
+
+    # Layers without any value (e.g. sampled outside the solved domain) are shown empty
+    finite = [np.asarray(fields[i])[np.isfinite(fields[i])] for i in layers]
+    finite = [i for i in finite if i.size]
+    vmin = min(float(i.min()) for i in finite) if finite else 0.0
+    vmax = max(float(i.max()) for i in finite) if finite else 1.0
+    if vmax <= vmin:
+        # A uniform field still needs increasing contour levels
+        margin = max(abs(vmin) * 1e-3, 1e-3)
+        vmin, vmax = vmin - margin, vmax + margin
+    fig, axes = plt.subplots(len(layers), 1, figsize=(7, 4.5 * len(layers)), squeeze=False)
+    for ax, layer in zip(axes[:, 0], layers):
+        x, y = layer_coordinates(meta['layers'][layer])
+        grid = np.asarray(fields[layer])
+        if not np.isfinite(grid).any():
+            ax.text(0.5, 0.5, 'No field values', transform=ax.transAxes, ha='center', va='center')
+            ax.set_title(layer)
+            continue
+        contour = ax.contourf(x, y, grid, levels=np.linspace(vmin, vmax, levels), cmap='jet')
+        if hot_spots and layer in hot_spots:
+            for px, py, value in hot_spots[layer]:
+                ax.plot(px, py, 'k+', markersize=10)
+                ax.annotate('{:.1f}'.format(value), (px, py), textcoords='offset points', xytext=(4, 4), fontsize=8)
+        ax.set_aspect('equal')
+        ax.set_title(layer)
+        ax.set_xlabel('X [' + meta['units'] + ']')
+        ax.set_ylabel('Y [' + meta['units'] + ']')
+        if xlim:
+            ax.set_xlim(xlim)
+        if ylim:
+            ax.set_ylim(ylim)
+        fig.colorbar(contour, ax=ax, label='Temperature [C]')
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,116 @@
+import os
+import re
+import hashlib
+
+from utils.jobs import _read_json, _write_json
+from utils.results_cache import CACHE_FOLDER
+
+# Named expressions and face lists created in the projects of a working directory
+EXPRESSION_FOLDER = os.path.join(CACHE_FOLDER, 'expressions')
+
+
+# Function to get the registry file of a project
+def registry_file(project_path):
+    path = os.path.normcase(os.path.abspath(project_path))
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+    name = re.sub(r"\W", "_", os.path.splitext(os.path.basename(path))[0])
+    return os.path.join(os.path.dirname(os.path.abspath(project_path)), EXPRESSION_FOLDER, f'{name}_{digest}.json')
+
+
+# Function to define the maximum temperature of an object
+def max_temperature_expression(object_name, surface=False):
+    """ Maximum over the volume of a solid object, or over the surface of a hollow one """
+    return object_name, ['Temp', 'Surf' if surface else 'Vol', object_name, 'Maximum']
+
+
+# Function to define the heat flow through a face list
+def heat_flow_expression(face_list):
+    return face_list + '_heat_flux', ['Heat_Flux', 'Surf', face_list, 'Integrate']
+
+
+class ExpressionRegistry:
+    """ Named expressions and face lists of the fields calculator of a project
+        Each is created once and then reused for as long as its definition is unchanged, so repeated reports
+        do not push the calculator stack or create face lists per object again. The record is kept with the
+        working directory and checked against the project once per session, as a project closed without saving
+        loses what was created in it.
+        Parameters
+        ----------
+        ipk: pyaedt.Icepak
+            Icepak design of the project
+        project_path: str
+            Full path of the AEDT project file (*.aedt)
+    """
+
+    def __init__(self, ipk, project_path):
+        self.ipk = ipk
+        self.project = os.path.normcase(os.path.abspath(project_path))
+        self.file = registry_file(project_path)
+        record = _read_json(self.file, {})
+        self.expressions = record.get('expressions', {}) if record.get('project') == self.project else {}
+        self.face_lists = record.get('face_lists', {}) if record.get('project') == self.project else {}
+        self._checked = False
+
+    def _check(self):
+        if self._checked:
+            return
+        fields = self.ipk.post.ofieldsreporter
+        self.expressions = {name: definition for name, definition in self.expressions.items()
+                            if fields.DoesNamedExpressionExists(name)}
+        lists = {i.name for i in self.ipk.modeler.user_lists}
+        self.face_lists = {name: faces for name, faces in self.face_lists.items() if name in lists}
+        self._checked = True
+
+    def has_face_list(self, name):
+        self._check()
+        return name in self.face_lists
+
+    def ensure(self, expressions, face_lists=None):
+        """ Create the face lists and named expressions that are missing or defined differently, in one pass
+            Parameters
+            ----------
+            expressions: dict
+                Definition of each named expression: quantity, geometry type (Vol or Surf), geometry name and
+                calculator operation, e.g. {'U1': ['Temp', 'Vol', 'U1', 'Maximum']}
+            face_lists: dict, optional
+                Face IDs of each face list the expressions use
+            Returns
+            -------
+            list
+                Names of the expressions, in the order given
+        """
+        self._check()
+        changed = False
+        for name, faces in (face_lists or {}).items():
+            faces = [int(i) for i in faces]
+            if self.face_lists.get(name) == faces:
+                continue
+            if name in self.face_lists:
+                self.ipk.modeler.oeditor.Delete(['NAME:Selections', 'Selections:=', name])
+            self.ipk.modeler.create_face_list(faces, name=name)
+            self.face_lists[name] = faces
+            changed = True
+
+        missing = {name: list(definition) for name, definition in expressions.items()
+                   if self.expressions.get(name) != list(definition)}
+        if missing:
+            fields = self.ipk.post.ofieldsreporter
+            fields.CalcStack('clear')
+            for name, (quantity, geometry_type, geometry, operation) in missing.items():
+                # Expressions of the same name from before the registry may be defined differently
+                if fields.DoesNamedExpressionExists(name):
+                    fields.DeleteNamedExpr(name)
+                fields.EnterQty(quantity)
+                if geometry_type == 'Vol':
+                    fields.EnterVol(geometry)
+                else:
+                    fields.EnterSurf(geometry)
+                fields.CalcOp(operation)
+                fields.AddNamedExpression(name, 'Fields')
+            self.expressions.update(missing)
+            changed = True
+        if changed:
+            os.makedirs(os.path.dirname(self.file), exist_ok=True)
+            _write_json(self.file, {'project': self.project, 'expressions': self.expressions,
+                                    'face_lists': self.face_lists})
+        return list(expressions)
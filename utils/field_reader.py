@@ -0,0 +1,329 @@
+import io
+import os
+import mmap
+
+import numpy as np
+
+# Size of the blocks parsed at a time from an exported field file
+DEFAULT_CHUNK_BYTES = 32 * 1024 * 1024
+
+
+# Function to parse a block of text into float32 rows, or rows of another type
+def _parse_block(text, columns, dtype=np.float32):
+    if not text.strip():
+        return np.empty((0, columns), dtype=dtype)
+    # Fast path; loadtxt fails on a value that is not a number and on lines with another number of values
+    try:
+        values = np.loadtxt(io.StringIO(text), dtype=dtype, ndmin=2)
+        if values.shape[1] == columns:
+            return values
+    except ValueError:
+        pass
+    # Slow path for blocks with stray non-numeric lines or rows of another length
+    rows = []
+    for line in text.splitlines():
+        values = line.split()
+        if len(values) != columns:
+            continue
+        try:
+            rows.append([float(i) for i in values])
+        except ValueError:
+            continue
+    return np.array(rows, dtype=dtype).reshape(-1, columns)
+
+
+# Function to find the byte offset of the first data line of a field file
+def field_data_offset(mm, columns=4):
+    """ Byte offset of the first numeric row in an AEDT field file (*.fld)
+        Parameters
+        ----------
+        mm: mmap.mmap
+            Memory map of the field file
+        columns: int, optional
+            default = 4
+            Number of values per row (x, y, z, value)
+        Returns
+        -------
+        int
+    """
+    offset = 0
+    while offset < len(mm):
+        end = mm.find(b'\n', offset)
+        if end < 0:
+            end = len(mm)
+        values = mm[offset:end].split()
+        if len(values) == columns:
+            try:
+                [float(i) for i in values]
+                return offset
+            except ValueError:
+                pass
+        offset = end + 1
+    return len(mm)
+
+
+# Function to iterate over a field file in fixed-size chunks
+def iter_field_chunks(fld_file, chunk_bytes=DEFAULT_CHUNK_BYTES, columns=4, dtype=np.float32, skip_nan=True):
+    """ Memory-map a field file and parse it block by block
+        Parameters
+        ----------
+        fld_file: str
+            Path of the field file
+        chunk_bytes: int, optional
+            default = 32 MB
+            Approximate size of each parsed block. Blocks always end on a line boundary.
+        columns: int, optional
+            default = 4
+        dtype: numpy.dtype, optional
+            default = float32
+            Type of the values; float64 keeps the coordinates as written, e.g. to find exported sample points
+        skip_nan: bool, optional
+            default = True
+            Rows with NaN values, i.e. points outside the solved domain, are removed
+        Yields
+        ------
+        numpy.ndarray
+            Array of shape (n, columns) per block
+    """
+    if not os.path.getsize(fld_file):
+        return
+    with open(fld_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = field_data_offset(mm, columns)
+            while start < len(mm):
+                end = min(start + chunk_bytes, len(mm))
+                if end < len(mm):
+                    newline = mm.find(b'\n', end)
+                    end = len(mm) if newline < 0 else newline + 1
+                block = _parse_block(mm[start:end].decode('ascii', errors='ignore'), columns, dtype)
+                start = end
+                if skip_nan:
+                    block = block[~np.isnan(block).any(axis=1)]
+                if len(block):
+                    yield block
+
+
+# Function to get the extent of the points and values in a field file
+def field_bounds(fld_file, chunk_bytes=DEFAULT_CHUNK_BYTES, columns=4):
+    """ Minimum and maximum of every column of a field file, computed chunk by chunk
+        Returns
+        -------
+        tuple
+            Column minimums, column maximums and number of points
+    """
+    mins = np.full(columns, np.inf)
+    maxs = np.full(columns, -np.inf)
+    count = 0
+    for block in iter_field_chunks(fld_file, chunk_bytes, columns):
+        mins = np.minimum(mins, block.min(axis=0))
+        maxs = np.maximum(maxs, block.max(axis=0))
+        count = count + len(block)
+    return mins, maxs, count
+
+
+class FieldBinIndex:
+    """ Spatial bins of a field, filled incrementally from point chunks
+        Each bin keeps the count, sum, minimum and maximum of the values and a histogram of the
+        values, so region statistics and percentiles are answered without the point cloud.
+        Parameters
+        ----------
+        bounds_min: list
+            Minimum x, y, z of the points
+        bounds_max: list
+            Maximum x, y, z of the points
+        value_range: tuple
+            (min, max) of the values, used for the value histograms
+        shape: tuple, optional
+            default = (64, 64, 8)
+            Number of spatial bins in x, y and z
+        value_bins: int, optional
+            default = 128
+            Number of histogram bins per spatial bin. Percentiles are resolved to
+            (max - min) / value_bins.
+    """
+
+    def __init__(self, bounds_min, bounds_max, value_range, shape=(64, 64, 8), value_bins=128):
+        self.bounds_min = np.asarray(bounds_min, dtype=np.float64)[:3]
+        self.bounds_max = np.asarray(bounds_max, dtype=np.float64)[:3]
+        self.shape = tuple(int(i) for i in shape)
+        self.value_range = (float(value_range[0]), float(value_range[1]))
+        self.value_bins = int(value_bins)
+        num_bins = int(np.prod(self.shape))
+        self.count = np.zeros(num_bins, dtype=np.int64)
+        self.total = np.zeros(num_bins, dtype=np.float64)
+        self.vmin = np.full(num_bins, np.inf, dtype=np.float32)
+        self.vmax = np.full(num_bins, -np.inf, dtype=np.float32)
+        self.hist = np.zeros((num_bins, self.value_bins), dtype=np.int32)
+
+    # Function to get the flat bin index of points
+    def _bin_index(self, xyz):
+        span = np.where(self.bounds_max > self.bounds_min, self.bounds_max - self.bounds_min, 1.0)
+        cell = np.floor((xyz - self.bounds_min) / span * self.shape).astype(np.int64)
+        cell = np.clip(cell, 0, np.array(self.shape) - 1)
+        return np.ravel_multi_index(cell.T, self.shape)
+
+    def _value_index(self, values):
+        span = self.value_range[1] - self.value_range[0]
+        if span <= 0:
+            return np.zeros(len(values), dtype=np.int64)
+        index = np.floor((values - self.value_range[0]) / span * self.value_bins).astype(np.int64)
+        return np.clip(index, 0, self.value_bins - 1)
+
+    def add(self, points):
+        """ Add a chunk of x, y, z, value rows to the bins """
+        if not len(points):
+            return
+        bins = self._bin_index(points[:, :3])
+        values = points[:, 3]
+        self.count += np.bincount(bins, minlength=len(self.count))
+        self.total += np.bincount(bins, weights=values, minlength=len(self.total))
+        np.minimum.at(self.vmin, bins, values)
+        np.maximum.at(self.vmax, bins, values)
+        np.add.at(self.hist, (bins, self._value_index(values)), 1)
+
+    # Function to select the bins that lie in a region
+    def region_mask(self, region=None):
+        """ Boolean masks of the bins with points that lie entirely inside a region, and of those that
+            lie only partly inside it
+            Parameters
+            ----------
+            region: list, optional
+                [xmin, ymin, zmin, xmax, ymax, zmax]. Whole field if not given.
+            Returns
+            -------
+            tuple
+                Mask of the bins inside and mask of the bins partly inside
+        """
+        mask = self.count > 0
+        if region is None:
+            return mask, np.zeros_like(mask)
+        region = np.asarray(region, dtype=np.float64)
+        span = (self.bounds_max - self.bounds_min) / self.shape
+        inside = []
+        overlap = []
+        for i in range(3):
+            lower = self.bounds_min[i] + np.arange(self.shape[i]) * span[i]
+            upper = lower + span[i]
+            inside.append((lower >= region[i]) & (upper <= region[i + 3]))
+            overlap.append((upper >= region[i]) & (lower <= region[i + 3]))
+        inside_box = (inside[0][:, None, None] & inside[1][None, :, None] & inside[2][None, None, :]).ravel()
+        overlap_box = (overlap[0][:, None, None] & overlap[1][None, :, None] & overlap[2][None, None, :]).ravel()
+        return mask & inside_box, mask & overlap_box & ~inside_box
+
+    # Function to get count, sum, minimum, maximum and histogram of the points of some bins inside a region
+    def _scan_bins(self, fld_file, bins, region, chunk_bytes):
+        region = np.asarray(region, dtype=np.float64)
+        count = 0
+        total = 0.0
+        vmin = np.inf
+        vmax = -np.inf
+        hist = np.zeros(self.value_bins, dtype=np.int64)
+        for block in iter_field_chunks(fld_file, chunk_bytes):
+            xyz = block[:, :3]
+            keep = bins[self._bin_index(xyz)] & (xyz >= region[:3]).all(axis=1) & (xyz <= region[3:]).all(axis=1)
+            values = block[keep, 3]
+            if not len(values):
+                continue
+            count += len(values)
+            total += float(values.sum(dtype=np.float64))
+            vmin = min(vmin, float(values.min()))
+            vmax = max(vmax, float(values.max()))
+            hist += np.bincount(self._value_index(values), minlength=self.value_bins)
+        return count, total, vmin, vmax, hist
+
+    def query(self, region=None, percentiles=(50, 95, 99), fld_file=None, chunk_bytes=DEFAULT_CHUNK_BYTES):
+        """ Statistics of the values inside a region
+            Bins entirely inside the region are answered from the index. The points of bins only partly inside
+            are read from the field file, if given; without it, those bins count as a whole, so the statistics
+            cover every bin that touches the region.
+            Parameters
+            ----------
+            region: list, optional
+                [xmin, ymin, zmin, xmax, ymax, zmax]. Whole field if not given.
+            percentiles: tuple, optional
+                default = (50, 95, 99)
+            fld_file: str, optional
+                Field file the index was built from
+            chunk_bytes: int, optional
+                default = 32 MB
+            Returns
+            -------
+            dict
+                count, min, max, mean and one 'p<q>' entry per requested percentile.
+                None if the region holds no points.
+        """
+        mask, partial = self.region_mask(region)
+        if not fld_file:
+            mask = mask | partial
+            partial = np.zeros_like(mask)
+        count = int(self.count[mask].sum())
+        total = float(self.total[mask].sum())
+        vmin = float(self.vmin[mask].min()) if mask.any() else np.inf
+        vmax = float(self.vmax[mask].max()) if mask.any() else -np.inf
+        hist = self.hist[mask].sum(axis=0, dtype=np.int64)
+        if partial.any():
+            scanned = self._scan_bins(fld_file, partial, region, chunk_bytes)
+            count += scanned[0]
+            total += scanned[1]
+            vmin = min(vmin, scanned[2])
+            vmax = max(vmax, scanned[3])
+            hist = hist + scanned[4]
+        if not count:
+            return None
+        stats = {'count': count,
+                 'min': vmin,
+                 'max': vmax,
+                 'mean': total / count}
+        edges = np.linspace(self.value_range[0], self.value_range[1], self.value_bins + 1)
+        cumulative = np.cumsum(hist)
+        for q in percentiles:
+            target = q / 100.0 * count
+            i = min(int(np.searchsorted(cumulative, target)), self.value_bins - 1)
+            before = cumulative[i - 1] if i > 0 else 0
+            fraction = (target - before) / hist[i] if hist[i] else 0.0
+            value = edges[i] + fraction * (edges[i + 1] - edges[i])
+            stats['p' + '{:g}'.format(q)] = float(np.clip(value, stats['min'], stats['max']))
+        return stats
+
+    def save(self, path):
+        np.savez_compressed(path, bounds_min=self.bounds_min, bounds_max=self.bounds_max, shape=self.shape,
+                            value_range=self.value_range, count=self.count, total=self.total, vmin=self.vmin,
+                            vmax=self.vmax, hist=self.hist)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        index = cls(data['bounds_min'], data['bounds_max'], tuple(data['value_range']), shape=tuple(data['shape']),
+                    value_bins=data['hist'].shape[1])
+        index.count = data['count']
+        index.total = data['total']
+        index.vmin = data['vmin']
+        index.vmax = data['vmax']
+        index.hist = data['hist']
+        return index
+
+
+# Function to build the spatial bins of a field file
+def build_field_index(fld_file, shape=(64, 64, 8), value_bins=128, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """ Build a FieldBinIndex from a field file in two chunked passes (extent, then bins)
+        Parameters
+        ----------
+        fld_file: str
+            Path of the field file
+        shape: tuple, optional
+            default = (64, 64, 8)
+        value_bins: int, optional
+            default = 128
+        chunk_bytes: int, optional
+            default = 32 MB
+        Returns
+        -------
+        FieldBinIndex
+    """
+    mins, maxs, count = field_bounds(fld_file, chunk_bytes)
+    if not count:
+        raise RuntimeError('No field values found in ' + fld_file)
+    index = FieldBinIndex(mins[:3], maxs[:3], (mins[3], maxs[3]), shape=shape, value_bins=value_bins)
+    for block in iter_field_chunks(fld_file, chunk_bytes):
+        index.add(block)
+    return index
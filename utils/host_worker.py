@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+import shutil
+import socket
+import argparse
+import threading
+import traceback
+
+from utils.jobs import ProgressReporter, JOBS_FOLDER, _read_json, _write_json, get_job_status
+from utils.scheduler import submit_job, dispatch, list_queue, cancel_job
+from utils.distributed import INPUT_KEYS, IDF_COMPANIONS, HEARTBEAT_INTERVAL, get_batch_dir, list_batches, \
+    claim_task, record_attempt, finish_attempt_check
+
+# Local scratch folder of the worker; projects are solved on local disk and copied back when done
+SCRATCH_DIR = os.path.join(os.path.expanduser('~'), '.pcb_thermal_cache', 'hosts')
+POLL_INTERVAL = 10
+IDLE_TIMEOUT = 600
+
+
+# Function to keep the claim of a task alive while it runs
+def _heartbeat(claim_file, stop_event):
+    while not stop_event.wait(HEARTBEAT_INTERVAL):
+        try:
+            os.utime(claim_file, None)
+        except OSError:
+            return
+
+
+# Function to find the next pending task of the shared directory
+def next_task(shared_dir, worker_name):
+    """ Claim the next task, oldest batch first
+        Returns
+        -------
+        tuple
+            Batch ID and task ID, None if no task is pending
+    """
+    for batch_id in reversed(list_batches(shared_dir)):
+        tasks_dir = os.path.join(get_batch_dir(shared_dir, batch_id), 'tasks')
+        for name in sorted(os.listdir(tasks_dir)):
+            if name.endswith('.json') and claim_task(tasks_dir, name[:-5], worker_name):
+                return batch_id, name[:-5]
+    return None
+
+
+# Function to solve a task as a job of the scheduler of this host
+def run_scheduled(job, work_dir, reporter):
+    """ The task is queued with the scheduler of the host, like the jobs submitted from the app, so its AEDT
+        session only starts once a license and the cores are free
+        Parameters
+        ----------
+        job: dict
+            Simulation inputs of the task, with local input paths
+        work_dir: str
+            Local working directory of the task
+        reporter: ProgressReporter
+            Receives the stage of the scheduled job, for the batch status
+    """
+    job_id = submit_job(job, work_dir, user=job.get('user'))
+    job_dir = os.path.join(work_dir, JOBS_FOLDER, job_id)
+    try:
+        while True:
+            status = get_job_status(job_dir)
+            if status.get('state') in ('done', 'failed', 'cancelled'):
+                break
+            reporter.update_status(stage=status.get('stage', 'Queued'), percent=status.get('percent', 0))
+            time.sleep(POLL_INTERVAL)
+            dispatch()
+    except BaseException:
+        # A stopped worker must not leave its job queued or running on the host
+        cancel_job(job_id)
+        raise
+    if status['state'] != 'done':
+        raise RuntimeError(status.get('error') or 'Scheduled job ' + job_id + ' was ' + status['state'])
+
+
+# Function to check whether the scheduler of this host has jobs waiting for resources
+def host_busy():
+    return any(i['state'] == 'queued' for i in list_queue())
+
+
+# Function to solve one task of a batch
+def run_task(shared_dir, batch_id, task_id, worker_name):
+    batch_dir = get_batch_dir(shared_dir, batch_id)
+    tasks_dir = os.path.join(batch_dir, 'tasks')
+    result_dir = os.path.join(batch_dir, 'results', task_id)
+    work_dir = os.path.join(SCRATCH_DIR, worker_name, batch_id, task_id)
+    job = _read_json(os.path.join(tasks_dir, task_id + '.json'))
+    claim_file = os.path.join(tasks_dir, task_id + '.claim')
+    stop_event = threading.Event()
+    threading.Thread(target=_heartbeat, args=(claim_file, stop_event), daemon=True).start()
+    shutil.rmtree(work_dir, ignore_errors=True)
+    shutil.rmtree(result_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    os.makedirs(result_dir)
+    try:
+        # Copy the inputs of the task to local disk
+        for key in INPUT_KEYS:
+            if not job.get(key):
+                continue
+            src = os.path.join(batch_dir, 'inputs', job[key])
+            dest = os.path.join(work_dir, job[key])
+            if os.path.isdir(src):
+                shutil.copytree(src, dest)
+            else:
+                shutil.copy2(src, dest)
+            ext = os.path.splitext(src)[1].lower()
+            if key == 'idf_file' and ext in IDF_COMPANIONS:
+                companion = os.path.splitext(src)[0] + IDF_COMPANIONS[ext]
+                if os.path.exists(companion):
+                    shutil.copy2(companion, work_dir)
+            job[key] = dest
+        job['workdir'] = work_dir
+        _write_json(os.path.join(result_dir, 'job.json'), job)
+
+        reporter = ProgressReporter(result_dir)
+        reporter.update_status(state='running', worker=worker_name)
+        run_scheduled(job, work_dir, reporter)
+        reporter.update_status(state='done')
+
+        # Copy the solved project back to the shared directory
+        project_no_ext = os.path.splitext(job['project_name'])[0]
+        shutil.copy2(os.path.join(work_dir, job['project_name']), result_dir)
+        if os.path.isdir(os.path.join(work_dir, project_no_ext + '.aedtresults')):
+            shutil.copytree(os.path.join(work_dir, project_no_ext + '.aedtresults'),
+                            os.path.join(result_dir, project_no_ext + '.aedtresults'))
+    except Exception as e:
+        record_attempt(tasks_dir, task_id, {'worker': worker_name, 'result': 'failed', 'error': str(e),
+                                            'traceback': traceback.format_exc()})
+        finish_attempt_check(tasks_dir, task_id)
+        os.remove(claim_file)
+        return False
+    finally:
+        stop_event.set()
+        os.chdir(SCRATCH_DIR)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    record_attempt(tasks_dir, task_id, {'worker': worker_name, 'result': 'done'})
+    _write_json(os.path.join(tasks_dir, task_id + '.done'), {'worker': worker_name, 'finished': time.time()})
+    os.remove(claim_file)
+    return True
+
+
+# Function to run tasks of the shared directory until none are left
+def main(shared_dir, worker_name, idle_timeout=IDLE_TIMEOUT):
+    """ Worker loop of a host. Several workers may run on one host, each with its own scratch folder; their tasks
+        share the licenses and cores of the host through its scheduler.
+    """
+    os.makedirs(SCRATCH_DIR, exist_ok=True)
+    idle_since = time.time()
+    while time.time() - idle_since < idle_timeout:
+        # Tasks are left to other hosts while this one cannot start the jobs it already has
+        if host_busy():
+            time.sleep(POLL_INTERVAL)
+            idle_since = time.time()
+            continue
+        task = next_task(shared_dir, worker_name)
+        if task is None:
+            time.sleep(POLL_INTERVAL)
+            continue
+        print(time.strftime('%H:%M:%S'), worker_name, 'running', *task, flush=True)
+        done = run_task(shared_dir, task[0], task[1], worker_name)
+        print(time.strftime('%H:%M:%S'), worker_name, 'done' if done else 'failed', *task, flush=True)
+        idle_since = time.time()
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Solve PCB Thermal Analyzer batch tasks of a shared directory')
+    parser.add_argument('shared_dir')
+    parser.add_argument('--name', default=None, help='Worker name, default is the host name')
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT,
+                        help='Seconds without pending tasks before the worker exits')
+    args = parser.parse_args()
+    sys.exit(main(args.shared_dir, args.name or socket.gethostname(), args.idle_timeout))
@@ -0,0 +1,231 @@
+import os
+import re
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+# Influence matrices of the projects of a working directory
+INFLUENCE_FOLDER = os.path.join('.pcb_thermal_cache', 'influence')
+# Columns heat sources can be grouped by; Instance_Name makes one group per component
+GROUP_COLUMNS = ('Instance_Name', 'Part_Name', 'Package_Name', 'Designator_Type', 'Placement')
+# Monitor temperatures predicted further than this from the full solve of the nominal powers [cel]
+ACCURACY_TOLERANCE = 1.0
+NOMINAL_CASE = 'Nominal'
+
+
+# Function to get the influence matrix file of a project
+def influence_file(workdir, project_name):
+    return os.path.join(os.path.abspath(workdir), INFLUENCE_FOLDER, os.path.splitext(project_name)[0] + '.npz')
+
+
+# Function to list the powered components of the boundary conditions table by group
+def heat_source_groups(bc_df, group_column='Instance_Name'):
+    """ Included components with power, which are the heat sources whose power a scenario can change
+        Parameters
+        ----------
+        bc_df: pandas.DataFrame
+            Typed boundary conditions table, see load_bc_table
+        group_column: str, optional
+            One of GROUP_COLUMNS. Components of a group always change power together, in proportion to their
+            nominal power.
+        Returns
+        -------
+        pandas.DataFrame
+            One row per component with its block name, group, nominal power and share of the group power
+    """
+    powered = bc_df[(bc_df['Include'] == 'YES') & (bc_df['Instance_Name'] != 'NOREFDES') &
+                    (bc_df['Power [W]'] > 0)]
+    members = pd.DataFrame({'block': [re.sub(r"\W", "_", i) for i in powered['Instance_Name']],
+                            'group': powered[group_column].astype(str).replace('', '(empty)').to_numpy(),
+                            'power': powered['Power [W]'].to_numpy(dtype=float)})
+    members['share'] = members['power'] / members.groupby('group')['power'].transform('sum')
+    return members
+
+
+# Function to list the cases solved for an influence matrix
+def influence_cases(members):
+    """ One case per group with 1 W spread over its components and no power elsewhere, followed by the nominal
+        powers, which check the superposition against a full solve and leave the project as built
+        Returns
+        -------
+        list
+            (case name, {block name: power}) pairs
+    """
+    cases = []
+    for group, group_df in members.groupby('group', sort=False):
+        powers = dict.fromkeys(members['block'], 0.0)
+        powers.update(zip(group_df['block'], group_df['share']))
+        cases.append((group, powers))
+    cases.append((NOMINAL_CASE, dict(zip(members['block'], members['power']))))
+    return cases
+
+
+class MonitorRecorder:
+    """ Passes the progress of a solve on to a reporter and keeps the last temperature of every monitor point
+        Parameters
+        ----------
+        report: ProgressReporter
+            Reporter of the job
+    """
+
+    def __init__(self, report):
+        self.report = report
+        self.values = {}
+
+    def monitors(self, iteration, values):
+        self.values.update(values)
+        self.report.monitors(iteration, values)
+
+    def __getattr__(self, name):
+        return getattr(self.report, name)
+
+
+# Function to assemble the influence matrix from the solved cases
+def assemble_influence(members, responses, air_temp):
+    """ Without power the steady temperature is the ambient temperature everywhere, so every group case gives
+        one column of temperature rise per watt directly
+        Parameters
+        ----------
+        members: pandas.DataFrame
+            Heat sources, see heat_source_groups
+        responses: dict
+            Monitor temperatures of each case of influence_cases
+        air_temp: float
+            Inlet or ambient temperature [cel]
+        Returns
+        -------
+        dict
+            Influence model, see save_influence
+    """
+    groups = list(pd.unique(members['group']))
+    monitors = sorted(set().union(*responses.values()))
+    solved = pd.DataFrame(responses).reindex(index=monitors, columns=groups + [NOMINAL_CASE]).to_numpy(dtype=float)
+    base = np.full(len(monitors), float(air_temp))
+    matrix = solved[:, :len(groups)] - base[:, None]
+    nominal = members.groupby('group', sort=False)['power'].sum().reindex(groups).to_numpy()
+    model = {'monitors': np.array(monitors, dtype=str), 'groups': np.array(groups, dtype=str),
+             'blocks': members['block'].to_numpy(dtype=str), 'block_groups': members['group'].to_numpy(dtype=str),
+             'shares': members['share'].to_numpy(dtype=float), 'nominal': nominal, 'base': base,
+             'matrix': matrix, 'verification': solved[:, len(groups)]}
+    return model
+
+
+# Function to store an influence model
+def save_influence(path, model, meta):
+    """ Parameters
+        ----------
+        path: str
+            File of the model, see influence_file
+        model: dict
+            Arrays of the model: monitor and group names, components with their group and share of the group
+            power, nominal group powers, base temperatures, influence matrix [cel/W] with one row per monitor and
+            one column per group, and monitor temperatures of the full solve of the nominal powers
+        meta: dict
+            Conditions the model was built for, e.g. project, flow, ambient temperature
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, meta=np.array(json.dumps(meta)), **model)
+    os.replace(tmp_path, path)
+
+
+# Function to read an influence model
+def load_influence(path):
+    """ Returns
+        -------
+        dict
+            Arrays of the model and its conditions under 'meta', None if there is no model
+    """
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            model = {key: data[key] for key in data.files}
+    except (OSError, ValueError):
+        return None
+    model['meta'] = json.loads(str(model['meta']))
+    return model
+
+
+# Function to predict monitor temperatures of power scenarios
+def evaluate(model, group_powers):
+    """ Monitor temperatures as the base temperatures plus the influence matrix times the group powers
+        Parameters
+        ----------
+        model: dict
+            Influence model, see load_influence
+        group_powers: pandas.DataFrame
+            Power of each group [W], one row per scenario and one column per group. Missing groups have no power.
+        Returns
+        -------
+        pandas.DataFrame
+            Temperatures [cel], one row per monitor and one column per scenario
+    """
+    powers = group_powers.reindex(columns=model['groups']).to_numpy(dtype=float)
+    temperatures = model['base'][:, None] + model['matrix'] @ np.nan_to_num(powers).T
+    return pd.DataFrame(temperatures, index=model['monitors'], columns=group_powers.index)
+
+
+# Function to get the group powers of a boundary conditions table
+def group_powers_from_bc(model, bc_df):
+    """ Group powers as the sum of the powers of their components
+        Returns
+        -------
+        tuple
+            Group powers [W] and powered components that are not heat sources of the model, whose power the
+            prediction misses
+    """
+    powered = bc_df[(bc_df['Include'] == 'YES') & (bc_df['Instance_Name'] != 'NOREFDES')]
+    powers = pd.Series(powered['Power [W]'].to_numpy(dtype=float),
+                       index=[re.sub(r"\W", "_", i) for i in powered['Instance_Name']])
+    block_groups = pd.Series(model['block_groups'], index=model['blocks'])
+    known = powers.index.isin(block_groups.index)
+    unknown = list(powers.index[~known & (powers > 0).to_numpy()])
+    group_powers = powers[known].groupby(block_groups.reindex(powers.index[known]).to_numpy()).sum()
+    return group_powers.reindex(model['groups']).fillna(0.0), unknown
+
+
+# Function to compare predicted monitor temperatures with a full solve
+def accuracy_check(predicted, solved):
+    """ Parameters
+        ----------
+        predicted: pandas.Series
+            Predicted temperature of each monitor [cel]
+        solved: dict
+            Temperature of each monitor of the full solve [cel]
+        Returns
+        -------
+        tuple
+            Table of predicted and solved temperatures with their difference, and largest and mean absolute
+            difference [cel]
+    """
+    compare = pd.DataFrame({'Predicted [cel]': predicted,
+                            'Solved [cel]': pd.Series(solved, dtype=float).reindex(predicted.index)})
+    compare['Difference [cel]'] = compare['Predicted [cel]'] - compare['Solved [cel]']
+    errors = compare['Difference [cel]'].abs().dropna()
+    if errors.empty:
+        return compare, None, None
+    return compare, float(errors.max()), float(errors.mean())
+
+
+# Function to describe where an influence model holds
+def validity_messages(meta):
+    """ Superposition holds while temperature does not change the flow or the heat transfer, i.e. for forced
+        convection dominated by conduction, without radiation and with constant properties
+    """
+    messages = []
+    if meta.get('conv_type') == 'Natural':
+        messages.append('The model was built for natural convection, where the flow depends on the temperatures. '
+                        'Predictions far from the nominal powers can be inaccurate.')
+    if meta.get('max_error') is not None and meta['max_error'] > ACCURACY_TOLERANCE:
+        messages.append(f'''The prediction of the nominal powers differs from the full solve by up to '''
+                        f'''{meta['max_error']:.2f} cel, so the board does not respond linearly to power.''')
+    return messages
+
+
+# Function to build the conditions stored with an influence model
+def influence_meta(job, group_column, max_error, mean_error):
+    return {'project_name': job['project_name'], 'bc_file': job['bc_file'], 'group_column': group_column,
+            'conv_type': job['conv_type'], 'air_temp': float(job['air_temp']),
+            'vel': float(job['vel'] or 0) if job['conv_type'] == 'Forced' else 0.0, 'created': time.time(),
+            'max_error': max_error, 'mean_error': mean_error}
@@ -0,0 +1,205 @@
+import os
+import csv
+import sys
+import json
+import time
+import uuid
+import signal
+import threading
+import subprocess
+
+# Simulation jobs are stored in the working directory, next to the projects they build
+JOBS_FOLDER = os.path.join('.pcb_thermal_cache', 'jobs')
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_RESIDUAL_HISTORY = 2000
+
+
+# Function to get the jobs folder of a working directory
+def get_jobs_dir(workdir):
+    return os.path.join(os.path.abspath(workdir), JOBS_FOLDER)
+
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path, default=None):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+class ProgressReporter:
+    """ Writes the progress of a simulation job to its job folder
+        The status file holds the latest stage and percentage; every update is also appended to
+        progress.jsonl so the page can show the history and the residuals of the solve.
+        Parameters
+        ----------
+        job_dir: str
+            Folder of the job
+    """
+
+    def __init__(self, job_dir):
+        self.job_dir = job_dir
+        self.status_file = os.path.join(job_dir, 'status.json')
+        self.progress_file = os.path.join(job_dir, 'progress.jsonl')
+        # Residuals are reported from a watcher thread
+        self._lock = threading.Lock()
+
+    def _append(self, entry):
+        entry['time'] = time.time()
+        with self._lock:
+            with open(self.progress_file, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def update_status(self, **kwargs):
+        with self._lock:
+            status = _read_json(self.status_file, {})
+            status.update(kwargs)
+            status['updated'] = time.time()
+            _write_json(self.status_file, status)
+
+    def stage(self, name, percent, message=''):
+        self.update_status(state='running', stage=name, percent=percent, message=message)
+        self._append({'type': 'stage', 'stage': name, 'percent': percent, 'message': message})
+
+    def warning(self, message):
+        self._append({'type': 'warning', 'message': message})
+
+    def residuals(self, iteration, values):
+        self.update_status(iteration=iteration, residuals=values)
+        self._append({'type': 'residuals', 'iteration': iteration, 'values': values})
+
+    def monitors(self, iteration, values):
+        self._append({'type': 'monitors', 'iteration': iteration, 'values': values})
+
+    def aedt_started(self, pid):
+        self.update_status(aedt_pid=pid)
+
+
+# Function to store a simulation job in the working directory
+def create_job(job, workdir):
+    """ Store a simulation job; utils.scheduler decides when its worker is started
+        Parameters
+        ----------
+        job: dict
+            Simulation inputs
+        workdir: str
+            Working directory of the job
+        Returns
+        -------
+        tuple
+            Job ID and job folder
+    """
+    # The random suffix keeps IDs unique across users and working directories that share the scheduler
+    job_id = time.strftime('%Y%m%d_%H%M%S') + '_' + os.path.splitext(job['project_name'])[0] + '_' + \
+        uuid.uuid4().hex[:8]
+    job_dir = os.path.join(get_jobs_dir(workdir), job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    job = dict(job, job_id=job_id, workdir=os.path.abspath(workdir))
+    _write_json(os.path.join(job_dir, 'job.json'), job)
+    ProgressReporter(job_dir).update_status(state='queued', stage='Queued', percent=0, submitted=time.time(),
+                                            analyze=job['analyze'])
+    return job_id, job_dir
+
+
+# Function to start the worker process of a job
+def start_worker(job_dir):
+    """ The worker is detached from the Streamlit server, so it survives reruns and browser refreshes """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = APP_ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    kwargs = {}
+    if sys.platform == 'win32':
+        kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+    else:
+        kwargs['start_new_session'] = True
+    log = open(os.path.join(job_dir, 'worker.log'), 'a')
+    process = subprocess.Popen([sys.executable, '-m', 'utils.worker', job_dir], cwd=APP_ROOT, env=env,
+                               stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, **kwargs)
+    log.close()
+    ProgressReporter(job_dir).update_status(worker_pid=process.pid)
+    return process.pid
+
+
+# Function to check whether a process is running
+def pid_alive(pid):
+    if not pid:
+        return False
+    if sys.platform == 'win32':
+        output = subprocess.run(['tasklist', '/FI', 'PID eq ' + str(pid), '/FO', 'CSV', '/NH'], capture_output=True,
+                                text=True)
+        # One "Image Name","PID",... row per process; the PID column is compared, not the whole line
+        return any(len(row) > 1 and row[1].strip() == str(pid) for row in csv.reader(output.stdout.splitlines()))
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+# Function to read the status of a job
+def get_job_status(job_dir):
+    """ Status of a job. Jobs whose worker died without reporting are marked as failed. """
+    status = _read_json(os.path.join(job_dir, 'status.json'), {})
+    if status.get('state') in ('queued', 'running') and status.get('worker_pid') \
+            and not pid_alive(status['worker_pid']):
+        status['state'] = 'failed'
+        status.setdefault('error', 'Worker process exited unexpectedly. See worker.log in the job folder.')
+    return status
+
+
+# Function to list the jobs of a working directory, newest first
+def list_jobs(workdir):
+    jobs_dir = get_jobs_dir(workdir)
+    if not os.path.isdir(jobs_dir):
+        return []
+    jobs = []
+    for job_id in sorted(os.listdir(jobs_dir), reverse=True):
+        job_dir = os.path.join(jobs_dir, job_id)
+        if os.path.exists(os.path.join(job_dir, 'job.json')):
+            jobs.append((job_id, job_dir))
+    return jobs
+
+
+# Function to read the progress history of a job
+def read_progress(job_dir, entry_type=None):
+    entries = []
+    try:
+        with open(os.path.join(job_dir, 'progress.jsonl'), 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry_type is None or entry['type'] == entry_type:
+                    entries.append(entry)
+    except OSError:
+        pass
+    if entry_type in ('residuals', 'monitors'):
+        entries = entries[-MAX_RESIDUAL_HISTORY:]
+    return entries
+
+
+# Function to get the last temperature of every monitor point of a job
+def final_monitors(job_dir):
+    values = {}
+    for entry in read_progress(job_dir, 'monitors'):
+        values.update(entry['values'])
+    return values
+
+
+# Function to cancel a running job
+def cancel_job(job_dir):
+    status = get_job_status(job_dir)
+    for key in ('worker_pid', 'aedt_pid'):
+        if status.get(key) and pid_alive(status[key]):
+            try:
+                os.kill(status[key], signal.SIGTERM)
+            except OSError:
+                pass
+    ProgressReporter(job_dir).update_status(state='cancelled')
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+# Default settings of the lumping of small passives: largest footprint [mm2] and height [mm] of a component that
+# can be lumped, largest gap between neighbours of a cluster [mm] and largest cluster size [mm]
+DEFAULT_LUMPING = {'max_area': 2.0, 'max_height': 1.0, 'gap': 0.5, 'max_extent': 10.0}
+MIN_CLUSTER_SIZE = 2
+# Length of a model unit in mm
+UNIT_MM = {'mm': 1.0, 'um': 1e-3, 'cm': 10.0, 'm': 1000.0, 'meter': 1000.0, 'mil': 0.0254, 'in': 25.4}
+
+
+# Function to select the components that can be lumped
+def lumping_candidates(bc_df, boxes, settings):
+    """ Included components without power, monitor point or special BC whose footprint and height are small
+        Parameters
+        ----------
+        bc_df: pandas.DataFrame
+            Typed boundary conditions table of the components, in the order of boxes
+        boxes: numpy.ndarray
+            Bounding box of each component [mm], rows of (xmin, ymin, zmin, xmax, ymax, zmax)
+        settings: dict
+            Lumping settings, see DEFAULT_LUMPING
+        Returns
+        -------
+        numpy.ndarray
+            Boolean mask of the components
+    """
+    size = boxes[:, 3:] - boxes[:, :3]
+    return ((bc_df['Include'] == 'YES') & (bc_df['Power [W]'] == 0) & (bc_df['BC_Type'] == 'block') &
+            (bc_df['Monitor_Point'] != 'YES')).to_numpy() & \
+        (size[:, 0] * size[:, 1] <= settings['max_area']) & (size[:, 2] <= settings['max_height'])
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+
+# Function to group neighbouring components into clusters
+def cluster_components(boxes, sides, gap, max_extent):
+    """ Components on the same side whose footprints are at most gap apart join a cluster. Clusters do not cross
+        the lines of a max_extent grid, so a chain of passives does not become one cluster across the board.
+        Parameters
+        ----------
+        boxes: numpy.ndarray
+            Bounding boxes [mm], see lumping_candidates
+        sides: numpy.ndarray
+            Placement of each component, TOP or BOTTOM
+        gap: float
+            Largest gap between neighbours [mm]
+        max_extent: float
+            Grid size that bounds the clusters [mm]
+        Returns
+        -------
+        list
+            Arrays with the positions of the components of every cluster of at least MIN_CLUSTER_SIZE components
+    """
+    n = len(boxes)
+    if n == 0:
+        return []
+    centers = (boxes[:, :2] + boxes[:, 3:5]) / 2
+    tiles = np.floor(centers / max_extent).astype(np.int64)
+    # Neighbours are searched in the grid cells around a component only
+    cell_size = max(float((boxes[:, 3:5] - boxes[:, :2]).max()) + gap, 1e-9)
+    cells = np.floor(centers / cell_size).astype(np.int64)
+    side_codes = pd.factorize(pd.Series(sides))[0]
+    buckets = {}
+    for i, key in enumerate(zip(side_codes, cells[:, 0], cells[:, 1])):
+        buckets.setdefault(key, []).append(i)
+    union_find = _UnionFind(n)
+    for (side, cx, cy), members in buckets.items():
+        members = np.array(members)
+        neighbours = np.array([j for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                               for j in buckets.get((side, cx + dx, cy + dy), ())])
+        # Gap between footprints, zero when they overlap
+        dx = np.maximum(boxes[members, None, 0], boxes[None, neighbours, 0]) - \
+            np.minimum(boxes[members, None, 3], boxes[None, neighbours, 3])
+        dy = np.maximum(boxes[members, None, 1], boxes[None, neighbours, 1]) - \
+            np.minimum(boxes[members, None, 4], boxes[None, neighbours, 4])
+        close = (np.maximum(np.maximum(dx, dy), 0) <= gap) & \
+            (tiles[members, None, :] == tiles[None, neighbours, :]).all(axis=2)
+        for a, b in zip(*np.nonzero(close)):
+            if members[a] < neighbours[b]:
+                union_find.union(members[a], neighbours[b])
+    roots = np.array([union_find.find(i) for i in range(n)])
+    clusters = [np.flatnonzero(roots == root) for root in np.unique(roots)]
+    return [i for i in clusters if len(i) >= MIN_CLUSTER_SIZE]
+
+
+# Function to drop clusters whose merged block would cover other components
+def free_clusters(clusters, boxes, sides):
+    """ Keep the clusters whose footprint overlaps no other component and no earlier kept cluster on its side
+        Parameters
+        ----------
+        clusters: list
+            Positions of the components of every cluster
+        boxes: numpy.ndarray
+            Bounding boxes of all components [mm]
+        sides: numpy.ndarray
+            Placement of all components
+        Returns
+        -------
+        tuple
+            Kept clusters and number of dropped clusters
+    """
+    kept = []
+    kept_boxes = []
+    kept_sides = []
+    for cluster in clusters:
+        lo = boxes[cluster, :2].min(axis=0)
+        hi = boxes[cluster, 3:5].max(axis=0)
+        others = np.ones(len(boxes), dtype=bool)
+        others[cluster] = False
+        obstacles = np.vstack([boxes[others]] + kept_boxes)
+        obstacle_sides = np.concatenate([sides[others]] + kept_sides)
+        overlap = (obstacle_sides == sides[cluster[0]]) & (obstacles[:, 0] < hi[0]) & (obstacles[:, 3] > lo[0]) & \
+            (obstacles[:, 1] < hi[1]) & (obstacles[:, 4] > lo[1])
+        if not overlap.any():
+            kept.append(cluster)
+            kept_boxes.append(np.r_[lo, 0.0, hi, 0.0][None, :])
+            kept_sides.append(sides[cluster[:1]])
+    return kept, len(clusters) - len(kept)
+
+
+# Function to compute the merged block of a cluster
+def lumped_block(boxes, conductivities, side):
+    """ Block over the footprint of a cluster, as high as the area-weighted mean height of its components,
+        standing on the board side of the components
+        The conductivity is the area-weighted conductivity of the components over the footprint, i.e. the air
+        between them is taken as not conducting.
+        Parameters
+        ----------
+        boxes: numpy.ndarray
+            Bounding boxes of the components of the cluster [mm]
+        conductivities: numpy.ndarray
+            Thermal conductivity of each component [W/m-C]
+        side: str
+            TOP or BOTTOM
+        Returns
+        -------
+        dict
+            Origin and size of the block [mm], conductivity [W/m-C] and fill factor of the footprint
+    """
+    size = boxes[:, 3:] - boxes[:, :3]
+    areas = size[:, 0] * size[:, 1]
+    lo = boxes[:, :3].min(axis=0)
+    hi = boxes[:, 3:].max(axis=0)
+    footprint = (hi[0] - lo[0]) * (hi[1] - lo[1])
+    height = float((areas * size[:, 2]).sum() / areas.sum())
+    base = lo[2] if side == 'TOP' else hi[2] - height
+    return {'origin': [float(lo[0]), float(lo[1]), float(base)],
+            'size': [float(hi[0] - lo[0]), float(hi[1] - lo[1]), height],
+            'conductivity': float((areas * conductivities).sum() / footprint),
+            'fill': float(areas.sum() / footprint)}
+
@@ -0,0 +1,109 @@
+import os
+from collections import OrderedDict
+
+import pandas as pd
+
+# Parsed material libraries, keyed by path, size and modification time of the CSV file
+MAX_CACHED_LIBRARIES = 8
+_libraries = OrderedDict()
+
+
+# Function to read a materials CSV file into an indexed library
+def load_material_library(materials_file):
+    """ Read a materials CSV file (name, thermal conductivity [W/m-C]) once per file version
+        Names are matched without case, as AEDT does; for duplicated names the last row wins.
+        Rows without a name or with a non-numeric conductivity are left out.
+        Parameters
+        ----------
+        materials_file: str
+            Path of the materials CSV file
+        Returns
+        -------
+        pandas.DataFrame
+            Columns 'name' and 'thermal_conductivity', indexed by the lower-case material name
+    """
+    path = os.path.abspath(materials_file)
+    stat = os.stat(path)
+    key = (os.path.normcase(path), stat.st_size, stat.st_mtime_ns)
+    if key in _libraries:
+        _libraries.move_to_end(key)
+        return _libraries[key]
+
+    df = pd.read_csv(path, encoding='utf-8-sig', usecols=[0, 1], dtype={0: str}, skipinitialspace=True)
+    df.columns = ['name', 'thermal_conductivity']
+    df['name'] = df['name'].str.strip()
+    df['thermal_conductivity'] = pd.to_numeric(df['thermal_conductivity'], errors='coerce')
+    df = df[df['name'].notna() & (df['name'] != '') & df['thermal_conductivity'].notna()]
+    df.index = df['name'].str.lower()
+    df = df[~df.index.duplicated(keep='last')]
+
+    _libraries[key] = df
+    while len(_libraries) > MAX_CACHED_LIBRARIES:
+        _libraries.popitem(last=False)
+    return df
+
+
+# Function to get the material names of a materials CSV file
+def material_names(materials_file):
+    return tuple(load_material_library(materials_file)['name'])
+
+
+# Function to find the library materials a project does not have yet
+def missing_materials(ipk, library):
+    """ Returns
+        -------
+        pandas.DataFrame
+            Rows of the library whose names are not defined in the project
+    """
+    existing = set(i.lower() for i in ipk.materials.material_keys)
+    existing.update(i.lower() for i in ipk.materials.odefinition_manager.GetProjectMaterialNames())
+    return library[~library.index.isin(existing)]
+
+
+# Function to find the project materials whose conductivity differs from a library
+def changed_materials(ipk, library):
+    """ Returns
+        -------
+        pandas.DataFrame
+            Rows of the library whose names are defined in the project with another thermal conductivity
+    """
+    project = ipk.materials.material_keys
+    rows = []
+    for key in library.index.intersection(list(project)):
+        try:
+            current = float(project[key].thermal_conductivity.value)
+        except (TypeError, ValueError):
+            # Anisotropic or parametric conductivities are replaced by the library value
+            current = None
+        if current is None or abs(current - library.at[key, 'thermal_conductivity']) > \
+                1e-9 * max(abs(current), 1.0):
+            rows.append(key)
+    return library.loc[rows]
+
+
+# Function to create the materials of a library that are missing in a project
+def add_library_materials(ipk, materials_file):
+    """ Create the missing materials of a materials CSV file in the project, and set the conductivity of the
+        materials the project already has where the library changed it
+        Each missing material is created with its properties in one call; materials whose conductivity matches
+        the library are left untouched.
+        Parameters
+        ----------
+        ipk: pyaedt.Icepak
+            Icepak design
+        materials_file: str
+            Path of the materials CSV file
+        Returns
+        -------
+        int
+            Number of materials created or changed
+    """
+    library = load_material_library(materials_file)
+    missing = missing_materials(ipk, library)
+    for name, conductivity in zip(missing['name'], missing['thermal_conductivity']):
+        ipk.materials.add_material(name, props={'thermal_conductivity': str(conductivity)})
+    changed = changed_materials(ipk, library)
+    for key, conductivity in zip(changed.index, changed['thermal_conductivity']):
+        # Setting the property updates the material in the project
+        ipk.materials.material_keys[key].thermal_conductivity = str(conductivity)
+    return len(missing) + len(changed)
@@ -0,0 +1,187 @@
+import os
+import warnings
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from utils.field_export import read_field_points
+
+# Sample points along the longest side of an object; shorter sides get proportionally fewer, at least one
+DEFAULT_SAMPLES = 5
+STAT_PERCENTILE = 95
+
+
+# Function to create sample points inside the bounding boxes of objects
+def object_sample_points(boxes, samples=DEFAULT_SAMPLES):
+    """ Cell centers of a regular grid over the bounding box of each object
+        Parameters
+        ----------
+        boxes: numpy.ndarray
+            Bounding box of each object, rows of (xmin, ymin, zmin, xmax, ymax, zmax)
+        samples: int, optional
+            Sample points along the longest side of each object
+        Returns
+        -------
+        tuple
+            Sample points, rows of (x, y, z), and the position of the object of each point
+    """
+    points = []
+    owners = []
+    for i, box in enumerate(np.asarray(boxes, dtype=float)):
+        size = box[3:] - box[:3]
+        counts = np.maximum(np.rint(samples * size / max(size.max(), 1e-30)), 1).astype(int)
+        axes = [box[k] + size[k] * (np.arange(counts[k]) + 0.5) / counts[k] for k in range(3)]
+        grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+        points.append(grid)
+        owners.append(np.full(len(grid), i))
+    if not points:
+        return np.empty((0, 3)), np.empty(0, dtype=int)
+    return np.concatenate(points), np.concatenate(owners)
+
+
+# Function to match exported field values to the sample points
+def match_sample_values(points, exported, rel_tol=1e-5):
+    """ Value of the exported row nearest to each sample point
+        The export writes coordinates with about six significant digits, so rows are matched within a tolerance
+        instead of by equal coordinates. Rows of the export closer to each other than the tolerance are one point.
+        Parameters
+        ----------
+        points: numpy.ndarray
+            Sample points, rows of (x, y, z)
+        exported: numpy.ndarray
+            Exported rows of (x, y, z, value), read as float64, see read_field_points
+        rel_tol: float, optional
+            Largest coordinate difference of a match, relative to the largest coordinate of the samples
+        Returns
+        -------
+        tuple
+            Value at each sample point, NaN where the export has none, e.g. outside the solids, and a mask of the
+            sample points that have a row in the export
+    """
+    values = np.full(len(points), np.nan)
+    matched = np.zeros(len(points), dtype=bool)
+    if not len(exported) or not len(points):
+        return values, matched
+    tol = rel_tol * (np.abs(points).max() or 1.0)
+    # Rows are hashed into cells of the tolerance size, so the match of a sample is in its cell or a neighbour
+    cells = pd.MultiIndex.from_arrays(list(np.floor(exported[:, :3] / tol).astype(np.int64).T))
+    unique = ~cells.duplicated()
+    cells = cells[unique]
+    coords = exported[unique, :3]
+    exported_values = exported[unique, 3]
+    sample_cells = np.floor(points / tol).astype(np.int64)
+    best = np.full(len(points), np.inf)
+    for offset in itertools.product((-1, 0, 1), repeat=3):
+        positions = cells.get_indexer(pd.MultiIndex.from_arrays(list((sample_cells + offset).T)))
+        found = np.flatnonzero(positions >= 0)
+        distance = np.abs(coords[positions[found]] - points[found]).max(axis=1)
+        closer = (distance <= tol) & (distance < best[found])
+        found = found[closer]
+        values[found] = exported_values[positions[found]]
+        best[found] = distance[closer]
+    matched[:] = np.isfinite(best)
+    return values, matched
+
+
+# Function to compute temperature statistics of objects from sampled values
+def object_statistics(names, points, owners, values, units='mm'):
+    """ Maximum, mean, minimum, percentile and gradient of the temperature of every object, with grouped reductions
+        over all samples at once. The gradient is the slope of the linear least squares fit of the temperature
+        over the samples of an object, i.e. the temperature change per length across the component.
+        Parameters
+        ----------
+        names: list
+            Object names, indexed by owners
+        points: numpy.ndarray
+            Sample points, rows of (x, y, z) in model units
+        owners: numpy.ndarray
+            Position of the object of each sample point
+        values: numpy.ndarray
+            Temperature at each sample point [cel], NaN where there is none
+        units: str, optional
+            Model units, for the gradient column
+        Returns
+        -------
+        pandas.DataFrame
+            One row per object with samples; objects without samples are left out
+    """
+    valid = ~np.isnan(values)
+    points, values = points[valid], values[valid]
+    # Objects without samples are dropped, and the owners renumbered to the objects left
+    present, owners = np.unique(owners[valid], return_inverse=True)
+    groups = len(present)
+    count = np.bincount(owners, minlength=groups)
+
+    # Samples sorted by object, then value: minimum, maximum and percentile are positions in each group
+    sorted_values = values[np.lexsort((values, owners))]
+    starts = np.cumsum(count) - count
+    position = starts + STAT_PERCENTILE / 100 * (count - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.ceil(position).astype(int)
+    percentile = sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+    mean = np.bincount(owners, weights=values, minlength=groups) / count
+
+    # Linear fit T = mean + g . (x - centroid) of every object from its grouped second moments
+    centroid = np.stack([np.bincount(owners, weights=points[:, k], minlength=groups)
+                         for k in range(3)], axis=1) / count[:, None]
+    offsets = points - centroid[owners]
+    deviations = values - mean[owners]
+    moments = np.zeros((groups, 3, 3))
+    cross = np.zeros((groups, 3))
+    for a in range(3):
+        cross[:, a] = np.bincount(owners, weights=offsets[:, a] * deviations, minlength=groups)
+        for b in range(3):
+            moments[:, a, b] = np.bincount(owners, weights=offsets[:, a] * offsets[:, b], minlength=groups)
+    # The pseudo-inverse leaves out the axes along which an object has a single sample
+    gradient = np.einsum('gab,gb->ga', np.linalg.pinv(moments), cross)
+
+    return pd.DataFrame({'Object': [names[i] for i in present],
+                         'Max [C]': sorted_values[starts + count - 1],
+                         'Mean [C]': mean,
+                         'Min [C]': sorted_values[starts],
+                         f'P{STAT_PERCENTILE} [C]': percentile,
+                         f'Gradient [C/{units}]': np.linalg.norm(gradient, axis=1),
+                         'Samples': count})
+
+
+# Function to export the temperature of objects in one pass and reduce it to statistics per object
+def export_object_statistics(ipk, sol_name, objects, out_dir, samples=DEFAULT_SAMPLES, quantity='Temp'):
+    """ One field export at sample points inside all objects, instead of one calculator expression per object
+        The sample points fill the bounding box of each object, so objects that are not boxes may get samples of
+        a neighbouring object.
+        Parameters
+        ----------
+        ipk: pyaedt.Icepak
+            Icepak design with a solved setup
+        sol_name: str
+            Name of solution (setup : sweep)
+        objects: list
+            Names of the solid objects
+        out_dir: str
+            Folder for the exported field file
+        samples: int, optional
+            Sample points along the longest side of each object
+        quantity: str, optional
+            default = 'Temp'
+        Returns
+        -------
+        pandas.DataFrame
+            Statistics of every object, see object_statistics; a warning is issued for sample points missing in
+            the export
+    """
+    boxes = np.array([ipk.modeler.get_object_from_name(i).bounding_box for i in objects], dtype=float)
+    points, owners = object_sample_points(boxes.reshape(-1, 6), samples)
+    os.makedirs(out_dir, exist_ok=True)
+    fld_file = os.path.join(out_dir, 'object_samples.fld')
+    ipk.post.export_field_file(quantity_name=quantity, solution=sol_name, filename=fld_file, obj_list=list(objects),
+                               sample_points_lists=points.tolist(), export_with_sample_points=True)
+    # Coordinates are read as float64, and points outside the solids are kept, so every sample finds its row
+    values, matched = match_sample_values(points, read_field_points(fld_file, dtype=np.float64, skip_nan=False))
+    os.remove(fld_file)
+    if not matched.all():
+        missing = np.unique(owners[~matched])
+        warnings.warn(f'''{int((~matched).sum())} of {len(points)} sample points were not found in the field export; '''
+                      f'''statistics of {len(missing)} object(s) use fewer samples, e.g. {objects[missing[0]]}''')
+    return object_statistics(list(objects), points, owners, values, ipk.modeler.model_units)
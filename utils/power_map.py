@@ -0,0 +1,145 @@
+import os
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.bc_schema import MAX_LISTED_ROWS
+
+# BC columns a power map can be joined on, and the columns it can set
+KEY_COLUMNS = ('Instance_Name', 'Part_Name')
+VALUE_COLUMNS = ('Power [W]', 'R_jb [C/W]', 'R_jc [C/W]')
+# Power map column names that are recognized without choosing them, compared without case, spaces and symbols
+COLUMN_ALIASES = {'Instance_Name': ('instancename', 'instance', 'refdes', 'referencedesignator', 'designator'),
+                  'Part_Name': ('partname', 'part', 'partnumber', 'pn', 'mpn'),
+                  'Power [W]': ('powerw', 'power', 'pd', 'powerdissipation', 'powerdissipationw'),
+                  'R_jb [C/W]': ('rjbcw', 'rjb', 'thetajb', 'rthjb'),
+                  'R_jc [C/W]': ('rjccw', 'rjc', 'thetajc', 'rthjc')}
+# Parsed power maps, keyed by path, size and modification time of the file
+MAX_CACHED_MAPS = 4
+_maps = OrderedDict()
+
+
+# Function to read a power map spreadsheet once per file version
+def read_power_map(map_file):
+    """ Read a power map (*.csv or *.xlsx) with all cells as text
+        Returns
+        -------
+        pandas.DataFrame
+    """
+    path = os.path.abspath(map_file)
+    stat = os.stat(path)
+    key = (os.path.normcase(path), stat.st_size, stat.st_mtime_ns)
+    if key in _maps:
+        _maps.move_to_end(key)
+        return _maps[key]
+    if path.lower().endswith(('.xlsx', '.xlsm', '.xls')):
+        df = pd.read_excel(path, dtype=str)
+    else:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    df.columns = [str(i).strip() for i in df.columns]
+    _maps[key] = df
+    while len(_maps) > MAX_CACHED_MAPS:
+        _maps.popitem(last=False)
+    return df
+
+
+# Function to find the power map columns that correspond to BC columns
+def guess_columns(map_df):
+    """ Returns
+        -------
+        dict
+            Power map column of each recognized BC column
+    """
+    normalized = {re.sub(r'[^a-z0-9]', '', i.lower()): i for i in map_df.columns}
+    guessed = {}
+    for bc_col, aliases in COLUMN_ALIASES.items():
+        found = [normalized[i] for i in aliases if i in normalized]
+        if found:
+            guessed[bc_col] = found[0]
+    return guessed
+
+
+# Function to list keys in a message
+def _keys_message(keys, message):
+    listed = ', '.join(keys[:MAX_LISTED_ROWS])
+    if len(keys) > MAX_LISTED_ROWS:
+        listed += f', ... {len(keys) - MAX_LISTED_ROWS} more'
+    return f'{message}: {listed}'
+
+
+# Function to join a power map onto the boundary conditions table
+def join_power_map(bc_df, map_df, bc_key, map_key, columns, scale=None):
+    """ Set power and resistances of the BC table from an external table, matched by reference designator or
+        part number through a hash index of the power map keys
+        Keys are compared without case and surrounding spaces. Keys that appear more than once in the power map
+        with different values are conflicting and left out; empty cells leave the BC value unchanged.
+        Parameters
+        ----------
+        bc_df: pandas.DataFrame
+            Boundary conditions table
+        map_df: pandas.DataFrame
+            Power map, as read by read_power_map
+        bc_key: str
+            BC column to match, one of KEY_COLUMNS
+        map_key: str
+            Power map column with the reference designators or part numbers
+        columns: dict
+            Power map column of each BC column to set, see VALUE_COLUMNS
+        scale: dict, optional
+            Factor applied to the values of a BC column, e.g. {'Power [W]': 1e-3} for a power map in mW
+        Returns
+        -------
+        tuple
+            New table and report with the number of matched rows and changed cells, and lists of power map keys
+            without a BC row, conflicting keys and keys with values that are not numbers
+    """
+    scale = scale or {}
+    # Keys are plain Python strings, so the index and set lookups below hash them directly
+    keys = map_df[map_key].fillna('').astype(str).str.strip().str.upper().to_numpy(dtype=object)
+    values = pd.DataFrame({'_key': keys}, dtype=object)
+    # Cells that are not empty but are not numbers
+    invalid = np.zeros(len(map_df), dtype=bool)
+    for bc_col, map_col in columns.items():
+        values[bc_col] = pd.to_numeric(map_df[map_col], errors='coerce').to_numpy(dtype=float) * scale.get(bc_col, 1.0)
+        missing = np.flatnonzero(np.isnan(values[bc_col].to_numpy()))
+        invalid[missing] |= (map_df[map_col].iloc[missing].fillna('').astype(str).str.strip() != '').to_numpy()
+    values = values[keys != ''].drop_duplicates()
+    conflicting = values['_key'][values['_key'].duplicated(keep=False)].unique()
+    values = values[~values['_key'].isin(conflicting)]
+
+    index = pd.Index(values['_key'])
+    bc_keys = bc_df[bc_key].fillna('').astype(str).str.strip().str.upper().to_numpy(dtype=object)
+    positions = index.get_indexer(bc_keys)
+    matched = positions >= 0
+    new_df = bc_df.copy()
+    changed = 0
+    for bc_col in columns:
+        old = pd.to_numeric(bc_df[bc_col], errors='coerce').to_numpy(dtype=float)
+        new = values[bc_col].to_numpy(dtype=float)[np.where(matched, positions, 0)] if len(values) else \
+            np.full(len(bc_df), np.nan)
+        update = matched & ~np.isnan(new)
+        result = np.where(update, new, old)
+        changed += int((update & ~((result == old) | (np.isnan(result) & np.isnan(old)))).sum())
+        new_df[bc_col] = result
+    unmatched = values['_key'][pd.Index(pd.unique(bc_keys)).get_indexer(values['_key']) < 0]
+    report = {'matched_rows': int(matched.sum()), 'changed': changed,
+              'unmatched_keys': list(unmatched), 'conflicting_keys': list(conflicting),
+              'invalid_keys': list(pd.unique(keys[invalid]))}
+    return new_df, report
+
+
+# Function to describe the problems of a power map import
+def report_messages(report):
+    messages = []
+    if report['unmatched_keys']:
+        messages.append(_keys_message(report['unmatched_keys'], f'''{len(report['unmatched_keys'])} power map '''
+                                                                f'''key(s) without a BC row'''))
+    if report['conflicting_keys']:
+        messages.append(_keys_message(report['conflicting_keys'], f'''{len(report['conflicting_keys'])} key(s) '''
+                                                                  f'''with conflicting values, not imported'''))
+    if report['invalid_keys']:
+        messages.append(_keys_message(report['invalid_keys'], f'''{len(report['invalid_keys'])} key(s) with '''
+                                                              f'''values that are not numbers'''))
+    return messages
@@ -0,0 +1,130 @@
+import os
+import re
+import time
+import hashlib
+
+from utils.jobs import _read_json, _write_json
+from utils.results_cache import solution_stamp, CACHE_FOLDER
+from utils.board_model import board_objects
+
+# Metadata indexes of the solved projects of a working directory
+INDEX_FOLDER = os.path.join(CACHE_FOLDER, 'project_index')
+# Boundary types assigned to objects, and to faces, whose objects the index lists
+OBJECT_BC_TYPES = ('Solid Block', 'Hollow Block', 'Source')
+FACE_BC_TYPES = ('Network', 'Opening', 'Conducting Plate', 'Grille')
+
+
+# Function to get a stamp that changes whenever a project or its solution changes
+def project_stamp(project_path):
+    try:
+        stat = os.stat(project_path)
+    except OSError:
+        return ''
+    return f'{stat.st_mtime_ns}_{stat.st_size}_{solution_stamp(project_path)}'
+
+
+# Function to get the index file of a project
+def index_file(project_path):
+    path = os.path.normcase(os.path.abspath(project_path))
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+    name = re.sub(r"\W", "_", os.path.splitext(os.path.basename(path))[0])
+    return os.path.join(os.path.dirname(os.path.abspath(project_path)), INDEX_FOLDER, f'{name}_{digest}.json')
+
+
+# Function to collect the metadata of an Icepak design
+def build_project_index(ipk):
+    """ Boundaries with their type and objects, monitors, 3D component parts and board objects, read in one pass
+        over the design. Object IDs of boundary assignments are resolved through the object table of the modeler
+        instead of one AEDT call per ID.
+        Parameters
+        ----------
+        ipk: pyaedt.Icepak
+            Icepak design of the solved project
+        Returns
+        -------
+        dict
+            Index, see load_project_index
+    """
+    thermal = ipk.odesign.GetChildObject('Thermal')
+    omodule = ipk.odesign.GetModule('BoundarySetup')
+    oeditor = ipk.modeler.oeditor
+    id_names = {obj_id: obj.name for obj_id, obj in ipk.modeler.objects.items()}
+    boundaries = {}
+    types = {}
+    for bc in thermal.GetChildNames():
+        bc_type = thermal.GetChildObject(bc).GetPropValue('Type')
+        objects = []
+        if bc_type in OBJECT_BC_TYPES:
+            objects = [id_names.get(i) or oeditor.GetObjectNameByID(i) for i in omodule.GetBoundaryAssignment(bc)]
+        elif bc_type in FACE_BC_TYPES:
+            faces = omodule.GetBoundaryAssignment(bc)
+            objects = [oeditor.GetObjectNameByFaceID(faces[0])] if faces else []
+        boundaries[bc] = {'type': bc_type, 'objects': objects}
+        types.setdefault(bc_type, []).append(bc)
+
+    modeler_child = ipk.odesign.GetChildObject('3D Modeler')
+    component_parts = {}
+    for definition in modeler_child.Get3DComponentDefinitionNames():
+        for instance in modeler_child.Get3DComponentInstanceNames(definition):
+            component_parts[instance] = list(modeler_child.Get3DComponentPartNames(instance))
+    pcb_name, pcb_layers = board_objects(ipk)
+    return {'boundaries': boundaries, 'types': types,
+            'monitors': list(ipk.odesign.GetChildObject('Monitor').GetChildNames()),
+            'component_parts': component_parts,
+            'objects': [i for i in ipk.modeler.model_objects if i != 'Region'],
+            'pcb_name': pcb_name, 'pcb_layers': pcb_layers}
+
+
+# Function to get the metadata index of a solved project
+def load_project_index(ipk, project_path, cached=None):
+    """ The index is built once per version of the project and kept on disk, so a later session of the same
+        project reads it instead of traversing the design again
+        Parameters
+        ----------
+        ipk: pyaedt.Icepak
+            Icepak design of the project
+        project_path: str
+            Full path of the AEDT project file (*.aedt)
+        cached: dict, optional
+            Index held by the session, used while the project is unchanged
+        Returns
+        -------
+        dict
+            Boundaries under 'boundaries' with their type and object names, boundary names of each type under
+            'types', monitor names, part names of each 3D component instance under 'component_parts', model
+            objects without the region, and the PCB 3D component and its layers or tiles
+    """
+    stamp = project_stamp(project_path)
+    path = os.path.normcase(os.path.abspath(project_path))
+    if cached and cached.get('project') == path and cached.get('stamp') == stamp:
+        return cached
+    file = index_file(project_path)
+    index = _read_json(file)
+    if index and index.get('project') == path and index.get('stamp') == stamp:
+        return index
+    index = build_project_index(ipk)
+    index.update({'project': path, 'stamp': stamp, 'created': time.time()})
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    _write_json(file, index)
+    return index
+
+
+# Function to get the boundaries of an index by type
+def boundary_types(index):
+    """ Returns
+        -------
+        dict
+            Boundary names of each boundary type
+    """
+    return {bc_type: list(bcs) for bc_type, bcs in index['types'].items()}
+
+
+# Function to get the objects of the boundaries of an index
+def boundary_objects(index):
+    """ Returns
+        -------
+        dict
+            {type: object names} of each boundary, empty for boundaries assigned to neither objects nor faces
+    """
+    return {bc: {entry['type']: list(entry['objects'])} if entry['type'] in OBJECT_BC_TYPES + FACE_BC_TYPES else {}
+            for bc, entry in index['boundaries'].items()}
@@ -0,0 +1,256 @@
+import os
+import re
+import time
+import threading
+from collections import deque
+
+# Solver transcript files written to the results folder of a project during a solve
+TRANSCRIPT_EXTENSIONS = ('.trn', '.log', '.out')
+# Monitor point histories written next to the transcript
+MONITOR_SUFFIXES = ('.mon', '-rfile.out')
+
+
+# Function to parse the column names of a residual table header
+def parse_residual_header(line):
+    """ Column names of a solver residual header such as 'iter continuity x-velocity ... energy time/iter'
+        Returns
+        -------
+        list
+            Residual names, None if the line is not a residual header
+    """
+    tokens = line.split()
+    if len(tokens) < 2 or tokens[0] != 'iter':
+        return None
+    return [i for i in tokens[1:] if i != 'time/iter']
+
+
+# Function to parse one row of a residual table
+def parse_residual_line(line, names):
+    """ Iteration and residuals of one solver transcript row
+        Parameters
+        ----------
+        line: str
+            Transcript line, e.g. '  120  1.2e-03  4.5e-04  ...  0:00:10  180'
+        names: list
+            Residual names from parse_residual_header
+        Returns
+        -------
+        tuple
+            Iteration number and {name: residual} dictionary, None if the line is not a residual row
+    """
+    tokens = line.split()
+    if len(tokens) < len(names) + 1 or not tokens[0].isdigit():
+        return None
+    values = []
+    for token in tokens[1:len(names) + 1]:
+        try:
+            values.append(float(token))
+        except ValueError:
+            return None
+    return int(tokens[0]), dict(zip(names, values))
+
+
+# Function to find the newest solver transcript in a results folder
+def find_transcript(results_folder, newer_than=0.0):
+    newest = None
+    newest_mtime = newer_than
+    for dirpath, dirnames, filenames in os.walk(results_folder):
+        for name in filenames:
+            if name.endswith(TRANSCRIPT_EXTENSIONS) and not name.endswith(MONITOR_SUFFIXES):
+                path = os.path.join(dirpath, name)
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+                if mtime >= newest_mtime:
+                    newest, newest_mtime = path, mtime
+    return newest
+
+
+# Function to find the monitor point histories in a results folder
+def find_monitor_files(results_folder, newer_than=0.0):
+    files = []
+    for dirpath, dirnames, filenames in os.walk(results_folder):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                if name.endswith(MONITOR_SUFFIXES) and os.path.getmtime(path) >= newer_than:
+                    files.append(path)
+            except OSError:
+                continue
+    return sorted(files)
+
+
+# Function to parse one line of a monitor history
+def parse_monitor_line(line):
+    """ Monitor history files have quoted or plain header lines followed by rows of 'iteration value ...'
+        Returns
+        -------
+        tuple
+            ('header', names) for a header line, ('row', (iteration, values)) for a data row, None otherwise
+    """
+    tokens = line.split()
+    if not tokens:
+        return None
+    if tokens[0].isdigit():
+        try:
+            return 'row', (int(tokens[0]), [float(i) for i in tokens[1:]])
+        except ValueError:
+            return None
+    names = re.findall(r'"([^"]+)"', line) or tokens
+    if names and names[0].lower().startswith(('iter', 'time step', 'flow-time')):
+        return 'header', names[1:]
+    return None
+
+
+# Function to read the number of mesh cells from a mesh statistics file
+def read_mesh_cells(stats_file):
+    """ Mesh statistics list the cells of the whole mesh on a line with 'total' and 'cells', or on the first
+        line with 'cells'
+        Returns
+        -------
+        int
+            Number of cells, None if the file has no cell count
+    """
+    try:
+        with open(stats_file, 'r', errors='ignore') as f:
+            lines = [i for i in f.read().splitlines() if 'cell' in i.lower() and re.search(r'\d', i)]
+    except (OSError, TypeError):
+        return None
+    lines = [i for i in lines if 'total' in i.lower()] or lines
+    if not lines:
+        return None
+    return int(re.findall(r'\d[\d,]*', lines[0])[-1].replace(',', ''))
+
+
+class ConvergenceRule:
+    """ Stops a solve once every monitor point is stable
+        A monitor is stable when its temperature varied less than delta_t over the last window iterations.
+        Parameters
+        ----------
+        delta_t: float, optional
+            default = 0.05
+            Allowed temperature change over the window [cel]
+        window: int, optional
+            default = 30
+            Number of iterations the temperatures must stay within delta_t
+        min_iterations: int, optional
+            default = 50
+            The rule is not checked before this iteration
+    """
+
+    def __init__(self, delta_t=0.05, window=30, min_iterations=50):
+        self.delta_t = delta_t
+        self.window = window
+        self.min_iterations = min_iterations
+        self._history = {}
+        self.iteration = 0
+
+    def add(self, iteration, values):
+        self.iteration = max(self.iteration, iteration)
+        for name, value in values.items():
+            self._history.setdefault(name, deque(maxlen=self.window)).append(value)
+
+    def spread(self):
+        """ Largest temperature change over the window among all monitors, None until the window is full """
+        if not self._history or any(len(i) < self.window for i in self._history.values()):
+            return None
+        return max(max(i) - min(i) for i in self._history.values())
+
+    def converged(self):
+        spread = self.spread()
+        return self.iteration >= self.min_iterations and spread is not None and spread < self.delta_t
+
+
+class ResidualWatcher(threading.Thread):
+    """ Background thread that tails the solver transcript of a running solve
+        Parameters
+        ----------
+        results_folder: str
+            The *.aedtresults folder of the project being solved
+        callback: callable
+            Called with (iteration, residuals) for every new residual row
+        poll_interval: float, optional
+            default = 2.0
+            Seconds between checks of the transcript
+        monitor_callback: callable, optional
+            Called with (iteration, {monitor: value}) for every new row of the monitor point histories
+    """
+
+    def __init__(self, results_folder, callback, poll_interval=2.0, monitor_callback=None):
+        super().__init__(daemon=True)
+        self.results_folder = results_folder
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.monitor_callback = monitor_callback
+        self.started_at = time.time()
+        self._stop_event = threading.Event()
+        self._path = None
+        self._offset = 0
+        self._names = None
+        # Read offset and column names of every monitor file
+        self._monitors = {}
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=2 * self.poll_interval)
+        # Read the rows written since the last poll
+        self.poll()
+
+    def run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            self.poll()
+
+    def poll(self):
+        if self.monitor_callback:
+            self._poll_monitors()
+        if self._path is None:
+            self._path = find_transcript(self.results_folder, newer_than=self.started_at - 1.0)
+            if self._path is None:
+                return
+        lines, self._offset = _read_new_lines(self._path, self._offset)
+        for line in lines:
+            names = parse_residual_header(line)
+            if names:
+                self._names = names
+                continue
+            if self._names:
+                row = parse_residual_line(line, self._names)
+                if row:
+                    self.callback(row[0], row[1])
+
+    def _poll_monitors(self):
+        rows = {}
+        for path in find_monitor_files(self.results_folder, newer_than=self.started_at - 1.0):
+            offset, names = self._monitors.get(path, (0, None))
+            lines, offset = _read_new_lines(path, offset)
+            default_name = os.path.splitext(os.path.basename(path))[0].replace('-rfile', '')
+            for line in lines:
+                parsed = parse_monitor_line(line)
+                if parsed is None:
+                    continue
+                if parsed[0] == 'header':
+                    names = parsed[1]
+                    continue
+                iteration, values = parsed[1]
+                if not names or len(names) != len(values):
+                    names = [default_name] if len(values) == 1 else \
+                        [f'{default_name}_{i + 1}' for i in range(len(values))]
+                rows.setdefault(iteration, {}).update(zip(names, values))
+            self._monitors[path] = (offset, names)
+        # Monitors of one iteration are reported together, in iteration order
+        for iteration in sorted(rows):
+            self.monitor_callback(iteration, rows[iteration])
+
+
+# Function to read the complete lines appended to a file since an offset
+def _read_new_lines(path, offset):
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return [], offset
+    # Keep an incomplete last line for the next poll
+    end = data.rfind(b'\n') + 1
+    return data[:end].decode('utf-8', errors='ignore').splitlines(), offset + end
@@ -0,0 +1,145 @@
+import os
+import re
+import shutil
+import hashlib
+from collections import OrderedDict
+
+# Default limits of the postprocessing results cache
+CACHE_FOLDER = '.pcb_thermal_cache'
+MAX_DISK_BYTES = 256 * 1024 * 1024
+MAX_MEMORY_ENTRIES = 32
+
+
+# Function to get a stamp that changes whenever the solution of a project changes
+def solution_stamp(project_path):
+    """ Modification stamp of the solution stored with an AEDT project
+        Parameters
+        ----------
+        project_path: str
+            Full path of the AEDT project file (*.aedt)
+        Returns
+        -------
+        str
+            Latest modification time and total size of the files in the *.aedtresults folder.
+            Empty string if the project has not been solved.
+    """
+    results_folder = os.path.splitext(os.path.abspath(project_path))[0] + '.aedtresults'
+    if not os.path.isdir(results_folder):
+        return ''
+    latest = 0
+    total_size = 0
+    for dirpath, dirnames, filenames in os.walk(results_folder):
+        for name in filenames:
+            try:
+                stat = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            latest = max(latest, stat.st_mtime_ns)
+            total_size = total_size + stat.st_size
+    return str(latest) + '_' + str(total_size)
+
+
+class ResultsCache:
+    """ Size bounded cache of postprocessing tables and images
+        Entries are keyed by project path, solution (setup : sweep) name, report name and the
+        solution stamp, so a re-solve of the project never returns stale results.
+        Parameters
+        ----------
+        cache_dir: str
+            Folder where cached tables (*.csv) and images (*.png) are stored
+        max_disk_bytes: int, optional
+            default = 256 MB
+            Least recently used entries are evicted once the folder grows beyond this size
+        max_memory_entries: int, optional
+            default = 32
+            Number of tables kept in memory for instant reruns
+    """
+
+    def __init__(self, cache_dir, max_disk_bytes=MAX_DISK_BYTES, max_memory_entries=MAX_MEMORY_ENTRIES):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_entries = max_memory_entries
+        self._tables = OrderedDict()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # Function to build a cache key
+    def key(self, project_path, sol_name, report_name, **options):
+        stamp = solution_stamp(project_path)
+        parts = [os.path.normcase(os.path.abspath(project_path)), sol_name, report_name, stamp]
+        parts = parts + [str(k) + '=' + str(options[k]) for k in sorted(options)]
+        digest = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+        return re.sub(r"\W", "_", report_name) + '_' + digest[:16]
+
+    def _path(self, key, ext):
+        return os.path.join(self.cache_dir, key + ext)
+
+    def _touch(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def get_table(self, key):
+        if key in self._tables:
+            self._tables.move_to_end(key)
+            return self._tables[key].copy()
+        path = self._path(key, '.csv')
+        if not os.path.exists(path):
+            return None
+        self._touch(path)
+        # pandas is only needed once a table is read back, so importing the cache stays cheap for the pages
+        import pandas as pd
+        df = pd.read_csv(path)
+        self._remember(key, df)
+        return df.copy()
+
+    def put_table(self, key, df):
+        df.to_csv(self._path(key, '.csv'), index=False)
+        self._remember(key, df.copy())
+        self.evict()
+
+    def get_image(self, key):
+        path = self._path(key, '.png')
+        if not os.path.exists(path):
+            return None
+        self._touch(path)
+        return path
+
+    def put_image(self, key, image_path):
+        path = self._path(key, '.png')
+        shutil.copyfile(image_path, path)
+        self.evict()
+        return path
+
+    def _remember(self, key, df):
+        self._tables[key] = df
+        self._tables.move_to_end(key)
+        while len(self._tables) > self.max_memory_entries:
+            self._tables.popitem(last=False)
+
+    # Function to evict least recently used files once the cache is over its size limit
+    def evict(self):
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total_size = total_size + stat.st_size
+        entries.sort()
+        for mtime, size, path in entries:
+            if total_size <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size = total_size - size
+            key = os.path.splitext(os.path.basename(path))[0]
+            self._tables.pop(key, None)
+
+    def clear(self):
+        self._tables.clear()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
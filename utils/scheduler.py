@@ -0,0 +1,367 @@
+import os
+import re
+import json
+import time
+import signal
+import sqlite3
+import getpass
+import subprocess
+import psutil
+
+from utils.jobs import create_job, start_worker, pid_alive, get_job_status, cancel_job as kill_job, ProgressReporter
+
+# One scheduler per analysis server, shared by all users and working directories
+SCHEDULER_DIR = os.path.join(os.path.expanduser('~'), '.pcb_thermal_cache')
+SCHEDULER_DB = os.path.join(SCHEDULER_DIR, 'scheduler.db')
+DEFAULT_CAPACITY = {'licenses': 1, 'cores': os.cpu_count() or 1, 'memory_gb': 0,
+                    'lmutil': '', 'license_server': '', 'license_feature': 'icepak'}
+# Finished jobs count towards the fair share of their user for this many seconds
+FAIR_SHARE_WINDOW = 24 * 3600
+PRIORITIES = {'Low': 0, 'Normal': 1, 'High': 2}
+# lmstat is asked at most once in this many seconds; dispatches in between use its last answer
+LICENSE_CHECK_INTERVAL = 60
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    job_dir TEXT NOT NULL,
+    user TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 1,
+    cores INTEGER NOT NULL DEFAULT 1,
+    memory_gb REAL NOT NULL DEFAULT 0,
+    setup_only INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    worker_pid INTEGER,
+    preemptions INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS license_checks (
+    license_server TEXT NOT NULL,
+    license_feature TEXT NOT NULL,
+    free INTEGER,
+    checked REAL NOT NULL,
+    PRIMARY KEY (license_server, license_feature)
+);
+'''
+
+
+# Function to open the scheduler database
+def connect(db_file=SCHEDULER_DB):
+    os.makedirs(os.path.dirname(db_file), exist_ok=True)
+    conn = sqlite3.connect(db_file, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+# Function to read the resources the scheduler may hand out
+def get_capacity(db_file=SCHEDULER_DB):
+    conn = connect(db_file)
+    try:
+        capacity = dict(DEFAULT_CAPACITY)
+        for row in conn.execute('SELECT key, value FROM settings'):
+            capacity[row['key']] = json.loads(row['value'])
+        return capacity
+    finally:
+        conn.close()
+
+
+# Function to change the resources the scheduler may hand out
+def set_capacity(db_file=SCHEDULER_DB, **kwargs):
+    """ Store scheduler settings
+        Parameters
+        ----------
+        licenses: int
+            Icepak licenses available to this server
+        cores: int
+            Cores available to simulation jobs
+        memory_gb: float
+            Memory available to simulation jobs, 0 to only check the free memory of the machine
+        lmutil: str
+            Path of the FlexLM lmutil executable, empty to trust the licenses setting
+        license_server: str
+            License server, e.g. 1055@licserver
+        license_feature: str
+            License feature counted by lmstat
+    """
+    conn = connect(db_file)
+    try:
+        for key, value in kwargs.items():
+            if key not in DEFAULT_CAPACITY:
+                raise KeyError('Unknown scheduler setting: ' + key)
+            conn.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, json.dumps(value)))
+    finally:
+        conn.close()
+
+
+# Function to ask the license server how many licenses of a feature are free
+def free_licenses(capacity):
+    """ Free licenses reported by lmstat, None when no license server is configured or it cannot be read """
+    if not capacity['lmutil'] or not capacity['license_server']:
+        return None
+    try:
+        output = subprocess.run([capacity['lmutil'], 'lmstat', '-c', capacity['license_server'],
+                                 '-f', capacity['license_feature']],
+                                capture_output=True, text=True, timeout=30).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'Total of (\d+) licenses? issued;\s+Total of (\d+) licenses? in use', output)
+    if not match:
+        return None
+    return int(match.group(1)) - int(match.group(2))
+
+
+# Function to get the free licenses of the last lmstat call, asking the license server again once it is too old
+def checked_free_licenses(capacity, db_file=SCHEDULER_DB):
+    """ lmstat can take up to its timeout to answer, so it is not asked on every dispatch. The first process to
+        find the last answer too old asks the license server; the others keep using the last answer meanwhile.
+        Returns
+        -------
+        tuple
+            Free licenses, None when no license server is configured or it cannot be read, and the time they
+            were counted
+    """
+    if not capacity['lmutil'] or not capacity['license_server']:
+        return None, time.time()
+    key = (capacity['license_server'], capacity['license_feature'])
+    conn = connect(db_file)
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute('SELECT free, checked FROM license_checks WHERE license_server = ? '
+                           'AND license_feature = ?', key).fetchone()
+        if row is not None and time.time() - row['checked'] < LICENSE_CHECK_INTERVAL:
+            conn.execute('COMMIT')
+            return row['free'], row['checked']
+        # Claim the check, so other processes do not ask the license server at the same time
+        conn.execute('INSERT OR REPLACE INTO license_checks (license_server, license_feature, free, checked) '
+                     'VALUES (?, ?, ?, ?)', key + (row['free'] if row is not None else None, time.time()))
+        conn.execute('COMMIT')
+    finally:
+        conn.close()
+    checked = time.time()
+    free = free_licenses(capacity)
+    conn = connect(db_file)
+    try:
+        conn.execute('INSERT OR REPLACE INTO license_checks (license_server, license_feature, free, checked) '
+                     'VALUES (?, ?, ?, ?)', key + (free, checked))
+    finally:
+        conn.close()
+    return free, checked
+
+
+# Function to remove finished, dead or lost jobs from the active set
+def _reap(conn):
+    for row in conn.execute("SELECT * FROM jobs WHERE state IN ('running', 'idle')").fetchall():
+        status = get_job_status(row['job_dir'])
+        if row['state'] == 'running':
+            if status.get('state') in ('queued', 'running') and pid_alive(row['worker_pid']):
+                continue
+            state = status.get('state', 'failed')
+            # Setup-only jobs keep AEDT open, and keep their license, until the user closes it
+            if state == 'done' and row['setup_only'] and pid_alive(status.get('aedt_pid')):
+                conn.execute("UPDATE jobs SET state = 'idle' WHERE job_id = ?", (row['job_id'],))
+                continue
+            conn.execute('UPDATE jobs SET state = ?, finished = ? WHERE job_id = ?',
+                         (state if state in ('done', 'failed', 'cancelled') else 'failed', time.time(),
+                          row['job_id']))
+        elif not pid_alive(status.get('aedt_pid')):
+            conn.execute("UPDATE jobs SET state = 'done', finished = ? WHERE job_id = ?",
+                         (time.time(), row['job_id']))
+
+
+# Function to rank queued jobs
+def _queue_order(conn):
+    """ Queued jobs by priority, then by the core-seconds their user consumed recently (fair share),
+        then by submission time
+    """
+    now = time.time()
+    usage = {}
+    for row in conn.execute('SELECT user, cores, started, finished FROM jobs WHERE started IS NOT NULL '
+                            'AND (finished IS NULL OR finished > ?)', (now - FAIR_SHARE_WINDOW,)):
+        start = max(row['started'], now - FAIR_SHARE_WINDOW)
+        usage[row['user']] = usage.get(row['user'], 0.0) + row['cores'] * ((row['finished'] or now) - start)
+    queued = conn.execute("SELECT * FROM jobs WHERE state = 'queued'").fetchall()
+    return sorted(queued, key=lambda r: (-r['priority'], usage.get(r['user'], 0.0), r['submitted']))
+
+
+# Function to preempt a setup-only job
+def _preempt(conn, row):
+    """ A running setup-only job is stopped and queued again; an idle one only has its AEDT session closed """
+    reporter = ProgressReporter(row['job_dir'])
+    if row['state'] == 'running':
+        kill_job(row['job_dir'])
+        reporter.update_status(state='queued', stage='Queued (preempted)', percent=0, worker_pid=None,
+                               aedt_pid=None)
+        reporter.warning('Setup-only job preempted by a higher priority job and queued again.')
+        conn.execute("UPDATE jobs SET state = 'queued', started = NULL, worker_pid = NULL, "
+                     "preemptions = preemptions + 1 WHERE job_id = ?", (row['job_id'],))
+    else:
+        _close_session(conn, row, 'AEDT session closed to free its license for a higher priority job.')
+
+
+# Function to close the AEDT session an idle setup-only job keeps open
+def _close_session(conn, row, message):
+    status = get_job_status(row['job_dir'])
+    try:
+        os.kill(status['aedt_pid'], signal.SIGTERM)
+    except (KeyError, TypeError, OSError):
+        pass
+    ProgressReporter(row['job_dir']).warning(message)
+    conn.execute("UPDATE jobs SET state = 'done', finished = ? WHERE job_id = ?", (time.time(), row['job_id']))
+
+
+# Function to start queued jobs that fit into the free resources
+def dispatch(db_file=SCHEDULER_DB):
+    """ Admit queued jobs while Icepak licenses, cores and memory are available
+        Safe to call from any process; the database lock makes one dispatcher run at a time.
+        Returns
+        -------
+        list
+            IDs of the started jobs
+    """
+    capacity = get_capacity(db_file)
+    lm_free, lm_checked = checked_free_licenses(capacity, db_file)
+    conn = connect(db_file)
+    started = []
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        _reap(conn)
+        active = conn.execute("SELECT * FROM jobs WHERE state IN ('running', 'idle')").fetchall()
+        licenses = capacity['licenses'] - len(active)
+        if lm_free is not None:
+            # Sessions of this scheduler are already counted as in use by the license server, except those
+            # started after it was asked
+            licenses = min(licenses, lm_free - sum(1 for r in active if r['started'] > lm_checked))
+        cores = capacity['cores'] - sum(r['cores'] for r in active if r['state'] == 'running')
+        memory = psutil.virtual_memory().available / 1024 ** 3
+        if capacity['memory_gb']:
+            memory = min(memory, capacity['memory_gb'] - sum(r['memory_gb'] for r in active))
+
+        blocked_priority = None
+        for row in _queue_order(conn):
+            # Lower priority jobs may not overtake a blocked higher priority job
+            if blocked_priority is not None and row['priority'] < blocked_priority:
+                break
+            fits = licenses >= 1 and cores >= row['cores'] and memory >= row['memory_gb']
+            if not fits:
+                # Free resources held by lower priority setup-only jobs
+                victims = [r for r in active if r['setup_only'] and r['priority'] < row['priority']]
+                victims.sort(key=lambda r: (r['state'] == 'running', r['priority']))
+                freed_cores, freed_memory, chosen = 0, 0.0, []
+                for victim in victims:
+                    if licenses + len(chosen) >= 1 and cores + freed_cores >= row['cores'] \
+                            and memory + freed_memory >= row['memory_gb']:
+                        break
+                    chosen.append(victim)
+                    freed_cores += victim['cores'] if victim['state'] == 'running' else 0
+                    freed_memory += victim['memory_gb']
+                if chosen and licenses + len(chosen) >= 1 and cores + freed_cores >= row['cores'] \
+                        and memory + freed_memory >= row['memory_gb']:
+                    for victim in chosen:
+                        _preempt(conn, victim)
+                    active = [r for r in active if r not in chosen]
+                    licenses += len(chosen)
+                    cores += freed_cores
+                    memory += freed_memory
+                    fits = True
+            if not fits:
+                blocked_priority = row['priority']
+                continue
+            pid = start_worker(row['job_dir'])
+            conn.execute("UPDATE jobs SET state = 'running', started = ?, worker_pid = ? WHERE job_id = ?",
+                         (time.time(), pid, row['job_id']))
+            active.append(row)
+            licenses -= 1
+            cores -= row['cores']
+            memory -= row['memory_gb']
+            started.append(row['job_id'])
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+    return started
+
+
+# Function to queue a simulation job
+def submit_job(job, workdir, user=None, priority=PRIORITIES['Normal'], memory_gb=0.0, db_file=SCHEDULER_DB):
+    """ Store a simulation job, queue it and start it if resources are free
+        Parameters
+        ----------
+        job: dict
+            Simulation inputs
+        workdir: str
+            Working directory of the job
+        user: str, optional
+            Owner of the job for fair share, default is the login name
+        priority: int, optional
+            One of the PRIORITIES values
+        memory_gb: float, optional
+            Memory reserved for the job
+        Returns
+        -------
+        str
+            Job ID
+    """
+    # A job that needs more than the whole server would stay queued forever
+    capacity = get_capacity(db_file)
+    if int(job['num_cores']) > capacity['cores']:
+        raise ValueError(f'''The job needs {int(job['num_cores'])} cores, but the scheduler hands out at most '''
+                         f'''{capacity['cores']}.''')
+    if capacity['memory_gb'] and float(memory_gb) > capacity['memory_gb']:
+        raise ValueError(f'''The job needs {float(memory_gb):g} GB of memory, but the scheduler hands out at '''
+                         f'''most {capacity['memory_gb']:g} GB.''')
+    job_id, job_dir = create_job(job, workdir)
+    conn = connect(db_file)
+    try:
+        conn.execute('INSERT INTO jobs (job_id, job_dir, user, priority, cores, memory_gb, setup_only, submitted) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                     (job_id, job_dir, user or getpass.getuser(), int(priority), int(job['num_cores']),
+                      float(memory_gb), int(not job['analyze']), time.time()))
+    finally:
+        conn.close()
+    dispatch(db_file)
+    return job_id
+
+
+# Function to cancel a queued or running job, or close the AEDT session of an idle one
+def cancel_job(job_id, db_file=SCHEDULER_DB):
+    conn = connect(db_file)
+    try:
+        row = conn.execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None:
+            return
+        if row['state'] == 'idle':
+            # The setup is done; only the session that holds the license is closed
+            _close_session(conn, row, 'AEDT session closed by the user.')
+        else:
+            if row['state'] in ('queued', 'running'):
+                kill_job(row['job_dir'])
+            conn.execute("UPDATE jobs SET state = 'cancelled', finished = ? WHERE job_id = ?",
+                         (time.time(), job_id))
+    finally:
+        conn.close()
+    dispatch(db_file)
+
+
+# Function to read the queue of the scheduler
+def list_queue(db_file=SCHEDULER_DB):
+    """ Returns
+        -------
+        list
+            Queued, running and idle jobs as dictionaries, in dispatch order
+    """
+    conn = connect(db_file)
+    try:
+        active = conn.execute("SELECT * FROM jobs WHERE state IN ('running', 'idle') ORDER BY started").fetchall()
+        queued = _queue_order(conn)
+    finally:
+        conn.close()
+    return [dict(i) for i in active] + [dict(i) for i in queued]
@@ -0,0 +1,1339 @@
+import os
+import re
+import time
+import shutil
+import signal
+import numpy as np
+import pandas as pd
+import pyaedt
+
+from utils.bc_diff import save_build_record, load_build_record, remove_build_record, diff_bc_tables, \
+    incremental_update_blockers
+from utils.materials import add_library_materials, load_material_library
+from utils.bc_schema import load_bc_table
+from utils.ecad_cache import ecad_content_hash, layout_key, get_cached_layout, store_layout, restore_layout
+from utils.uploads import file_sha256
+from utils.distributed import IDF_COMPANIONS
+from utils.residuals import ResidualWatcher, ConvergenceRule, read_mesh_cells
+from utils.lumping import lumping_candidates, cluster_components, free_clusters, lumped_block, UNIT_MM
+from utils.board_model import read_layout, tile_board, tile_blocks, board_objects, board_side_face, \
+    board_tile_under, TILE_PREFIX
+from utils.checkpoints import StageCheckpoints, stage_keys, BUILD_STAGES, SOLVE_STAGE
+from utils.warm_start import geometry_hash, solve_conditions, register_solution, find_warm_start
+from utils.influence import heat_source_groups, influence_cases, assemble_influence, save_influence, \
+    influence_file, influence_meta, accuracy_check, evaluate, validity_messages, MonitorRecorder, NOMINAL_CASE
+
+# Material the IDF import gives component blocks; blocks without a material in the BC table keep it
+IDF_COMPONENT_MATERIAL = 'Ceramic_material'
+
+
+# Function to create a forced convection problem setup with default entries
+def forced_convection_setup(ipk, setup_name, flow_regime, turb_model='ZeroEquation'):
+    """ Default settings for forced convection problem
+        Parameters
+        ----------
+        ipk: pyaedt.Icepak
+            Icepak design
+        setup_name: str
+            Name of setup. Use only alphanumeric characters (letter, numbers and underscores)
+        flow_regime: str
+            Laminar or Turbulent
+        turb_model: str, optional
+            default = 'ZeroEquation'
+            'TwoEquation' uses 'Enhanced Realizable k-epsilon' turbulence model
+    """
+    setup = ipk.create_setup(setup_name)
+    setup.props['Enabled'] = True
+    flow_regime = flow_regime.casefold()
+    turb_model = turb_model.casefold()
+    if flow_regime == 'laminar':
+        setup.props['Flow Regime'] = 'Laminar'
+    else:
+        setup.props['Flow Regime'] = 'Turbulent'
+        if turb_model == 'zeroequation':
+            setup.props['Turbulent Model Eqn'] = 'ZeroEquation'
+        else:
+            setup.props['Turbulent Model Eqn'] = 'EnhancedRealizableTwoEquation'
+    setup.props['Include Temperature'] = True
+    setup.props['Include Flow'] = True
+    setup.props['Include Gravity'] = False
+    setup.props['Include Solar'] = False
+    setup.props['Solution Initialization - X Velocity'] = "0m_per_sec"
+    setup.props['Solution Initialization - Y Velocity'] = "0m_per_sec"
+    setup.props['Solution Initialization - Z Velocity'] = "0m_per_sec"
+    setup.props['Solution Initialization - Use Model Based Flow Initialization'] = False
+    setup.props['Convergence Criteria - Flow'] = '1e-4'
+    setup.props['Convergence Criteria - Energy'] = '1e-10'
+    setup.props['IsEnabled'] = False
+    setup.props['Radiation Model'] = 'Off'
+    setup.props['Under-relaxation - Pressure'] = '0.3'
+    setup.props['Under-relaxation - Momentum'] = '0.7'
+    setup.props['Under-relaxation - Temperature'] = '1'
+    setup.props['Discretization Scheme - Pressure'] = 'Standard'
+    setup.props['Discretization Scheme - Momentum'] = 'First'
+    setup.props['Discretization Scheme - Temperature'] = 'First'
+    setup.props['Secondary Gradient'] = False
+    setup.props['Sequential Solve of Flow and Energy Equations'] = True
+    setup.props['Convergence Criteria - Max Iterations'] = 300
+    setup.update()
+
+
+# Function to create a natural convection problem setup with default entries
+def natural_convection_setup(ipk, setup_name, gravity_dir, flow_regime, turb_model='ZeroEquation', ambient_temp=20):
+    """ Default settings for natural convection problem
+        Parameters
+        ----------
+        ipk: pyaedt.Icepak
+            Icepak design
+        setup_name: str
+            Name of setup. Use only alphanumeric characters (letter, numbers and underscores)
+        gravity_dir: str
+            Direction of gravity: -x, +x, -y, +y, -z, +z
+        flow_regime: str
+            Laminar or Turbulent
+        turb_model: str, optional
+            default = 'ZeroEquation'
+            'TwoEquation' uses 'Enhanced Realizable k-epsilon' turbulence model
+        ambient_temp: float, optional
+            default = 20
+    """
+    setup = ipk.create_setup(setup_name)
+    setup.props['Enabled'] = True
+    flow_regime = flow_regime.casefold()
+    turb_model = turb_model.casefold()
+    if flow_regime == 'laminar':
+        setup.props['Flow Regime'] = 'Laminar'
+    else:
+        setup.props['Flow Regime'] = 'Turbulent'
+        if turb_model == 'zeroequation':
+            setup.props['Turbulent Model Eqn'] = 'ZeroEquation'
+        else:
+            setup.props['Turbulent Model Eqn'] = 'EnhancedRealizableTwoEquation'
+    setup.props['Include Temperature'] = True
+    setup.props['Include Flow'] = True
+    setup.props['Include Gravity'] = True
+    setup.props['Include Solar'] = False
+    setup.props['Solution Initialization - X Velocity'] = "0m_per_sec"
+    setup.props['Solution Initialization - Y Velocity'] = "0m_per_sec"
+    setup.props['Solution Initialization - Z Velocity'] = "0m_per_sec"
+    gravity_dir = gravity_dir.casefold()
+    ambient_temp = str(ambient_temp) + 'cel'
+    if gravity_dir == "-x":
+        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=0)
+        ipk.modeler.edit_region_dimensions([250, 50, 50, 50, 200, 200])
+        setup.props['Solution Initialization - X Velocity'] = "0.00098m_per_sec"
+    elif gravity_dir == "-y":
+        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=1)
+        ipk.modeler.edit_region_dimensions([50, 50, 250, 50, 200, 200])
+        setup.props['Solution Initialization - Y Velocity'] = "0.00098m_per_sec"
+    elif gravity_dir == "-z":
+        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=2)
+        ipk.modeler.edit_region_dimensions([50, 50, 50, 50, 250, 50])
+        setup.props['Solution Initialization - Z Velocity'] = "0.00098m_per_sec"
+    elif gravity_dir == "+x":
+        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=3)
+        ipk.modeler.edit_region_dimensions([50, 250, 50, 50, 200, 200])
+        setup.props['Solution Initialization - X Velocity'] = "-0.00098m_per_sec"
+    elif gravity_dir == "+y":
+        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=4)
+        ipk.modeler.edit_region_dimensions([50, 50, 50, 250, 200, 200])
+        setup.props['Solution Initialization - Y Velocity'] = "-0.00098m_per_sec"
+    else:
+        ipk.apply_icepak_settings(ambienttemp=ambient_temp, gravityDir=5)
+        ipk.modeler.edit_region_dimensions([50, 50, 50, 50, 50, 250])
+        setup.props['Solution Initialization - Z Velocity'] = "-0.00098m_per_sec"
+    setup.props['Solution Initialization - Use Model Based Flow Initialization'] = False
+    setup.props['Convergence Criteria - Flow'] = '1e-4'
+    setup.props['Convergence Criteria - Energy'] = '1e-10'
+    setup.props['IsEnabled'] = True
+    setup.props['Radiation Model'] = 'Discrete Ordinates Model'
+    setup.props['Flow Iteration Per Radiation Iteration'] = '10'
+    setup.props['ThetaDivision'] = 2
+    setup.props['PhiDivision'] = 2
+    setup.props['ThetaPixels'] = 2
+    setup.props['PhiPixels'] = 2
+    setup.props['Convergence Criteria - Discrete Ordinates'] = '1e-6'
+    setup.props['Under-relaxation - Pressure'] = '0.7'
+    setup.props['Under-relaxation - Momentum'] = '0.3'
+    setup.props['Under-relaxation - Temperature'] = '1'
+    setup.props['Discretization Scheme - Pressure'] = 'Standard'
+    setup.props['Discretization Scheme - Momentum'] = 'First'
+    setup.props['Discretization Scheme - Temperature'] = 'First'
+    setup.props['Discretization Scheme - Discrete Ordinates'] = 'First'
+    setup.props['Secondary Gradient'] = False
+    setup.props['Linear Solver Type - Pressure'] = 'V'
+    setup.props['Linear Solver Type - Momentum'] = 'flex'
+    setup.props['Linear Solver Type - Temperature'] = 'F'
+    setup.props['Sequential Solve of Flow and Energy Equations'] = False
+    setup.props['Convergence Criteria - Max Iterations'] = 500
+    setup.update()
+
+
+# Function to create opening boundary condition
+def assign_opening_boundary(ipk, name, face_id, flow_type,
+                            xvel="0m_per_sec", yvel="0m_per_sec", zvel="0m_per_sec",
+                            pressure="AmbientPressure", temperature="AmbientTemp"):
+    """ Function to create opening boundary condition
+        Parameters
+        ----------
+        ipk: pyaedt.Icepak
+            Icepak design
+        name: str
+            name of opening boundary condition, e.g., inlet/outlet
+        face_id: int
+            face ID of opening
+        flow_type: str
+            velocity or pressure
+        xvel: str, optional
+            velocity in x-direction
+        yvel: str, optional
+            velocity in y-direction
+        zvel: str, optional
+            velocity in z-direction
+        pressure: str, optional
+            pressure at opening boundary
+        temperature: str, optional
+            temperature at opening boundary
+    """
+    props = {"Faces": [face_id]}
+    if flow_type == 'velocity':
+        props['Inlet Type'] = "Velocity"
+        props['Static Pressure'] = pressure
+        props['X Velocity'] = xvel
+        props['Y Velocity'] = yvel
+        props['Z Velocity'] = zvel
+        props['Temperature'] = temperature
+    else:
+        props['Inlet Type'] = "Pressure"
+        props['Total Pressure'] = pressure
+        props['Temperature'] = temperature
+    bound = pyaedt.modules.Boundary.BoundaryObject(ipk, name, props, 'Opening')
+    if bound.create():
+        ipk.boundaries.append(bound)
+        return bound
+
+
+# Function to add slack
+def add_slack(ipk, box_name, minx, maxx, miny, maxy, minz, maxz):
+    obj_ref = ipk.modeler.get_object_from_name(box_name)
+    obj_ref.bottom_face_x.move_with_offset(minx)
+    obj_ref.bottom_face_y.move_with_offset(miny)
+    obj_ref.bottom_face_z.move_with_offset(minz)
+    obj_ref.top_face_x.move_with_offset(maxx)
+    obj_ref.top_face_y.move_with_offset(maxy)
+    obj_ref.top_face_z.move_with_offset(maxz)
+    return None
+
+
+# Function to remove aedt files and project folders
+def cleanup_files(proj_name):
+    proj_path = os.path.join(os.getcwd(), proj_name)
+    proj_name_no_ext = os.path.splitext(proj_name)[0]
+    if os.path.exists(proj_path):
+        os.remove(proj_path)
+    if os.path.exists(os.path.join(os.getcwd(), proj_name + ".lock")):
+        os.remove(os.path.join(os.getcwd(), proj_name + ".lock"))
+    # Delete aedt results folder
+    if os.path.exists(os.path.join(os.getcwd(), proj_name_no_ext + ".aedtresults")):
+        try:
+            shutil.rmtree(os.path.join(os.getcwd(), proj_name_no_ext + ".aedtresults"))
+        except RuntimeError:
+            print('Error deleting aedtresults directory')
+    # Delete pyaedt folder
+    if os.path.exists(os.path.join(os.getcwd(), proj_name_no_ext + ".pyaedt")):
+        try:
+            shutil.rmtree(os.path.join(os.getcwd(), proj_name_no_ext + ".pyaedt"))
+        except RuntimeError:
+            print('Error deleting pyaedt directory')
+
+
+# Function to clean up names of objects
+def name_cleanup(name):
+    return re.sub(r"\W", "_", name)
+
+
+# Function to assign boundary condition, material and monitor point to a component block
+def assign_component_bc(ipk, block_name, bc_type, power, rjb, rjc, monpt, mat_type, pcb_name, pcb_layers):
+    """ Assign the boundary condition of one row of the boundary conditions table
+        Parameters
+        ----------
+        ipk: pyaedt.Icepak
+            Icepak design
+        block_name: str
+            Name of component block
+        bc_type: str
+            block, network or hollow
+        power: float
+            Power in W
+        rjb: float
+            Junction to board resistance in C/W (network blocks)
+        rjc: float
+            Junction to case resistance in C/W (network blocks)
+        monpt: str
+            YES to create a monitor point at the board side face center
+        mat_type: str
+            Material of block (solid blocks)
+        pcb_name: str
+            Name of PCB 3D component, None for a tiled board
+        pcb_layers: list
+            Names of PCB layers, sorted from top to bottom, or of the tiles of a tiled board
+    """
+    block_handle = ipk.modeler.get_object_from_name(block_name)
+    if bc_type == "block":
+        if power > 0:
+            ipk.create_source_block(block_name, f'{power:g}W', assign_material=False, use_object_for_name=True)
+        # Assign material property
+        if mat_type != "":
+            block_handle.material_name = mat_type
+            block_handle.surface_material_name = 'Ceramic-surface'
+    elif bc_type == "network":
+        # On a tiled board, the network block stands on the tile under its center
+        pcb = pcb_name or board_tile_under(ipk, block_handle, pcb_layers)
+        ipk.create_two_resistor_network_block(object_name=block_name, pcb=pcb, power=f'{power:g}W',
+                                              rjb=rjb, rjc=rjc)
+    elif bc_type == "hollow":
+        ipk.create_source_block(block_name, f'{power:g}W', assign_material=False, use_object_for_name=True)
+        ipk.modeler.primitives[block_name].solve_inside = False
+    else:
+        raise RuntimeError('Error! Incorrect block boundary condition for ' + block_name + '.')
+    # Monitor points
+    if monpt == "YES":
+        point_name = 'point_' + block_name
+        if point_name not in ipk.odesign.GetChildObject("Monitor").GetChildNames():
+            mon_point = ipk.modeler.primitives.get_face_center(board_side_face(ipk, block_handle, pcb_layers).id)
+            ipk.assign_point_monitor(mon_point, monitor_type='Temperature', monitor_name=point_name)
+
+
+# Function to remove boundary conditions and monitor point of a component block
+def remove_component_bc(ipk, block_name, keep_monitor=False, reset_body=True):
+    """ Remove the boundary conditions of a component block, and with reset_body also what assign_component_bc
+        changed on the block itself: a hollow block is solved inside again, and a block material goes back to the
+        material of the IDF import. Keep the body when only the power changes, so the mesh stays valid.
+    """
+    block_handle = ipk.modeler.get_object_from_name(block_name)
+    entity_ids = [block_handle.id] + [f.id for f in block_handle.faces]
+    omodule = ipk.odesign.GetModule("BoundarySetup")
+    for bc in list(ipk.odesign.GetChildObject('Thermal').GetChildNames()):
+        assigned = list(omodule.GetBoundaryAssignment(bc))
+        if bc == block_name or any(i in entity_ids for i in assigned):
+            omodule.DeleteBoundaries([bc])
+    if reset_body:
+        if not block_handle.solve_inside:
+            block_handle.solve_inside = True
+        if block_handle.material_name.lower() != IDF_COMPONENT_MATERIAL.lower():
+            block_handle.material_name = IDF_COMPONENT_MATERIAL
+    point_name = 'point_' + block_name
+    if not keep_monitor and point_name in ipk.odesign.GetChildObject("Monitor").GetChildNames():
+        ipk.monitor.delete_monitor(point_name)
+
+
+# Function to save the project and close AEDT
+def quit_aedt(ipk, desktop):
+    ipk.save_project()
+    pid = desktop.aedt_process_id
+    os.kill(pid, signal.SIGTERM)
+    file_list = os.listdir(os.getcwd())
+    for item in file_list:
+        if item.endswith('.lock'):
+            os.remove(item)
+
+
+# Function to get the rows of the boundary conditions table
+def bc_rows(bc_df):
+    """ Header and rows of the typed boundary conditions table as strings, with normalized YES/NO, TOP/BOTTOM and
+        BC type values and numbers written the same way in every build record
+    """
+    df = bc_strings(bc_df)
+    return list(df.columns), df.values.tolist()
+
+
+# Function to get the typed boundary conditions table as normalized strings
+def bc_strings(bc_df):
+    return bc_df.astype(str)
+
+
+# Function to get the inputs of a job that define the built project
+def get_build_inputs(job):
+    keys = ['ecad_file', 'ecad_type', 'idf_file', 'mesh_fidelity', 'delete_filtered', 'all_points', 'conv_type',
+            'vel', 'vel_dir', 'air_temp', 'gravity_direction']
+    build_inputs = {key: job[key] for key in keys}
+    build_inputs['ecad_hash'] = ecad_content_hash(job['ecad_file'])
+    idf_no_ext, ext = os.path.splitext(job['idf_file'])
+    idf_library = idf_no_ext + IDF_COMPANIONS.get(ext.lower(), '')
+    build_inputs['idf_hash'] = file_sha256(job['idf_file']) + \
+        (file_sha256(idf_library) if os.path.isfile(idf_library) else '')
+    # Lumping and board settings of jobs from before these options are missing
+    build_inputs['lumping'] = job.get('lumping') or None
+    build_inputs['board'] = job.get('board') or None
+    return build_inputs
+
+
+# Function to import the ECAD into HFSS 3D Layout
+def import_ecad(desktop, job):
+    """ Import the ECAD of a job, or open the cached layout project of an earlier import
+        Returns
+        -------
+        tuple
+            HFSS 3D Layout application, ECAD design name and outline polygon names
+    """
+    ecad_file_path = job['ecad_file']
+    ecad_type = job['ecad_type']
+    ecad_file_name = os.path.basename(ecad_file_path)
+    ecad_file_name_no_ext = os.path.splitext(ecad_file_name)[0]
+
+    ecad_project_name = ecad_file_name_no_ext + '.aedt'
+    cleanup_files(ecad_project_name)
+
+    # Reuse the layout project of an earlier import of the same ECAD content with the same AEDT release
+    ecad_hash = layout_key(ecad_content_hash(ecad_file_path), ecad_type, job['aedt_release']) \
+        if job['reuse_ecad_import'] else False
+    if ecad_hash and get_cached_layout(ecad_hash):
+        cached_project = restore_layout(ecad_hash, os.path.join(os.getcwd(), ecad_file_name_no_ext + '_layout'))
+        h3d = pyaedt.Hfss3dLayout(projectname=cached_project)
+    else:
+        h3d = pyaedt.Hfss3dLayout()
+        if ecad_type == 'EDB Folder':
+            h3d.import_edb(ecad_file_path)
+        if ecad_type == 'ODB++ File':
+            h3d.import_odb(ecad_file_path)
+        if ecad_type == 'BRD File':
+            h3d.import_brd(ecad_file_path)
+
+        h3d.save_project()
+        if ecad_hash:
+            store_layout(ecad_hash, h3d.project_file, {'ecad_file': ecad_file_path, 'ecad_type': ecad_type,
+                                                       'aedt_release': job['aedt_release']})
+
+    # Delete empty project
+    project_list = desktop.project_list()
+    for i in project_list:
+        if i != h3d.project_name:
+            desktop.odesktop.DeleteProject(i)
+
+    # ECAD design name from HFSS 3D Layout
+    ecad_design = h3d.design_list[0]
+
+    # Get name of outline polygon
+    outline_poly = []
+    for key in h3d.modeler.polygons.keys():
+        if h3d.modeler.polygons[key].placement_layer == 'Outline':
+            outline_poly.append(key)
+    return h3d, ecad_design, outline_poly
+
+
+# Function to run the ECAD import stage
+def ecad_import_stage(desktop, app, job, bc_df, state):
+    h3d, state['ecad_design'], state['outline_poly'] = import_ecad(desktop, job)
+    return h3d
+
+
+# Function to run the PCB creation stage
+def pcb_creation_stage(desktop, h3d, job, bc_df, state):
+    """ Insert the Icepak design into the layout project, rename it to the project name and link the PCB """
+    ecad_file_name_no_ext = os.path.splitext(os.path.basename(job['ecad_file']))[0]
+    # Close other projects, e.g. the empty default project of a resumed build
+    for i in desktop.project_list():
+        if i != h3d.project_name:
+            desktop.odesktop.DeleteProject(i)
+
+    # Insert Icepak design and rename project to user-specified project name
+    ipk = pyaedt.Icepak()
+    ipk.save_project()
+    ipk.oproject.Rename(os.path.join(ipk.project_path, job['project_name']), True)
+
+    if job.get('board'):
+        layout = read_layout(os.path.splitext(h3d.project_file)[0] + '.aedb', job['aedt_release'])
+        state['board'] = create_tiled_board(ipk, layout, job['board']['tile_size'])
+        return ipk
+
+    # Create PCB object in Icepak from HFSS 3D Layout
+    ipk.create_pcb_from_3dlayout(component_name=ecad_file_name_no_ext,
+                                 project_name=None,
+                                 design_name=state['ecad_design'],
+                                 resolution=3,
+                                 extent_type='Polygon',
+                                 outline_polygon=state['outline_poly'][0],
+                                 close_linked_project_after_import=False)
+    return ipk
+
+
+# Function to build the board from tiles of effective conductivity
+def create_tiled_board(ipk, layout, tile_size):
+    """ One block per run of tiles with the same anisotropic material, as thick as the board and standing on z = 0,
+        instead of the traces and layers of the PCB 3D component
+        Parameters
+        ----------
+        ipk: pyaedt.Icepak
+            Icepak design
+        layout: dict
+            Stackup and copper of the board, see read_layout
+        tile_size: float
+            Largest tile size [mm]
+        Returns
+        -------
+        dict
+            Number of tiles, blocks and materials, and mean copper coverage of each signal layer [%]
+    """
+    tiles = tile_board(layout, tile_size)
+    blocks, materials = tile_blocks(tiles)
+    ipk.modeler.model_units = 'mm'
+    material_names = []
+    for n, (kx, ky, kz) in enumerate(materials):
+        material_name = f'board_tile_k{n + 1}'
+        if not ipk.materials.checkifmaterialexists(material_name):
+            material = ipk.materials.add_material(material_name)
+            material.thermal_conductivity = [f'{kx:g}', f'{ky:g}', f'{kz:g}']
+        material_names.append(material_name)
+    for n, (xmin, ymin, xmax, ymax, code) in enumerate(blocks):
+        ipk.modeler.create_box([float(xmin), float(ymin), 0.0], [float(xmax - xmin), float(ymax - ymin),
+                                                                 tiles['thickness']],
+                               f'{TILE_PREFIX}{n + 1}', material_names[int(code)])
+    return {'tiles': int(tiles['inside'].sum()), 'blocks': len(blocks), 'materials': len(materials),
+            'coverage': {name: round(100.0 * float(coverage[tiles['inside']].mean()), 1)
+                         for name, coverage in tiles['coverage'].items()}}
+
+
+# Function to run the IDF import stage
+def idf_import_stage(desktop, ipk, job, bc_df, state):
+    # Import IDF file into Icepak
+    ipk.import_idf(job['idf_file'])
+
+    # Fit all and save
+    ipk.modeler.fit_all()
+    ipk.save_project()
+    ipk.autosave_disable()
+
+    # List of boundary conditions
+    list_bcs = ipk.odesign.GetChildObject('Thermal').GetChildNames()
+
+    # Delete all boundary conditions
+    omodule = ipk.odesign.GetModule("BoundarySetup")
+    if list_bcs:
+        for i in list_bcs:
+            omodule.DeleteBoundaries([i])
+
+    # Delete all points
+    for i in ipk.modeler.points:
+        ipk.modeler.points[i].delete()
+
+    # Delete empty part numbers/NOREFDES instances
+    for i in ipk.modeler.solid_bodies:
+        if i.startswith('idf_mech'):
+            ipk.modeler.delete(i)
+    return ipk
+
+
+# Function to run the gap fix stage
+def gap_fix_stage(desktop, ipk, job, bc_df, state):
+    """ Move the components onto the board and find the monitor point locations at their board side """
+    rows = bc_rows(bc_df)[1]
+
+    # Remove any gap between board and components
+    top_components = []
+    bottom_components = []
+    for i in range(len(rows)):
+        if rows[i][3] != 'NOREFDES':
+            block_name = re.sub(r"\W", "_", rows[i][3])
+            if rows[i][6] == 'TOP':
+                top_components.append(block_name)
+            if rows[i][6] == 'BOTTOM':
+                bottom_components.append(block_name)
+
+    tc_z = ipk.modeler.get_object_from_name(top_components[0]).bottom_face_z.center[2]
+    bc_z = ipk.modeler.get_object_from_name(bottom_components[0]).top_face_z.center[2]
+
+    pcb_layers = get_pcb_layers(ipk)[1]
+    top_layer_z_bound = ipk.modeler.get_object_from_name(pcb_layers[0]).top_face_z.center[2]
+    bottom_layer_z_bound = ipk.modeler.get_object_from_name(pcb_layers[-1]).bottom_face_z.center[2]
+
+    move_top = tc_z - top_layer_z_bound
+    if move_top > 0:
+        ipk.modeler.move(objid=top_components, vector=[0, 0, -move_top])
+    else:
+        ipk.modeler.move(objid=top_components, vector=[0, 0, move_top])
+
+    move_bottom = bc_z - bottom_layer_z_bound
+    if move_bottom < 0:
+        ipk.modeler.move(objid=bottom_components, vector=[0, 0, -move_bottom])
+    else:
+        ipk.modeler.move(objid=bottom_components, vector=[0, 0, move_bottom])
+
+    # Create dictionary of points at board side of all components
+    points_dict = {}
+    for i in range(len(rows)):
+        if rows[i][3] != 'NOREFDES':
+            block_name = re.sub(r"\W", "_", rows[i][3])
+            block_handle = ipk.modeler.get_object_from_name(block_name)
+            point_name = 'point_' + block_name
+            if job['all_points']:
+                block_board_side = board_side_face(ipk, block_handle, pcb_layers)
+                mon_point = ipk.modeler.primitives.get_face_center(block_board_side.id)
+                points_dict[point_name] = [float(c) for c in mon_point]
+    state['points_dict'] = points_dict
+    return ipk
+
+
+# Function to run the filtering stage
+def filtering_stage(desktop, ipk, job, bc_df, state):
+    # Delete filtered objects or make them non-model
+    rows = bc_rows(bc_df)[1]
+    for i in range(len(rows)):
+        if rows[i][0] == 'NO':
+            if rows[i][3] != 'NOREFDES':
+                block_name = re.sub(r"\W", "_", rows[i][3])
+                block_handle = ipk.modeler.get_object_from_name(block_name)
+                if job['delete_filtered']:
+                    ipk.modeler.delete(block_handle.name)
+                else:
+                    block_handle.model = False
+    return ipk
+
+
+# Function to get the thermal conductivity of a material
+def material_conductivity(ipk, material_name, library, cache):
+    """ Conductivity [W/m-C] from the materials CSV file or the project, the in-plane value of anisotropic
+        materials; None if it is not a number
+    """
+    key = material_name.lower()
+    if key not in cache:
+        if library is not None and key in library.index:
+            value = library.loc[key, 'thermal_conductivity']
+        else:
+            material = ipk.materials.checkifmaterialexists(material_name)
+            value = material.thermal_conductivity.value if material else None
+            if isinstance(value, (list, tuple)):
+                value = value[0]
+        try:
+            cache[key] = float(value)
+        except (TypeError, ValueError):
+            cache[key] = None
+    return cache[key]
+
+
+# Function to run the lumping stage
+def lumping_stage(desktop, ipk, job, bc_df, state):
+    """ Replace clusters of small unpowered components by one block each, see utils.lumping
+        The merged components get no boundary conditions and no monitor points later on.
+    """
+    state['lumped'] = []
+    settings = job.get('lumping')
+    if not settings:
+        return ipk
+    bc_df = bc_df[(bc_df['Include'] == 'YES') & (bc_df['Instance_Name'] != 'NOREFDES')]
+    block_names = [name_cleanup(i) for i in bc_df['Instance_Name']]
+    scale = UNIT_MM.get(ipk.modeler.model_units, 1.0)
+    boxes = np.array([ipk.modeler.get_object_from_name(i).bounding_box for i in block_names], dtype=float) * scale
+    sides = bc_df['Placement'].to_numpy()
+    candidates = lumping_candidates(bc_df, boxes, settings)
+
+    # Components take the material of the BC table, or keep the one of the IDF import
+    library = load_material_library(job['materials_file']) if job['materials_file'] else None
+    cache = {}
+    conductivities = np.full(len(block_names), np.nan)
+    for i in np.flatnonzero(candidates):
+        material_name = bc_df['Material'].iloc[i] or ipk.modeler.get_object_from_name(block_names[i]).material_name
+        conductivity = material_conductivity(ipk, material_name, library, cache)
+        if conductivity is not None:
+            conductivities[i] = conductivity
+    candidates &= ~np.isnan(conductivities)
+
+    positions = np.flatnonzero(candidates)
+    clusters = [positions[i] for i in cluster_components(boxes[candidates], sides[candidates], settings['gap'],
+                                                         settings['max_extent'])]
+    clusters, dropped = free_clusters(clusters, boxes, sides)
+    for n, cluster in enumerate(clusters):
+        block = lumped_block(boxes[cluster], conductivities[cluster], sides[cluster[0]])
+        conductivity = f'''{block['conductivity']:.3g}'''
+        material_name = 'lumped_' + name_cleanup(conductivity)
+        if not ipk.materials.checkifmaterialexists(material_name):
+            ipk.materials.add_material(material_name, props={'thermal_conductivity': conductivity})
+        ipk.modeler.create_box([i / scale for i in block['origin']], [i / scale for i in block['size']],
+                               f'lumped_{n + 1}', material_name)
+        members = [block_names[i] for i in cluster]
+        ipk.modeler.delete(members)
+        state['lumped'].extend(members)
+        for member in members:
+            state['points_dict'].pop('point_' + member, None)
+    state['lumping'] = {'candidates': int(candidates.sum()), 'lumped': len(state['lumped']),
+                        'blocks': len(clusters), 'dropped_clusters': dropped}
+    return ipk
+
+
+# Function to run the priorities stage
+def priorities_stage(desktop, ipk, job, bc_df, state):
+    # Priority assignments based on volume of objects
+    obj_dict = {}
+    for i in ipk.modeler.solid_bodies:
+        if i != 'Region':
+            obj_dict[i] = ipk.modeler.get_object_from_name(i).volume
+    vol_sorted_objs = sorted(obj_dict.items(), key=lambda x: x[1], reverse=True)
+    vol_sorted_obj_list = []
+    for i in vol_sorted_objs:
+        vol_sorted_obj_list.append(i[0])
+
+    priority_num = 2
+    args = ["NAME:UpdatePriorityListData"]
+    for i in vol_sorted_obj_list:
+        if i != 'Region':
+            prio = [
+                "NAME:PriorityListParameters",
+                "EntityType:=", "Object",
+                "EntityList:=", i,
+                "PriorityNumber:=", priority_num,
+                "PriorityListType:=", "3D"
+            ]
+            args.append(prio)
+            priority_num = priority_num + 1
+    ipk.modeler.oeditor.UpdatePriorityList(args)
+
+    # Clear Desktop messages
+    desktop.clear_messages()
+
+    # Save project
+    ipk.save_project()
+
+    # Make board that comes with the IDF file as non-model object
+    board_handle = ipk.modeler.get_object_from_name('IDF_BoardOutline')
+    board_handle.model = False
+
+    # Clear Desktop messages
+    desktop.clear_messages()
+    return ipk
+
+
+# Function to get the PCB 3D component and its layers, sorted from top to bottom, or the tiles of a tiled board
+def get_pcb_layers(ipk):
+    return board_objects(ipk)
+
+
+# Function to run the mesh setup stage
+def mesh_setup_stage(desktop, ipk, job, bc_df, state):
+    """ Mesh region around the board, mesh levels of components and PCB layers and global mesh settings """
+    mesh_fidelity = job['mesh_fidelity']
+    pcb_layers = get_pcb_layers(ipk)[1]
+
+    # List all model objects in design
+    model_objects = ipk.modeler.model_objects
+    model_objects.remove('Region')
+
+    # List of primitive objects
+    primitive_objects = [x for x in model_objects if x not in pcb_layers]
+
+    # Set mesh dimensions
+    dim_x = []
+    dim_y = []
+    dim_z = []
+    for i in primitive_objects:
+        obj_handle = ipk.modeler.get_object_from_name(i)
+        dim_x.append(obj_handle.bounding_dimension[0])
+        dim_y.append(obj_handle.bounding_dimension[1])
+    for i in pcb_layers:
+        obj_handle = ipk.modeler.get_object_from_name(i)
+        dim_z.append(obj_handle.bounding_dimension[2])
+
+    # Extent of the board, over all tiles of a tiled board
+    pcb_boxes = np.array([ipk.modeler.get_object_from_name(i).bounding_box for i in pcb_layers], dtype=float)
+    pcb_min_x, pcb_min_y = pcb_boxes[:, :2].min(axis=0)
+    pcb_dim_x, pcb_dim_y = pcb_boxes[:, 3:5].max(axis=0) - pcb_boxes[:, :2].min(axis=0)
+
+    tx = np.histogram(dim_x, bins=10)
+    ty = np.histogram(dim_y, bins=10)
+    max_val_index_x = np.argmax(tx[0])
+    max_val_index_y = np.argmax(ty[0])
+
+    if mesh_fidelity == 'Coarse':
+        mesh_mult_xy = 0.5
+        mesh_mult_z = 8
+    elif mesh_fidelity == 'Medium':
+        mesh_mult_xy = 0.25
+        mesh_mult_z = 4
+    else:
+        mesh_mult_xy = 0.1
+        mesh_mult_z = 2
+
+    # Max element size in x, y, z direction based on mesh fidelity
+    mesh_x = mesh_mult_xy * (tx[1][max_val_index_x] + tx[1][max_val_index_x + 1])
+    mesh_y = mesh_mult_xy * (ty[1][max_val_index_y] + ty[1][max_val_index_y + 1])
+    mesh_z = mesh_mult_z * min(dim_z)
+
+    # Find extent of all objects in z-direction
+    minzs = []
+    maxzs = []
+    for i in primitive_objects:
+        obj_handle = ipk.modeler.get_object_from_name(i)
+        minzs.append(obj_handle.bounding_box[2])
+        maxzs.append(obj_handle.bounding_box[5])
+    z_extent_min = min(minzs)
+    z_extent_max = max(maxzs)
+    z_extent = z_extent_max - z_extent_min
+
+    # slack values
+    slack_x = 0.1 * pcb_dim_x
+    slack_y = 0.1 * pcb_dim_y
+    slack_z = 0.25 * z_extent
+
+    # Add mesh region
+    meshregion_box = ipk.modeler.create_box([pcb_min_x, pcb_min_y, z_extent_min], [pcb_dim_x, pcb_dim_y, z_extent],
+                                            'meshregion_all_objs')
+    add_slack(ipk, 'meshregion_all_objs', slack_x, slack_x, slack_y, slack_y, slack_z, slack_z)
+    meshregion_box.model = False
+    mesh_box = 'meshregion_all_objs'
+    mesh_region = ipk.mesh.assign_mesh_region([mesh_box], 5, False, 'meshregion_all_objs')
+
+    # Set user defined settings in mesh region
+    mesh_region.UserSpecifiedSettings = True
+    mesh_region.MaxElementSizeX = str(mesh_x) + ipk.modeler.model_units
+    mesh_region.MaxElementSizeY = str(mesh_y) + ipk.modeler.model_units
+    mesh_region.MaxElementSizeZ = str(mesh_z) + ipk.modeler.model_units
+    mesh_region.MinElementsInGap = 2
+    mesh_region.MinElementsOnEdge = 2
+    mesh_region.MaxSizeRatio = 2
+    mesh_region.NoOGrids = True
+    mesh_region.StairStepMeshing = False
+    mesh_region.MinGapX = '0.0001mm'
+    mesh_region.MinGapY = '0.0001mm'
+    mesh_region.MinGapZ = '0.0001mm'
+    mesh_region.EnableMLM = True
+    mesh_region.MaxLevels = 2
+    mesh_region.BufferLayers = 1
+    mesh_region.EnforeMLMType = "2D"
+    mesh_region.Enable2DCutCell = True
+    mesh_region.UniformMeshParametersType = "Average"
+    mesh_region.DMLMType = "2DMLM_XY"
+    mesh_region.Objects = [mesh_box]
+    mesh_region.update()
+
+    # Add mesh operation to primitives, mesh level = 2
+    mesh_levels_primitives = {}
+    for i in primitive_objects:
+        mesh_levels_primitives[i] = 2
+    ipk.mesh.assign_mesh_level(mesh_levels_primitives, "mesh_levels_primitives")
+
+    # Add mesh operation to primitives, mesh level = 1
+    mesh_levels_3dcomps = {}
+    for i in pcb_layers:
+        mesh_levels_3dcomps[i] = 1
+    ipk.mesh.assign_mesh_level(mesh_levels_3dcomps, "mesh_levels_pcb_layers")
+
+    # Global mesh dimensions
+    global_max_x = 4 * mesh_x
+    global_max_y = 4 * mesh_y
+    global_max_z = 4 * mesh_z
+
+    # Apply global mesh settings.
+    ipk.mesh.global_mesh_region.UserSpecifiedSettings = True
+    ipk.mesh.global_mesh_region.MaxElementSizeX = str(global_max_x) + ipk.modeler.model_units
+    ipk.mesh.global_mesh_region.MaxElementSizeY = str(global_max_y) + ipk.modeler.model_units
+    ipk.mesh.global_mesh_region.MaxElementSizeZ = str(global_max_z) + ipk.modeler.model_units
+    ipk.mesh.global_mesh_region.MinElementsInGap = 3
+    ipk.mesh.global_mesh_region.MinElementsOnEdge = 2
+    ipk.mesh.global_mesh_region.MaxSizeRatio = 2
+    ipk.mesh.global_mesh_region.NoOGrids = True
+    ipk.mesh.global_mesh_region.StairStepMeshing = False
+    ipk.mesh.global_mesh_region.MinGapX = '0.0001mm'
+    ipk.mesh.global_mesh_region.MinGapY = '0.0001mm'
+    ipk.mesh.global_mesh_region.MinGapZ = '0.0001mm'
+    ipk.mesh.global_mesh_region.EnableMLM = False
+    ipk.mesh.global_mesh_region.UniformMeshParametersType = "None"
+    ipk.mesh.global_mesh_region.OptimizePCBMesh = True
+    ipk.mesh.global_mesh_region.update()
+    return ipk
+
+
+# Function to run the boundary conditions stage
+def boundary_conditions_stage(desktop, ipk, job, bc_df, state):
+    # Read material properties file (if provided)
+    if job['materials_file']:
+        add_library_materials(ipk, job['materials_file'])
+
+    # Assign Boundary Conditions
+    pcb_name, pcb_layers = get_pcb_layers(ipk)
+    bc_df = bc_df[(bc_df['Include'] == 'YES') & (bc_df['Instance_Name'] != 'NOREFDES')]
+    lumped = set(state.get('lumped', ()))
+    for ind, row in bc_df.iterrows():
+        if name_cleanup(row['Instance_Name']) in lumped:
+            continue
+        assign_component_bc(ipk, name_cleanup(row['Instance_Name']), row['BC_Type'], row['Power [W]'],
+                            row['R_jb [C/W]'], row['R_jc [C/W]'], row['Monitor_Point'], row['Material'], pcb_name,
+                            pcb_layers)
+    return ipk
+
+
+# Function to run the solution setup stage
+def solution_setup_stage(desktop, ipk, job, bc_df, state):
+    """ Forced or natural convection setup with its openings, and monitor points at all component bases """
+    conv_type = job['conv_type']
+    air_temp = job['air_temp']
+    vel = job['vel']
+    vel_dir = job['vel_dir']
+    points_dict = state['points_dict']
+
+    # Insert forced convection setup
+    analysis_setup = 'Icepak_Analysis'
+    if conv_type == 'Forced':
+        analysis_setup = 'forced_conv_setup'
+        forced_convection_setup(ipk, analysis_setup, 'Turbulent')
+
+        # Assign velocity inlet and pressure outlet boundary conditions
+        region = ipk.modeler.primitives["Region"]
+        speed = str(vel) + 'm_per_sec'
+        inlet_temp = str(air_temp) + 'cel'
+        if vel_dir == '+X':
+            ipk.modeler.edit_region_dimensions([100, 100, 50, 50, 50, 50])
+            assign_opening_boundary(ipk, 'inlet', region.bottom_face_x.id, flow_type='velocity', xvel=speed,
+                                    temperature=inlet_temp)
+            assign_opening_boundary(ipk, 'outlet', region.top_face_x.id, flow_type='pressure')
+        elif vel_dir == '-X':
+            ipk.modeler.edit_region_dimensions([100, 100, 50, 50, 50, 50])
+            assign_opening_boundary(ipk, 'inlet', region.top_face_x.id, flow_type='velocity', xvel=speed,
+                                    temperature=inlet_temp)
+            assign_opening_boundary(ipk, 'outlet', region.bottom_face_x.id, flow_type='pressure')
+        elif vel_dir == '+Y':
+            ipk.modeler.edit_region_dimensions([50, 50, 100, 100, 50, 50])
+            assign_opening_boundary(ipk, 'inlet', region.bottom_face_y.id, flow_type='velocity', yvel=speed,
+                                    temperature=inlet_temp)
+            assign_opening_boundary(ipk, 'outlet', region.top_face_y.id, flow_type='pressure')
+        elif vel_dir == '-Y':
+            ipk.modeler.edit_region_dimensions([50, 50, 100, 100, 50, 50])
+            assign_opening_boundary(ipk, 'inlet', region.top_face_y.id, flow_type='velocity', yvel=speed,
+                                    temperature=inlet_temp)
+            assign_opening_boundary(ipk, 'outlet', region.bottom_face_y.id, flow_type='pressure')
+        elif vel_dir == '+Z':
+            ipk.modeler.edit_region_dimensions([50, 50, 50, 50, 100, 100])
+            assign_opening_boundary(ipk, 'inlet', region.bottom_face_z.id, flow_type='velocity', zvel=speed,
+                                    temperature=inlet_temp)
+            assign_opening_boundary(ipk, 'outlet', region.top_face_z.id, flow_type='pressure')
+        else:
+            ipk.modeler.edit_region_dimensions([50, 50, 50, 50, 100, 100])
+            assign_opening_boundary(ipk, 'inlet', region.top_face_z.id, flow_type='velocity', zvel=speed,
+                                    temperature=inlet_temp)
+            assign_opening_boundary(ipk, 'outlet', region.bottom_face_z.id, flow_type='pressure')
+
+    if conv_type == 'Natural':
+        analysis_setup = 'natural_conv_setup'
+        natural_convection_setup(ipk, analysis_setup, gravity_dir=job['gravity_direction'], flow_regime='Turbulent',
+                                 ambient_temp=air_temp)
+        for i in ipk.modeler.get_object_faces('Region'):
+            outlet_name = 'outlet_' + str(i)
+            assign_opening_boundary(ipk, outlet_name, i, flow_type='pressure')
+
+    # Create monitor points at all object bases
+    list_mon_pts = ipk.odesign.GetChildObject("Monitor").GetChildNames()
+    for pt in points_dict:
+        if pt not in list_mon_pts:
+            ipk.assign_point_monitor(points_dict[pt], monitor_type='Temperature', monitor_name=pt)
+
+    ipk.modeler.refresh_all_ids()
+    ipk.modeler.refresh()
+    state['analysis_setup'] = analysis_setup
+    return ipk
+
+
+# Functions of the build stages, in the order of BUILD_STAGES
+STAGE_FUNCTIONS = {'ECAD import': ecad_import_stage, 'PCB creation': pcb_creation_stage,
+                   'IDF import': idf_import_stage, 'Gap fix': gap_fix_stage, 'Filtering': filtering_stage,
+                   'Lumping': lumping_stage, 'Priorities': priorities_stage, 'Mesh setup': mesh_setup_stage,
+                   'Boundary conditions': boundary_conditions_stage, 'Solution setup': solution_setup_stage}
+
+
+# Function to build the Icepak project of a job
+def build_project(desktop, job, bc_df, report, checkpoints=None):
+    """ Import ECAD and IDF, fix gaps, filter components, assign priorities, mesh settings, boundary
+        conditions and solution setup
+        With checkpoints, the project is saved and snapshotted after every stage, and a build whose earlier
+        attempt failed, or whose later inputs changed, resumes after the last stage that is still valid.
+        Parameters
+        ----------
+        desktop: pyaedt.Desktop
+            Running AEDT session
+        job: dict
+            Simulation inputs
+        bc_df: pandas.DataFrame
+            Typed boundary conditions table of the job, see load_bc_table
+        report: ProgressReporter
+            Receives the progress of each stage
+        checkpoints: StageCheckpoints, optional
+            Completed stages of earlier attempts, updated as stages complete
+        Returns
+        -------
+        tuple
+            Icepak application and name of analysis setup
+    """
+    project_path = os.path.join(os.getcwd(), job['project_name'])
+    stages = [i[0] for i in BUILD_STAGES]
+    resume = checkpoints.resume_point() if checkpoints else None
+    app = None
+    state = {}
+    if resume:
+        state = checkpoints.state(resume)
+        cleanup_files(job['project_name'])
+        restored_project = checkpoints.restore(resume, os.getcwd())
+        report.stage(resume, dict(BUILD_STAGES)[resume], 'Resumed from the checkpoint of an earlier attempt')
+        if resume == 'ECAD import':
+            app = pyaedt.Hfss3dLayout(projectname=restored_project)
+        else:
+            app = pyaedt.Icepak(projectname=restored_project)
+            if stages.index(resume) >= stages.index('IDF import'):
+                app.autosave_disable()
+
+    for stage, percent in BUILD_STAGES[stages.index(resume) + 1 if resume else 0:]:
+        report.stage(stage, percent)
+        app = STAGE_FUNCTIONS[stage](desktop, app, job, bc_df, state)
+        if checkpoints:
+            app.save_project()
+            checkpoints.save(stage, app.project_file, state)
+    ipk = app
+    analysis_setup = state['analysis_setup']
+    if state.get('board'):
+        board = state['board']
+        report.update_status(board=board)
+        report.stage('Solution setup', 70, f'''Tiled board of {board['tiles']} tiles in {board['blocks']} blocks '''
+                                           f'''with {board['materials']} materials''')
+    if state.get('lumping'):
+        lumping = state['lumping']
+        report.update_status(lumping=lumping)
+        report.stage('Solution setup', 70, f'''{lumping['lumped']} of {lumping['candidates']} small components '''
+                                           f'''lumped into {lumping['blocks']} blocks''')
+
+    # Store BC table and build inputs with the project for incremental updates
+    ipk.save_project()
+    fields, rows = bc_rows(bc_df)
+    build_inputs = get_build_inputs(job)
+    build_inputs['analysis_setup'] = analysis_setup
+    build_inputs['lumped'] = state.get('lumped', [])
+    save_build_record(project_path, pd.DataFrame(rows, columns=fields), build_inputs)
+    return ipk, analysis_setup
+
+
+# Function to check whether the project of a job can be updated incrementally
+def plan_incremental_update(job, bc_df):
+    """ Returns
+        -------
+        tuple
+            BC table diff, new BC table and stored build inputs, or None and the reasons for a full rebuild
+    """
+    project_path = os.path.join(os.getcwd(), job['project_name'])
+    old_bc_df, old_build_inputs = load_build_record(project_path)
+    if old_bc_df is None:
+        return None, ['No existing project with stored boundary conditions found']
+    new_bc_df = bc_strings(bc_df)
+    bc_diff = diff_bc_tables(old_bc_df, new_bc_df)
+    blockers = incremental_update_blockers(bc_diff, old_build_inputs, get_build_inputs(job))
+    if blockers:
+        return None, blockers
+    return (bc_diff, new_bc_df, old_build_inputs), []
+
+
+# Function to update an existing project from the diff of its BC table
+def update_project(job, bc_df, plan, report):
+    """ Update only the components whose rows changed in the BC table
+        Returns
+        -------
+        tuple
+            Icepak application, name of analysis setup and whether the mesh must be regenerated
+    """
+    bc_diff, new_bc_df, old_build_inputs = plan
+    project_path = os.path.join(os.getcwd(), job['project_name'])
+    ipk = pyaedt.Icepak(project_path)
+    ipk.autosave_disable()
+    analysis_setup = old_build_inputs['analysis_setup']
+
+    if job['materials_file']:
+        add_library_materials(ipk, job['materials_file'])
+
+    report.stage('Boundary conditions', 60, str(len(bc_diff['changed'])) + ' component(s) changed')
+    pcb_name, pcb_layers = get_pcb_layers(ipk)
+    new_bc_rows = bc_df[bc_df['Instance_Name'] != 'NOREFDES'].copy()
+    new_bc_rows.index = [name_cleanup(i) for i in new_bc_rows['Instance_Name']]
+
+    # Only components with changed rows are touched
+    remesh = False
+    for block_name in bc_diff['changed']:
+        row = new_bc_rows.loc[block_name]
+        if row['Include'] != 'YES' and block_name not in bc_diff['excluded']:
+            continue
+        remove_component_bc(ipk, block_name, keep_monitor=(row['Monitor_Point'] == 'YES' or job['all_points']))
+        if block_name in bc_diff['excluded']:
+            remesh = True
+            if job['delete_filtered']:
+                ipk.modeler.delete(block_name)
+            else:
+                ipk.modeler.get_object_from_name(block_name).model = False
+            continue
+        if block_name in bc_diff['included']:
+            remesh = True
+            ipk.modeler.get_object_from_name(block_name).model = True
+        # A hollow block is not meshed inside, and a material change changes the mesh of the block
+        if any(i in bc_diff['changed'][block_name] for i in ('BC_Type', 'Material')):
+            remesh = True
+        assign_component_bc(ipk, block_name, row['BC_Type'], row['Power [W]'], row['R_jb [C/W]'], row['R_jc [C/W]'],
+                            row['Monitor_Point'], row['Material'], pcb_name, pcb_layers)
+    ipk.save_project()
+    build_inputs = get_build_inputs(job)
+    build_inputs['analysis_setup'] = analysis_setup
+    # The lumped components are unchanged, and the next update must still know them
+    build_inputs['lumped'] = old_build_inputs.get('lumped', [])
+    save_build_record(project_path, new_bc_df, build_inputs)
+    return ipk, analysis_setup, remesh
+
+
+# Function to mesh and solve a project while streaming solver residuals
+def solve_project(ipk, analysis_setup, num_cores, report, remesh=True, stop_rule=None):
+    """ Mesh and solve the project while streaming residuals and monitor point temperatures
+        Parameters
+        ----------
+        ipk: Icepak
+            Icepak application
+        analysis_setup: str
+            Name of the setup to solve
+        num_cores: int
+            Number of cores
+        report: ProgressReporter
+            Receives stage, residual and monitor updates
+        remesh: bool, optional
+            default = True
+            Generate the mesh before solving
+        stop_rule: dict, optional
+            ConvergenceRule arguments, e.g. {'delta_t': 0.05, 'window': 30}. The solve is stopped cleanly once
+            every monitor point is stable.
+    """
+    if remesh:
+        report.stage('Mesh generation', 75)
+        mesh_start = time.time()
+        ipk.mesh.generate_mesh(analysis_setup)
+        report.update_status(mesh_seconds=round(time.time() - mesh_start, 1))
+        mesh_cells = read_mesh_cells(ipk.export_mesh_stats(analysis_setup))
+        if mesh_cells:
+            report.update_status(mesh_cells=mesh_cells)
+    report.stage('Solve', 80)
+    max_iterations = int(ipk.get_setup(analysis_setup).props['Convergence Criteria - Max Iterations'])
+    rule = ConvergenceRule(**stop_rule) if stop_rule else None
+    last_iteration = [0]
+    stopped_early = []
+
+    def on_residuals(iteration, values):
+        last_iteration[0] = max(last_iteration[0], iteration)
+        report.residuals(iteration, values)
+
+    def on_monitors(iteration, values):
+        report.monitors(iteration, values)
+        if rule is None or stopped_early:
+            return
+        rule.add(iteration, values)
+        if rule.converged():
+            stopped_early.append(iteration)
+            report.stage('Solve', 80, 'Monitor temperatures changed less than %g cel over %d iterations; '
+                                      'stopping at iteration %d' % (rule.delta_t, rule.window, iteration))
+            # The main thread is blocked in the solve, so the stop is requested from this watcher thread. An error
+            # must not end the watcher silently: the solve then runs on to its iteration limit.
+            try:
+                ipk.stop_simulations(clean_stop=True)
+            except Exception as e:
+                stopped_early[0] = None
+                report.warning('Early stop at iteration %d failed (%s); the solve continues to its iteration '
+                               'limit.' % (iteration, e))
+
+    results_folder = os.path.splitext(ipk.project_file)[0] + '.aedtresults'
+    watcher = ResidualWatcher(results_folder, on_residuals, monitor_callback=on_monitors)
+    watcher.start()
+    solve_start = time.time()
+    try:
+        ipk.analyze_setup(analysis_setup, num_cores, num_cores)
+    finally:
+        watcher.stop()
+    report.update_status(solve_seconds=round(time.time() - solve_start, 1))
+    # A failed stop request is kept as None, so the rule is not checked again
+    stopped_early = [i for i in stopped_early if i is not None]
+    iterations = max(last_iteration[0], stopped_early[0] if stopped_early else 0)
+    report.update_status(iterations=iterations, max_iterations=max_iterations, stopped_early=bool(stopped_early),
+                         iterations_saved=max(max_iterations - iterations, 0) if stopped_early else 0)
+
+
+# Function to change the power of heat source components in a built project
+def set_source_powers(ipk, bc_rows, powers, current, all_points):
+    """ Assign the boundary conditions again of the components whose power differs from the current one
+        Parameters
+        ----------
+        ipk: Icepak
+            Icepak application
+        bc_rows: pandas.DataFrame
+            Typed boundary conditions table indexed by block name
+        powers: dict
+            New power of each block [W]
+        current: dict
+            Power of each block in the project [W], updated in place
+        all_points: bool
+            Monitor points were created for all components
+    """
+    pcb_name, pcb_layers = get_pcb_layers(ipk)
+    for block_name, power in powers.items():
+        if current.get(block_name) == power:
+            continue
+        row = bc_rows.loc[block_name]
+        remove_component_bc(ipk, block_name, keep_monitor=(row['Monitor_Point'] == 'YES' or all_points),
+                            reset_body=False)
+        assign_component_bc(ipk, block_name, row['BC_Type'], power, row['R_jb [C/W]'], row['R_jc [C/W]'],
+                            row['Monitor_Point'], row['Material'], pcb_name, pcb_layers)
+        current[block_name] = power
+
+
+# Function to solve the unit power cases of an influence matrix
+def run_influence(ipk, analysis_setup, job, bc_df, report, remesh=True):
+    """ Solve one case per heat source group with 1 W in the group, then the nominal powers, on the same mesh
+        The monitor temperatures of the group cases make the influence matrix, and the nominal case checks its
+        prediction against a full solve. The project is left with its nominal powers and solution.
+        Parameters
+        ----------
+        ipk: Icepak
+            Icepak application with the project built from the job
+        analysis_setup: str
+            Name of the setup to solve
+        job: dict
+            Simulation inputs, with the group column under 'influence'
+        bc_df: pandas.DataFrame
+            Typed boundary conditions table of the job
+        report: ProgressReporter
+            Receives the progress of every case
+        remesh: bool, optional
+            default = True
+            Generate the mesh before the first case
+    """
+    group_column = job['influence']['group_column']
+    members = heat_source_groups(bc_df, group_column)
+    if members.empty:
+        raise RuntimeError('The boundary conditions table has no included component with power')
+    bc_rows = bc_df[bc_df['Instance_Name'] != 'NOREFDES'].copy()
+    bc_rows.index = [name_cleanup(i) for i in bc_rows['Instance_Name']]
+    # The project as built has the nominal powers
+    current = dict(zip(members['block'], members['power']))
+    cases = influence_cases(members)
+    responses = {}
+    for i, (case, powers) in enumerate(cases):
+        report.stage('Influence cases', 80, f'{case} ({i + 1} of {len(cases)})')
+        set_source_powers(ipk, bc_rows, powers, current, job['all_points'])
+        recorder = MonitorRecorder(report)
+        solve_project(ipk, analysis_setup, job['num_cores'], recorder, remesh=remesh and i == 0,
+                      stop_rule=job.get('stop_rule'))
+        if not recorder.values:
+            raise RuntimeError(f'No monitor point temperatures were reported for case {case}')
+        responses[case] = recorder.values
+    ipk.save_project()
+
+    model = assemble_influence(members, responses, job['air_temp'])
+    predicted = evaluate(model, pd.DataFrame([model['nominal']], columns=model['groups'], index=[NOMINAL_CASE]))
+    max_error, mean_error = accuracy_check(predicted[NOMINAL_CASE], responses[NOMINAL_CASE])[1:]
+    meta = influence_meta(job, group_column, max_error, mean_error)
+    save_influence(influence_file(os.getcwd(), job['project_name']), model, meta)
+    for message in validity_messages(meta):
+        report.warning(message)
+    report.update_status(influence_groups=len(model['groups']), influence_monitors=len(model['monitors']),
+                         influence_max_error=max_error)
+
+
+# Function to initialize a solve from the closest solved project
+def warm_start_setup(ipk, analysis_setup, source, report):
+    """ Use the solution of a previously solved project as the initial field of the analysis setup
+        Parameters
+        ----------
+        ipk: Icepak
+            Icepak application
+        analysis_setup: str
+            Name of the setup to initialize
+        source: dict
+            Solved project returned by find_warm_start
+        report: ProgressReporter
+            Receives a warning when the solution cannot be linked
+    """
+    setup = ipk.get_setup(analysis_setup)
+    linked = setup.start_continue_from_previous_setup(source['design'], source['setup'] + ' : SteadyState',
+                                                      project=source['project'])
+    if linked:
+        report.stage('Solution setup', 72, 'Initialized from ' + os.path.basename(source['project']))
+    else:
+        report.warning('Could not initialize from ' + source['project'] + '. The default initialization is used.')
+    return linked
+
+
+# Function to remove the link of the analysis setup to the solution of another project
+def clear_warm_start(ipk, analysis_setup):
+    """ A link left from an earlier warm start would initialize this solve from a stale, or deleted, project """
+    setup = ipk.get_setup(analysis_setup)
+    if 'PrevSoln' in setup.props:
+        del setup.props['PrevSoln']
+        return setup.update()
+    return True
+
+
+# Function to run a simulation job
+def run_simulation(job, report):
+    """ Set up, and optionally solve, the Icepak project of a simulation job
+        Parameters
+        ----------
+        job: dict
+            Simulation inputs collected on the Simulate page
+        report: ProgressReporter
+            Receives stage, percentage and residual updates
+    """
+    os.chdir(job['workdir'])
+    project_name = job['project_name']
+    project_path = os.path.join(os.getcwd(), project_name)
+
+    # Report every problem of the BC table before AEDT is started; the stages use the table read here
+    report.stage('BC table validation', 1)
+    bc_df, bc_errors, bc_warnings = load_bc_table(job['bc_file'], job['materials_file'], job['aedt_release'])
+    for warning in bc_warnings:
+        report.warning(warning)
+    if bc_errors:
+        raise RuntimeError('The boundary conditions table has errors:\n' + '\n'.join(bc_errors))
+    bc_text_df = bc_strings(bc_df)
+
+    plan = None
+    if job['incremental']:
+        plan, blockers = plan_incremental_update(job, bc_df)
+        if blockers:
+            report.warning('The project will be rebuilt. ' + '; '.join(blockers))
+
+    report.stage('Start AEDT', 2)
+    checkpoints = None
+    if plan:
+        if os.path.exists(project_path + '.lock'):
+            os.remove(project_path + '.lock')
+        desktop = pyaedt.Desktop(job['aedt_release'], non_graphical=job['non_graphical'])
+        report.aedt_started(desktop.aedt_process_id)
+        ipk, analysis_setup, remesh = update_project(job, bc_df, plan, report)
+    else:
+        # A rebuild resumes after the last completed stage whose inputs did not change
+        checkpoints = StageCheckpoints(os.getcwd(), project_name, stage_keys(job, bc_text_df))
+        if not job.get('resume', True):
+            checkpoints.clear()
+        if not checkpoints.resume_point():
+            cleanup_files(project_name)
+        remove_build_record(project_path)
+        desktop = pyaedt.Desktop(job['aedt_release'], non_graphical=job['non_graphical'])
+        report.aedt_started(desktop.aedt_process_id)
+        ipk, analysis_setup = build_project(desktop, job, bc_df, report, checkpoints)
+        remesh = True
+
+    if job['analyze']:
+        geometry = geometry_hash(job, bc_text_df)
+        conditions = solve_conditions(job, bc_text_df)
+        source = find_warm_start(os.getcwd(), geometry, conditions, exclude_project=project_path) \
+            if job.get('warm_start') else None
+        if job.get('warm_start') and not source:
+            report.warning('No solved project with the same geometry was found. The default initialization '
+                           'is used.')
+        if not (source and warm_start_setup(ipk, analysis_setup, source, report)):
+            clear_warm_start(ipk, analysis_setup)
+        if job.get('influence'):
+            run_influence(ipk, analysis_setup, job, bc_df, report, remesh=remesh)
+        else:
+            solve_project(ipk, analysis_setup, job['num_cores'], report, remesh=remesh,
+                          stop_rule=job.get('stop_rule'))
+        register_solution(os.getcwd(), project_path, ipk.design_name, analysis_setup, geometry, conditions)
+        if checkpoints:
+            checkpoints.complete(SOLVE_STAGE)
+        quit_aedt(ipk, desktop)
+    else:
+        # Leave AEDT open for inspection of the set up project
+        desktop.release_desktop(close_projects=False, close_on_exit=False)
+    report.stage('Done', 100, 'Project saved to: ' + project_path)
@@ -0,0 +1,182 @@
+import os
+import ast
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+
+from utils.jobs import APP_ROOT
+
+# Benchmark results of earlier runs, one JSON record per line
+HISTORY_FILE = os.path.join(os.path.expanduser('~'), '.pcb_thermal_cache', 'startup_benchmark.jsonl')
+# Modules whose import is slow enough to show up in the time to first render of a page
+HEAVY_MODULES = ('pyaedt', 'pandas', 'numpy', 'PIL', 'st_aggrid', 'pyarrow', 'matplotlib', 'scipy')
+SERVER_TIMEOUT = 120
+HEALTH_ENDPOINTS = ('/_stcore/health', '/healthz')
+
+
+# Function to list the page scripts of the app
+def app_pages():
+    pages_dir = os.path.join(APP_ROOT, 'pages')
+    return [os.path.join(APP_ROOT, '00_Home.py')] + \
+        sorted(os.path.join(pages_dir, i) for i in os.listdir(pages_dir) if i.endswith('.py'))
+
+
+# Function to time the module level imports of a page script, called in a fresh process
+def measure_page(page):
+    """ Import streamlit, as the running server already has, then run the top-level import statements of a page
+        in order. Imports inside branches of the page are lazy and not counted; they cost time only when the user
+        gets to them.
+        Returns
+        -------
+        dict
+            Streamlit import time, import time of the page, slowest and failed statements and heavy modules
+            loaded [s]
+    """
+    sys.path.insert(0, APP_ROOT)
+    start = time.perf_counter()
+    try:
+        import streamlit  # noqa: F401
+        streamlit_time = time.perf_counter() - start
+    except ImportError:
+        streamlit_time = None
+
+    with open(page, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=page)
+    statements = []
+    namespace = {'__name__': '__page__', '__file__': page}
+    for node in tree.body:
+        if not isinstance(node, (ast.Import, ast.ImportFrom)):
+            continue
+        code = compile(ast.Module(body=[node], type_ignores=[]), page, 'exec')
+        start = time.perf_counter()
+        try:
+            exec(code, namespace)
+            error = None
+        except Exception as e:
+            # e.g. ctypes.windll outside Windows, or a dependency that is not installed
+            error = f'{type(e).__name__}: {e}'
+        statements.append({'line': node.lineno, 'statement': ast.unparse(node), 'time': time.perf_counter() - start,
+                           'error': error})
+    return {'streamlit': streamlit_time, 'imports': sum(i['time'] for i in statements),
+            'slowest': sorted(statements, key=lambda x: x['time'], reverse=True)[:3],
+            'errors': [i for i in statements if i['error']],
+            'heavy_modules': sorted(i for i in HEAVY_MODULES if i in sys.modules)}
+
+
+# Function to run measure_page in a fresh process
+def _measure_page_cold(page):
+    output = subprocess.run([sys.executable, '-m', 'utils.startup_benchmark', '--measure-page', page],
+                            cwd=APP_ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# Function to get a free local port
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+# Function to time the cold start of the app server
+def measure_server_start(timeout=SERVER_TIMEOUT):
+    """ Seconds from launching pcb_thermal_analyzer.py until the Streamlit server answers its health check,
+        None if it did not within the timeout
+    """
+    port = _free_port()
+    env = dict(os.environ, STREAMLIT_SERVER_HEADLESS='true', STREAMLIT_SERVER_PORT=str(port),
+               STREAMLIT_BROWSER_GATHER_USAGE_STATS='false')
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'pcb_thermal_analyzer.py'], cwd=APP_ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout and process.poll() is None:
+            for endpoint in HEALTH_ENDPOINTS:
+                try:
+                    with urllib.request.urlopen(f'http://localhost:{port}{endpoint}', timeout=1) as response:
+                        if response.status == 200:
+                            return time.perf_counter() - start
+                except OSError:
+                    pass
+            time.sleep(0.05)
+        return None
+    finally:
+        process.terminate()
+        process.wait()
+
+
+# Function to run the startup benchmark of all pages
+def run_benchmark(repeat=3, server=True):
+    """ Time to first render of every page: server start (once per app start) plus the cold import time of the
+        page, the median of several fresh processes
+        Parameters
+        ----------
+        repeat: int, optional
+            Fresh processes per page
+        server: bool, optional
+            Also time the cold start of the server
+        Returns
+        -------
+        dict
+            Benchmark record, as appended to HISTORY_FILE
+    """
+    record = {'time': time.time(), 'python': sys.version.split()[0], 'repeat': repeat, 'pages': {}}
+    if server:
+        server_times = [measure_server_start() for _ in range(repeat)]
+        server_times = [i for i in server_times if i is not None]
+        record['server_start'] = statistics.median(server_times) if server_times else None
+    for page in app_pages():
+        runs = [_measure_page_cold(page) for _ in range(repeat)]
+        record['pages'][os.path.basename(page)] = {
+            'imports': statistics.median(i['imports'] for i in runs),
+            'streamlit': runs[-1]['streamlit'],
+            'slowest': runs[-1]['slowest'], 'errors': runs[-1]['errors'], 'heavy_modules': runs[-1]['heavy_modules']}
+    os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+    with open(HISTORY_FILE, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    return record
+
+
+# Function to read the last benchmark record before the current one
+def previous_record():
+    try:
+        with open(HISTORY_FILE, 'r') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    return json.loads(lines[-2]) if len(lines) > 1 else None
+
+
+# Function to print a benchmark record next to the previous one
+def print_report(record, previous=None):
+    previous_pages = previous['pages'] if previous else {}
+    if record.get('server_start') is not None:
+        line = f'''Server start: {record['server_start']:.2f} s'''
+        if previous and previous.get('server_start') is not None:
+            line += f''' ({record['server_start'] - previous['server_start']:+.2f} s)'''
+        print(line)
+    print(f'''{'Page':45} {'Imports [s]':>12} {'Change [s]':>11}  Heavy modules''')
+    for page, result in record['pages'].items():
+        change = result['imports'] - previous_pages[page]['imports'] if page in previous_pages else None
+        print(f'''{page:45} {result['imports']:12.3f} {'' if change is None else f'{change:+.3f}':>11}  '''
+              f'''{', '.join(result['heavy_modules']) or '-'}''')
+        for statement in result['slowest']:
+            print(f'''{'':6}{statement['time']:.3f} s  line {statement['line']}: {statement['statement']}''')
+        for statement in result['errors']:
+            print(f'''{'':6}line {statement['line']}: {statement['statement']} -> {statement['error']}''')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time to first render of the PCB Thermal Analyzer pages')
+    parser.add_argument('--repeat', type=int, default=3, help='Fresh processes per page')
+    parser.add_argument('--no-server', action='store_true', help='Skip the cold start of the server')
+    parser.add_argument('--measure-page', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure_page:
+        print(json.dumps(measure_page(args.measure_page)))
+    else:
+        print_report(run_benchmark(args.repeat, not args.no_server), previous_record())
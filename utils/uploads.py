@@ -0,0 +1,258 @@
+import os
+import stat
+import time
+import uuid
+import shutil
+import hashlib
+import zipfile
+import argparse
+
+from utils.jobs import _read_json, _write_json
+from utils.ecad_cache import HASH_BLOCK_SIZE
+from utils.distributed import IDF_COMPANIONS
+
+# Uploaded inputs are stored once per content, shared by all working directories of the server user.
+# Browser uploads arrive through Streamlit, which holds the whole file in the memory of the server before
+# store_stream writes it. The resumable chunked upload (upload_file and the command line below) writes into the
+# store folder itself, so it needs file access to that folder, e.g. through a share of the server.
+UPLOAD_DIR = os.path.join(os.path.expanduser('~'), '.pcb_thermal_cache', 'uploads')
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# ECAD inputs that can be uploaded; EDB folders are uploaded as a zip archive of the *.aedb folder
+ECAD_UPLOAD_TYPES = {'.tgz': 'ODB++ File', '.brd': 'BRD File', '.zip': 'EDB Folder'}
+IDF_UPLOAD_EXTENSIONS = ('.emn', '.emp', '.bdf', '.ldf')
+
+
+# Function to hash the content of a local file
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _object_file(upload_dir, sha):
+    return os.path.join(upload_dir, 'objects', sha[:2], sha)
+
+
+def _partial_file(upload_dir, sha):
+    return os.path.join(upload_dir, 'partial', sha + '.part')
+
+
+# Function to move a received file into the store
+def _store_object(upload_dir, sha, path):
+    object_file = _object_file(upload_dir, sha)
+    os.makedirs(os.path.dirname(object_file), exist_ok=True)
+    os.replace(path, object_file)
+    # Stored contents are never written again; inputs are copies of them, see materialize
+    os.chmod(object_file, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+
+
+# Function to check whether a content is already stored
+def has_upload(sha, upload_dir=UPLOAD_DIR):
+    return os.path.exists(_object_file(upload_dir, sha))
+
+
+# Function to remember a file name of a stored content
+def _record_name(upload_dir, sha, name):
+    meta_file = _object_file(upload_dir, sha) + '.json'
+    meta = _read_json(meta_file, {'sha256': sha, 'size': os.path.getsize(_object_file(upload_dir, sha)),
+                                  'names': []})
+    if name in meta['names']:
+        meta['names'].remove(name)
+    meta['names'].append(name)
+    meta['uploaded'] = time.time()
+    _write_json(meta_file, meta)
+
+
+# Function to start or resume the upload of a file
+def begin_upload(name, size, sha, upload_dir=UPLOAD_DIR):
+    """ Start the chunked upload of a file whose hash the client computed beforehand
+        Partial uploads are keyed by the content hash, so an interrupted transfer resumes at the received offset,
+        whoever sends it. Content that is already stored is not transferred again.
+        Parameters
+        ----------
+        name: str
+            File name, kept for the import in AEDT
+        size: int
+            File size [bytes]
+        sha: str
+            SHA-256 of the file content
+        Returns
+        -------
+        int
+            Offset to send the next chunk from, None if the content is already stored
+    """
+    if has_upload(sha, upload_dir):
+        _record_name(upload_dir, sha, name)
+        return None
+    partial_file = _partial_file(upload_dir, sha)
+    os.makedirs(os.path.dirname(partial_file), exist_ok=True)
+    _write_json(partial_file + '.json', {'name': name, 'size': size, 'sha256': sha, 'started': time.time()})
+    if not os.path.exists(partial_file) or os.path.getsize(partial_file) > size:
+        open(partial_file, 'wb').close()
+    return os.path.getsize(partial_file)
+
+
+# Function to append a chunk to a partial upload
+def write_chunk(sha, offset, data, upload_dir=UPLOAD_DIR):
+    """ Returns
+        -------
+        int
+            Offset of the next chunk
+    """
+    partial_file = _partial_file(upload_dir, sha)
+    with open(partial_file, 'r+b') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() != offset:
+            raise ValueError(f'Chunk at offset {offset} does not continue the upload at {f.tell()}')
+        f.write(data)
+        return f.tell()
+
+
+# Function to complete a chunked upload
+def finish_upload(sha, upload_dir=UPLOAD_DIR):
+    """ Check the received content against its hash and move it into the store
+        Raises ValueError and discards the partial file if the content does not match.
+    """
+    partial_file = _partial_file(upload_dir, sha)
+    meta = _read_json(partial_file + '.json')
+    if file_sha256(partial_file) != sha:
+        os.remove(partial_file)
+        raise ValueError(f'''Upload of {meta['name']} is corrupted, its content does not match the hash''')
+    _store_object(upload_dir, sha, partial_file)
+    os.remove(partial_file + '.json')
+    _record_name(upload_dir, sha, meta['name'])
+    return sha
+
+
+# Function to upload a local file in chunks
+def upload_file(path, upload_dir=UPLOAD_DIR, chunk_size=UPLOAD_CHUNK_SIZE):
+    """ Upload a file into a store, e.g. one on a share of the server, resuming an interrupted transfer
+        Returns
+        -------
+        str
+            SHA-256 of the file
+    """
+    sha = file_sha256(path)
+    offset = begin_upload(os.path.basename(path), os.path.getsize(path), sha, upload_dir)
+    if offset is None:
+        return sha
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for block in iter(lambda: f.read(chunk_size), b''):
+            offset = write_chunk(sha, offset, block, upload_dir)
+    return finish_upload(sha, upload_dir)
+
+
+# Function to store a file received by the server
+def store_stream(name, stream, upload_dir=UPLOAD_DIR, chunk_size=UPLOAD_CHUNK_SIZE):
+    """ Store a file object, e.g. a Streamlit UploadedFile, chunk by chunk while hashing it
+        Content that is already stored is discarded, so uploading a file twice keeps one copy.
+        Returns
+        -------
+        str
+            SHA-256 of the content
+    """
+    tmp_file = os.path.join(upload_dir, 'partial', uuid.uuid4().hex + '.tmp')
+    os.makedirs(os.path.dirname(tmp_file), exist_ok=True)
+    sha = hashlib.sha256()
+    with open(tmp_file, 'wb') as f:
+        for block in iter(lambda: stream.read(chunk_size), b''):
+            sha.update(block)
+            f.write(block)
+    sha = sha.hexdigest()
+    if has_upload(sha, upload_dir):
+        os.remove(tmp_file)
+    else:
+        _store_object(upload_dir, sha, tmp_file)
+    _record_name(upload_dir, sha, name)
+    return sha
+
+
+# Function to list the stored uploads
+def list_uploads(extensions=None, upload_dir=UPLOAD_DIR):
+    """ Parameters
+        ----------
+        extensions: tuple, optional
+            Keep only uploads whose latest name has one of these extensions
+        Returns
+        -------
+        list
+            Metadata of the stored contents, latest upload first
+    """
+    uploads = []
+    objects_dir = os.path.join(upload_dir, 'objects')
+    if os.path.isdir(objects_dir):
+        for prefix in os.listdir(objects_dir):
+            for i in os.listdir(os.path.join(objects_dir, prefix)):
+                meta = _read_json(os.path.join(objects_dir, prefix, i)) if i.endswith('.json') else None
+                if meta and (not extensions or os.path.splitext(meta['names'][-1])[1].lower() in extensions):
+                    uploads.append(meta)
+    return sorted(uploads, key=lambda x: x['uploaded'], reverse=True)
+
+
+# Function to get input files with their names from the store
+def materialize(files, upload_dir=UPLOAD_DIR):
+    """ Folder with the stored contents under their file names, e.g. an IDF board file next to its library file
+        The folder is keyed by names and contents, so it is created once and its paths stay the same, which keeps
+        the ECAD import cache valid. Zip archives of EDB folders are extracted.
+        Parameters
+        ----------
+        files: list
+            (file name, SHA-256) pairs
+        Returns
+        -------
+        dict
+            Path of each file name; for a zip archive the extracted *.aedb folder
+    """
+    key = hashlib.sha256('|'.join(f'{name}:{sha}' for name, sha in sorted(files)).encode('utf-8')).hexdigest()
+    inputs_dir = os.path.join(upload_dir, 'inputs', key[:16])
+    if not os.path.isdir(inputs_dir):
+        tmp_dir = inputs_dir + '.' + uuid.uuid4().hex + '.tmp'
+        os.makedirs(tmp_dir)
+        for name, sha in files:
+            if name.lower().endswith('.zip'):
+                with zipfile.ZipFile(_object_file(upload_dir, sha)) as archive:
+                    archive.extractall(tmp_dir)
+            else:
+                # A copy, not a link: AEDT and EDB may write to their inputs, which must not change the store
+                shutil.copyfile(_object_file(upload_dir, sha), os.path.join(tmp_dir, name))
+        try:
+            os.rename(tmp_dir, inputs_dir)
+        except OSError:
+            # Materialized at the same time by another session
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    paths = {}
+    for name, sha in files:
+        if name.lower().endswith('.zip'):
+            folders = [i for i in os.listdir(inputs_dir) if i.lower().endswith('.aedb')]
+            paths[name] = os.path.join(inputs_dir, folders[0]) if folders else inputs_dir
+        else:
+            paths[name] = os.path.join(inputs_dir, name)
+    return paths
+
+
+# Function to check that uploaded IDF files form a board and library pair
+def idf_pair(names):
+    """ Returns
+        -------
+        tuple
+            Board file name and library file name, None if the names are not a pair
+    """
+    boards = [i for i in names if os.path.splitext(i)[1].lower() in IDF_COMPANIONS]
+    if len(boards) != 1:
+        return None
+    board_no_ext, ext = os.path.splitext(boards[0])
+    library = [i for i in names if i.lower() == (board_no_ext + IDF_COMPANIONS[ext.lower()]).lower()]
+    return (boards[0], library[0]) if library else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Upload ECAD and IDF files into a PCB Thermal Analyzer store, '
+                                                 'resuming interrupted transfers and skipping stored content')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--store', default=UPLOAD_DIR, help='Upload folder of the server, e.g. on a share')
+    args = parser.parse_args()
+    for file in args.files:
+        print(upload_file(file, args.store), os.path.basename(file), flush=True)
@@ -0,0 +1,192 @@
+import os
+import re
+import glob
+import time
+import uuid
+import hashlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from utils.results_cache import solution_stamp
+from utils.bc_diff import load_build_record
+
+# Results of all runs of a user, partitioned by table and board
+WAREHOUSE_DIR = os.path.join(os.path.expanduser('~'), '.pcb_thermal_cache', 'warehouse')
+# Result tables of the postprocessing page: (name column, value column) of each report
+TABLES = {'monitor': ('Point Name', 'Temperature [C]'),
+          'junction': ('Network Junction', 'Temperature [C]'),
+          'object_max': ('Object', 'Temperature [C]'),
+          'heat_flow': ('Object', 'Heat Flow [W]')}
+# Files of a board partition are merged once there are more than this many
+MAX_PARTITION_FILES = 64
+RUN_SCHEMA = pa.schema([('run_id', pa.string()), ('board', pa.string()), ('project', pa.string()),
+                        ('solution', pa.string()), ('run_time', pa.float64()), ('conv_type', pa.string()),
+                        ('air_temp', pa.float64()), ('vel', pa.float64()), ('power', pa.float64())])
+BOARD_PARTITION = pa.schema([('board', pa.string())])
+RESULT_SCHEMA = pa.schema([('run_id', pa.string()), ('name', pa.string()), ('value', pa.float64())])
+
+
+# Function to clean up a board name for use as a partition folder
+def _partition_name(board):
+    return re.sub(r'[^\w.-]', '_', board) or 'unknown'
+
+
+# Function to describe the run of a solved project
+def run_info(project_path, sol_name):
+    """ Run ID, board and operating conditions of a solved project
+        The run ID changes whenever the solution changes, so storing the same reports twice is harmless.
+        The run time is the time of the last change of the solution. Board and conditions come from the build
+        record written by the Simulate page, if any.
+        Returns
+        -------
+        dict
+    """
+    stamp = solution_stamp(project_path)
+    run_id = hashlib.sha1((os.path.abspath(project_path) + '|' + sol_name + '|' + stamp).encode('utf-8')).hexdigest()
+    bc_df, build_inputs = load_build_record(project_path)
+    build_inputs = build_inputs or {}
+    ecad_file = build_inputs.get('ecad_file') or project_path
+    power = 0.0
+    if bc_df is not None:
+        included = bc_df['Include'] == 'YES'
+        power = float(pd.to_numeric(bc_df.loc[included, 'Power [W]'], errors='coerce').fillna(0).sum())
+
+    def number(key):
+        try:
+            return float(build_inputs.get(key) or 'nan')
+        except ValueError:
+            return float('nan')
+    return {'run_id': run_id[:16], 'board': os.path.splitext(os.path.basename(os.path.normpath(ecad_file)))[0],
+            'project': os.path.abspath(project_path), 'solution': sol_name,
+            'run_time': int(stamp.split('_')[0]) / 1e9 if stamp else time.time(),
+            'conv_type': str(build_inputs.get('conv_type', '')), 'air_temp': number('air_temp'),
+            'vel': number('vel'), 'power': power}
+
+
+# Function to write one file into a partition of a dataset
+def _write_part(table_dir, board, run_id, table):
+    part_dir = os.path.join(table_dir, 'board=' + _partition_name(board))
+    os.makedirs(part_dir, exist_ok=True)
+    # Each run has one file per table, so storing a run again replaces its rows
+    part_file = os.path.join(part_dir, 'run-' + run_id + '.parquet')
+    tmp_file = part_file + '.' + uuid.uuid4().hex + '.tmp'
+    pq.write_table(table, tmp_file)
+    os.replace(tmp_file, part_file)
+    if len(glob.glob(os.path.join(part_dir, '*.parquet'))) > MAX_PARTITION_FILES:
+        compact_partition(part_dir)
+
+
+# Function to merge the files of a partition into one
+def compact_partition(part_dir):
+    files = sorted(glob.glob(os.path.join(part_dir, '*.parquet')))
+    if len(files) < 2:
+        return
+    table = pa.concat_tables([pq.read_table(i) for i in files])
+    # Keep the latest rows of runs that were stored again
+    df = table.to_pandas()
+    key = ['run_id', 'name'] if 'name' in df.columns else ['run_id']
+    df = df.drop_duplicates(subset=key, keep='last')
+    merged = os.path.join(part_dir, 'compacted-' + uuid.uuid4().hex + '.parquet')
+    pq.write_table(pa.Table.from_pandas(df, schema=table.schema, preserve_index=False), merged)
+    for i in files:
+        os.remove(i)
+
+
+# Function to add the result table of a run to the warehouse
+def store_results(table_name, report_df, info, warehouse_dir=WAREHOUSE_DIR):
+    """ Append a postprocessing table to its Parquet dataset
+        Parameters
+        ----------
+        table_name: str
+            One of TABLES
+        report_df: pandas.DataFrame
+            Table returned by the postprocessing page
+        info: dict
+            Run description from run_info
+        warehouse_dir: str, optional
+            Root folder of the datasets
+    """
+    name_col, value_col = TABLES[table_name]
+    results = pd.DataFrame({'run_id': info['run_id'], 'name': report_df[name_col].astype(str),
+                            'value': pd.to_numeric(report_df[value_col], errors='coerce')})
+    _write_part(os.path.join(warehouse_dir, table_name), info['board'], info['run_id'],
+                pa.Table.from_pandas(results, schema=RESULT_SCHEMA, preserve_index=False))
+    _write_part(os.path.join(warehouse_dir, 'runs'), info['board'], info['run_id'],
+                pa.Table.from_pylist([info], schema=RUN_SCHEMA))
+
+
+# Function to open a dataset of the warehouse
+def _dataset(warehouse_dir, table_name):
+    path = os.path.join(warehouse_dir, table_name)
+    if not os.path.isdir(path):
+        return None
+    # Board is always read as a string, as inferring its type fails for boards with numeric names
+    return ds.dataset(path, format='parquet', partitioning=ds.partitioning(BOARD_PARTITION, flavor='hive'),
+                      exclude_invalid_files=True)
+
+
+# Function to list the runs of the warehouse
+def list_runs(board=None, last=None, warehouse_dir=WAREHOUSE_DIR):
+    """ Returns
+        -------
+        pandas.DataFrame
+            Runs, newest first
+    """
+    dataset = _dataset(warehouse_dir, 'runs')
+    if dataset is None:
+        return pd.DataFrame(columns=RUN_SCHEMA.names)
+    flt = ds.field('board') == _partition_name(board) if board else None
+    runs = dataset.to_table(filter=flt).to_pandas()
+    runs = runs.sort_values('run_time', ascending=False).drop_duplicates('run_id')
+    return runs.head(last) if last else runs
+
+
+# Function to query results across runs
+def query_results(table_name, names=None, board=None, last=None, warehouse_dir=WAREHOUSE_DIR):
+    """ Results of a table across runs, joined with the run conditions
+        Parameters
+        ----------
+        table_name: str
+            One of TABLES
+        names: list, optional
+            Monitor points, junctions or objects to keep, all by default
+        board: str, optional
+            Board to keep, all by default
+        last: int, optional
+            Only the latest runs are kept
+        Returns
+        -------
+        pandas.DataFrame
+            One row per run and name, newest run first
+    """
+    dataset = _dataset(warehouse_dir, table_name)
+    runs = list_runs(board, last, warehouse_dir)
+    if dataset is None or runs.empty:
+        return pd.DataFrame(columns=['run_id', 'name', 'value'] + RUN_SCHEMA.names[1:])
+    flt = ds.field('run_id').isin(list(runs['run_id']))
+    if names:
+        flt = flt & ds.field('name').isin(list(names))
+    if board:
+        flt = flt & (ds.field('board') == _partition_name(board))
+    results = dataset.to_table(columns=['run_id', 'name', 'value'], filter=flt).to_pandas()
+    results = results.drop_duplicates(subset=['run_id', 'name'], keep='last')
+    results = results.merge(runs, on='run_id', how='left')
+    return results.sort_values(['run_time', 'name'], ascending=[False, True]).reset_index(drop=True)
+
+
+# Function to get the highest value of a name across runs
+def max_over_runs(table_name, name, board=None, last=None, warehouse_dir=WAREHOUSE_DIR):
+    """ e.g. max_over_runs('junction', 'U12', last=50) is the maximum junction temperature of U12 in the last
+        50 runs
+        Returns
+        -------
+        pandas.Series
+            Row of the run with the highest value, None if the name was never stored
+    """
+    results = query_results(table_name, [name], board, last, warehouse_dir)
+    if results.empty or results['value'].isna().all():
+        return None
+    return results.loc[results['value'].idxmax()]
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import hashlib
+import pandas as pd
+
+from utils.bc_diff import GEOMETRY_COLUMNS
+from utils.ecad_cache import ecad_content_hash, HASH_BLOCK_SIZE
+from utils.distributed import IDF_COMPANIONS
+
+# Solved projects of a working directory that can initialize new solves
+SOLUTIONS_FILE = os.path.join('.pcb_thermal_cache', 'solutions.json')
+
+
+# Function to hash the content of a file
+def _file_hash(path, sha):
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha.update(block)
+
+
+# Function to hash everything that defines the mesh of a project
+def geometry_hash(job, bc_df):
+    """ Hash of the ECAD and IDF content, the component geometry of the BC table, the filtering, mesh, lumping
+        and board settings and the flow direction, which sets the size of the air region
+        Parameters
+        ----------
+        job: dict
+            Simulation inputs
+        bc_df: pandas.DataFrame
+            Boundary conditions table
+        Returns
+        -------
+        str
+    """
+    sha = hashlib.sha256()
+    sha.update(ecad_content_hash(job['ecad_file']).encode('utf-8'))
+    _file_hash(job['idf_file'], sha)
+    idf_no_ext, ext = os.path.splitext(job['idf_file'])
+    if os.path.exists(idf_no_ext + IDF_COMPANIONS.get(ext.lower(), '')):
+        _file_hash(idf_no_ext + IDF_COMPANIONS[ext.lower()], sha)
+    geometry_df = bc_df[['Include'] + GEOMETRY_COLUMNS] if job['delete_filtered'] else bc_df[GEOMETRY_COLUMNS]
+    sha.update(geometry_df.to_csv(index=False).encode('utf-8'))
+    direction = job['vel_dir'] if job['conv_type'] == 'Forced' else job['gravity_direction']
+    sha.update(json.dumps([job['mesh_fidelity'], job['conv_type'], direction]).encode('utf-8'))
+    # Lumped components and a tiled board change the geometry; jobs from before these options have neither
+    if job.get('lumping') or job.get('board'):
+        sha.update(json.dumps([job.get('lumping') or None, job.get('board') or None]).encode('utf-8'))
+    return sha.hexdigest()
+
+
+# Function to get the operating conditions of a job
+def solve_conditions(job, bc_df):
+    """ Ambient temperature, velocity and total power of the included components """
+    power = pd.to_numeric(bc_df.loc[bc_df['Include'] == 'YES', 'Power [W]'], errors='coerce').fillna(0).sum()
+    return {'air_temp': float(job['air_temp'] or 0),
+            'vel': float(job['vel'] or 0) if job['conv_type'] == 'Forced' else 0.0,
+            'power': float(power)}
+
+
+# Function to measure how different two sets of operating conditions are
+def conditions_distance(a, b):
+    return sum(abs(a[key] - b[key]) / max(abs(a[key]), abs(b[key]), 1.0) for key in a)
+
+
+def _read_solutions(workdir):
+    try:
+        with open(os.path.join(workdir, SOLUTIONS_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+# Function to remember a solved project
+def register_solution(workdir, project_path, design_name, setup_name, geometry, conditions):
+    solutions = [i for i in _read_solutions(workdir) if os.path.normcase(i['project']) !=
+                 os.path.normcase(project_path)]
+    solutions.append({'project': project_path, 'design': design_name, 'setup': setup_name, 'geometry': geometry,
+                      'conditions': conditions, 'solved': time.time()})
+    os.makedirs(os.path.join(workdir, os.path.dirname(SOLUTIONS_FILE)), exist_ok=True)
+    with open(os.path.join(workdir, SOLUTIONS_FILE), 'w') as f:
+        json.dump(solutions, f, indent=2)
+
+
+# Function to find the solved project closest to a new solve
+def find_warm_start(workdir, geometry, conditions, exclude_project=None):
+    """ Solved project with the same geometry hash and the nearest operating conditions
+        Returns
+        -------
+        dict
+            Project, design, setup and conditions of the solution, None if no project qualifies
+    """
+    best, best_distance = None, None
+    for entry in _read_solutions(workdir):
+        if entry['geometry'] != geometry:
+            continue
+        if exclude_project and os.path.normcase(entry['project']) == os.path.normcase(exclude_project):
+            continue
+        project_no_ext = os.path.splitext(entry['project'])[0]
+        if not (os.path.exists(entry['project']) and os.path.isdir(project_no_ext + '.aedtresults')):
+            continue
+        distance = conditions_distance(conditions, entry['conditions'])
+        if best is None or distance < best_distance:
+            best, best_distance = entry, distance
+    return best
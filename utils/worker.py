@@ -0,0 +1,32 @@
+import os
+import sys
+import json
+import traceback
+
+from utils.jobs import ProgressReporter
+from utils.scheduler import dispatch
+
+
+# Function to run a stored simulation job, called in a detached worker process
+def main(job_dir):
+    reporter = ProgressReporter(job_dir)
+    with open(os.path.join(job_dir, 'job.json'), 'r') as f:
+        job = json.load(f)
+    reporter.update_status(state='running', worker_pid=os.getpid())
+    try:
+        # pyaedt is imported here so a broken installation is reported as a failed job
+        from utils.simulation import run_simulation
+        run_simulation(job, reporter)
+    except Exception as e:
+        reporter.update_status(state='failed', error=str(e), traceback=traceback.format_exc())
+        exit_code = 1
+    else:
+        reporter.update_status(state='done')
+        exit_code = 0
+    # Hand the freed license and cores to the next queued job
+    dispatch()
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1]))